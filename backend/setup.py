@@ -35,6 +35,14 @@ setup(
             'alembic',
             'setuptools_scm',
         ],
+        # Parquet archive tier (archive.py); duckdb is optional for faster reads
+        'archive': [
+            'pyarrow',
+        ],
+        'archive-duckdb': [
+            'pyarrow',
+            'duckdb',
+        ],
     },
     entry_points={
         'console_scripts': [
@@ -10,12 +10,14 @@ import time
 import logging
 import argparse
 import signal
+import zlib
 from datetime import datetime, timedelta, timezone
 from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv
 
 # Project imports (config first to apply log level early)
 from .config import get_settings, reload_settings
+from . import jsoncodec
 cfg = get_settings()
 
 # -------------------------
@@ -50,7 +52,7 @@ logging.getLogger().setLevel(log_level)
 async def cancel_all(tasks: list[asyncio.Task]):
     """
     Cancel tasks and await them safely.
-    Use: await cancel_all(bg_tasks + ([pipeline_task] if pipeline_task else []))
+    Use: await cancel_all(bg_tasks + pipeline_tasks)
     """
     if not tasks:
         return
@@ -70,12 +72,15 @@ async def cancel_all(tasks: list[asyncio.Task]):
 # -------------------------
 # Safe loop cancellation template
 # -------------------------
-async def safe_loop_template(name: str, loop_coro: callable, interval: float = 5.0, flush_coro: callable | None = None):
+async def safe_loop_template(name: str, loop_coro: callable, interval: float = 5.0, flush_coro: callable | None = None,
+                             wake_on: tuple = ()):
     """
     Generic wrapper to run `loop_coro()` repeatedly with graceful cancellation and optional flush on exit.
     `loop_coro` must be an async callable implementing a single iteration of work.
+    With `wake_on` tables the loop runs on their committed changes (changefeed), `interval` as fallback.
     """
-    logger.info(f"[{name}] started (interval={interval}s)")
+    sub = changefeed.subscribe(wake_on, name) if wake_on else None
+    logger.info(f"[{name}] started (interval={interval}s{', wake_on=' + ','.join(wake_on) if wake_on else ''})")
     try:
         while True:
             try:
@@ -85,7 +90,7 @@ async def safe_loop_template(name: str, loop_coro: callable, interval: float = 5
                 raise
             except Exception as e:
                 logger.warning(f"[{name}] iteration error: {type(e).__name__}: {e}")
-            await asyncio.sleep(interval)
+            await changefeed.wait(sub, interval)
     except asyncio.CancelledError:
         logger.info(f"[{name}] cancelled — running flush/cleanup (if provided)")
         if flush_coro:
@@ -103,6 +108,9 @@ async def safe_loop_template(name: str, loop_coro: callable, interval: float = 5
             except Exception:
                 pass
         return
+    finally:
+        if sub is not None:
+            changefeed.unsubscribe(sub)
 
 # -------------------------
 # Safe async runner wrapper
@@ -130,6 +138,7 @@ import socketio
 
 sio = socketio.AsyncServer(
     async_mode="asgi",
+    json=jsoncodec,  # datetimes / numpy / NaN in emitted payloads
     cors_allowed_origins="*",
     ping_timeout=30,
     ping_interval=10,
@@ -172,8 +181,7 @@ from .db import (
     get_latest_metrics_async,
     get_metrics_by_symbol_async,
     close_db_async,
-    get_latest_rest_metric,
-    prune_old_data_loop,
+    retention_loop,
 )
 # import quant loops/defs
 from .quant_engine import (
@@ -186,8 +194,17 @@ from .quant_engine import (
     context_scoring_loop,
     context_trends_loop as quant_context_trends_loop,
     regime_loop,
+    on_universe_change as quant_engine_on_universe_change,
 )
 from . import ws_manager
+from . import universe
+from . import snapshots
+from . import spill
+from . import rollups
+from . import changefeed
+from .bucketer import BAR_FIELDS, from_settings as make_bucketer
+from .ingest_queue import LaneQueue, lane_for, merge_status as lane_status
+from .ticks import KIND_CODES as TICK_KIND_CODES, KIND_NAMES as TICK_KIND_NAMES, from_settings as make_tick_writer
 import importlib
 
 # Rest collector dynamic import (keeps original behavior)
@@ -200,7 +217,7 @@ except Exception:
     except Exception:
         _rest_collector = None
 
-ALLOWED_TFS = ["1m", "5m", "15m", "30m", "1h"]
+ALLOWED_TFS = ["1s", "5s", "1m", "5m", "15m", "30m", "1h"]
 
 def to_ms(dt):
     if not dt:
@@ -228,17 +245,63 @@ def serialize_metric_row(m):
 # -------------------------
 # Queue + task tracking
 # -------------------------
-queue: asyncio.Queue = asyncio.Queue(maxsize=int(os.getenv("DB_QUEUE_MAX", "20000")))
+# N writer workers, each owning one symbol-hash partition of the ingest queue.
+# A symbol always maps to the same partition, so per-symbol ordering is preserved
+# while partitions write concurrently on separate pool connections.
+DB_WRITER_WORKERS = max(1, int(os.getenv("DB_WRITER_WORKERS", "4")))
+DB_QUEUE_MAX = int(os.getenv("DB_QUEUE_MAX", "20000"))
+# Each partition is a LaneQueue: rest/ticker > markPrice > trades > depth, shedding lowest lanes first.
+queues: list[LaneQueue] = [
+    LaneQueue(maxsize=max(1, DB_QUEUE_MAX // DB_WRITER_WORKERS)) for _ in range(DB_WRITER_WORKERS)
+]
 bg_tasks: list[asyncio.Task] = []
-pipeline_task: asyncio.Task | None = None
+pipeline_tasks: list[asyncio.Task] = []
+# one TickBucketer / TickWriter per running db_writer (status only)
+bucketers: list = []
+tick_writers: list = []
+
+
+def partition_for(symbol: str, n: int = DB_WRITER_WORKERS) -> int:
+    """Stable symbol → writer partition (crc32, not the per-process salted hash())."""
+    return zlib.crc32((symbol or "").upper().encode("utf-8")) % max(1, n)
+
+
+def queue_for(symbol: str) -> LaneQueue:
+    return queues[partition_for(symbol, len(queues))]
+
+
+def queue_size() -> int:
+    return sum(q.qsize() for q in queues)
 
 # -------------------------
 # db_writer implementation (safe + offload heavy transforms)
 # -------------------------
+def _overlay_rest(row: dict, rest: dict | None) -> dict:
+    """Merge the latest REST snapshot fields onto a WS-derived metrics row."""
+    if not rest:
+        return row
+    row["funding"] = rest.get("funding_rate") if rest.get("funding_rate") is not None else row.get("funding")
+    row["oi_usd"] = rest.get("open_interest_hist_usd") if rest.get("open_interest_hist_usd") is not None else row.get("oi_usd")
+    row["global_ls_5m"] = rest.get("global_long_short_ratio") or row.get("global_ls_5m")
+    row["top_ls_accounts"] = rest.get("top_trader_account_ratio") or row.get("top_ls_accounts")
+    row["top_ls_positions"] = rest.get("top_trader_long_short_ratio") or row.get("top_ls_positions")
+    if row.get("price") is None:
+        row["price"] = rest.get("mark_price") or rest.get("close") or row.get("price")
+    row["volume_24h"] = rest.get("volume") or row.get("volume_24h")
+    row["vol_usd"] = rest.get("volume") or row.get("vol_usd")
+    rawobj = row.get("raw_json") or {}
+    rawobj["rest"] = rest.get("metadata") if rest.get("metadata") else rest
+    row["raw_json"] = rawobj
+    return row
+
+
 async def db_writer_worker(buffer: list, timeframe: str = "1m"):
     """
     Transform buffer (list of dict WS/rest payloads) into rows and call save_metrics_v3_async.
-    Offloads heavy CPU work to thread via asyncio.to_thread.
+    REST fields come from the in-process snapshot store (no per-row DB lookup), so the
+    whole transform + merge runs in a worker thread via asyncio.to_thread.
+    Rows go to the disk spill instead when the DB fails, stalls, the batch lags, or
+    the spill still holds a backlog (see spill.py).
     """
     def transform_sync(buffer_snapshot):
         transformed = []
@@ -271,89 +334,164 @@ async def db_writer_worker(buffer: list, timeframe: str = "1m"):
                         row["oi_abs_usd"] = float(oi) if oi is not None else None
                     except Exception:
                         row["oi_abs_usd"] = None
-                    transformed.append((row, item))  # attach original for potential REST overlay
+                    # closed bucket bars carry OHLC / counts / bucket-start timestamp
+                    for k in BAR_FIELDS:
+                        if k in item:
+                            row[k] = item[k]
+                    try:
+                        row = _overlay_rest(row, snapshots.get_rest(sym) if sym else None)
+                    except Exception as e:
+                        logger.debug(f"[db_writer_worker] merge/rest error for {sym}: {e}")
+                    transformed.append(row)
             except Exception:
                 # skip malformed
                 continue
-        # We return transformed list of (row, original) so further async operations can merge rest data
         return transformed
 
     try:
         # snapshot buffer for thread transform
         buffer_snapshot = list(buffer)
-        transformed_pairs = await asyncio.to_thread(transform_sync, buffer_snapshot)
-        # Now merge REST samples asynchronously where available
-        transformed_rows = []
-        for row, orig in transformed_pairs:
-            try:
-                sym = row.get("symbol")
-                if sym:
-                    rest = await get_latest_rest_metric(sym)
-                else:
-                    rest = None
-                if rest:
-                    row["funding"] = rest.get("funding_rate") if rest.get("funding_rate") is not None else row.get("funding")
-                    row["oi_usd"] = rest.get("open_interest_hist_usd") if rest.get("open_interest_hist_usd") is not None else row.get("oi_usd")
-                    row["global_ls_5m"] = rest.get("global_long_short_ratio") or row.get("global_ls_5m")
-                    row["top_ls_accounts"] = rest.get("top_trader_account_ratio") or row.get("top_ls_accounts")
-                    row["top_ls_positions"] = rest.get("top_trader_long_short_ratio") or row.get("top_ls_positions")
-                    if row.get("price") is None:
-                        row["price"] = rest.get("mark_price") or rest.get("close") or row.get("price")
-                    row["volume_24h"] = rest.get("volume") or row.get("volume_24h")
-                    row["vol_usd"] = rest.get("volume") or row.get("vol_usd")
-                    rawobj = row.get("raw_json") or {}
-                    rawobj["rest"] = rest.get("metadata") if rest.get("metadata") else rest
-                    row["raw_json"] = rawobj
-                transformed_rows.append(row)
-            except Exception as e:
-                logger.debug(f"[db_writer_worker] merge/rest error for {row.get('symbol')}: {e}")
-                transformed_rows.append(row)
-        if transformed_rows:
+        transformed_rows = await asyncio.to_thread(transform_sync, buffer_snapshot)
+        if not transformed_rows:
+            return 0
+    except Exception as e:
+        logger.warning(f"[db_writer_worker] failed: {e}")
+        return 0
+
+    if not spill.enabled():
+        try:
             saved = await save_metrics_v3_async(transformed_rows, timeframe=timeframe)
             logger.debug(f"[db_writer_worker] saved {len(transformed_rows)} rows (save_metrics returned: {saved})")
             return saved
-        return 0
+        except Exception as e:
+            logger.warning(f"[db_writer_worker] failed: {e}")
+            return 0
+
+    # divert to the disk spill while it holds a backlog (keeps per-symbol order) or when lagging
+    if spill.diverting():
+        return _spill_rows(transformed_rows, "backlog")
+    lag = _batch_lag(buffer_snapshot)
+    if lag > float(getattr(cfg, "SPILL_LAG_THRESHOLD", 5.0)):
+        return _spill_rows(transformed_rows, f"lag {lag:.1f}s")
+    try:
+        saved = await asyncio.wait_for(
+            save_metrics_v3_async(transformed_rows, timeframe=timeframe),
+            timeout=float(getattr(cfg, "SPILL_INSERT_TIMEOUT", 10.0)),
+        )
+        logger.debug(f"[db_writer_worker] saved {len(transformed_rows)} rows (save_metrics returned: {saved})")
+        return saved
+    except asyncio.TimeoutError:
+        return _spill_rows(transformed_rows, "insert timeout")
     except Exception as e:
-        logger.warning(f"[db_writer_worker] failed: {e}")
-        return 0
+        return _spill_rows(transformed_rows, f"insert failed: {e}")
+
 
-async def db_writer(q: asyncio.Queue, batch_size: int = 200, flush_interval: float = 1.0):
+def _batch_lag(items: list, now: float | None = None) -> float:
+    """Seconds the oldest payload has waited since it became writable (bars: since they closed)."""
+    ready = [item.get("close_ts") or item.get("recv_ts") for item in items if isinstance(item, dict)]
+    ready = [t for t in ready if t]
+    return ((time.time() if now is None else now) - min(ready)) if ready else 0.0
+
+
+def _spill_rows(rows: list, reason: str) -> int:
+    """Append transformed rows to the disk spill, stamped with their write time."""
+    now = datetime.utcnow()
+    for r in rows:
+        r.setdefault("updated_at", now)
+    try:
+        n = spill.append(rows, reason=reason)
+        if reason != "backlog":
+            logger.warning(f"[db_writer_worker] spilled {n} rows to disk ({reason})")
+    except Exception as e:
+        logger.error(f"[db_writer_worker] spill append failed, {len(rows)} rows lost: {e}")
+    return 0
+
+async def db_writer(q: LaneQueue, batch_size: int = 200, flush_interval: float = 1.0, name: str = "db_writer"):
+    """
+    Drain one queue partition. Raw ticks are COPYed into the narrow `ticks` table;
+    with METRICS_BUCKET set they are also folded into per-symbol bars and only closed
+    bars are written to `metrics` (timeframe = bucket label).
+    """
     buffer: list = []
     last_flush = time.time()
-    logger.info("[db_writer] started")
+    bucketer = make_bucketer()
+    if bucketer is not None:
+        bucketers.append(bucketer)
+    tick_writer = make_tick_writer()
+    if tick_writer is not None:
+        tick_writers.append(tick_writer)
+    last_tick_flush = time.time()
+    # tick COPYs run inline; bound them like the metrics insert so a stuck DB can't stall the drain
+    insert_timeout = float(getattr(cfg, "SPILL_INSERT_TIMEOUT", 10.0))
+    timeframe = bucketer.label if bucketer is not None else "1m"
+    # bars become due at most once per bucket; poll the clock a few times per bucket
+    wait_timeout = min(flush_interval, bucketer.resolution / 4) if bucketer is not None else None
+    logger.info(f"[{name}] started (bucket={timeframe if bucketer is not None else 'off'})")
     closed = False
 
     async def loop_iteration():
-        nonlocal last_flush, buffer
-        payload = await q.get()
-        buffer.append(payload)
+        nonlocal last_flush, last_tick_flush, buffer
+        if wait_timeout is None:
+            payload = await q.get()
+        else:
+            try:
+                payload = await asyncio.wait_for(q.get(), timeout=wait_timeout)
+            except asyncio.TimeoutError:
+                payload = None
+        # take whatever else is already queued too (the loop wrapper sleeps between iterations)
+        batch = [payload] if payload is not None else []
+        while payload is not None and len(batch) < batch_size:
+            try:
+                batch.append(q.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        for item in batch:
+            if tick_writer is not None:
+                tick_writer.add(item)
+            if bucketer is not None:
+                buffer.extend(bucketer.add(item))
+            else:
+                buffer.append(item)
         now_ts = time.time()
-        if len(buffer) >= batch_size or (now_ts - last_flush) > flush_interval:
+        if bucketer is not None:
+            buffer.extend(bucketer.close_due(now_ts))
+        if buffer and (len(buffer) >= batch_size or (now_ts - last_flush) > flush_interval):
             to_flush = list(buffer)
             buffer.clear()
             last_flush = now_ts
             try:
-                await db_writer_worker(to_flush, timeframe="1m")
-                logger.debug(f"[db_writer] flushed {len(to_flush)} rows")
+                await db_writer_worker(to_flush, timeframe=timeframe)
+                logger.debug(f"[{name}] flushed {len(to_flush)} rows")
             except Exception as e:
-                logger.warning(f"[db_writer] batch save failed: {e}")
-        # mark q.task_done after processing this payload
-        try:
-            q.task_done()
-        except Exception:
-            pass
+                logger.warning(f"[{name}] batch save failed: {e}")
+        # raw ticks go to the narrow `ticks` table via COPY on their own cadence
+        if tick_writer is not None and tick_writer.pending() and (
+            tick_writer.due() or (now_ts - last_tick_flush) > flush_interval
+        ):
+            last_tick_flush = now_ts
+            await tick_writer.flush(timeout=insert_timeout)
+        # mark q.task_done after processing these payloads
+        for _ in batch:
+            try:
+                q.task_done()
+            except Exception:
+                pass
 
     async def flush_remaining():
         nonlocal buffer
+        if tick_writer is not None:
+            await tick_writer.flush(timeout=insert_timeout)
+        if bucketer is not None:
+            buffer.extend(bucketer.drain())
         if buffer:
             try:
-                await db_writer_worker(buffer, timeframe="1m")
+                await db_writer_worker(buffer, timeframe=timeframe)
             except Exception as e:
-                logger.warning(f"[db_writer] final flush failed: {e}")
+                logger.warning(f"[{name}] final flush failed: {e}")
             buffer.clear()
 
     # Run the safe loop wrapper
-    await safe_loop_template("db_writer", loop_coro=loop_iteration, interval=0.01, flush_coro=flush_remaining)
+    await safe_loop_template(name, loop_coro=loop_iteration, interval=0.01, flush_coro=flush_remaining)
 
 
 # -------------------------
@@ -370,12 +508,14 @@ async def on_message_callback(payload: dict):
             "symbol": sym,
             "Price": payload.get("last") or payload.get("c") or payload.get("p") or payload.get("Price"),
             "openInterest": payload.get("openInterest") or payload.get("oi"),
-            "raw": payload  # keep original WS payload for debug/trace
+            "raw": payload,  # keep original WS payload for debug/trace
+            "recv_ts": time.time(),  # writer lag → disk spill diversion
+            "kind": payload.get("kind"),  # ingest lane (ws_manager stream kind)
         }
         try:
-            queue.put_nowait(record)
+            queue_for(sym).put_nowait(record)
         except asyncio.QueueFull:
-            logger.warning("[on_message] queue full — dropping payload")
+            logger.debug(f"[on_message] queue full — rejected {lane_for(record)} payload for {sym}")
     except Exception as e:
         logger.exception(f"[on_message_callback] error: {e}")
 
@@ -393,7 +533,7 @@ async def _start_rest_collector(symbols: list[str], poll_interval: int):
         return None
     try:
         logger.info(f"[rest_collector] starting via {_rest_collector.__name__}.run (interval={poll_interval}s)")
-        task = asyncio.create_task(fn(symbols=symbols, out_queue=queue, interval=poll_interval))
+        task = asyncio.create_task(fn(symbols=symbols, interval=poll_interval))
         logger.info("[rest_collector] ✓ run() task created and stored (will stay alive)")
         return task
     except Exception as e:
@@ -418,13 +558,7 @@ async def quant_update_iteration():
         try:
             computed = await compute_quant_metrics(limit=200)
             if computed:
-                def _safe_json(data):
-                    def default(o):
-                        if isinstance(o, datetime):
-                            return o.isoformat()
-                        return str(o)
-                    return json.loads(json.dumps(data, default=default))
-                await sio.emit("quant_update", {"data": _safe_json(computed), "ts": datetime.utcnow().isoformat()})
+                await sio.emit("quant_update", {"data": computed, "ts": datetime.utcnow().isoformat()})
                 logger.info(f"[QuantLoop] emitted quant_update ({len(computed)} rows)")
         except Exception as e:
             logger.debug(f"[QuantLoop] compute/emit failed: {e}")
@@ -437,12 +571,12 @@ async def quant_update_iteration():
 # -------------------------
 async def regime_transition_iteration():
     try:
-        async with db._pool.acquire() as conn:
+        async with db.DBReadConnection() as conn:
             rows = await conn.fetch("""
-                SELECT DISTINCT ON (symbol)
+                SELECT
                     symbol, regime, confidence, ts
-                FROM quant_regimes
-                ORDER BY symbol, ts DESC
+                FROM quant_regimes_latest
+                ORDER BY symbol
             """)
         for r in rows:
             sym, regime = r["symbol"], r["regime"]
@@ -473,11 +607,11 @@ async def regime_transition_iteration():
 # -------------------------
 async def context_trends_iteration():
     try:
-        async with db._pool.acquire() as conn:
+        async with db.DBReadConnection() as conn:
             rows = await conn.fetch("""
-                SELECT DISTINCT ON (symbol) symbol, bias, context_score, ts
-                FROM quant_context_scores
-                ORDER BY symbol, ts DESC
+                SELECT symbol, bias, context_score, ts
+                FROM quant_context_scores_latest
+                ORDER BY symbol
             """)
         transitions = []
         now = datetime.now(timezone.utc)
@@ -533,7 +667,7 @@ ws_started: bool = False
 
 @app.before_serving
 async def startup():
-    global pipeline_task, bg_tasks, ws_started
+    global pipeline_tasks, bg_tasks, ws_started
     logger.info("[Lifecycle] before_serving startup – creating tasks")
     try:
         await init_db_async()
@@ -541,10 +675,31 @@ async def startup():
         logger.exception(f"[Lifecycle] init_db_async failed: {e}")
         raise
 
-    # start db_writer pipeline task if missing
-    if pipeline_task is None or (pipeline_task and pipeline_task.done()):
-        pipeline_task = asyncio.create_task(db_writer(queue))
-        logger.info("[Pipeline] DB writer started")
+    # warm the REST snapshot store in one query so early WS rows get REST fields
+    await snapshots.warm_from_db()
+
+    # disk spill: open before the writers so a backlog from a previous run diverts them
+    if spill.enabled():
+        try:
+            spill.open_log()
+            bg_tasks.append(asyncio.create_task(spill.spill_loop(1.0)))
+        except Exception as e:
+            logger.exception(f"[Spill] failed to start: {e}")
+
+    # start one db_writer per queue partition (restart any that died)
+    if not pipeline_tasks or any(t.done() for t in pipeline_tasks):
+        await cancel_all(pipeline_tasks)
+        bucketers.clear()
+        tick_writers.clear()
+        pipeline_tasks = [
+            asyncio.create_task(db_writer(q, name=f"db_writer[{i}]")) for i, q in enumerate(queues)
+        ]
+        if db.POOL_MAX_SIZE <= DB_WRITER_WORKERS:
+            logger.warning(
+                f"[Pipeline] DB_POOL_MAX={db.POOL_MAX_SIZE} leaves no headroom for "
+                f"{DB_WRITER_WORKERS} writers plus background loops"
+            )
+        logger.info(f"[Pipeline] {DB_WRITER_WORKERS} DB writers started (symbol-hash partitions)")
 
     # symbols (supports both list[str] and comma-separated string)
     symbols_env = getattr(cfg, "SYMBOLS", None)
@@ -554,11 +709,24 @@ async def startup():
         raw_symbols = symbols_env or os.getenv("SYMBOLS", "BTCUSDT,ETHUSDT,SOLUSDT")
         symbols = [s.strip().upper() for s in raw_symbols.split(",") if s.strip()]
 
+    # symbol universe: static SYMBOLS seed (tier 1); discovery refresh replaces it when enabled
+    universe.seed_if_empty(symbols)
+    if getattr(cfg, "UNIVERSE_ENABLED", False):
+        try:
+            await universe.refresh_once()
+        except Exception as e:
+            logger.warning(f"[Universe] initial discovery failed, keeping static SYMBOLS: {e}")
+    symbols = universe.symbols()
+    universe.subscribe(ws_manager.on_universe_change)
+    if _rest_collector and hasattr(_rest_collector, "on_universe_change"):
+        universe.subscribe(_rest_collector.on_universe_change)
+    universe.subscribe(quant_engine_on_universe_change)
 
     # ws manager
     try:
         ws_poll_symbols = [s.lower() for s in symbols]
-        safe_loop_runner(ws_manager.start_all(ws_poll_symbols, on_message_callback))
+        safe_loop_runner(ws_manager.start_all(ws_poll_symbols, on_message_callback,
+                                              streams_by_symbol=universe.streams_by_symbol()))
         ws_started = True
         logger.info("[Exchange] WS manager started safely (%d symbols)", len(ws_poll_symbols))
     except Exception as e:
@@ -573,6 +741,16 @@ async def startup():
     if rest_task:
         bg_tasks.append(rest_task)
 
+    # universe refresher (no-op unless UNIVERSE_ENABLED)
+    if getattr(cfg, "UNIVERSE_ENABLED", False):
+        try:
+            universe_interval = int(getattr(cfg, "UNIVERSE_REFRESH_INTERVAL", 900))
+            universe_task = asyncio.create_task(universe.universe_loop(universe_interval))
+            bg_tasks.append(universe_task)
+            logger.info("[Universe] refresher started (interval=%ss)", universe_interval)
+        except Exception as e:
+            logger.exception(f"[Universe] failed to start refresher: {e}")
+
     # start HF quant loop (5s cadence) using quant_engine.run_quant_loop
     try:
         hf_interval = float(os.getenv("QUANT_5S_INTERVAL", "5.0"))
@@ -583,15 +761,30 @@ async def startup():
     except Exception as e:
         logger.exception(f"[QuantLoop] failed to start 5s loop: {e}")
 
-    # start pruning background loop (separate safe task)
+    # partition maintenance + per-table retention (drop partitions / chunks, batched DELETE on plain heaps)
     try:
-        prune_interval_hours = int(os.getenv("PRUNE_INTERVAL_HOURS", "6"))
-        prune_days = int(os.getenv("PRUNE_DAYS", "60"))
-        prune_task = asyncio.create_task(prune_old_data_loop(interval_hours=prune_interval_hours, days=prune_days))
-        bg_tasks.append(prune_task)
-        logger.info("[PruneLoop] prune_old_data_loop started (every %s hours, keep %s days)", prune_interval_hours, prune_days)
+        prune_interval_hours = float(os.getenv("PRUNE_INTERVAL_HOURS", "6"))
+        bg_tasks.append(asyncio.create_task(retention_loop(interval_hours=prune_interval_hours)))
+        logger.info("[Retention] retention_loop started (every %s hours, mode=%s)", prune_interval_hours, db.TIMESERIES_MODE)
     except Exception as e:
-        logger.exception(f"[PruneLoop] failed to start: {e}")
+        logger.exception(f"[Retention] failed to start: {e}")
+
+    # in-app rollup refresher (resolutions served by continuous aggregates are skipped)
+    if getattr(cfg, "ROLLUPS_ENABLED", True):
+        try:
+            rollup_interval = float(getattr(cfg, "ROLLUP_REFRESH_INTERVAL", 15))
+            bg_tasks.append(asyncio.create_task(rollups.refresh_loop(rollup_interval)))
+            logger.info("[Rollups] refresher started (every %ss, %s)", rollup_interval, rollups.status()["available"])
+        except Exception as e:
+            logger.exception(f"[Rollups] failed to start: {e}")
+
+    # change feed listener: wakes the downstream quant loops on committed upstream batches
+    if changefeed.enabled():
+        try:
+            bg_tasks.append(asyncio.create_task(changefeed.listen_loop(db.DATABASE_URL)))
+            logger.info("[ChangeFeed] listener started (tables=%s)", ",".join(sorted(changefeed.tables())))
+        except Exception as e:
+            logger.exception(f"[ChangeFeed] failed to start: {e}")
 
     # start diagnostics loop (every 60 s) - using provided diagnostics_loop if it loops internally, else wrap
     try:
@@ -633,7 +826,8 @@ async def startup():
     # regime transition monitor (safe wrapper)
     try:
         transition_interval = int(os.getenv("REGIME_TRANSITION_INTERVAL", "120"))
-        transition_task = asyncio.create_task(safe_loop_template("RegimeTransitions", regime_transition_iteration, interval=transition_interval))
+        transition_task = asyncio.create_task(safe_loop_template("RegimeTransitions", regime_transition_iteration, interval=transition_interval,
+                                                               wake_on=("quant_regimes",)))
         bg_tasks.append(transition_task)
         logger.info("[RegimeTransitions] monitor started (interval=%ss)", transition_interval)
     except Exception as e:
@@ -651,7 +845,8 @@ async def startup():
     # context trends loop (wrapped)
     try:
         ctx_trend_interval = float(os.getenv("CONTEXT_TRENDS_INTERVAL", "120.0"))
-        ctx_trend_task = asyncio.create_task(safe_loop_template("ContextTrends", context_trends_iteration, interval=ctx_trend_interval))
+        ctx_trend_task = asyncio.create_task(safe_loop_template("ContextTrends", context_trends_iteration, interval=ctx_trend_interval,
+                                                             wake_on=("quant_context_scores",)))
         bg_tasks.append(ctx_trend_task)
         logger.info("[ContextTrends] monitor started (interval=%ss)", ctx_trend_interval)
     except Exception as e:
@@ -677,7 +872,7 @@ async def shutdown():
     - Cancel background tasks
     - Close DB connection
     """
-    global pipeline_task, bg_tasks, ws_started
+    global pipeline_tasks, bg_tasks, ws_started
     logger.info("[Lifecycle] after_serving shutdown – cleaning tasks")
 
     # --- Continuity snapshot ---
@@ -705,10 +900,13 @@ async def shutdown():
             logger.warning(f"[Lifecycle] stop ws_manager failed: {e}")
 
     # --- Cancel Background Tasks ---
+    # writers first: their final flush may still spill to disk before the log is closed
     try:
-        tracked = list(bg_tasks) + ([pipeline_task] if pipeline_task else [])
-        await cancel_all(tracked)
+        await cancel_all(list(pipeline_tasks))
+        await cancel_all(list(bg_tasks))
         bg_tasks.clear()
+        pipeline_tasks.clear()
+        spill.close_log()
         logger.info("[Pipeline] background tasks cancelled")
     except Exception as e:
         logger.warning(f"[Lifecycle] cancel_all failed: {e}")
@@ -777,6 +975,62 @@ async def api_symbol_history(symbol):
         return jsonify([]), 500
 
 
+@app.route("/api/ticks/<symbol>")
+async def api_symbol_ticks(symbol):
+    limit = min(request.args.get("limit", 1000, type=int), 10000)
+    kind = request.args.get("kind")
+    if kind and kind not in TICK_KIND_CODES:
+        return jsonify({"error": "Invalid kind"}), 400
+    try:
+        rows = await db.get_ticks_async(symbol.upper(), limit=limit, kind=TICK_KIND_CODES.get(kind))
+        return jsonify([
+            {"timestamp": to_ms(r["ts"]), "kind": TICK_KIND_NAMES.get(r["kind"]), "price": r["price"], "qty": r["qty"]}
+            for r in rows
+        ])
+    except Exception as e:
+        logger.warning(f"[API] /ticks/{symbol} failed: {e}")
+        return jsonify([]), 500
+
+
+def _parse_time_arg(value, default: datetime) -> datetime:
+    """epoch ms / epoch s / ISO-8601 query arg → aware UTC datetime."""
+    if value in (None, ""):
+        return default
+    try:
+        x = float(value)
+        return datetime.fromtimestamp(x / 1000.0 if x > 1e11 else x, tz=timezone.utc)
+    except ValueError:
+        dt = datetime.fromisoformat(value)
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+@app.route("/api/features/<symbol>/history")
+async def api_feature_history(symbol):
+    """
+    Quant feature history at the coarsest rollup (1m/5m/1h/1d, else raw 5s) that gives
+    at least `points` buckets over [start, end). Query: start, end (ms or ISO), points, fields.
+    """
+    try:
+        end = _parse_time_arg(request.args.get("end"), datetime.now(timezone.utc))
+        start = _parse_time_arg(request.args.get("start"), end - timedelta(hours=1))
+        points = max(1, min(request.args.get("points", 300, type=int), 5000))
+        fields = [f for f in (request.args.get("fields") or "").split(",") if f] or None
+    except Exception:
+        return jsonify({"error": "Invalid start/end"}), 400
+    if start >= end:
+        return jsonify({"error": "start must be before end"}), 400
+    try:
+        out = await rollups.fetch_history(symbol.upper(), start, end, points=points, fields=fields)
+        for r in out["rows"]:
+            r["timestamp"] = to_ms(r.pop("bucket"))
+        return jsonify(out)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.warning(f"[API] /features/{symbol}/history failed: {e}")
+        return jsonify({"symbol": symbol.upper(), "rows": []}), 500
+
+
 @app.route("/api/quant/summary")
 async def api_quant_summary():
     limit = request.args.get("limit", 100, type=int)
@@ -801,12 +1055,12 @@ async def favicon():
 @app.route("/api/signals/latest")
 async def api_signals_latest():
     try:
-        async with db._pool.acquire() as conn:
+        async with db.DBReadConnection() as conn:
             rows = await conn.fetch("""
-                SELECT DISTINCT ON (symbol, family)
+                SELECT
                     symbol, family, score, confidence, ts
-                FROM quant_signals
-                ORDER BY symbol, family, ts DESC
+                FROM quant_signals_latest
+                ORDER BY symbol, family
             """)
         return jsonify([dict(r) for r in rows])
     except Exception as e:
@@ -817,12 +1071,12 @@ async def api_signals_latest():
 @app.route("/api/confluence/latest")
 async def api_confluence_latest():
     try:
-        async with db._pool.acquire() as conn:
+        async with db.DBReadConnection() as conn:
             rows = await conn.fetch("""
-                SELECT DISTINCT ON (symbol)
+                SELECT
                     symbol, ts, confluence_score, bull_strength, bear_strength, volatility
-                FROM quant_confluence
-                ORDER BY symbol, ts DESC
+                FROM quant_confluence_latest
+                ORDER BY symbol
             """)
         return jsonify([dict(r) for r in rows])
     except Exception as e:
@@ -833,9 +1087,9 @@ async def api_confluence_latest():
 @app.route("/api/diagnostics/latest")
 async def api_diagnostics_latest():
     try:
-        async with db._pool.acquire() as conn:
+        async with db.DBReadConnection() as conn:
             rows = await conn.fetch("""
-                SELECT DISTINCT ON (symbol)
+                SELECT
                     symbol,
                     ts,
                     COALESCE(volatility_5s, 0) AS volatility_5s,
@@ -844,8 +1098,8 @@ async def api_diagnostics_latest():
                     COALESCE(corr_price_ls, 0) AS corr_price_ls,
                     COALESCE(corr_oi_ls, 0) AS corr_oi_ls,
                     COALESCE(confluence_density, 0) AS confluence_density
-                FROM quant_diagnostics
-                ORDER BY symbol, ts DESC
+                FROM quant_diagnostics_latest
+                ORDER BY symbol
             """)
         return jsonify([dict(r) for r in rows])
     except Exception as e:
@@ -856,12 +1110,12 @@ async def api_diagnostics_latest():
 @app.route("/api/regime/latest")
 async def api_regime_latest():
     try:
-        async with db._pool.acquire() as conn:
+        async with db.DBReadConnection() as conn:
             rows = await conn.fetch("""
-                SELECT DISTINCT ON (symbol)
+                SELECT
                     symbol, ts, regime, confidence, confluence_score, volatility
-                FROM quant_regimes
-                ORDER BY symbol, ts DESC
+                FROM quant_regimes_latest
+                ORDER BY symbol
             """)
         return jsonify([dict(r) for r in rows])
     except Exception as e:
@@ -874,15 +1128,18 @@ async def api_regime_history():
     try:
         symbol = request.args.get("symbol", "BTCUSDT")
         limit = request.args.get("limit", 200, type=int)
-        async with db._pool.acquire() as conn:
-            rows = await conn.fetch("""
+        async with db.DBReadConnection() as conn:
+            key, value = await db.symbol_filter(conn, "quant_regimes", symbol)
+            rows = await conn.fetch(f"""
                 SELECT symbol, ts, regime, confidence, confluence_score, volatility
                 FROM quant_regimes
-                WHERE symbol = $1
+                WHERE {key} = $1
                 ORDER BY ts DESC
                 LIMIT $2
-            """, symbol, limit)
-        return jsonify([dict(r) for r in rows])
+            """, value, limit)
+        out = await db.with_archived_tail("quant_regimes", symbol, [dict(r) for r in rows], limit,
+                                          columns=["symbol", "ts", "regime", "confidence", "confluence_score", "volatility"])
+        return jsonify(out)
     except Exception as e:
         logger.warning(f"[API] /api/regime/history failed: {e}")
         return jsonify([]), 500
@@ -891,7 +1148,7 @@ async def api_regime_history():
 @app.route("/api/regime/transitions/latest")
 async def api_regime_transitions_latest():
     try:
-        async with db._pool.acquire() as conn:
+        async with db.DBReadConnection() as conn:
             rows = await conn.fetch("""
                 WITH recent AS (
                     SELECT symbol, regime, ts,
@@ -914,12 +1171,12 @@ async def api_regime_transitions_latest():
 @app.route("/api/context/summary")
 async def api_context_summary():
     try:
-        async with db._pool.acquire() as conn:
+        async with db.DBReadConnection() as conn:
             rows = await conn.fetch("""
-                SELECT DISTINCT ON (symbol)
+                SELECT
                     symbol, ts, context_score, bias, components
-                FROM quant_context_scores
-                ORDER BY symbol, ts DESC
+                FROM quant_context_scores_latest
+                ORDER BY symbol
             """)
         return jsonify([dict(r) for r in rows])
     except Exception as e:
@@ -930,7 +1187,7 @@ async def api_context_summary():
 @app.route("/api/context/trends")
 async def api_context_trends():
     try:
-        async with db._pool.acquire() as conn:
+        async with db.DBReadConnection() as conn:
             rows = await conn.fetch("""
                 SELECT symbol, from_bias, to_bias, ts
                 FROM quant_context_trends
@@ -950,52 +1207,26 @@ async def api_context_latest():
     merged with regime + confluence if available.
     """
     try:
-        async with db._pool.acquire() as conn:
+        async with db.DBReadConnection() as conn:
             rows = await conn.fetch("""
-                WITH latest_ctx AS (
-                    SELECT DISTINCT ON (symbol)
-                        symbol, ts, context_score, bias, components
-                    FROM quant_context_scores
-                    ORDER BY symbol, ts DESC
-                ),
-                latest_reg AS (
-                    SELECT DISTINCT ON (symbol)
-                        symbol, regime, confidence AS regime_conf
-                    FROM quant_regimes
-                    ORDER BY symbol, ts DESC
-                ),
-                latest_conf AS (
-                    SELECT DISTINCT ON (symbol)
-                        symbol, confluence_score, bull_strength, bear_strength
-                    FROM quant_confluence
-                    ORDER BY symbol, ts DESC
-                )
-                SELECT 
+                SELECT
                     c.symbol,
                     c.ts,
                     c.context_score,
                     c.bias,
                     c.components,
                     r.regime,
-                    r.regime_conf,
+                    r.confidence AS regime_conf,
                     f.confluence_score,
                     f.bull_strength,
                     f.bear_strength
-                FROM latest_ctx c
-                LEFT JOIN latest_reg r USING(symbol)
-                LEFT JOIN latest_conf f USING(symbol)
+                FROM quant_context_scores_latest c
+                LEFT JOIN quant_regimes_latest r USING(symbol)
+                LEFT JOIN quant_confluence_latest f USING(symbol)
                 ORDER BY c.context_score DESC
             """)
-        out = []
-        for r in rows:
-            d = dict(r)
-            try:
-                if isinstance(d.get("components"), str):
-                    d["components"] = json.loads(d["components"])
-            except Exception:
-                pass
-            out.append(d)
-        return jsonify(out)
+        # components arrives decoded (jsonb codec)
+        return jsonify([dict(r) for r in rows])
     except Exception as e:
         logger.warning(f"[API] /api/context/latest failed: {e}")
         return jsonify([]), 500
@@ -1054,6 +1285,39 @@ async def api_db_status():
     stats = await db.get_pool_stats()
     return jsonify(stats)
 
+
+@app.route("/metrics", methods=["GET"])
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: DB pool waits and per-statement latency histograms."""
+    return db.prometheus_metrics(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+
+@app.route("/api/raw", methods=["GET"])
+async def api_raw_payload():
+    """Raw payload behind a metrics / quant_features_5s raw_ref (RAW_STORE=table|disk)."""
+    ref = request.args.get("ref", "")
+    try:
+        payload = await db.load_raw_async(ref)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.warning(f"[API] /api/raw failed: {e}")
+        return jsonify({"error": str(e)}), 500
+    if payload is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify({"ref": ref, "raw_json": payload})
+
+@app.route("/api/universe", methods=["GET"])
+async def api_universe():
+    """Current symbol universe with tiers and per-tier cadence."""
+    try:
+        out = universe.status()
+        out["tier_specs"] = {str(k): v for k, v in universe.TIER_SPECS.items()}
+        return jsonify(out)
+    except Exception as e:
+        logger.warning(f"[API] /api/universe failed: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/api/system/continuity", methods=["GET"])
 async def api_system_continuity():
     """
@@ -1064,7 +1328,15 @@ async def api_system_continuity():
         return jsonify({
             "phase": PHASE,
             "uptime_s": uptime,
-            "queue_size": queue.qsize(),
+            "queue_size": queue_size(),
+            "queue_partitions": [q.qsize() for q in queues],
+            "queue_lanes": lane_status(queues),
+            "rest_snapshots": snapshots.status(),
+            "spill": spill.status(),
+            "buckets": [b.status() for b in bucketers],
+            "ticks": [t.status() for t in tick_writers],
+            "timeseries": db.timeseries_status(),
+            "rollups": rollups.status(),
             "ws_active": ws_started,
             "bg_tasks": len(bg_tasks),
             "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
@@ -0,0 +1,447 @@
+# backend/src/futuresboard/archive.py
+"""
+Parquet cold-storage tier for closed days of the time-series tables.
+
+The retention pass (db.apply_retention) calls archive_table() for every table in
+ARCHIVE_TABLES: each closed UTC day (ended more than ARCHIVE_GRACE_HOURS ago) not
+archived yet is exported to
+
+    <ARCHIVE_DIR>/<table>/<table>-YYYYMMDD.parquet
+
+sorted by (symbol, time) in row groups of ARCHIVE_ROW_GROUP_ROWS with column
+statistics, so symbol and time predicates skip whole row groups. Files are written
+to a .tmp name and renamed. Days without rows get no file: the exporter jumps to
+the next day with data and records the skipped run as one zero-byte marker
+
+    <ARCHIVE_DIR>/<table>/<table>-YYYYMMDD-YYYYMMDD.empty
+
+which counts as archived for contiguity. A first pass starts at the oldest row, but
+not before ARCHIVE_RETENTION_DAYS (those files would be pruned right away). symbol_id is not exported (dictionary ids are local
+to the database); jsonb columns are stored as JSON text.
+
+boundary(table) is where PostgreSQL starts: the end of the contiguous archived run
+(files and empty markers),
+capped at ARCHIVE_HOT_DAYS before today. The retention pass drops PG data older
+than it, and readers (read()) serve everything before it from Parquet — through
+DuckDB when installed, else pyarrow.dataset, both with column and predicate pushdown.
+
+pyarrow is an optional dependency; without it the archive stays off and PG keeps
+everything up to its normal retention.
+"""
+
+from __future__ import annotations
+import asyncio
+import logging
+import os
+import pathlib
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .config import get_settings
+from . import jsoncodec
+
+try:  # optional dependencies
+    import pyarrow as _pa
+    import pyarrow.parquet as _pq
+except ImportError:  # pragma: no cover - depends on the environment
+    _pa = _pq = None
+try:
+    import duckdb as _duckdb
+except ImportError:  # pragma: no cover - depends on the environment
+    _duckdb = None
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.archive")
+logger.setLevel(logging.INFO)
+
+SKIP_COLUMNS = ("symbol_id",)
+_SUFFIX = ".parquet"
+_EMPTY = ".empty"
+_stats: Dict[str, Any] = {"days_exported": 0, "rows_exported": 0, "reads": 0, "rows_read": 0, "errors": 0}
+_warned = False
+
+
+def available() -> bool:
+    return _pa is not None
+
+
+def enabled() -> bool:
+    global _warned
+    if not getattr(cfg, "ARCHIVE_ENABLED", False):
+        return False
+    if not available():
+        if not _warned:
+            logger.warning("[archive] ARCHIVE_ENABLED but pyarrow is not installed; archive stays off")
+            _warned = True
+        return False
+    return True
+
+
+def tables() -> set:
+    raw = getattr(cfg, "ARCHIVE_TABLES", "") or ""
+    return {t.strip() for t in str(raw).split(",") if t.strip()}
+
+
+def archives(table: str) -> bool:
+    return enabled() and table in tables()
+
+
+def engine() -> str:
+    return "duckdb" if _duckdb is not None else "pyarrow"
+
+
+# ---------------------------------------------------------------------
+# Layout
+# ---------------------------------------------------------------------
+def base_dir() -> pathlib.Path:
+    configured = getattr(cfg, "ARCHIVE_DIR", "") or ""
+    return pathlib.Path(configured) if configured else pathlib.Path(__file__).resolve().parents[2] / "archive"
+
+
+def file_path(table: str, day: date) -> pathlib.Path:
+    return base_dir() / table / f"{table}-{day:%Y%m%d}{_SUFFIX}"
+
+
+def archived_days(table: str) -> List[date]:
+    folder = base_dir() / table
+    if not folder.is_dir():
+        return []
+    out = []
+    for p in folder.glob(f"{table}-*{_SUFFIX}"):
+        try:
+            out.append(datetime.strptime(p.name[len(table) + 1:-len(_SUFFIX)], "%Y%m%d").date())
+        except ValueError:
+            continue
+    return sorted(out)
+
+
+def empty_path(table: str, first: date, last: date) -> pathlib.Path:
+    return base_dir() / table / f"{table}-{first:%Y%m%d}-{last:%Y%m%d}{_EMPTY}"
+
+
+def empty_spans(table: str) -> List[Tuple[date, date]]:
+    """(first, last) day runs verified to hold no rows, sorted."""
+    folder = base_dir() / table
+    if not folder.is_dir():
+        return []
+    out = []
+    for p in folder.glob(f"{table}-*{_EMPTY}"):
+        try:
+            a, b = p.name[len(table) + 1:-len(_EMPTY)].split("-")
+            out.append((datetime.strptime(a, "%Y%m%d").date(), datetime.strptime(b, "%Y%m%d").date()))
+        except ValueError:
+            continue
+    return sorted(out)
+
+
+def _day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def contiguous_end(days: Sequence[date], spans: Sequence[Tuple[date, date]] = ()) -> Optional[date]:
+    """Last day of the run of consecutive days starting at days[0]; empty `spans` bridge gaps."""
+    if not days:
+        return None
+    end = days[0]
+    for lo, hi in sorted([(d, d) for d in days[1:]] + [s for s in spans if s[1] > end]):
+        if lo > end + timedelta(days=1):
+            break
+        end = max(end, hi)
+    return end
+
+
+def boundary(table: str, now: Optional[datetime] = None, days: Optional[Sequence[date]] = None,
+             spans: Optional[Sequence[Tuple[date, date]]] = None) -> Optional[datetime]:
+    """UTC time before which `table` is served from Parquet (None = everything from PG)."""
+    days = archived_days(table) if days is None else sorted(days)
+    spans = (empty_spans(table) if days else []) if spans is None else spans
+    end = contiguous_end(days, spans)
+    if end is None:
+        return None
+    now = _utc(now or datetime.now(timezone.utc))
+    hot = _day_start(now.date()) - timedelta(days=float(getattr(cfg, "ARCHIVE_HOT_DAYS", 7)))
+    b = min(_day_start(end + timedelta(days=1)), hot)
+    return b if b > _day_start(days[0]) else None
+
+
+# ---------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------
+def _arrow_type(kind: str):
+    return {
+        "float": _pa.float64(), "numeric": _pa.float64(), "int": _pa.int64(), "bool": _pa.bool_(),
+        "ts": _pa.timestamp("us", tz="UTC"), "timestamp": _pa.timestamp("us"),
+    }.get(kind, _pa.string())
+
+
+def _cell(kind: str, v: Any) -> Any:
+    if v is None:
+        return None
+    if kind == "json":
+        return jsoncodec.dumps(v)
+    if kind == "numeric":
+        return float(v)
+    if kind in ("text", "raw"):
+        return str(v)
+    return v
+
+
+def to_arrow(schema, kinds: Dict[str, str], rows: Sequence[Sequence[Any]]):
+    """Rows (tuples in schema order) → pyarrow.Table."""
+    arrays = []
+    for i, field in enumerate(schema):
+        kind = kinds[field.name]
+        arrays.append(_pa.array([_cell(kind, r[i]) for r in rows], type=field.type))
+    return _pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _bound(day: date, kind: str) -> datetime:
+    ts = _day_start(day)
+    return ts.replace(tzinfo=None) if kind == "timestamp" else ts
+
+
+async def export_day(conn, table: str, day: date) -> int:
+    """Write one UTC day of `table` to its Parquet file; returns rows exported."""
+    from . import db, timeseries
+
+    tc = timeseries.TIMESERIES_TABLES[table].time_col
+    kinds = {c.name: c.kind for c in (await db.table_columns(table)).values() if c.name not in SKIP_COLUMNS}
+    cols = list(kinds)
+    schema = _pa.schema([(c, _arrow_type(kinds[c])) for c in cols])
+    group = max(1000, int(getattr(cfg, "ARCHIVE_ROW_GROUP_ROWS", 100_000)))
+    order = f"symbol, {tc}" if "symbol" in kinds else tc
+    path = file_path(table, day)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    writer = _pq.ParquetWriter(str(tmp), schema, compression=getattr(cfg, "ARCHIVE_COMPRESSION", "zstd"),
+                               write_statistics=True)
+    n = 0
+    try:
+        async with conn.transaction():
+            chunk: List[Sequence[Any]] = []
+            async for r in conn.cursor(
+                f"SELECT {', '.join(cols)} FROM {table} WHERE {tc} >= $1 AND {tc} < $2 ORDER BY {order}",
+                _bound(day, kinds[tc]), _bound(day + timedelta(days=1), kinds[tc]), prefetch=min(group, 10_000),
+            ):
+                chunk.append(tuple(r))
+                if len(chunk) >= group:
+                    await asyncio.to_thread(writer.write_table, to_arrow(schema, kinds, chunk), group)
+                    n += len(chunk)
+                    chunk = []
+            if chunk:
+                await asyncio.to_thread(writer.write_table, to_arrow(schema, kinds, chunk), group)
+                n += len(chunk)
+        writer.close()
+        os.replace(tmp, path)
+    except BaseException:
+        writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    _stats["days_exported"] += 1
+    _stats["rows_exported"] += n
+    return n
+
+
+async def archive_table(conn, table: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Export the closed days with rows after the last archived one (at most
+    ARCHIVE_MAX_DAYS_PER_PASS); runs of empty days in between become one marker.
+    """
+    from . import db, timeseries
+
+    now = _utc(now or datetime.now(timezone.utc))
+    last_closed = (now - timedelta(hours=float(getattr(cfg, "ARCHIVE_GRACE_HOURS", 1)))).date() - timedelta(days=1)
+    days = archived_days(table)
+    spans = empty_spans(table)
+    done = max(([days[-1]] if days else []) + [s[1] for s in spans], default=None)
+    if done is None:
+        keep = float(getattr(cfg, "ARCHIVE_RETENTION_DAYS", 0))
+        start = now.date() - timedelta(days=keep) if keep > 0 else date.min
+    else:
+        start = done + timedelta(days=1)
+    tc = timeseries.TIMESERIES_TABLES[table].time_col
+    kind = (await db.table_columns(table))[tc].kind
+    out: Dict[str, Any] = {"exported": 0, "rows": 0, "skipped_days": 0}
+    day, stop = start, last_closed + timedelta(days=1)
+    for _ in range(int(getattr(cfg, "ARCHIVE_MAX_DAYS_PER_PASS", 7))):
+        if day > last_closed:
+            break
+        nxt = await conn.fetchval(f"SELECT min({tc}) FROM {table} WHERE {tc} >= $1", _bound(day, kind))
+        first = min(_utc(nxt).date(), stop) if nxt is not None else stop
+        if first > day:
+            if done is not None:
+                # nothing to read in [day, first): keep the archived run contiguous without empty files
+                lo = day
+                if spans and spans[-1][1] == day - timedelta(days=1):
+                    lo = spans[-1][0]
+                    empty_path(table, *spans.pop()).unlink(missing_ok=True)
+                empty_path(table, lo, first - timedelta(days=1)).touch()
+                spans.append((lo, first - timedelta(days=1)))
+                out["skipped_days"] += (first - day).days
+            day = first
+            if day > last_closed:
+                break
+        try:
+            out["rows"] += await export_day(conn, table, day)
+        except Exception as e:
+            _stats["errors"] += 1
+            logger.warning(f"[archive] {table} {day}: export failed: {e}")
+            out["error"] = str(e)
+            break
+        out["exported"] += 1
+        done = day
+        day += timedelta(days=1)
+    if out["exported"]:
+        logger.info(f"[archive] {table}: exported {out['exported']} days ({out['rows']} rows) through {done}")
+    out["pruned_files"] = prune_files(table, now)
+    return out
+
+
+def prune_files(table: str, now: Optional[datetime] = None) -> int:
+    """Delete archived days older than ARCHIVE_RETENTION_DAYS (0 = keep forever)."""
+    keep = float(getattr(cfg, "ARCHIVE_RETENTION_DAYS", 0))
+    if keep <= 0:
+        return 0
+    cutoff = _utc(now or datetime.now(timezone.utc)).date() - timedelta(days=keep)
+    removed = 0
+    for d in archived_days(table):
+        if d >= cutoff:
+            break
+        try:
+            file_path(table, d).unlink()
+            removed += 1
+        except OSError as e:
+            logger.warning(f"[archive] could not delete {table} {d}: {e}")
+    for first, last in empty_spans(table):
+        if last < cutoff:
+            empty_path(table, first, last).unlink(missing_ok=True)
+    return removed
+
+
+# ---------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------
+def files_for(table: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+    """Archived day files overlapping [start, end)."""
+    lo = _utc(start).date() if start else None
+    hi = (_utc(end) - timedelta(microseconds=1)).date() if end else None
+    return [str(file_path(table, d)) for d in archived_days(table)
+            if (lo is None or d >= lo) and (hi is None or d <= hi)]
+
+
+def _time_param(v: datetime, naive: bool) -> datetime:
+    v = _utc(v)
+    return v.replace(tzinfo=None) if naive else v
+
+
+def _read_duckdb(files, tc, cols, naive, start, end, filters, limit, descending) -> List[Dict[str, Any]]:
+    con = _duckdb.connect()
+    try:
+        con.execute("SET TimeZone = 'UTC'")
+        where, params = [], [files]
+        if start is not None:
+            where.append(f"{tc} >= ?")
+            params.append(_time_param(start, naive))
+        if end is not None:
+            where.append(f"{tc} < ?")
+            params.append(_time_param(end, naive))
+        for k, v in filters.items():
+            where.append(f"{k} = ?")
+            params.append(v)
+        sql = (f"SELECT {', '.join(cols)} FROM read_parquet(?) "
+               f"{'WHERE ' + ' AND '.join(where) if where else ''} "
+               f"ORDER BY {tc} {'DESC' if descending else 'ASC'}{f' LIMIT {int(limit)}' if limit else ''}")
+        # via Arrow: timestamptz values keep their zone without duckdb's pytz dependency
+        return con.execute(sql, params).fetch_arrow_table().to_pylist()
+    finally:
+        con.close()
+
+
+def _read_arrow(files, tc, cols, schema, start, end, filters, limit, descending) -> List[Dict[str, Any]]:
+    import pyarrow.dataset as ds
+
+    tc_type = schema.field(tc).type
+    naive = getattr(tc_type, "tz", None) is None
+    expr = None
+    terms = []
+    if start is not None:
+        terms.append(ds.field(tc) >= _pa.scalar(_time_param(start, naive), type=tc_type))
+    if end is not None:
+        terms.append(ds.field(tc) < _pa.scalar(_time_param(end, naive), type=tc_type))
+    terms += [ds.field(k) == v for k, v in filters.items()]
+    for t in terms:
+        expr = t if expr is None else expr & t
+    table = ds.dataset(files, format="parquet").to_table(columns=cols, filter=expr)
+    table = table.sort_by([(tc, "descending" if descending else "ascending")])
+    if limit:
+        table = table.slice(0, int(limit))
+    return table.to_pylist()
+
+
+def _read_sync(table, files, start, end, columns, filters, limit, descending) -> List[Dict[str, Any]]:
+    from . import timeseries
+
+    tc = timeseries.TIMESERIES_TABLES[table].time_col
+    schema = _pq.read_schema(files[-1])
+    names = set(schema.names)
+    cols = [c for c in (columns or schema.names) if c in names]
+    if tc not in cols:
+        cols.append(tc)
+    bad = [k for k in filters if k not in names]
+    if bad:
+        raise ValueError(f"archive {table}: unknown filter columns {bad}")
+    if _duckdb is not None:
+        naive = getattr(schema.field(tc).type, "tz", None) is None
+        return _read_duckdb(files, tc, cols, naive, start, end, filters, limit, descending)
+    return _read_arrow(files, tc, cols, schema, start, end, filters, limit, descending)
+
+
+async def read(table: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               symbol: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+               where: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+               descending: bool = False) -> List[Dict[str, Any]]:
+    """Archived rows of `table` in [start, end) as dicts, ordered by time ([] when nothing is archived)."""
+    if not enabled():
+        return []
+    files = files_for(table, start, end)
+    if not files:
+        return []
+    filters = dict(where or {})
+    if symbol is not None:
+        filters["symbol"] = symbol
+    try:
+        rows = await asyncio.to_thread(_read_sync, table, files, start, end, columns, filters, limit, descending)
+    except Exception:
+        _stats["errors"] += 1
+        raise
+    _stats["reads"] += 1
+    _stats["rows_read"] += len(rows)
+    return rows
+
+
+def status() -> Dict[str, Any]:
+    out: Dict[str, Any] = {"enabled": enabled(), "pyarrow": available(), "engine": engine(),
+                           "dir": str(base_dir()), **_stats}
+    if out["enabled"]:
+        per = {}
+        for t in sorted(tables()):
+            days = archived_days(t)
+            b = boundary(t, days=days)
+            per[t] = {"days": len(days), "first": days[0].isoformat() if days else None,
+                      "last": days[-1].isoformat() if days else None,
+                      "boundary": b.isoformat() if b else None,
+                      "bytes": sum(file_path(t, d).stat().st_size for d in days)}
+        out["tables"] = per
+    return out
+
+
+__all__ = [
+    "available", "enabled", "tables", "archives", "engine", "base_dir", "file_path", "archived_days",
+    "empty_path", "empty_spans", "contiguous_end", "boundary", "to_arrow", "export_day", "archive_table",
+    "prune_files", "files_for", "read", "status",
+]
@@ -0,0 +1,222 @@
+# backend/src/futuresboard/blobstore.py
+"""
+Compressed side store for raw JSON payloads (metrics.raw_json, quant_features_5s.raw_json).
+
+RAW_STORE selects where the raw payload of a hot-table row goes:
+
+    inline   keep raw_json in the hot row (historic behaviour, default)
+    table    compressed BYTEA rows in `raw_payloads` (id, src, symbol, ts, codec, payload)
+    disk     compressed records appended to day segments under RAW_STORE_DIR
+    off      drop raw payloads
+
+With table/disk the hot row keeps only its typed columns plus `raw_ref`:
+"t:<raw_payloads.id>" or "f:<segment>:<offset>". Only a deterministic
+RAW_SAMPLE_RATE fraction of rows (hash of symbol + time) keep a payload at all.
+
+Disk layout: <RAW_STORE_DIR>/raw-YYYYMMDD-<seq>.seg, rolled at RAW_SEGMENT_BYTES.
+Record:      <u32 payload length><u32 crc32(payload)><u8 codec><payload>
+Codecs:      1 = zlib, 2 = zstd (when the optional `zstandard` package is installed).
+Day segments older than RAW_STORE_RETENTION_DAYS are deleted by prune_disk().
+"""
+
+from __future__ import annotations
+import logging
+import pathlib
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .config import get_settings
+
+try:  # optional dependency
+    import zstandard as _zstd
+except ImportError:  # pragma: no cover - depends on the environment
+    _zstd = None
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.blobstore")
+logger.setLevel(logging.INFO)
+
+MODES = ("inline", "table", "disk", "off")
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+_HEADER = struct.Struct("<IIB")
+_SEGMENT_PREFIX = "raw-"
+_SEGMENT_SUFFIX = ".seg"
+
+_dir: Optional[pathlib.Path] = None
+_writer = None                    # open binary file of the active segment
+_writer_name: str = ""
+_writer_pos: int = 0
+_zc = None
+_stats: Dict[str, int] = {"stored": 0, "skipped": 0, "bytes_in": 0, "bytes_out": 0, "errors": 0}
+
+
+def mode() -> str:
+    m = str(getattr(cfg, "RAW_STORE", "inline") or "inline").strip().lower()
+    return m if m in MODES else "inline"
+
+
+def tables() -> set:
+    raw = getattr(cfg, "RAW_STORE_TABLES", "metrics,quant_features_5s") or ""
+    return {t.strip() for t in str(raw).split(",") if t.strip()}
+
+
+def offloads(table: str) -> bool:
+    """True when raw payloads of `table` leave the hot row."""
+    return mode() != "inline" and table in tables()
+
+
+def sampled(symbol: Any, ts: Any, rate: Optional[float] = None) -> bool:
+    """Deterministic sampling on (symbol, time): the same row always gets the same answer."""
+    rate = float(getattr(cfg, "RAW_SAMPLE_RATE", 1.0) if rate is None else rate)
+    if rate >= 1.0:
+        return True
+    if rate <= 0.0:
+        return False
+    key = f"{symbol}|{ts.isoformat() if hasattr(ts, 'isoformat') else ts}".encode("utf-8")
+    return zlib.crc32(key) % 1_000_000 < rate * 1_000_000
+
+
+# ---------------------------------------------------------------------
+# Codec
+# ---------------------------------------------------------------------
+def encode(payload: Any) -> Tuple[int, bytes]:
+    """JSON text (or bytes) → (codec, compressed bytes); zstd when available, else zlib."""
+    global _zc
+    data = payload if isinstance(payload, (bytes, bytearray)) else str(payload).encode("utf-8")
+    level = int(getattr(cfg, "RAW_COMPRESSION_LEVEL", 3))
+    if _zstd is not None:
+        if _zc is None:
+            _zc = _zstd.ZstdCompressor(level=level)
+        out = (CODEC_ZSTD, _zc.compress(data))
+    else:
+        out = (CODEC_ZLIB, zlib.compress(data, max(1, min(9, level * 2))))
+    _stats["bytes_in"] += len(data)
+    _stats["bytes_out"] += len(out[1])
+    return out
+
+
+def decode(codec: int, blob: bytes) -> str:
+    if codec == CODEC_ZSTD:
+        if _zstd is None:
+            raise RuntimeError("zstd payload but the zstandard package is not installed")
+        return _zstd.ZstdDecompressor().decompress(blob).decode("utf-8")
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(blob).decode("utf-8")
+    raise ValueError(f"unknown raw payload codec {codec}")
+
+
+# ---------------------------------------------------------------------
+# Disk segments
+# ---------------------------------------------------------------------
+def _base_dir() -> pathlib.Path:
+    configured = getattr(cfg, "RAW_STORE_DIR", "") or ""
+    return pathlib.Path(configured) if configured else pathlib.Path(__file__).resolve().parents[2] / "rawstore"
+
+
+def _store_dir() -> pathlib.Path:
+    global _dir
+    if _dir is None:
+        base = _base_dir()
+        base.mkdir(parents=True, exist_ok=True)
+        _dir = base
+    return _dir
+
+
+def _segments(day: Optional[str] = None) -> List[pathlib.Path]:
+    prefix = f"{_SEGMENT_PREFIX}{day}-" if day else _SEGMENT_PREFIX
+    return sorted(p for p in _store_dir().glob(f"{prefix}*{_SEGMENT_SUFFIX}"))
+
+
+def _roll(day: str):
+    global _writer, _writer_name, _writer_pos
+    if _writer is not None:
+        _writer.close()
+    existing = _segments(day)
+    seq = int(existing[-1].stem.rsplit("-", 1)[-1]) + 1 if existing else 0
+    _writer_name = f"{_SEGMENT_PREFIX}{day}-{seq:04d}{_SEGMENT_SUFFIX}"
+    _writer = open(_store_dir() / _writer_name, "ab")
+    _writer_pos = _writer.tell()
+
+
+def disk_append(payloads: Sequence[Tuple[int, bytes]]) -> List[str]:
+    """Append encoded payloads to today's segment; returns one "f:<segment>:<offset>" ref each."""
+    global _writer_pos
+    day = datetime.now(timezone.utc).strftime("%Y%m%d")
+    max_bytes = int(getattr(cfg, "RAW_SEGMENT_BYTES", 64 * 1024 * 1024))
+    if _writer is None or not _writer_name.startswith(f"{_SEGMENT_PREFIX}{day}-") or _writer_pos >= max_bytes:
+        _roll(day)
+    refs = []
+    for codec, blob in payloads:
+        if _writer_pos >= max_bytes:
+            _roll(day)
+        refs.append(f"f:{_writer_name}:{_writer_pos}")
+        rec = _HEADER.pack(len(blob), zlib.crc32(blob), codec) + blob
+        _writer.write(rec)
+        _writer_pos += len(rec)
+    _writer.flush()
+    _stats["stored"] += len(refs)
+    return refs
+
+
+def disk_read(ref: str) -> str:
+    """Payload text behind an "f:<segment>:<offset>" ref."""
+    _kind, name, offset = ref.split(":", 2)
+    if "/" in name or "\\" in name or not name.startswith(_SEGMENT_PREFIX):
+        raise ValueError(f"bad raw ref {ref!r}")
+    with open(_store_dir() / name, "rb") as f:
+        f.seek(int(offset))
+        length, crc, codec = _HEADER.unpack(f.read(_HEADER.size))
+        blob = f.read(length)
+    if len(blob) != length or zlib.crc32(blob) != crc:
+        raise ValueError(f"corrupt raw record {ref!r}")
+    return decode(codec, blob)
+
+
+def prune_disk(days: Optional[float] = None) -> List[str]:
+    """Delete day segments older than RAW_STORE_RETENTION_DAYS (0 = keep)."""
+    days = float(getattr(cfg, "RAW_STORE_RETENTION_DAYS", 7) if days is None else days)
+    if days <= 0 or not _base_dir().is_dir():
+        return []
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y%m%d")
+    removed = []
+    for p in _segments():
+        day = p.stem[len(_SEGMENT_PREFIX):].split("-", 1)[0]
+        if day < cutoff and p.name != _writer_name:
+            try:
+                p.unlink()
+                removed.append(p.name)
+            except OSError as e:
+                logger.warning(f"[blobstore] could not delete {p.name}: {e}")
+    if removed:
+        logger.info(f"[blobstore] pruned {len(removed)} raw segments older than {cutoff}")
+    return removed
+
+
+def note(**counts: int):
+    """Bump skipped / errors counters from the DB side."""
+    for k, n in counts.items():
+        _stats[k] = _stats.get(k, 0) + n
+
+
+def status() -> Dict[str, Any]:
+    out: Dict[str, Any] = {"mode": mode(), "tables": sorted(tables()),
+                           "sample_rate": float(getattr(cfg, "RAW_SAMPLE_RATE", 1.0)),
+                           "codec": "zstd" if _zstd is not None else "zlib", **_stats}
+    if _stats["bytes_in"]:
+        out["ratio"] = round(_stats["bytes_out"] / _stats["bytes_in"], 3)
+    if mode() == "disk" and _dir is not None:
+        segs = _segments()
+        out["segments"] = len(segs)
+        out["disk_bytes"] = sum(p.stat().st_size for p in segs)
+    return out
+
+
+__all__ = [
+    "MODES", "mode", "tables", "offloads", "sampled", "encode", "decode",
+    "disk_append", "disk_read", "prune_disk", "note", "status",
+]
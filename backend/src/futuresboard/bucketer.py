@@ -0,0 +1,236 @@
+# backend/src/futuresboard/bucketer.py
+"""
+Write-side tick downsampling for the `metrics` table.
+
+Raw WS frames are folded into one bar per symbol per fixed time bucket
+(METRICS_BUCKET = 1s / 5s / 1m): last price, OHLC, tick count, last OI, taker
+buy/sell counts and the latest top-of-book. A bar is emitted exactly once, when
+its bucket closes — either because a tick for a later bucket arrived or because
+the wall clock passed bucket end + METRICS_BUCKET_GRACE. Bars are labelled with
+the bucket resolution as `timeframe` and stamped with the bucket start as
+`updated_at`, so readers get an evenly spaced series.
+
+Each db_writer owns one TickBucketer; because the writer queues are partitioned
+by symbol, every symbol is bucketed by exactly one instance.
+"""
+
+from __future__ import annotations
+import logging
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .config import get_settings
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.bucketer")
+logger.setLevel(logging.INFO)
+
+# bar fields copied verbatim onto the metrics row by db_writer_worker
+BAR_FIELDS = ("price_open", "price_high", "price_low", "tick_count",
+              "taker_buy_count", "taker_sell_count", "updated_at")
+
+BOOK_LEVELS = 5
+
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_resolution(value: Optional[str]) -> Optional[int]:
+    """'5s' → 5, '1m' → 60; None for 'off' / '0' / empty / unparsable (bucketing disabled)."""
+    if value is None:
+        return None
+    m = re.fullmatch(r"\s*(\d+)\s*([smh]?)\s*", str(value).lower())
+    if not m:
+        return None
+    seconds = int(m.group(1)) * _UNIT_SECONDS[m.group(2) or "s"]
+    return seconds or None
+
+
+def resolution_label(seconds: int) -> str:
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+
+def configured_resolution() -> Optional[int]:
+    return parse_resolution(getattr(cfg, "METRICS_BUCKET", "5s"))
+
+
+def series_timeframe() -> Optional[str]:
+    """
+    Timeframe label WS bars are persisted under (None when bucketing is off). With
+    METRICS_UPSERT the rows are relabelled to the upsert bucket (db.bucket_metric_records).
+    """
+    res = configured_resolution()
+    if getattr(cfg, "METRICS_UPSERT", False):
+        res = parse_resolution(getattr(cfg, "METRICS_UPSERT_BUCKET", "")) or res or 60
+    return resolution_label(res) if res else None
+
+
+def _num(v) -> Optional[float]:
+    try:
+        return float(v) if v is not None and v != "" else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _event_ts(item: Dict[str, Any]) -> float:
+    """Exchange event time (s) when present, else local receive time."""
+    raw = item.get("raw") if isinstance(item.get("raw"), dict) else {}
+    for v in (raw.get("timestamp"), (raw.get("raw") or {}).get("E") if isinstance(raw.get("raw"), dict) else None):
+        ts = _num(v)
+        if ts:
+            return ts / 1000.0 if ts > 1e11 else ts
+    return _num(item.get("recv_ts")) or time.time()
+
+
+def _book_side(raw: Dict[str, Any], keys) -> Optional[list]:
+    for k in keys:
+        v = raw.get(k)
+        if isinstance(v, list) and v:
+            return v[:BOOK_LEVELS]
+    return None
+
+
+class TickBucketer:
+    """Folds ticks into per-symbol bars of `resolution` seconds."""
+
+    def __init__(self, resolution: int, grace: float = 0.5):
+        self.resolution = int(resolution)
+        self.grace = float(grace)
+        self.label = resolution_label(self.resolution)
+        self._bars: Dict[str, Dict[str, Any]] = {}
+        self._closed: Dict[str, float] = {}  # symbol -> start of the last emitted bucket
+        self.ticks_in = 0
+        self.bars_out = 0
+        self.late = 0
+
+    def _bucket_start(self, ts: float) -> float:
+        return ts - (ts % self.resolution)
+
+    def _new_bar(self, start: float) -> Dict[str, Any]:
+        return {"start": start, "open": None, "high": None, "low": None, "close": None,
+                "ticks": 0, "oi": None, "bids": None, "asks": None, "buy": 0, "sell": 0}
+
+    def add(self, item: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Fold one tick. Returns the previous bar of this symbol if the tick closed it."""
+        sym = (item.get("symbol") or item.get("sym") or "").upper()
+        if not sym:
+            return []
+        self.ticks_in += 1
+        start = self._bucket_start(_event_ts(item))
+        late = False
+        last_closed = self._closed.get(sym)
+        if last_closed is not None and start <= last_closed:
+            # late tick for an already-emitted bucket: never re-emit it, fold forward
+            late = True
+            start = last_closed + self.resolution
+        out: List[Dict[str, Any]] = []
+        bar = self._bars.get(sym)
+        if bar is None:
+            bar = self._bars[sym] = self._new_bar(start)
+        elif start > bar["start"]:
+            out.append(self._emit(sym, bar))
+            bar = self._bars[sym] = self._new_bar(start)
+        elif start < bar["start"]:
+            late = True
+        if late:
+            self.late += 1
+
+        price = _num(item.get("Price") or item.get("price"))
+        if price is not None:
+            if bar["open"] is None:
+                bar["open"] = bar["high"] = bar["low"] = price
+            bar["high"] = max(bar["high"], price)
+            bar["low"] = min(bar["low"], price)
+            bar["close"] = price
+        oi = _num(item.get("openInterest") or item.get("oi"))
+        if oi is not None:
+            bar["oi"] = oi
+        bar["ticks"] += 1
+
+        raw = item.get("raw") if isinstance(item.get("raw"), dict) else {}
+        bids = _book_side(raw, ("bids", "bid"))
+        asks = _book_side(raw, ("asks", "ask"))
+        if bids is not None:
+            bar["bids"] = bids
+        if asks is not None:
+            bar["asks"] = asks
+        data = raw.get("raw") if isinstance(raw.get("raw"), dict) else raw
+        if data.get("e") in ("aggTrade", "trade") and "m" in data:
+            # m = buyer is maker → taker sold
+            if data.get("m"):
+                bar["sell"] += 1
+            else:
+                bar["buy"] += 1
+        return out
+
+    def _emit(self, sym: str, bar: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The bar as a db_writer payload. close_ts is when the bar became writable (bucket
+        end, capped at the emit time against exchange clock skew); db_writer measures
+        spill lag from it, since its ticks are up to one bucket old by design.
+        """
+        self.bars_out += 1
+        self._closed[sym] = bar["start"]
+        summary: Dict[str, Any] = {"bucket": self.label, "ticks": bar["ticks"]}
+        if bar["bids"] is not None:
+            summary["bids"] = bar["bids"]
+        if bar["asks"] is not None:
+            summary["asks"] = bar["asks"]
+        return {
+            "symbol": sym,
+            "Price": bar["close"],
+            "openInterest": bar["oi"],
+            "price_open": bar["open"],
+            "price_high": bar["high"],
+            "price_low": bar["low"],
+            "tick_count": bar["ticks"],
+            "taker_buy_count": bar["buy"],
+            "taker_sell_count": bar["sell"],
+            "updated_at": datetime.utcfromtimestamp(bar["start"]),
+            "close_ts": min(bar["start"] + self.resolution, time.time()),
+            "raw": summary,
+        }
+
+    def close_due(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Emit every bar whose bucket ended more than `grace` seconds ago."""
+        now = time.time() if now is None else now
+        out = []
+        for sym, bar in list(self._bars.items()):
+            if bar["start"] + self.resolution + self.grace <= now:
+                out.append(self._emit(sym, bar))
+                del self._bars[sym]
+        return out
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Emit all open bars (shutdown flush)."""
+        out = [self._emit(sym, bar) for sym, bar in self._bars.items()]
+        self._bars.clear()
+        return out
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "resolution": self.label,
+            "open_bars": len(self._bars),
+            "ticks_in": self.ticks_in,
+            "bars_out": self.bars_out,
+            "late": self.late,
+            "ratio": round(self.ticks_in / self.bars_out, 2) if self.bars_out else None,
+        }
+
+
+def from_settings() -> Optional[TickBucketer]:
+    """TickBucketer for METRICS_BUCKET, or None when bucketing is disabled."""
+    res = configured_resolution()
+    if not res:
+        return None
+    return TickBucketer(res, grace=float(getattr(cfg, "METRICS_BUCKET_GRACE", 0.5)))
+
+
+__all__ = ["TickBucketer", "BAR_FIELDS", "parse_resolution", "resolution_label",
+           "configured_resolution", "series_timeframe", "from_settings"]
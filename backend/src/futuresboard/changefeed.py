@@ -0,0 +1,226 @@
+# backend/src/futuresboard/changefeed.py
+"""
+PostgreSQL LISTEN/NOTIFY change feed for the quant pipeline.
+
+Writers (db._bulk_load) NOTIFY on CHANNEL inside the batch transaction, so the
+message is delivered only once the rows are committed (and never for a rolled
+back batch). Payload: {"t": table, "s": [symbols] or "*", "ts": max row ts}.
+
+One dedicated connection per process LISTENs (listen_loop, reconnecting with
+backoff) and fans changes out to Subscriptions. Downstream loops wait on their
+upstream tables instead of sleeping a blind interval:
+
+    quant_diagnostics → signals → confluence → regimes → context scores → trends
+
+Their interval stays as the fallback: while the listener is down a wait times out
+after `interval`, while it is up after max(interval, CHANGEFEED_IDLE_S).
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+from .config import get_settings
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.changefeed")
+logger.setLevel(logging.INFO)
+
+CHANNEL = "futuresboard_changes"
+# NOTIFY payloads must stay below 8000 bytes; beyond this many symbols send "*"
+MAX_SYMBOLS = 200
+DEFAULT_TABLES = (
+    "quant_features_5s,quant_diagnostics,quant_signals,quant_confluence,"
+    "quant_regimes,quant_context_scores,quant_context_trends"
+)
+
+
+class Change(NamedTuple):
+    table: str
+    symbols: Optional[frozenset]   # None = every symbol
+    ts: Optional[str]
+
+
+def enabled() -> bool:
+    return bool(getattr(cfg, "CHANGEFEED_ENABLED", True))
+
+
+def tables() -> set:
+    raw = getattr(cfg, "CHANGEFEED_TABLES", DEFAULT_TABLES) or ""
+    return {t.strip() for t in str(raw).split(",") if t.strip()}
+
+
+def publishes(table: str) -> bool:
+    return enabled() and table in tables()
+
+
+def encode(table: str, symbols: Iterable[Any] = (), max_ts: Any = None) -> str:
+    syms = sorted({str(s) for s in symbols if s})
+    ts = max_ts.isoformat() if isinstance(max_ts, datetime) else (str(max_ts) if max_ts is not None else None)
+    return json.dumps({"t": table, "s": syms if 0 < len(syms) <= MAX_SYMBOLS else "*", "ts": ts},
+                      separators=(",", ":"))
+
+
+def decode(payload: str) -> Optional[Change]:
+    try:
+        d = json.loads(payload)
+        syms = d.get("s")
+        return Change(str(d["t"]), frozenset(syms) if isinstance(syms, list) else None, d.get("ts"))
+    except Exception:
+        return None
+
+
+async def notify(conn, table: str, symbols: Iterable[Any] = (), max_ts: Any = None):
+    """Queue a change message on conn; delivered when its transaction commits."""
+    await conn.execute("SELECT pg_notify($1, $2)", CHANNEL, encode(table, symbols, max_ts))
+    _stats["sent"] += 1
+
+
+# ---------------------------------------------------------------------
+# Subscriptions (in-process fan-out)
+# ---------------------------------------------------------------------
+class Subscription:
+    """Pending changes of some tables for one consumer; wait() returns and clears them."""
+
+    def __init__(self, tables: Sequence[str], name: str = ""):
+        self.tables = set(tables)
+        self.name = name
+        self.pending: Dict[str, Optional[Set[str]]] = {}
+        self.event = asyncio.Event()
+        self.wakeups = 0
+
+    def push(self, change: Change):
+        if change.table not in self.tables:
+            return
+        cur = self.pending.get(change.table, set())
+        if cur is None or change.symbols is None:
+            self.pending[change.table] = None
+        else:
+            self.pending[change.table] = cur | change.symbols
+        self.event.set()
+
+    def drain(self) -> Dict[str, Optional[Set[str]]]:
+        out, self.pending = self.pending, {}
+        self.event.clear()
+        return out
+
+    async def wait(self, timeout: float) -> Dict[str, Optional[Set[str]]]:
+        """Changes since the last wait ({} on timeout). Bursts within CHANGEFEED_DEBOUNCE_S coalesce."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            return self.drain()
+        debounce = float(getattr(cfg, "CHANGEFEED_DEBOUNCE_S", 0.5))
+        if debounce > 0:
+            await asyncio.sleep(debounce)
+        self.wakeups += 1
+        return self.drain()
+
+
+_subs: List[Subscription] = []
+_conn = None
+_stats: Dict[str, Any] = {"sent": 0, "received": 0, "bad": 0, "reconnects": 0, "connected_since": None}
+
+
+def subscribe(tables: Sequence[str], name: str = "") -> Subscription:
+    sub = Subscription(tables, name)
+    _subs.append(sub)
+    return sub
+
+
+def unsubscribe(sub: Subscription):
+    if sub in _subs:
+        _subs.remove(sub)
+
+
+def dispatch(payload: str):
+    change = decode(payload)
+    if change is None:
+        _stats["bad"] += 1
+        return
+    _stats["received"] += 1
+    for sub in _subs:
+        sub.push(change)
+
+
+def connected() -> bool:
+    return _conn is not None and not _conn.is_closed()
+
+
+def wait_timeout(interval: float) -> float:
+    """Fallback wait: the loop interval while the listener is down, at least CHANGEFEED_IDLE_S while up."""
+    if not connected():
+        return interval
+    return max(interval, float(getattr(cfg, "CHANGEFEED_IDLE_S", 300)))
+
+
+async def wait(sub: Optional[Subscription], interval: float) -> Dict[str, Optional[Set[str]]]:
+    """Sleep until an upstream change (or the fallback timeout); plain sleep without a subscription."""
+    if sub is None or not enabled():
+        await asyncio.sleep(interval)
+        return {}
+    return await sub.wait(wait_timeout(interval))
+
+
+def _on_notify(_conn, _pid, _channel, payload):
+    dispatch(payload)
+
+
+async def listen_loop(dsn: str, check_every: float = 5.0):
+    """Keep one LISTEN connection open (reconnect with backoff); runs until cancelled."""
+    global _conn
+    import asyncpg
+
+    backoff = 1.0
+    try:
+        while True:
+            try:
+                _conn = await asyncpg.connect(dsn=dsn, timeout=10)
+                await _conn.add_listener(CHANNEL, _on_notify)
+                _stats["connected_since"] = time.time()
+                logger.info(f"[changefeed] listening on {CHANNEL}")
+                backoff = 1.0
+                while not _conn.is_closed():
+                    await asyncio.sleep(check_every)
+                logger.warning("[changefeed] listener connection closed, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[changefeed] listener unavailable ({e}); loops fall back to intervals")
+            _stats["reconnects"] += 1
+            _stats["connected_since"] = None
+            # a reconnect may have missed messages: wake every consumer once
+            for sub in _subs:
+                for t in sub.tables:
+                    sub.push(Change(t, None, None))
+            await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+            backoff = min(backoff * 2, 60.0)
+    finally:
+        if _conn is not None and not _conn.is_closed():
+            try:
+                await _conn.close()
+            except Exception:
+                pass
+        _conn = None
+
+
+def status() -> Dict[str, Any]:
+    return {
+        "enabled": enabled(),
+        "connected": connected(),
+        "tables": sorted(tables()),
+        **_stats,
+        "subscribers": [{"name": s.name, "tables": sorted(s.tables), "wakeups": s.wakeups} for s in _subs],
+    }
+
+
+__all__ = [
+    "CHANNEL", "Change", "Subscription", "enabled", "tables", "publishes", "encode", "decode", "notify",
+    "subscribe", "unsubscribe", "dispatch", "connected", "wait", "listen_loop", "status",
+]
@@ -0,0 +1,244 @@
+# backend/src/futuresboard/changes.py
+"""
+Change-only persistence for the quant snapshot tables.
+
+The quant loops recompute a full row per symbol (six per symbol for quant_signals)
+on every tick, and most ticks reproduce the previous values. db.bulk_write passes
+the rows of the tables in CHANGE_TABLES through select(): a row is persisted only
+when, compared with the last row *persisted* for its key (LATEST_KEYS, plus
+timeframe for quant_features),
+
+  - a text column differs (regime, bias, family, ...), or
+  - a numeric column moves beyond its tolerance, or a value appears / disappears, or
+  - CHANGE_HEARTBEAT_S elapsed since that key was last persisted.
+
+Comparing against the last persisted row (not the last computed one) keeps a slow
+drift from hiding under the tolerance forever. History readers see the same step
+function with far fewer rows; the heartbeat bounds how old the newest row of a
+quiet symbol can get. JSON columns and ts are never compared.
+
+Tolerances: "0.01" is absolute, "1%" relative to the larger magnitude, and
+"0.01|1%" passes when either one does. DEFAULT_TOLERANCES holds the per-table
+defaults ("*" = every numeric column without its own entry, absent = exact);
+CHANGE_TOLERANCES overrides them as "table.column=tol,..." (column may be "*").
+
+State is per process and starts empty, so the first row per key after a restart
+is always written. Callers commit() the rows once they are stored, so a failed
+batch is retried on the next tick instead of being treated as persisted.
+"""
+
+from __future__ import annotations
+import logging
+import math
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .config import get_settings
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.changes")
+logger.setLevel(logging.INFO)
+
+DEFAULT_TABLES = "quant_features,quant_signals,quant_signals_wide,quant_confluence,quant_regimes,quant_context_scores"
+
+KEYS: Dict[str, Tuple[str, ...]] = {
+    "quant_features": ("symbol", "timeframe"),
+    "quant_signals": ("symbol", "family"),
+    "quant_signals_wide": ("symbol",),
+    "quant_confluence": ("symbol",),
+    "quant_regimes": ("symbol",),
+    "quant_context_scores": ("symbol",),
+    "quant_diagnostics": ("symbol",),
+}
+
+# never compared: timestamps, payloads, back-references to other rows
+IGNORED = {"ts", "raw_json", "families", "components", "raw_ref", "diagnostics_ref", "diagnostic_ref", "id"}
+
+DEFAULT_TOLERANCES: Dict[str, Dict[str, str]] = {
+    "quant_features": {"*": "0.001|0.5%", "price": "0.05%"},
+    "quant_signals": {"score": "0.01", "confidence": "0.01"},
+    "quant_signals_wide": {"*": "0.01"},
+    "quant_confluence": {"confluence_score": "0.01", "bull_strength": "0.01", "bear_strength": "0.01",
+                         "volatility": "0.0001|1%"},
+    "quant_regimes": {"confluence_score": "0.01", "confidence": "0.01", "volatility": "0.0001|1%"},
+    "quant_context_scores": {"context_score": "0.01"},
+    "quant_diagnostics": {"*": "0.01"},
+}
+
+
+class Tolerance(NamedTuple):
+    abs: float = 0.0
+    rel: float = 0.0
+
+
+EXACT = Tolerance()
+
+_last: Dict[str, Dict[Tuple[Any, ...], Tuple[Dict[str, Any], float]]] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+_tolerances: Optional[Tuple[str, Dict[str, Dict[str, Tolerance]]]] = None
+
+
+def enabled() -> bool:
+    return bool(getattr(cfg, "CHANGE_ONLY_ENABLED", True))
+
+
+def tables() -> set:
+    raw = getattr(cfg, "CHANGE_TABLES", DEFAULT_TABLES) or ""
+    return {t.strip() for t in str(raw).split(",") if t.strip() in KEYS}
+
+
+def filters(table: str) -> bool:
+    return enabled() and table in tables()
+
+
+def heartbeat_s() -> float:
+    return float(getattr(cfg, "CHANGE_HEARTBEAT_S", 300) or 0)
+
+
+def parse_tolerance(spec: Any) -> Tolerance:
+    """"0.01" → absolute, "1%" → relative, "0.01|1%" → either."""
+    a = r = 0.0
+    for part in str(spec).split("|"):
+        part = part.strip()
+        if not part:
+            continue
+        if part.endswith("%"):
+            r = float(part[:-1]) / 100.0
+        else:
+            a = float(part)
+    return Tolerance(a, r)
+
+
+def tolerances() -> Dict[str, Dict[str, Tolerance]]:
+    """DEFAULT_TOLERANCES with CHANGE_TOLERANCES applied (parsed once per setting value)."""
+    global _tolerances
+    raw = str(getattr(cfg, "CHANGE_TOLERANCES", "") or "")
+    if _tolerances is not None and _tolerances[0] == raw:
+        return _tolerances[1]
+    out = {t: {c: parse_tolerance(s) for c, s in cols.items()} for t, cols in DEFAULT_TOLERANCES.items()}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        name, spec = item.split("=", 1)
+        table, _, col = name.strip().partition(".")
+        try:
+            out.setdefault(table, {})[col or "*"] = parse_tolerance(spec)
+        except ValueError:
+            logger.warning(f"[changes] ignoring bad CHANGE_TOLERANCES entry {item.strip()!r}")
+    _tolerances = (raw, out)
+    return out
+
+
+def _num(v: Any) -> Optional[float]:
+    if isinstance(v, bool) or v is None:
+        return None
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return f if math.isfinite(f) else None
+
+
+def moved(old: Any, new: Any, tol: Tolerance = EXACT) -> bool:
+    """True when `new` is a change worth persisting relative to `old`."""
+    # NaN/inf are stored as NULL (db._coerce_bulk_value), so compare them as such
+    old, new = (None if isinstance(v, float) and not math.isfinite(v) else v for v in (old, new))
+    if old is None or new is None:
+        return (old is None) != (new is None)
+    a, b = _num(old), _num(new)
+    if a is None or b is None:
+        # text values compare exactly
+        return old != new
+    return abs(a - b) > max(tol.abs, tol.rel * max(abs(a), abs(b)))
+
+
+def differs(table: str, old: Dict[str, Any], new: Dict[str, Any],
+            columns: Optional[Iterable[str]] = None) -> bool:
+    tols = tolerances().get(table, {})
+    wildcard = tols.get("*", EXACT)
+    for col in (columns if columns is not None else set(old) | set(new)):
+        if col in IGNORED:
+            continue
+        if moved(old.get(col), new.get(col), tols.get(col, wildcard)):
+            return True
+    return False
+
+
+def _key(table: str, row: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+    key = tuple(row.get(k) for k in KEYS[table])
+    return None if any(k is None for k in key) else key
+
+
+def _stat(table: str) -> Dict[str, int]:
+    return _stats.setdefault(table, {"kept": 0, "skipped": 0})
+
+
+def select(table: str, rows: Sequence[Dict[str, Any]], now: Optional[float] = None,
+           columns: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    The rows of `table` that should be persisted, in order. Only `columns` (default:
+    every key of the rows) are compared. Rows without a full key always pass; repeated
+    keys in one batch are compared against the row kept before.
+    """
+    if not rows or not filters(table):
+        return list(rows)
+    now = time.time() if now is None else now
+    beat = heartbeat_s()
+    seen = _last.get(table, {})
+    batch: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    out: List[Dict[str, Any]] = []
+    for r in rows:
+        k = _key(table, r)
+        if k is None:
+            out.append(r)
+            continue
+        prev = batch.get(k)
+        if prev is None:
+            state = seen.get(k)
+            # an expired heartbeat counts as "nothing persisted yet"
+            prev = state[0] if state is not None and not (beat > 0 and now - state[1] >= beat) else None
+        if prev is None or differs(table, prev, r, columns):
+            batch[k] = r
+            out.append(r)
+    st = _stat(table)
+    st["kept"] += len(out)
+    st["skipped"] += len(rows) - len(out)
+    return out
+
+
+def commit(table: str, rows: Iterable[Dict[str, Any]], now: Optional[float] = None,
+           columns: Optional[Sequence[str]] = None) -> None:
+    """Record `rows` as the last persisted state of their keys."""
+    if not filters(table):
+        return
+    now = time.time() if now is None else now
+    seen = _last.setdefault(table, {})
+    for r in rows:
+        k = _key(table, r)
+        if k is not None:
+            cols = r if columns is None else columns
+            seen[k] = ({c: r.get(c) for c in cols if c not in IGNORED}, now)
+
+
+def forget(table: Optional[str] = None) -> None:
+    """Drop the persisted-state cache (all tables by default); the next row per key is written."""
+    if table is None:
+        _last.clear()
+    else:
+        _last.pop(table, None)
+
+
+def status() -> Dict[str, Any]:
+    return {
+        "enabled": enabled(),
+        "heartbeat_s": heartbeat_s(),
+        "tables": {t: {**_stat(t), "keys": len(_last.get(t, {}))} for t in sorted(tables())},
+    }
+
+
+__all__ = [
+    "DEFAULT_TABLES", "DEFAULT_TOLERANCES", "KEYS", "Tolerance",
+    "enabled", "tables", "filters", "heartbeat_s", "parse_tolerance", "tolerances",
+    "moved", "differs", "select", "commit", "forget", "status",
+]
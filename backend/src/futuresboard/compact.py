@@ -0,0 +1,323 @@
+# backend/src/futuresboard/compact.py
+"""
+Compact quant row schema (version 2) for the two widest writers.
+
+    quant_features_5s   bounded ratios, percent changes and z-scores (REAL_COLUMNS)
+                        become REAL; price / oi_usd / vol_usd / atr_5s stay DOUBLE
+                        PRECISION. The `families` JSONB dict of six booleans becomes
+                        `family_mask SMALLINT` (bit i = FAMILIES[i]). raw_json has no
+                        default and is written only with QUANT_COMPACT_RAW_JSON.
+    quant_signals       one wide row per symbol per tick in quant_signals_wide
+                        (<family>_score / <family>_conf REAL per family) instead of
+                        six narrow rows.
+
+Compatibility views keep the v1 shape readable:
+
+    quant_signals, quant_signals_latest   views that unnest the wide rows back into
+                                          (symbol, ts, family, score, confidence, ...);
+                                          every family row of a tick shares its id
+    quant_features_5s_v1                  quant_features_5s with `families` as JSONB
+
+The applied version per component is recorded in `schema_version`. Tables created
+by init (fresh) are switched right away when QUANT_SCHEMA_VERSION >= 2; existing
+ones by run_migrations.py (migrate()). Writers in db.py pick the layout from
+versions() at init. The features ALTER rewrites the table once; it fails on
+compressed hypertable chunks and while rollup continuous aggregates depend on the
+columns, and that failure leaves the table on version 1.
+"""
+
+from __future__ import annotations
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .config import get_settings
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.compact")
+logger.setLevel(logging.INFO)
+
+SCHEMA_VERSION = 2
+FEATURES = "quant_features_5s"
+SIGNALS = "quant_signals"
+WIDE = "quant_signals_wide"
+COMPONENTS = (FEATURES, SIGNALS)
+# physical table → logical (v1) table name, for change-feed notifications
+LOGICAL = {WIDE: SIGNALS}
+
+FAMILIES = ("accumulation", "distribution", "momentum", "exhaustion", "orderflow", "divergence")
+
+REAL_COLUMNS = (
+    "oi_change_5s_pct", "oi_change_10s_pct", "price_change_5s_pct", "price_change_10s_pct",
+    "obi", "taker_buy_ratio", "taker_sell_ratio", "vpi",
+    "z_oi", "z_top_ls_acc", "z_obi", "z_funding", "zsc", "confidence",
+)
+
+VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    component TEXT PRIMARY KEY,
+    version SMALLINT NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
+"""
+
+
+def target_version() -> int:
+    return int(getattr(cfg, "QUANT_SCHEMA_VERSION", SCHEMA_VERSION) or 1)
+
+
+def keep_raw() -> bool:
+    return bool(getattr(cfg, "QUANT_COMPACT_RAW_JSON", False))
+
+
+def logical(table: str) -> str:
+    return LOGICAL.get(table, table)
+
+
+# ---------------------------------------------------------------------
+# Row mapping
+# ---------------------------------------------------------------------
+def family_mask(flags: Any) -> Optional[int]:
+    """{"momentum": True, ...} → bitmask over FAMILIES (None when flags is not a dict)."""
+    if not isinstance(flags, dict):
+        return None
+    return sum(1 << i for i, f in enumerate(FAMILIES) if flags.get(f))
+
+
+def family_flags(mask: Optional[int]) -> Dict[str, bool]:
+    m = int(mask or 0)
+    return {f: bool(m & (1 << i)) for i, f in enumerate(FAMILIES)}
+
+
+def wide_columns() -> List[str]:
+    return [c for f in FAMILIES for c in (f"{f}_score", f"{f}_conf")]
+
+
+def widen_signals(rows: Iterable[Dict[str, Any]], raw: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """
+    Narrow family rows → one wide row per (symbol, ts), in first-seen order. Families
+    outside FAMILIES are dropped; raw_json (the first one of the tick) only with `raw`.
+    """
+    raw = keep_raw() if raw is None else raw
+    out: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+    for r in rows:
+        fam = r.get("family")
+        if fam not in FAMILIES:
+            continue
+        key = (r.get("symbol"), r.get("ts"))
+        w = out.get(key)
+        if w is None:
+            w = out[key] = {"symbol": key[0], "ts": key[1], "diagnostics_ref": r.get("diagnostics_ref"),
+                            "raw_json": r.get("raw_json") if raw else None}
+        w[f"{fam}_score"] = r.get("score")
+        w[f"{fam}_conf"] = r.get("confidence")
+    return list(out.values())
+
+
+# ---------------------------------------------------------------------
+# SQL
+# ---------------------------------------------------------------------
+def mask_from_jsonb_sql(col: str) -> str:
+    bits = " + ".join(f"CASE WHEN {col}->>'{f}' = 'true' THEN {1 << i} ELSE 0 END" for i, f in enumerate(FAMILIES))
+    return f"({bits})::smallint"
+
+
+def flags_jsonb_sql(col: str) -> str:
+    pairs = ", ".join(f"'{f}', ({col} & {1 << i}) <> 0" for i, f in enumerate(FAMILIES))
+    return f"CASE WHEN {col} IS NULL THEN NULL ELSE jsonb_build_object({pairs}) END"
+
+
+def _as_double(col: str) -> str:
+    # float4 → numeric keeps the 6 significant digits that were stored (0.3, not 0.30000001192...)
+    return f"{col}::numeric::double precision"
+
+
+def features_alter_sql() -> str:
+    parts = [f"ALTER COLUMN {c} TYPE REAL" for c in REAL_COLUMNS]
+    parts += [
+        "ALTER COLUMN families DROP DEFAULT",
+        f"ALTER COLUMN families TYPE SMALLINT USING {mask_from_jsonb_sql('families')}",
+        "ALTER COLUMN raw_json DROP DEFAULT",
+    ]
+    return (f"ALTER TABLE {FEATURES}\n    " + ",\n    ".join(parts) + ";\n"
+            f"ALTER TABLE {FEATURES} RENAME COLUMN families TO family_mask;")
+
+
+def features_v1_view_sql(columns: Sequence[str]) -> str:
+    """quant_features_5s in its v1 shape; `columns` are the table's columns in order."""
+    sel = []
+    for c in columns:
+        if c == "family_mask":
+            sel.append(f"{flags_jsonb_sql('family_mask')} AS families")
+        elif c in REAL_COLUMNS:
+            sel.append(f"{_as_double(c)} AS {c}")
+        else:
+            sel.append(c)
+    return f"CREATE OR REPLACE VIEW {FEATURES}_v1 AS\nSELECT " + ",\n       ".join(sel) + f"\nFROM {FEATURES};"
+
+
+def wide_table_sql(name: str = WIDE) -> str:
+    fams = ",\n    ".join(f"{c} REAL" for c in wide_columns())
+    return f"""
+CREATE TABLE IF NOT EXISTS {name} (
+    id BIGSERIAL PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    symbol_id SMALLINT,
+    ts TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    diagnostics_ref BIGINT,
+    {fams},
+    raw_json JSONB
+);
+"""
+
+
+def signals_backfill_sql() -> str:
+    aggs = ", ".join(
+        f"max(score) FILTER (WHERE family = '{f}'), max(confidence) FILTER (WHERE family = '{f}')" for f in FAMILIES
+    )
+    return (
+        f"INSERT INTO {WIDE} (symbol, symbol_id, ts, diagnostics_ref, {', '.join(wide_columns())})\n"
+        f"SELECT symbol, max(symbol_id), ts, max(diagnostics_ref), {aggs}\n"
+        f"FROM {SIGNALS} WHERE family = ANY($1::text[])\nGROUP BY symbol, ts ORDER BY ts"
+    )
+
+
+def signals_view_sql(view: str, source: str) -> str:
+    """Narrow (v1) view over a wide table: one row per stored family score."""
+    values = ", ".join(f"('{f}', w.{f}_score, w.{f}_conf)" for f in FAMILIES)
+    return (
+        f"CREATE OR REPLACE VIEW {view} AS\n"
+        f"SELECT w.id, w.symbol, w.symbol_id, w.ts, f.family,\n"
+        f"       {_as_double('f.score')} AS score, {_as_double('f.confidence')} AS confidence,\n"
+        f"       w.diagnostics_ref, w.raw_json\n"
+        f"FROM {source} w\n"
+        f"CROSS JOIN LATERAL (VALUES {values}) AS f(family, score, confidence)\n"
+        f"WHERE f.score IS NOT NULL OR f.confidence IS NOT NULL;"
+    )
+
+
+# ---------------------------------------------------------------------
+# Versions, schema (init) and migration (run_migrations)
+# ---------------------------------------------------------------------
+async def _relkind(conn, name: str) -> Optional[str]:
+    return await conn.fetchval("SELECT relkind::text FROM pg_class WHERE oid = to_regclass($1)", name)
+
+
+async def _columns(conn, table: str) -> List[str]:
+    rows = await conn.fetch(
+        "SELECT attname FROM pg_attribute WHERE attrelid = $1::regclass AND attnum > 0 "
+        "AND NOT attisdropped ORDER BY attnum", table,
+    )
+    return [r["attname"] for r in rows]
+
+
+async def versions(conn) -> Dict[str, int]:
+    """component → applied schema version (1 when never migrated)."""
+    await conn.execute(VERSION_SQL)
+    rows = await conn.fetch("SELECT component, version FROM schema_version WHERE component = ANY($1::text[])",
+                            list(COMPONENTS))
+    out = {c: 1 for c in COMPONENTS}
+    out.update({r["component"]: int(r["version"]) for r in rows})
+    return out
+
+
+async def _set_version(conn, component: str, version: int = SCHEMA_VERSION):
+    await conn.execute(
+        "INSERT INTO schema_version (component, version) VALUES ($1, $2) "
+        "ON CONFLICT (component) DO UPDATE SET version = EXCLUDED.version, applied_at = now()",
+        component, version,
+    )
+
+
+async def migrate_features(conn) -> str:
+    if await _relkind(conn, FEATURES) is None:
+        return "missing"
+    if "family_mask" in await _columns(conn, FEATURES):
+        await _set_version(conn, FEATURES)
+        return "already compact"
+    async with conn.transaction():
+        await conn.execute(features_alter_sql())
+        await _set_version(conn, FEATURES)
+    await conn.execute(features_v1_view_sql(await _columns(conn, FEATURES)))
+    return "altered in place"
+
+
+async def migrate_signals(conn) -> str:
+    """quant_signals rows → quant_signals_wide, then the v1 names become views."""
+    kind = await _relkind(conn, SIGNALS)
+    if kind == "v":
+        await _set_version(conn, SIGNALS)
+        return "already compact"
+    async with conn.transaction():
+        await conn.execute(wide_table_sql())
+        moved = 0
+        if kind is not None:
+            status = await conn.execute(signals_backfill_sql(), list(FAMILIES))
+            moved = int(status.rsplit(" ", 1)[-1])
+            await conn.execute(f"DROP TABLE IF EXISTS {SIGNALS}_latest")
+            await conn.execute(f"DROP TABLE {SIGNALS}")
+        await conn.execute(signals_view_sql(SIGNALS, WIDE))
+        await _set_version(conn, SIGNALS)
+    return f"rewritten ({moved} wide rows)" if kind is not None else "created"
+
+
+MIGRATIONS = {FEATURES: migrate_features, SIGNALS: migrate_signals}
+
+
+async def migrate(conn, components: Iterable[str] = COMPONENTS,
+                  log: Callable[[str], Any] = print) -> Dict[str, str]:
+    """
+    Bring `components` to SCHEMA_VERSION (idempotent). Per-component failures are logged
+    and leave that component on version 1. No-op while QUANT_SCHEMA_VERSION < 2.
+    """
+    if target_version() < SCHEMA_VERSION:
+        return {}
+    current = await versions(conn)
+    out: Dict[str, str] = {}
+    for comp in components:
+        if current.get(comp, 1) >= SCHEMA_VERSION and await _relkind(conn, WIDE if comp == SIGNALS else comp):
+            out[comp] = "up to date"
+            continue
+        try:
+            out[comp] = await MIGRATIONS[comp](conn)
+        except Exception as e:
+            out[comp] = f"failed: {e}"
+            logger.warning(f"[compact] {comp}: migration failed, staying on version 1: {e}")
+        log(f"🗜️  {comp}: {out[comp]}")
+    return out
+
+
+async def ensure_schema(conn, fresh: Iterable[str] = ()) -> set:
+    """
+    Switch components whose tables were created just now (`fresh`, still empty) to the
+    compact layout. Returns the components at SCHEMA_VERSION.
+    """
+    fresh = set(fresh)
+    todo = [c for c in COMPONENTS if c in fresh]
+    if todo:
+        await migrate(conn, todo, log=logger.info)
+    return {c for c, v in (await versions(conn)).items() if v >= SCHEMA_VERSION}
+
+
+async def ensure_views(conn, active: Iterable[str]) -> None:
+    """
+    (Re)create the compatibility views of active components whose sources exist. Views
+    bind to a table, not a name, so this also re-points them after partitions.convert_table
+    renamed their source to *_legacy.
+    """
+    active = set(active)
+    if SIGNALS in active:
+        for view, source in ((SIGNALS, WIDE), (f"{SIGNALS}_latest", f"{WIDE}_latest")):
+            if await _relkind(conn, source) in ("r", "p") and await _relkind(conn, view) in (None, "v"):
+                await conn.execute(signals_view_sql(view, source))
+    if FEATURES in active and await _relkind(conn, FEATURES) is not None:
+        await conn.execute(features_v1_view_sql(await _columns(conn, FEATURES)))
+
+
+__all__ = [
+    "SCHEMA_VERSION", "FEATURES", "SIGNALS", "WIDE", "COMPONENTS", "FAMILIES", "REAL_COLUMNS",
+    "target_version", "keep_raw", "logical", "family_mask", "family_flags", "wide_columns", "widen_signals",
+    "mask_from_jsonb_sql", "flags_jsonb_sql", "features_alter_sql", "features_v1_view_sql",
+    "wide_table_sql", "signals_backfill_sql", "signals_view_sql",
+    "versions", "migrate_features", "migrate_signals", "migrate", "ensure_schema", "ensure_views",
+]
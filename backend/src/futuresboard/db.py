@@ -18,17 +18,20 @@ import os
 import asyncio
 import logging
 import math
-import json
-from typing import Any, Dict, List, Optional, Sequence
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
 import asyncpg
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 from dateutil import parser as dateutil_parser
 
 # The quant engine exports a helper safe_float used by some insert helpers
-from .utils import safe_float
+from .utils import extract_book_top_volumes, safe_float
 
 # unified config (pydantic settings)
 from .config import get_settings
+from . import archive, blobstore, bucketer, changefeed, changes, compact, jsoncodec, partitions, pools, querystats, rollups, symbols, timeseries
 cfg = get_settings()
 
 logger = logging.getLogger("futuresboard.db")
@@ -40,10 +43,33 @@ logger.setLevel(logging.INFO)
 DATABASE_URL = cfg.DATABASE_URL
 POOL_MIN_SIZE = cfg.DB_POOL_MIN
 POOL_MAX_SIZE = cfg.DB_POOL_MAX
-
-_pool: Optional[asyncpg.pool.Pool] = None
+# reads get their own pool on the primary (0 = share the write pool) and optionally a replica
+READ_POOL_MIN_SIZE = int(getattr(cfg, "DB_READ_POOL_MIN", 1))
+READ_POOL_MAX_SIZE = int(getattr(cfg, "DB_READ_POOL_MAX", 10))
+REPLICA_URL = getattr(cfg, "DB_REPLICA_URL", "") or ""
+REPLICA_MAX_LAG_S = float(getattr(cfg, "DB_REPLICA_MAX_LAG_S", 5.0))
+REPLICA_LAG_CHECK_S = float(getattr(cfg, "DB_REPLICA_LAG_CHECK_S", 2.0))
+
+_pool: Optional[pools.InstrumentedPool] = None           # write pool (primary)
+_read_pool: Optional[pools.InstrumentedPool] = None      # read pool (primary)
+_replica_pool: Optional[pools.InstrumentedPool] = None   # read pool (replica)
+_replica_lag_s: Optional[float] = None                   # None = unknown / unreachable
+_replica_checked_at = 0.0
+_replica_lock = asyncio.Lock()
+_read_routes = {"replica": 0, "primary": 0}
 _init_lock = asyncio.Lock()
 
+# "timescale" | "partitioned" | "plain" — resolved in init_db_async (see timeseries.py)
+TIMESERIES_MODE: str = "plain"
+_HYPERTABLES: set = set()
+_PARTITIONED: set = set()
+# tables whose per-symbol index leads with symbol_id (readers filter on it; see symbols.py)
+_SYMBOL_ID_TABLES: set = set()
+# METRICS_UPSERT active: the (symbol, timeframe, updated_at) unique key exists (see ensure_metrics_bucket_key)
+_METRICS_UPSERT: bool = False
+# compact (v2) quant components present in the database (see compact.py)
+_COMPACT: set = set()
+
 # ---------------------------------------------------------------------
 # DB Connection Safety Helpers
 # ---------------------------------------------------------------------
@@ -163,10 +189,36 @@ COLS = [
     "vpi",
     "zsc",
     "lsm",
+    # write-side bucket bars (bucketer.py)
+    "price_open",
+    "price_high",
+    "price_low",
+    "tick_count",
+    "taker_buy_count",
+    "taker_sell_count",
+    "last_bar_at",
+    # typed order-book depth (survives raw_json offload) + side-store reference (blobstore.py)
+    "book_bid_top5",
+    "book_ask_top5",
+    "raw_ref",
     "updated_at",
     "raw_json"
 ]
 
+# columns added after the original schema (ALTER ... ADD COLUMN IF NOT EXISTS on startup)
+METRICS_BAR_COLUMNS = {
+    "price_open": "DOUBLE PRECISION",
+    "price_high": "DOUBLE PRECISION",
+    "price_low": "DOUBLE PRECISION",
+    "tick_count": "INTEGER",
+    "taker_buy_count": "INTEGER",
+    "taker_sell_count": "INTEGER",
+    "last_bar_at": "TIMESTAMPTZ",
+    "book_bid_top5": "DOUBLE PRECISION",
+    "book_ask_top5": "DOUBLE PRECISION",
+    "raw_ref": "TEXT",
+}
+
 INSERT_SQL = f"""
 INSERT INTO metrics ({','.join(COLS)})
 VALUES ({','.join(f'${i+1}' for i in range(len(COLS)))})
@@ -180,23 +232,26 @@ async def init_db_async():
     Initialize asyncpg pool and create required tables if absent.
     This function is tolerant (CREATE IF NOT EXISTS) so R&D forks can iterate.
     """
-    global _pool
+    global _pool, TIMESERIES_MODE, _HYPERTABLES, _PARTITIONED, _SYMBOL_ID_TABLES, _METRICS_UPSERT, _COMPACT
     async with _init_lock:
         # If a pool already exists and isn't closed, just reuse it
         if _pool and not getattr(_pool, "_closed", True):
             return
 
+        _TABLE_COLUMNS.clear()
         logger.info(f"[DB] connecting to database → {DATABASE_URL}")
         try:
             # wrap create_pool in a timeout so Windows async hang cannot occur
-            _pool = await asyncio.wait_for(
+            _pool = pools.InstrumentedPool("write", await asyncio.wait_for(
                 asyncpg.create_pool(
                     dsn=DATABASE_URL,
                     min_size=POOL_MIN_SIZE,
                     max_size=POOL_MAX_SIZE,
+                    connection_class=pools.connection_class(),
+                    init=pools.init_connection,
                 ),
                 timeout=10.0,  # hard timeout for network hangs
-            )
+            ))
             logger.info("[DB] connection pool created")
         except asyncio.TimeoutError:
             logger.error("[DB] ❌ Timeout while creating pool (10 s)")
@@ -207,11 +262,14 @@ async def init_db_async():
 
         # Create tables/indexes if missing (auto-create behaviour for R&D)
         async with _pool.acquire() as conn:
-            # metrics + index
+            # tables created by this call get symbol_id indexes right away (symbols.py)
+            fresh = [t for t in symbols.TABLES if not await timeseries.table_exists(conn, t)]
+            # metrics
             await conn.execute("""
             CREATE TABLE IF NOT EXISTS metrics (
                 id BIGSERIAL PRIMARY KEY,
                 symbol TEXT NOT NULL,
+                symbol_id SMALLINT,
                 timeframe TEXT NOT NULL,
                 price DOUBLE PRECISION,
                 price_change_24h_pct DOUBLE PRECISION,
@@ -254,10 +312,30 @@ async def init_db_async():
                 vpi DOUBLE PRECISION,
                 zsc DOUBLE PRECISION,
                 lsm DOUBLE PRECISION,
+                price_open DOUBLE PRECISION,
+                price_high DOUBLE PRECISION,
+                price_low DOUBLE PRECISION,
+                tick_count INTEGER,
+                taker_buy_count INTEGER,
+                taker_sell_count INTEGER,
                 updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
                 raw_json JSONB DEFAULT '{}'::jsonb
             );
-            CREATE INDEX IF NOT EXISTS metrics_symbol_tf_idx ON metrics(symbol, timeframe, updated_at DESC);
+            """)
+            # bring pre-bucketing metrics tables up to date
+            await conn.execute("".join(
+                f"ALTER TABLE metrics ADD COLUMN IF NOT EXISTS {c} {t};" for c, t in METRICS_BAR_COLUMNS.items()
+            ))
+
+            # ticks (narrow append-only WS ticks; see ticks.py)
+            await conn.execute("""
+            CREATE TABLE IF NOT EXISTS ticks (
+                ts TIMESTAMP WITH TIME ZONE NOT NULL,
+                symbol_id SMALLINT NOT NULL,
+                kind SMALLINT NOT NULL,
+                price DOUBLE PRECISION,
+                qty DOUBLE PRECISION
+            );
             """)
 
             # market_rest_metrics (raw REST snapshots)
@@ -266,6 +344,7 @@ async def init_db_async():
                 id BIGSERIAL PRIMARY KEY,
                 ts TIMESTAMP WITH TIME ZONE,
                 symbol TEXT,
+                symbol_id SMALLINT,
                 open DOUBLE PRECISION,
                 high DOUBLE PRECISION,
                 low DOUBLE PRECISION,
@@ -281,7 +360,6 @@ async def init_db_async():
                 open_interest_hist_usd DOUBLE PRECISION,
                 metadata JSONB DEFAULT '{}'::jsonb
             );
-            CREATE INDEX IF NOT EXISTS market_rest_metrics_symbol_ts_idx ON market_rest_metrics(symbol, ts DESC);
             """)
 
             # quant_summary (light dashboard summary)
@@ -289,6 +367,7 @@ async def init_db_async():
             CREATE TABLE IF NOT EXISTS quant_summary (
                 id BIGSERIAL PRIMARY KEY,
                 symbol TEXT,
+                symbol_id SMALLINT,
                 timeframe TEXT,
                 oi_z DOUBLE PRECISION,
                 ls_delta_pct DOUBLE PRECISION,
@@ -299,17 +378,13 @@ async def init_db_async():
                 updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
             );
             """)
-            # Unique index for potential ON CONFLICT usage (keeps symbol+timeframe uniqueness intent)
-            await conn.execute("""
-            CREATE INDEX IF NOT EXISTS quant_summary_symbol_tf_idx
-            ON quant_summary(symbol, timeframe, updated_at DESC);
-            """)
 
             # quant_features (replay / record of computed metrics)
             await conn.execute("""
             CREATE TABLE IF NOT EXISTS quant_features (
                 id BIGSERIAL PRIMARY KEY,
                 symbol TEXT NOT NULL,
+                symbol_id SMALLINT,
                 timeframe TEXT DEFAULT '1m',
                 ts TIMESTAMP WITH TIME ZONE DEFAULT now(),
                 price DOUBLE PRECISION,
@@ -337,8 +412,6 @@ async def init_db_async():
                 families JSONB DEFAULT '{}'::jsonb,
                 raw_json JSONB DEFAULT '{}'::jsonb
             );
-            CREATE INDEX IF NOT EXISTS quant_features_symbol_ts_idx
-            ON quant_features(symbol, ts DESC);
             """)
 
             # quant_features_5s (high-frequency table)
@@ -346,6 +419,7 @@ async def init_db_async():
             CREATE TABLE IF NOT EXISTS quant_features_5s (
                 id BIGSERIAL PRIMARY KEY,
                 symbol TEXT NOT NULL,
+                symbol_id SMALLINT,
                 timeframe TEXT DEFAULT '5s',
                 ts TIMESTAMP WITH TIME ZONE DEFAULT now(),
                 price DOUBLE PRECISION,
@@ -369,8 +443,6 @@ async def init_db_async():
                 families JSONB DEFAULT '{}'::jsonb,
                 raw_json JSONB DEFAULT '{}'::jsonb
             );
-            CREATE INDEX IF NOT EXISTS quant_features_5s_symbol_ts_idx
-            ON quant_features_5s(symbol, ts DESC);
             """)
 
             # quant_diagnostics (rolling correlations & volatility)
@@ -378,6 +450,7 @@ async def init_db_async():
             CREATE TABLE IF NOT EXISTS quant_diagnostics (
                 id BIGSERIAL PRIMARY KEY,
                 symbol TEXT NOT NULL,
+                symbol_id SMALLINT,
                 ts TIMESTAMP WITH TIME ZONE DEFAULT now(),
                 window_s INT DEFAULT 60,
                 corr_price_oi DOUBLE PRECISION,
@@ -388,8 +461,6 @@ async def init_db_async():
                 confluence_density DOUBLE PRECISION,
                 raw_json JSONB DEFAULT '{}'::jsonb
             );
-            CREATE INDEX IF NOT EXISTS quant_diagnostics_symbol_ts_idx
-            ON quant_diagnostics(symbol, ts DESC);
             """)
 
             # quant_signals (family-level signals)
@@ -397,6 +468,7 @@ async def init_db_async():
             CREATE TABLE IF NOT EXISTS quant_signals (
                 id BIGSERIAL PRIMARY KEY,
                 symbol TEXT NOT NULL,
+                symbol_id SMALLINT,
                 ts TIMESTAMP WITH TIME ZONE DEFAULT now(),
                 family TEXT,
                 score DOUBLE PRECISION,
@@ -404,8 +476,6 @@ async def init_db_async():
                 diagnostics_ref BIGINT,
                 raw_json JSONB DEFAULT '{}'::jsonb
             );
-            CREATE INDEX IF NOT EXISTS quant_signals_symbol_ts_idx
-            ON quant_signals(symbol, ts DESC);
             """)
 
             # quant_confluence (aggregated confluence)
@@ -413,6 +483,7 @@ async def init_db_async():
             CREATE TABLE IF NOT EXISTS quant_confluence (
                 id BIGSERIAL PRIMARY KEY,
                 symbol TEXT NOT NULL,
+                symbol_id SMALLINT,
                 ts TIMESTAMP WITH TIME ZONE DEFAULT now(),
                 confluence_score DOUBLE PRECISION,
                 bull_strength DOUBLE PRECISION,
@@ -422,8 +493,6 @@ async def init_db_async():
                 diagnostic_ref BIGINT,
                 raw_json JSONB DEFAULT '{}'::jsonb
             );
-            CREATE INDEX IF NOT EXISTS quant_confluence_symbol_ts_idx
-            ON quant_confluence(symbol, ts DESC);
             """)
 
             # quant_regimes (market regimes)
@@ -431,6 +500,7 @@ async def init_db_async():
             CREATE TABLE IF NOT EXISTS quant_regimes (
                 id BIGSERIAL PRIMARY KEY,
                 symbol TEXT NOT NULL,
+                symbol_id SMALLINT,
                 ts TIMESTAMP WITH TIME ZONE DEFAULT now(),
                 confluence_score DOUBLE PRECISION,
                 volatility DOUBLE PRECISION,
@@ -438,8 +508,6 @@ async def init_db_async():
                 confidence DOUBLE PRECISION,
                 raw_json JSONB DEFAULT '{}'::jsonb
             );
-            CREATE INDEX IF NOT EXISTS quant_regimes_symbol_ts_idx
-            ON quant_regimes(symbol, ts DESC);
             """)
 
             # quant_context_scores (context scoring)
@@ -447,13 +515,12 @@ async def init_db_async():
             CREATE TABLE IF NOT EXISTS quant_context_scores (
                 id BIGSERIAL PRIMARY KEY,
                 symbol TEXT NOT NULL,
+                symbol_id SMALLINT,
                 ts TIMESTAMPTZ NOT NULL DEFAULT now(),
                 context_score DOUBLE PRECISION,
                 bias TEXT,
                 components JSONB DEFAULT '{}'::jsonb
             );
-            CREATE INDEX IF NOT EXISTS quant_context_scores_symbol_ts_idx
-                ON quant_context_scores(symbol, ts DESC);
             """)
 
             # quant_context_trends (context transitions)
@@ -461,23 +528,152 @@ async def init_db_async():
             CREATE TABLE IF NOT EXISTS quant_context_trends (
                 id BIGSERIAL PRIMARY KEY,
                 symbol TEXT NOT NULL,
+                symbol_id SMALLINT,
                 ts TIMESTAMP WITH TIME ZONE DEFAULT now(),
                 from_bias TEXT,
                 to_bias TEXT,
                 context_score DOUBLE PRECISION,
                 raw_json JSONB DEFAULT '{}'::jsonb
             );
-            CREATE INDEX IF NOT EXISTS quant_context_trends_symbol_ts_idx
-            ON quant_context_trends(symbol, ts DESC);
+
+            -- compressed raw_json side store (RAW_STORE=table, see blobstore.py)
+            CREATE TABLE IF NOT EXISTS raw_payloads (
+                id BIGSERIAL PRIMARY KEY,
+                src TEXT NOT NULL,
+                symbol TEXT,
+                ts TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                codec SMALLINT NOT NULL,
+                payload BYTEA NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS raw_payloads_ts_idx ON raw_payloads(ts);
+            ALTER TABLE quant_features_5s ADD COLUMN IF NOT EXISTS raw_ref TEXT;
             """)
 
+            # compact v2 layout: fresh tables switch now, existing ones via run_migrations.py
+            try:
+                _COMPACT = await compact.ensure_schema(conn, fresh)
+            except Exception as e:
+                logger.warning(f"[DB] compact schema init failed, writing the v1 layout: {e}")
+                _COMPACT = set()
+
+            # symbol dictionary + per-symbol indexes (symbol_id once a table is migrated)
+            try:
+                _SYMBOL_ID_TABLES = await symbols.ensure_schema(conn, fresh)
+            except Exception as e:
+                logger.warning(f"[DB] symbol dictionary init failed: {e}")
+
+            # time-series storage mode (hypertables are created by run_migrations.py)
+            try:
+                TIMESERIES_MODE = await timeseries.detect_mode(conn)
+                _HYPERTABLES = set(await timeseries.hypertables(conn)) if TIMESERIES_MODE == "timescale" else set()
+                _PARTITIONED = set(await partitions.partitioned_tables(conn, list(timeseries.TIMESERIES_TABLES)))
+                for tbl in _PARTITIONED:
+                    # premake today's + upcoming day partitions before the first insert
+                    await partitions.ensure_future(conn, tbl)
+                logger.info(f"[DB] time-series mode: {TIMESERIES_MODE} "
+                            f"({len(_HYPERTABLES)} hypertables, {len(_PARTITIONED)} partitioned tables)")
+            except Exception as e:
+                logger.warning(f"[DB] time-series mode detection failed, assuming plain: {e}")
+                TIMESERIES_MODE, _HYPERTABLES, _PARTITIONED = "plain", set(), set()
+
+            try:
+                await ensure_latest_tables(conn)
+                await compact.ensure_views(conn, _COMPACT)
+            except Exception as e:
+                logger.warning(f"[DB] *_latest tables init failed: {e}")
+
+            if getattr(cfg, "METRICS_UPSERT", False):
+                _METRICS_UPSERT = await ensure_metrics_bucket_key(conn)
+
+            # multi-resolution rollups of quant_features_5s (continuous aggregates or in-app tables)
+            if getattr(cfg, "ROLLUPS_ENABLED", True):
+                try:
+                    await rollups.ensure_schema(conn)
+                except Exception as e:
+                    logger.warning(f"[DB] rollup schema init failed: {e}")
+
             logger.info("[DB] initialized and ready")
 
+        await _open_read_pools()
+
+# ---------------------------------------------------------------------
+# Read pools & replica routing (see pools.py)
+# ---------------------------------------------------------------------
+async def _open_read_pools():
+    """Primary read pool and optional replica pool; failures leave reads on the write pool."""
+    global _read_pool, _replica_pool, _replica_lag_s, _replica_checked_at
+    if READ_POOL_MAX_SIZE > 0 and _read_pool is None:
+        try:
+            _read_pool = pools.InstrumentedPool("read", await asyncio.wait_for(
+                asyncpg.create_pool(dsn=DATABASE_URL, min_size=min(READ_POOL_MIN_SIZE, READ_POOL_MAX_SIZE),
+                                    max_size=READ_POOL_MAX_SIZE, connection_class=pools.connection_class(),
+                                    init=pools.init_connection),
+                timeout=10.0,
+            ))
+            logger.info(f"[DB] read pool created (max={READ_POOL_MAX_SIZE})")
+        except Exception as e:
+            logger.warning(f"[DB] read pool unavailable, reads share the write pool: {e}")
+    if REPLICA_URL and _replica_pool is None:
+        try:
+            _replica_pool = pools.InstrumentedPool("replica", await asyncio.wait_for(
+                asyncpg.create_pool(dsn=REPLICA_URL, min_size=min(READ_POOL_MIN_SIZE, max(1, READ_POOL_MAX_SIZE)),
+                                    max_size=max(1, READ_POOL_MAX_SIZE), connection_class=pools.connection_class(),
+                                    init=pools.init_connection),
+                timeout=10.0,
+            ))
+            _replica_lag_s, _replica_checked_at = None, 0.0
+            logger.info("[DB] replica pool created")
+        except Exception as e:
+            logger.warning(f"[DB] replica unavailable, reads stay on the primary: {e}")
+
+
+async def _check_replica_lag() -> Optional[float]:
+    """Measured replay lag of the replica, refreshed at most every DB_REPLICA_LAG_CHECK_S."""
+    global _replica_lag_s, _replica_checked_at
+    if _replica_pool is None:
+        return None
+    if time.monotonic() - _replica_checked_at < REPLICA_LAG_CHECK_S:
+        return _replica_lag_s
+    async with _replica_lock:
+        if time.monotonic() - _replica_checked_at < REPLICA_LAG_CHECK_S:
+            return _replica_lag_s
+        prev_ok = pools.replica_usable(_replica_lag_s, REPLICA_MAX_LAG_S)
+        try:
+            async with _replica_pool.acquire(timeout=2.0) as conn:
+                _replica_lag_s = float(await conn.fetchval(pools.REPLICA_LAG_SQL))
+        except Exception as e:
+            _replica_lag_s = None
+            logger.debug(f"[DB] replica lag check failed: {e}")
+        _replica_checked_at = time.monotonic()
+        ok = pools.replica_usable(_replica_lag_s, REPLICA_MAX_LAG_S)
+        if ok != prev_ok:
+            state = "back on replica" if ok else "falling back to primary"
+            logger.warning(f"[DB] reads {state} (replica lag={_replica_lag_s})")
+    return _replica_lag_s
+
+
+async def read_pool() -> pools.InstrumentedPool:
+    """Pool for read-only queries: replica when fresh enough, else primary read pool, else write pool."""
+    await ensure_connected()
+    if _replica_pool is not None and pools.replica_usable(await _check_replica_lag(), REPLICA_MAX_LAG_S):
+        _read_routes["replica"] += 1
+        return _replica_pool
+    _read_routes["primary"] += 1
+    return _read_pool or _pool
+
+
 # ---------------------------------------------------------------------
 # Close pool
 # ---------------------------------------------------------------------
 async def close_db_async():
-    global _pool
+    global _pool, _read_pool, _replica_pool
+    for name, p in (("read", _read_pool), ("replica", _replica_pool)):
+        if p:
+            try:
+                await p.close()
+            except Exception as e:
+                logger.warning(f"[DB] closing {name} pool failed: {e}")
+    _read_pool = _replica_pool = None
     if _pool:
         await _pool.close()
         _pool = None
@@ -511,27 +707,124 @@ def _safe_num(x):
     except Exception:
         return None
 
-def _safe_json(obj):
-    try:
-        return json.dumps(obj, default=str)
-    except Exception:
-        return "{}"
-
-def sanitize_json(obj):
-    """Recursively replace NaN/Inf floats with None to make JSON safe."""
-    if isinstance(obj, dict):
-        return {k: sanitize_json(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [sanitize_json(v) for v in obj]
-    elif isinstance(obj, float):
-        if math.isnan(obj) or math.isinf(obj):
-            return None
-        return obj
-    return obj
+def _safe_int(x):
+    v = _safe_num(x)
+    if v is None or not math.isfinite(v):
+        return None
+    return int(v)
 
 # ---------------------------------------------------------------------
 # save_metrics_v3_async - primary metrics ingestion (bulk batching)
 # ---------------------------------------------------------------------
+def _coerce_ts(v) -> Optional[datetime]:
+    """datetime / ISO string / epoch seconds → datetime (None if unusable)."""
+    if v is None:
+        return None
+    if isinstance(v, datetime):
+        return v
+    try:
+        if isinstance(v, (int, float)):
+            return datetime.utcfromtimestamp(float(v))
+        return datetime.fromisoformat(str(v))
+    except Exception:
+        pass
+    try:
+        return dateutil_parser.isoparse(str(v))
+    except Exception:
+        return None
+
+
+def _book_tops(m: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
+    """Top-5 bid / ask size of a depth payload carried in the row (None when there is no book)."""
+    try:
+        return extract_book_top_volumes(m, top_n=5)
+    except Exception:
+        return None, None
+
+
+def _prepare_metric_row(m: Dict[str, Any], timeframe: str) -> Optional[List[Any]]:
+    """
+    Build one `metrics` row in COLS order from a tolerant metric dict.
+    Honours an explicit `updated_at` (e.g. rows replayed from the disk spill);
+    otherwise stamps utcnow(). Returns None for rows without a symbol.
+    """
+    if not isinstance(m, dict):
+        logger.debug("[save_metrics_v3_async] skip non-dict")
+        return None
+    symbol = (m.get("symbol") or m.get("sym") or "").strip()
+    if not symbol:
+        logger.debug("[save_metrics_v3_async] skip missing symbol")
+        return None
+
+    def g(k, fallback=None):
+        # accept upper/lower variants
+        return _safe_num(m.get(k, fallback))
+
+    updated_at = _coerce_ts(m.get("updated_at")) or datetime.utcnow()
+    row = [
+        symbol,
+        timeframe,
+        g("Price") or g("price") or None,
+        g("price_change_24h_pct"),
+        g("volume_24h"),
+        g("volume_change_24h_pct"),
+        g("market_cap"),
+        g("oi_usd"),
+        g("oi_abs_usd"),
+        g("oi_change_24h_pct"),
+        g("oi_change_5m_pct"),
+        g("oi_change_15m_pct"),
+        g("oi_change_30m_pct"),
+        g("oi_change_1h_pct"),
+        g("oi_delta_pct"),
+        g("price_change_5m_pct"),
+        g("price_change_15m_pct"),
+        g("price_change_30m_pct"),
+        g("price_change_1h_pct"),
+        g("Global_LS_5m") or g("global_ls_5m"),
+        g("Global_LS_15m") or g("global_ls_15m"),
+        g("Global_LS_30m") or g("global_ls_30m"),
+        g("Global_LS_1h") or g("global_ls_1h"),
+        g("long_account_pct"),
+        g("short_account_pct"),
+        g("Top_LS") or g("top_ls"),
+        g("Top_LS_Accounts") or g("top_ls_accounts"),
+        g("Top_LS_Positions") or g("top_ls_positions"),
+        g("top_ls_delta_pct"),
+        g("ls_delta_pct"),
+        g("cvd"),
+        g("z_ls_val"),
+        g("z_score"),
+        g("z_top_ls_acc"),
+        g("z_top_ls_pos"),
+        g("imbalance"),
+        g("funding"),
+        g("rsi"),
+        g("vol_usd") or g("volume"),
+        g("weighted_oi"),
+        g("vpi"),
+        g("zsc"),
+        g("lsm"),
+        g("price_open"),
+        g("price_high"),
+        g("price_low"),
+        _safe_int(m.get("tick_count")),
+        _safe_int(m.get("taker_buy_count")),
+        _safe_int(m.get("taker_sell_count")),
+        # source bar the counts belong to (bucket upserts add each bar once, see metrics_upsert_sql)
+        updated_at if any(m.get(k) is not None for k in METRICS_MERGE_SUM) else None,
+        *_book_tops(m),
+        None,  # raw_ref, set by _offload_raw
+        updated_at,
+        m,  # raw_json (jsonb codec, see jsoncodec.py)
+    ]
+    # sanitize non-finite floats
+    for idx, v in enumerate(row):
+        if isinstance(v, float) and not math.isfinite(v):
+            row[idx] = None
+    return row
+
+
 async def save_metrics_v3_async(metrics: List[Dict[str, Any]], timeframe: str = "1m") -> int:
     """
     Accepts list of metric dicts and writes them into `metrics` table in batches.
@@ -547,70 +840,9 @@ async def save_metrics_v3_async(metrics: List[Dict[str, Any]], timeframe: str =
     saved = 0
     for m in metrics:
         try:
-            if not isinstance(m, dict):
-                logger.debug("[save_metrics_v3_async] skip non-dict")
+            row = _prepare_metric_row(m, timeframe)
+            if row is None:
                 continue
-            symbol = (m.get("symbol") or m.get("sym") or "").strip()
-            if not symbol:
-                logger.debug("[save_metrics_v3_async] skip missing symbol")
-                continue
-
-            def g(k, fallback=None):
-                # accept upper/lower variants
-                return _safe_num(m.get(k, fallback))
-
-            updated_at = datetime.utcnow()
-            row = [
-                symbol,
-                timeframe,
-                g("Price") or g("price") or None,
-                g("price_change_24h_pct"),
-                g("volume_24h"),
-                g("volume_change_24h_pct"),
-                g("market_cap"),
-                g("oi_usd"),
-                g("oi_abs_usd"),
-                g("oi_change_24h_pct"),
-                g("oi_change_5m_pct"),
-                g("oi_change_15m_pct"),
-                g("oi_change_30m_pct"),
-                g("oi_change_1h_pct"),
-                g("oi_delta_pct"),
-                g("price_change_5m_pct"),
-                g("price_change_15m_pct"),
-                g("price_change_30m_pct"),
-                g("price_change_1h_pct"),
-                g("Global_LS_5m") or g("global_ls_5m"),
-                g("Global_LS_15m") or g("global_ls_15m"),
-                g("Global_LS_30m") or g("global_ls_30m"),
-                g("Global_LS_1h") or g("global_ls_1h"),
-                g("long_account_pct"),
-                g("short_account_pct"),
-                g("Top_LS") or g("top_ls"),
-                g("Top_LS_Accounts") or g("top_ls_accounts"),
-                g("Top_LS_Positions") or g("top_ls_positions"),
-                g("top_ls_delta_pct"),
-                g("ls_delta_pct"),
-                g("cvd"),
-                g("z_ls_val"),
-                g("z_score"),
-                g("z_top_ls_acc"),
-                g("z_top_ls_pos"),
-                g("imbalance"),
-                g("funding"),
-                g("rsi"),
-                g("vol_usd") or g("volume"),
-                g("weighted_oi"),
-                g("vpi"),
-                g("zsc"),
-                g("lsm"),
-                updated_at,
-                _safe_json(m)
-            ]
-            # sanitize non-finite floats
-            for idx, v in enumerate(row):
-                if isinstance(v, float) and not math.isfinite(v):
-                    row[idx] = None
             values.append(row)
             saved += 1
         except Exception as e:
@@ -619,22 +851,747 @@ async def save_metrics_v3_async(metrics: List[Dict[str, Any]], timeframe: str =
     if not values:
         return 0
 
-    batch = int(os.getenv("DB_INSERT_BATCH", "200"))
     async with _pool.acquire() as conn:
+        cols, records = await _with_symbol_ids(conn, "metrics", COLS, [tuple(v) for v in values])
+        # rows are already typed by _prepare_metric_row → straight to COPY / upsert
+        await _write_metrics(conn, cols, records, "save_metrics_v3_async", strict=False)
+    return saved
+
+
+TICK_COLS = ["ts", "symbol", "kind", "price", "qty"]
+
+
+async def _symbol_ids(conn, table: str, names) -> Dict[str, int]:
+    """
+    name → symbol_id for a write batch (symbols.py dictionary). Runs outside the batch
+    transaction; if the dictionary is unavailable rows keep a NULL id.
+    """
+    try:
+        return await symbols.ensure(conn, {str(n) for n in names if n is not None})
+    except Exception as e:
+        logger.warning(f"[symbols] {table}: id lookup failed, writing NULL symbol_id: {e}")
+        return {}
+
+
+async def _with_symbol_ids(conn, table: str, cols: Sequence[str],
+                           records: List[Sequence[Any]]) -> Tuple[List[str], List[Sequence[Any]]]:
+    """Add the symbol_id column to positional rows of tables that carry one."""
+    if table not in symbols.TABLES or "symbol" not in cols or "symbol_id" in cols or not records:
+        return list(cols), records
+    si = list(cols).index("symbol")
+    return symbols.stamp(cols, records, await _symbol_ids(conn, table, [r[si] for r in records]))
+
+
+async def copy_ticks_async(records: List[Sequence[Any]]) -> int:
+    """
+    COPY pre-built (ts, symbol, kind, price, qty) tuples into the narrow `ticks` table.
+    Symbols are stored as symbol_id; the text column is only written while a
+    not-yet-migrated table still has it. Raises on failure so TickWriter can keep
+    the batch for retry.
+    """
+    if not records:
+        return 0
+    await ensure_connected()
+    async with _pool.acquire() as conn:
+        cols, rows = await _with_symbol_ids(conn, "ticks", TICK_COLS, records)
+        if "symbol" not in await table_columns("ticks"):
+            cols, rows = cols[:1] + cols[2:], [r[:1] + r[2:] for r in rows]
+        try:
+            await conn.copy_records_to_table("ticks", records=rows, columns=cols)
+        except Exception:
+            _TABLE_COLUMNS.pop("ticks", None)  # re-read after a concurrent migration
+            raise
+    return len(records)
+
+
+async def _known_symbol_ids(conn, names: Sequence[str]) -> Dict[str, int]:
+    # module-level so readers whose parameter is called `symbols` can reach the dictionary
+    return await symbols.lookup(conn, names)
+
+
+async def symbol_filter(conn, table: str, symbol: str) -> Tuple[str, Any]:
+    """(column, value) to filter `table` on one symbol: symbol_id once migrated, else the name."""
+    if table not in _SYMBOL_ID_TABLES:
+        return "symbol", symbol
+    # unknown name → NULL id, which matches no row
+    return "symbol_id", (await symbols.lookup(conn, [symbol])).get(symbol)
+
+
+async def _symbol_keys(conn, table: str, names: Sequence[str]) -> Tuple[str, List[Any], str]:
+    """(column, values, array element type) to filter `table` on several symbols; unknown names are dropped."""
+    if table not in _SYMBOL_ID_TABLES:
+        return "symbol", list(names), "text"
+    return "symbol_id", list((await symbols.lookup(conn, names)).values()), "smallint"
+
+
+async def get_ticks_async(symbol: str, since: Optional[datetime] = None, limit: int = 1000,
+                          kind: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Recent ticks for one symbol (newest first), optionally filtered by kind code."""
+    await ensure_connected()
+    async with DBReadConnection() as conn:
+        key, value = await symbol_filter(conn, "ticks", symbol)
+        where = [f"{key} = $1"]
+        params: List[Any] = [value]
+        if since is not None:
+            params.append(since)
+            where.append(f"ts >= ${len(params)}")
+        if kind is not None:
+            params.append(kind)
+            where.append(f"kind = ${len(params)}")
+        params.append(limit)
+        q = f"SELECT ts, kind, price, qty FROM ticks WHERE {' AND '.join(where)} ORDER BY ts DESC LIMIT ${len(params)}"
+        rows = await conn.fetch(q, *params)
+    return [{"ts": r["ts"], "symbol": symbol, "kind": r["kind"], "price": r["price"], "qty": r["qty"]} for r in rows]
+
+
+async def copy_metrics_rows_async(metrics: List[Dict[str, Any]], timeframe: str = "1m") -> int:
+    """
+    Bulk-load metric dicts into `metrics` with COPY in a single transaction.
+    Each row's own `timeframe` / `updated_at` win over the defaults (spill replay).
+    Unlike save_metrics_v3_async this raises on failure so the caller can retry.
+    """
+    await ensure_connected()
+    records = []
+    for m in metrics:
+        try:
+            row = _prepare_metric_row(m, (m.get("timeframe") if isinstance(m, dict) else None) or timeframe)
+        except Exception as e:
+            logger.warning(f"[copy_metrics_rows_async] row prepare failed: {e}")
+            continue
+        if row is not None:
+            records.append(tuple(row))
+    if not records:
+        return 0
+    async with _pool.acquire() as conn:
+        cols, records = await _with_symbol_ids(conn, "metrics", COLS, records)
+        await _write_metrics(conn, cols, records, "copy_metrics_rows_async", strict=True)
+    return len(records)
+
+
+# errors that say nothing about the row itself; the row-by-row fallback re-raises them
+_CONNECTION_ERRORS = (asyncpg.InterfaceError, asyncpg.PostgresConnectionError, OSError, asyncio.TimeoutError)
+
+
+async def insert_metrics_rows_each_async(metrics: List[Dict[str, Any]], timeframe: str = "1m") -> List[Dict[str, Any]]:
+    """
+    Row-by-row variant of copy_metrics_rows_async for a batch the server keeps rejecting:
+    one transaction, every row under its own savepoint. Returns the metric dicts that
+    still fail (the rest is committed); connection errors raise as usual.
+    """
+    await ensure_connected()
+    failed: List[Dict[str, Any]] = []
+    prepared = []
+    for m in metrics:
+        try:
+            row = _prepare_metric_row(m, (m.get("timeframe") if isinstance(m, dict) else None) or timeframe)
+        except Exception as e:
+            logger.warning(f"[insert_metrics_rows_each_async] row prepare failed: {e}")
+            failed.append(m)
+            continue
+        if row is not None:
+            prepared.append((m, tuple(row)))
+    if not prepared:
+        return failed
+    async with _pool.acquire() as conn:
+        cols, records = await _with_symbol_ids(conn, "metrics", COLS, [rec for _, rec in prepared])
         async with conn.transaction():
-            for i in range(0, len(values), batch):
-                chunk = values[i:i+batch]
+            for (m, _), rec in zip(prepared, records):
                 try:
-                    await conn.executemany(INSERT_SQL, chunk)
+                    # _write_metrics opens a nested transaction, i.e. a savepoint per row
+                    await _write_metrics(conn, cols, [rec], "insert_metrics_rows_each_async", strict=True)
+                except _CONNECTION_ERRORS:
+                    raise
                 except Exception as e:
-                    logger.warning(f"[save_metrics_v3_async] batch insert failed ({len(chunk)}): {e}")
-                    # fallback to single-row inserts so other rows still persist
-                    for row in chunk:
-                        try:
-                            await conn.execute(INSERT_SQL, *row)
-                        except Exception as e2:
-                            logger.warning(f"[save_metrics_v3_async] single insert failed: {e2}")
-    return saved
+                    logger.warning(f"[insert_metrics_rows_each_async] row {m.get('symbol')} rejected: {e}")
+                    failed.append(m)
+    return failed
+
+# ---------------------------------------------------------------------
+# Bucket-keyed metrics (METRICS_UPSERT): one row per (symbol, timeframe, bucket start)
+# ---------------------------------------------------------------------
+METRICS_KEY = ("symbol", "timeframe", "updated_at")
+# how fields of rows landing in the same bucket combine; every other field: latest non-NULL wins
+METRICS_MERGE_FIRST = {"price_open"}
+METRICS_MERGE_MAX = {"price_high", "last_bar_at"}
+METRICS_MERGE_MIN = {"price_low"}
+# per-bar counts add up when several bars fold into one bucket, but only for a bar newer than
+# last_bar_at: a replayed spill or a batch spilled after its commit actually landed must not
+# count the same bar twice. Bars of one symbol reach the writer in time order (while the
+# spill holds a backlog every write is diverted behind it).
+METRICS_MERGE_SUM = {"tick_count", "taker_buy_count", "taker_sell_count"}
+METRICS_BAR_MARK = "last_bar_at"
+
+
+def _newer_bar(a: Any, b: Any) -> bool:
+    """True unless bar b is known to be already counted in a row marked with bar a."""
+    return a is None or b is None or b > a
+
+
+def metrics_upsert_resolution() -> int:
+    """
+    Bucket (seconds) every metrics row is keyed on in upsert mode: METRICS_UPSERT_BUCKET,
+    else the WS bar size (METRICS_BUCKET), else 1m. REST rows and WS bars are both
+    relabelled to it, so they share one key per symbol and bucket.
+    """
+    return (bucketer.parse_resolution(getattr(cfg, "METRICS_UPSERT_BUCKET", ""))
+            or bucketer.configured_resolution() or 60)
+
+
+async def ensure_metrics_bucket_key(conn, dedupe: bool = False) -> bool:
+    """
+    Unique (symbol, timeframe, updated_at) index the metrics upserts conflict on.
+    With dedupe, exact duplicate keys (older id loses) are deleted first; without it an
+    existing duplicate makes the index build fail and metrics stay on plain COPY.
+    """
+    try:
+        if dedupe:
+            res = await conn.execute(
+                "DELETE FROM metrics a USING metrics b WHERE a.symbol = b.symbol AND a.timeframe = b.timeframe "
+                "AND a.updated_at = b.updated_at AND a.id < b.id"
+            )
+            logger.info(f"[DB] metrics bucket key: removed duplicates ({res})")
+        await conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS metrics_bucket_key ON metrics (symbol, timeframe, updated_at)"
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"[DB] metrics bucket key unavailable, metrics stay append-only "
+                       f"(run_migrations.py removes duplicates): {e}")
+        return False
+
+
+def merge_metric_rows(cols: Sequence[str], old: Sequence[Any], new: Sequence[Any]) -> List[Any]:
+    """Fold a later row of the same bucket into an earlier one (same rules as the ON CONFLICT update)."""
+    mi = list(cols).index(METRICS_BAR_MARK) if METRICS_BAR_MARK in cols else None
+    fresh = mi is None or _newer_bar(old[mi], new[mi])
+    out = []
+    for c, a, b in zip(cols, old, new):
+        if a is None or b is None:
+            v = b if b is not None else a
+        elif c in METRICS_MERGE_FIRST:
+            v = a
+        elif c in METRICS_MERGE_MAX:
+            v = max(a, b)
+        elif c in METRICS_MERGE_MIN:
+            v = min(a, b)
+        elif c in METRICS_MERGE_SUM:
+            v = a + b if fresh else a
+        elif c == "raw_json" and isinstance(a, dict) and isinstance(b, dict):
+            v = {**a, **b}
+        else:
+            v = b
+        out.append(v)
+    return out
+
+
+def bucket_metric_records(cols: Sequence[str], records: List[Sequence[Any]],
+                          resolution: Optional[int] = None) -> List[tuple]:
+    """
+    Relabel every row to the upsert bucket (metrics_upsert_resolution), stamp updated_at
+    with the bucket start and fold rows sharing (symbol, timeframe, bucket) in arrival
+    order — one ON CONFLICT update per key and batch. Two different counted bars of a key
+    stay separate rows (applied in order), so each one is checked against last_bar_at
+    on its own and a bar the table already holds is not added again.
+    """
+    res = resolution or metrics_upsert_resolution()
+    label = bucketer.resolution_label(res)
+    si, ti, ui = (list(cols).index(c) for c in METRICS_KEY)
+    mi = list(cols).index(METRICS_BAR_MARK) if METRICS_BAR_MARK in cols else None
+    merged: Dict[tuple, List[List[Any]]] = {}
+    out: List[List[Any]] = []
+    for rec in records:
+        r = list(rec)
+        r[ti] = label
+        if isinstance(r[ui], datetime):
+            ts = r[ui] if r[ui].tzinfo else r[ui].replace(tzinfo=timezone.utc)
+            r[ui] = rollups.floor_ts(ts, res)
+        if mi is not None and isinstance(r[mi], datetime) and not r[mi].tzinfo:
+            r[mi] = r[mi].replace(tzinfo=timezone.utc)
+        key = (r[si], r[ti], r[ui])
+        last = merged.get(key)
+        if last is not None and (mi is None or last[mi] is None or r[mi] is None or last[mi] == r[mi]):
+            last[:] = merge_metric_rows(cols, last, r)
+        else:
+            merged[key] = r
+            out.append(r)
+    return [tuple(r) for r in out]
+
+
+def metrics_upsert_sql(cols: Sequence[str]) -> str:
+    sets = []
+    for c in cols:
+        if c in METRICS_KEY:
+            continue
+        if c in METRICS_MERGE_FIRST:
+            sets.append(f"{c} = COALESCE(metrics.{c}, EXCLUDED.{c})")
+        elif c in METRICS_MERGE_MAX:
+            sets.append(f"{c} = GREATEST(metrics.{c}, EXCLUDED.{c})")
+        elif c in METRICS_MERGE_MIN:
+            sets.append(f"{c} = LEAST(metrics.{c}, EXCLUDED.{c})")
+        elif c in METRICS_MERGE_SUM:
+            # add once per source bar (see METRICS_MERGE_SUM); rows from before last_bar_at existed add as before
+            newer = (f"COALESCE(EXCLUDED.{METRICS_BAR_MARK} > metrics.{METRICS_BAR_MARK}, TRUE)"
+                     if METRICS_BAR_MARK in cols else "TRUE")
+            sets.append(f"{c} = CASE WHEN EXCLUDED.{c} IS NULL THEN metrics.{c} "
+                        f"WHEN metrics.{c} IS NULL THEN EXCLUDED.{c} "
+                        f"WHEN {newer} THEN metrics.{c} + EXCLUDED.{c} ELSE metrics.{c} END")
+        elif c == "raw_json":
+            # REST and WS payloads of one bucket end up side by side
+            sets.append("raw_json = COALESCE(metrics.raw_json || EXCLUDED.raw_json, EXCLUDED.raw_json, metrics.raw_json)")
+        else:
+            sets.append(f"{c} = COALESCE(EXCLUDED.{c}, metrics.{c})")
+    return (f"{_insert_sql('metrics', cols)} ON CONFLICT ({', '.join(METRICS_KEY)}) "
+            f"DO UPDATE SET {', '.join(sets)}")
+
+
+async def _write_metrics(conn, cols: Sequence[str], records: List[Sequence[Any]], tag: str, strict: bool) -> int:
+    """
+    Metrics batch in one transaction: COPY (append-only) or bucket upserts (METRICS_UPSERT).
+    strict raises on failure (spill replay retries); otherwise bad rows are skipped one by one.
+    """
+    async with conn.transaction():
+        if _METRICS_UPSERT:
+            records = bucket_metric_records(cols, records)
+        records = await _offload_raw(conn, "metrics", cols, records)
+        if not _METRICS_UPSERT:
+            if strict:
+                await conn.copy_records_to_table("metrics", records=records, columns=cols)
+                return len(records)
+            return len(await _copy_with_fallback(conn, "metrics", cols, records, tag))
+        sql = metrics_upsert_sql(cols)
+        if strict:
+            await conn.executemany(sql, records)
+            return len(records)
+        try:
+            async with conn.transaction():
+                await conn.executemany(sql, records)
+            return len(records)
+        except Exception as e:
+            logger.warning(f"[{tag}] upsert batch failed ({len(records)} rows), retrying row by row: {e}")
+        n = 0
+        for rec in records:
+            try:
+                async with conn.transaction():
+                    await conn.execute(sql, *rec)
+                n += 1
+            except Exception as e2:
+                logger.warning(f"[{tag}] single upsert failed: {e2}")
+        return n
+
+
+# ---------------------------------------------------------------------
+# Typed bulk-write layer (COPY, per-row fallback only for rejected rows)
+# ---------------------------------------------------------------------
+class BulkColumn(NamedTuple):
+    name: str
+    kind: str                 # text | float | int | ts | json
+    required: bool = False    # NULL → row fails validation
+    default_now: bool = False # NULL ts → utcnow() (COPY does not apply column DEFAULTs)
+
+
+def _c(name: str, kind: str = "float", required: bool = False, default_now: bool = False) -> BulkColumn:
+    return BulkColumn(name, kind, required, default_now)
+
+
+BULK_SPECS: Dict[str, List[BulkColumn]] = {
+    "quant_features": [
+        _c("symbol", "text", True), _c("timeframe", "text"), _c("ts", "ts", default_now=True),
+        _c("price"), _c("oi_usd"), _c("vol_usd"),
+        _c("global_ls_5m"), _c("top_ls_accounts"), _c("top_ls_positions"), _c("funding"),
+        _c("atr_5s"), _c("obi"), _c("taker_buy_ratio"), _c("taker_sell_ratio"), _c("vpi"),
+        _c("z_oi"), _c("z_top_ls_acc"), _c("z_obi"), _c("z_funding"), _c("zsc"),
+        _c("oi_change_5s_pct"), _c("oi_change_10s_pct"),
+        _c("price_change_5s_pct"), _c("price_change_10s_pct"),
+        _c("confidence"), _c("families", "json"), _c("raw_json", "json"),
+    ],
+    "quant_features_5s": [
+        _c("symbol", "text", True), _c("timeframe", "text"), _c("ts", "ts", default_now=True),
+        _c("price"), _c("oi_usd"), _c("vol_usd"),
+        _c("oi_change_5s_pct"), _c("oi_change_10s_pct"), _c("price_change_5s_pct"), _c("price_change_10s_pct"),
+        _c("atr_5s"), _c("obi"), _c("taker_buy_ratio"), _c("taker_sell_ratio"), _c("vpi"),
+        _c("z_oi"), _c("z_top_ls_acc"), _c("z_obi"), _c("z_funding"), _c("zsc"),
+        _c("confidence"), _c("families", "json"), _c("raw_json", "json"), _c("raw_ref", "text"),
+    ],
+    "quant_diagnostics": [
+        _c("symbol", "text", True), _c("ts", "ts", default_now=True), _c("window_s", "int"),
+        _c("corr_price_oi"), _c("corr_price_ls"), _c("corr_oi_ls"),
+        _c("volatility_5s"), _c("volatility_zscore"),
+        _c("confluence_density"), _c("raw_json", "json"),
+    ],
+    "quant_signals": [
+        _c("symbol", "text", True), _c("ts", "ts", default_now=True), _c("family", "text"),
+        _c("score"), _c("confidence"),
+        _c("diagnostics_ref", "int"), _c("raw_json", "json"),
+    ],
+    "quant_confluence": [
+        _c("symbol", "text", True), _c("ts", "ts", default_now=True), _c("confluence_score"),
+        _c("bull_strength"), _c("bear_strength"), _c("volatility"), _c("family_count", "int"),
+        _c("diagnostic_ref", "int"), _c("raw_json", "json"),
+    ],
+    "quant_regimes": [
+        _c("symbol", "text", True), _c("ts", "ts", default_now=True), _c("confluence_score"),
+        _c("volatility"), _c("regime", "text"), _c("confidence"), _c("raw_json", "json"),
+    ],
+    "quant_context_scores": [
+        _c("symbol", "text", True), _c("ts", "ts", default_now=True), _c("context_score"),
+        _c("bias", "text"), _c("components", "json"),
+    ],
+    "quant_context_trends": [
+        _c("symbol", "text", True), _c("ts", "ts", default_now=True), _c("from_bias", "text"),
+        _c("to_bias", "text"), _c("context_score"), _c("raw_json", "json"),
+    ],
+    # compact v2 signals: one row per symbol per tick (compact.py)
+    "quant_signals_wide": [
+        _c("symbol", "text", True), _c("ts", "ts", default_now=True), _c("diagnostics_ref", "int"),
+        *(_c(name) for name in compact.wide_columns()), _c("raw_json", "json"),
+    ],
+}
+# layouts of compact components once migrated (families JSONB → family_mask bitmask)
+COMPACT_SPECS: Dict[str, List[BulkColumn]] = {
+    "quant_features_5s": [
+        _c("family_mask", "int") if c.name == "families" else c for c in BULK_SPECS["quant_features_5s"]
+    ],
+}
+
+
+def bulk_spec(table: str) -> List[BulkColumn]:
+    """Column spec of `table` in the layout the database currently has."""
+    if table in _COMPACT and table in COMPACT_SPECS:
+        return COMPACT_SPECS[table]
+    return BULK_SPECS[table]
+
+
+class BulkValidationError(ValueError):
+    """A row value that cannot be coerced to its column type."""
+
+
+def _coerce_bulk_value(col: BulkColumn, v: Any) -> Any:
+    if v is None:
+        if col.default_now:
+            return datetime.utcnow()
+        if col.required:
+            raise BulkValidationError(f"{col.name} is required")
+        return None
+    if col.kind == "text":
+        return v if isinstance(v, str) else str(v)
+    if col.kind == "float":
+        if isinstance(v, bool):
+            return float(v)
+        x = _safe_num(v)
+        if x is None:
+            raise BulkValidationError(f"{col.name}: not numeric ({v!r})")
+        return x if math.isfinite(x) else None
+    if col.kind == "int":
+        x = _safe_num(v)
+        if x is None:
+            raise BulkValidationError(f"{col.name}: not an integer ({v!r})")
+        return int(x) if math.isfinite(x) else None
+    if col.kind == "ts":
+        ts = _coerce_ts(v)
+        if ts is None:
+            raise BulkValidationError(f"{col.name}: not a timestamp ({v!r})")
+        return ts
+    if col.kind == "timestamp":
+        # timestamp without time zone: aware values are stored as naive UTC
+        ts = _coerce_ts(v)
+        if ts is None:
+            raise BulkValidationError(f"{col.name}: not a timestamp ({v!r})")
+        return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+    if col.kind == "json":
+        # objects (str included) go to the jsonb codec as-is; pre-encoded text only as jsoncodec.JSONText
+        return v
+    if col.kind == "numeric":
+        try:
+            return v if isinstance(v, Decimal) else Decimal(str(v))
+        except Exception:
+            raise BulkValidationError(f"{col.name}: not numeric ({v!r})")
+    if col.kind == "bool":
+        if isinstance(v, str):
+            return v.strip().lower() in ("1", "t", "true", "yes", "y", "on")
+        return bool(v)
+    return v
+
+
+def _prepare_records(spec: Sequence[BulkColumn], rows: List[Dict[str, Any]], table: str = "") -> Tuple[List[tuple], List[Dict[str, Any]]]:
+    """Column-at-a-time coercion of dict rows to typed tuples in `spec` order → (records, rejected)."""
+    rows = [r for r in rows if isinstance(r, dict)]
+    bad: set = set()
+    columns: List[List[Any]] = []
+    for col in spec:
+        out: List[Any] = []
+        for i, r in enumerate(rows):
+            if i in bad:
+                out.append(None)
+                continue
+            try:
+                out.append(_coerce_bulk_value(col, r.get(col.name)))
+            except (BulkValidationError, TypeError, ValueError) as e:
+                logger.debug(f"[bulk_write:{table}] row rejected by validation: {e}")
+                bad.add(i)
+                out.append(None)
+        columns.append(out)
+    records = [rec for i, rec in enumerate(zip(*columns)) if i not in bad] if columns else []
+    return records, [rows[i] for i in sorted(bad)]
+
+
+def prepare_bulk_records(table: str, rows: List[Dict[str, Any]]) -> Tuple[List[tuple], List[Dict[str, Any]]]:
+    """
+    Coerce column-keyed dicts to typed COPY records for `table`.
+    Returns (records, rejected) — rejected rows failed validation and are inserted one by one.
+    """
+    return _prepare_records(bulk_spec(table), rows, table)
+
+
+def _insert_sql(table: str, cols: Sequence[str]) -> str:
+    return f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join(f'${i+1}' for i in range(len(cols)))})"
+
+
+async def _copy_with_fallback(conn, table: str, cols: Sequence[str], records: List[Sequence[Any]], tag: str) -> List[Sequence[Any]]:
+    """
+    COPY `records` in chunks, each under a savepoint. A chunk the server rejects is
+    retried row by row (also under savepoints) so one bad row cannot sink the batch.
+    Must run inside a transaction. Returns the records actually written.
+    """
+    chunk_size = int(os.getenv("DB_COPY_BATCH", "5000"))
+    sql = _insert_sql(table, cols)
+    written: List[Sequence[Any]] = []
+    for i in range(0, len(records), chunk_size):
+        chunk = records[i:i + chunk_size]
+        try:
+            async with conn.transaction():
+                await conn.copy_records_to_table(table, records=chunk, columns=list(cols))
+            written.extend(chunk)
+            continue
+        except Exception as e:
+            logger.warning(f"[{tag}] COPY failed ({len(chunk)} rows), falling back to row inserts: {e}")
+        for rec in chunk:
+            try:
+                async with conn.transaction():
+                    await conn.execute(sql, *rec)
+                written.append(rec)
+            except Exception as e2:
+                logger.warning(f"[{tag}] single insert failed: {e2}")
+    return written
+
+
+# ---------------------------------------------------------------------
+# *_latest tables (one row per key, upserted with each history batch)
+# ---------------------------------------------------------------------
+# history table → key of its <table>_latest companion
+LATEST_KEYS: Dict[str, Tuple[str, ...]] = {
+    "quant_diagnostics": ("symbol",),
+    "quant_signals": ("symbol", "family"),
+    "quant_confluence": ("symbol",),
+    "quant_regimes": ("symbol",),
+    "quant_context_scores": ("symbol",),
+    "quant_signals_wide": ("symbol",),
+}
+_LATEST_SQL_TYPES = {"text": "TEXT", "float": "DOUBLE PRECISION", "int": "BIGINT", "ts": "TIMESTAMPTZ", "json": "JSONB"}
+_ID_SEQUENCES: Dict[str, Optional[str]] = {}
+
+
+def latest_table(table: str) -> str:
+    return f"{table}_latest"
+
+
+def latest_table_sql(table: str) -> str:
+    keys = LATEST_KEYS[table]
+    cols = ["id BIGINT", "symbol_id SMALLINT"] + [
+        f"{c.name} {_LATEST_SQL_TYPES.get(c.kind, 'TEXT')}{' NOT NULL' if c.name in keys else ''}"
+        for c in BULK_SPECS[table]
+    ]
+    return (f"CREATE TABLE IF NOT EXISTS {latest_table(table)} (\n    "
+            + ",\n    ".join(cols) + f",\n    PRIMARY KEY ({', '.join(keys)})\n);")
+
+
+def latest_rows(table: str, cols: Sequence[str], records: Sequence[Sequence[Any]]) -> List[Sequence[Any]]:
+    """Newest record per latest-key within a batch (later records win ties); NULL keys are skipped."""
+    key_idx = [cols.index(k) for k in LATEST_KEYS[table]]
+    ts_idx = cols.index("ts")
+    best: Dict[tuple, Sequence[Any]] = {}
+    for rec in records:
+        key = tuple(rec[i] for i in key_idx)
+        if any(k is None for k in key):
+            continue
+        cur = best.get(key)
+        if cur is None or cur[ts_idx] is None or (rec[ts_idx] is not None and rec[ts_idx] >= cur[ts_idx]):
+            best[key] = rec
+    return list(best.values())
+
+
+def _latest_upsert_sql(table: str, cols: Sequence[str]) -> str:
+    keys = LATEST_KEYS[table]
+    lt = latest_table(table)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols if c not in keys)
+    return (f"{_insert_sql(lt, cols)} ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates} "
+            f"WHERE {lt}.ts IS NULL OR EXCLUDED.ts >= {lt}.ts")
+
+
+async def _reserve_ids(conn, table: str, n: int) -> Optional[List[int]]:
+    """Draw n ids from the table's id sequence so COPY rows carry ids (None if no sequence)."""
+    if table not in _ID_SEQUENCES:
+        _ID_SEQUENCES[table] = await conn.fetchval("SELECT pg_get_serial_sequence($1, 'id')", table)
+    seq = _ID_SEQUENCES[table]
+    if not seq:
+        return None
+    rows = await conn.fetch("SELECT nextval($1::regclass) AS id FROM generate_series(1, $2)", seq, n)
+    return [r["id"] for r in rows]
+
+
+async def ensure_latest_tables(conn):
+    """Create the *_latest tables and seed empty ones once from history."""
+    for table, keys in LATEST_KEYS.items():
+        if not await timeseries.table_exists(conn, table):
+            # not in this layout (v1 quant_signals_wide, v2 quant_signals view; see compact.py)
+            continue
+        lt = latest_table(table)
+        await conn.execute(latest_table_sql(table))
+        await conn.execute(f"ALTER TABLE {lt} ADD COLUMN IF NOT EXISTS symbol_id SMALLINT")
+        if await conn.fetchval(f"SELECT EXISTS (SELECT 1 FROM {lt})"):
+            continue
+        cols = ["id"] + [c.name for c in BULK_SPECS[table]]
+        await conn.execute(
+            f"INSERT INTO {lt} ({', '.join(cols)}) "
+            f"SELECT DISTINCT ON ({', '.join(keys)}) {', '.join(cols)} FROM {table} "
+            f"WHERE {' AND '.join(f'{k} IS NOT NULL' for k in keys)} "
+            f"ORDER BY {', '.join(keys)}, ts DESC NULLS LAST ON CONFLICT DO NOTHING"
+        )
+
+
+# ---------------------------------------------------------------------
+# raw_json offload (blobstore.py)
+# ---------------------------------------------------------------------
+RAW_PAYLOAD_COLS = ["id", "src", "symbol", "ts", "codec", "payload"]
+
+
+async def _offload_raw(conn, table: str, cols: Sequence[str], records: List[Sequence[Any]]) -> List[Sequence[Any]]:
+    """
+    Move raw_json of sampled rows to the side store (RAW_STORE=table|disk) and set raw_ref;
+    raw_json of every row is cleared. No-op in inline mode. Runs inside the caller's
+    transaction; if the side store fails the rows keep their raw_json inline.
+    """
+    if not records or not blobstore.offloads(table):
+        return records
+    ri, fi = cols.index("raw_json"), cols.index("raw_ref")
+    si, ti = cols.index("symbol"), cols.index(timeseries.TIMESERIES_TABLES[table].time_col)
+    out = [list(r) for r in records]
+    store = blobstore.mode()
+    keep = [r for r in out if r[ri] is not None and store != "off" and blobstore.sampled(r[si], r[ti])]
+    blobstore.note(skipped=len(out) - len(keep))
+    if keep:
+        try:
+            encoded = [blobstore.encode(jsoncodec.encode_json(r[ri])) for r in keep]
+            if store == "table":
+                ids = await _reserve_ids(conn, "raw_payloads", len(keep))
+                async with conn.transaction():
+                    await conn.copy_records_to_table("raw_payloads", columns=RAW_PAYLOAD_COLS, records=[
+                        (i, table, r[si], r[ti], codec, blob) for i, r, (codec, blob) in zip(ids, keep, encoded)
+                    ])
+                refs = [f"t:{i}" for i in ids]
+                blobstore.note(stored=len(refs))
+            else:
+                refs = blobstore.disk_append(encoded)
+        except Exception as e:
+            blobstore.note(errors=1)
+            logger.warning(f"[raw_store] {table}: offload of {len(keep)} payloads failed, kept inline: {e}")
+            return records
+        for r, ref in zip(keep, refs):
+            r[fi] = ref
+    for r in out:
+        r[ri] = None
+    return [tuple(r) for r in out]
+
+
+async def load_raw_async(ref: str) -> Optional[Any]:
+    """Decoded raw payload behind a raw_ref ("t:<id>" or "f:<segment>:<offset>")."""
+    if not ref:
+        return None
+    if ref.startswith("f:"):
+        return jsoncodec.loads(await asyncio.to_thread(blobstore.disk_read, ref))
+    if not ref.startswith("t:"):
+        raise ValueError(f"bad raw ref {ref!r}")
+    async with DBReadConnection() as conn:
+        row = await conn.fetchrow("SELECT codec, payload FROM raw_payloads WHERE id = $1", int(ref[2:]))
+    return jsoncodec.loads(blobstore.decode(row["codec"], row["payload"])) if row else None
+
+
+async def _bulk_load(table: str, spec: Sequence[BulkColumn], rows: List[Dict[str, Any]],
+                     tag: str) -> List[Dict[str, Any]]:
+    """
+    COPY the rows that pass validation, INSERT the rejected ones one by one.
+    Returns the source rows actually written (rows the server refused are left out).
+    """
+    await ensure_connected()
+    cols = [c.name for c in spec]
+    records, rejected = _prepare_records(spec, rows, table)
+    rejected_ids = {id(r) for r in rejected}
+    # records keep the order of the valid rows through symbol stamping, id reservation and offload
+    valid = [r for r in rows if isinstance(r, dict) and id(r) not in rejected_ids]
+    track_latest = table in LATEST_KEYS and "ts" in cols and all(k in cols for k in LATEST_KEYS[table])
+    stored: List[Dict[str, Any]] = []
+    async with _pool.acquire() as conn:
+        sym_ids: Optional[Dict[str, int]] = None
+        if table in symbols.TABLES and "symbol" in cols and "symbol_id" not in cols:
+            # one dictionary lookup for the batch, outside its transaction (see symbols.ensure)
+            sym_ids = await _symbol_ids(conn, table, [r.get("symbol") for r in rows])
+            cols, records = symbols.stamp(cols, records, sym_ids)
+        async with conn.transaction():
+            if records:
+                copy_cols: List[str] = cols
+                if track_latest:
+                    ids = await _reserve_ids(conn, table, len(records))
+                    if ids:
+                        copy_cols = ["id"] + cols
+                        records = [(i, *rec) for i, rec in zip(ids, records)]
+                if blobstore.offloads(table) and "raw_json" in copy_cols and "raw_ref" in copy_cols:
+                    records = await _offload_raw(conn, table, copy_cols, records)
+                position = {id(rec): i for i, rec in enumerate(records)}
+                written = await _copy_with_fallback(conn, table, copy_cols, records, tag)
+                stored.extend(valid[position[id(rec)]] for rec in written)
+                if track_latest and written:
+                    # same transaction as the history rows → latest never points past committed history
+                    await conn.executemany(_latest_upsert_sql(table, copy_cols),
+                                           latest_rows(table, copy_cols, written))
+            if rejected:
+                sql = _insert_sql(table, cols)
+                for r in rejected:
+                    values = [r.get(c.name) for c in spec]
+                    if sym_ids is not None:
+                        values.append(sym_ids.get(str(r.get("symbol"))))
+                    try:
+                        async with conn.transaction():
+                            await conn.execute(sql, *values)
+                        stored.append(r)
+                    except Exception as e:
+                        logger.warning(f"[{tag}] insert failed: {e}")
+            if stored and changefeed.publishes(compact.logical(table)):
+                # queued in the batch transaction → delivered on commit, never for a rollback
+                stamps = [r.get("ts") for r in rows if isinstance(r.get("ts"), datetime)]
+                await changefeed.notify(conn, compact.logical(table), (r.get("symbol") for r in rows),
+                                        max(stamps) if stamps else None)
+    return stored
+
+
+async def bulk_write(table: str, rows: List[Dict[str, Any]], tag: Optional[str] = None) -> int:
+    """
+    Shared bulk writer for the quant tables: typed COPY for valid rows, per-row INSERT
+    only for rows that fail local validation. Returns rows written.
+    """
+    if not rows:
+        return 0
+    spec = bulk_spec(table)
+    if changes.filters(table):
+        # change-only persistence: unchanged rows inside tolerance are dropped (see changes.py)
+        cols = [c.name for c in spec]
+        rows = changes.select(table, rows, columns=cols)
+        if not rows:
+            return 0
+        stored = await _bulk_load(table, spec, rows, tag or f"bulk_write:{table}")
+        # only rows the server accepted count as persisted; dropped ones are retried next tick
+        changes.commit(table, stored, columns=cols)
+        return len(stored)
+    return len(await _bulk_load(table, spec, rows, tag or f"bulk_write:{table}"))
+
 
 # ---------------------------------------------------------------------
 # Save computed quant features for replay/backtest (quant_features)
@@ -643,61 +1600,15 @@ async def save_quant_features_async(features: List[Dict[str, Any]]) -> int:
     """
     Persist computed quant metrics (1m) into quant_features for replay/backtesting.
     """
-    global _pool
-    await ensure_connected()
     if not features:
         return 0
-
-    cols = [
-        "symbol", "timeframe", "ts", "price", "oi_usd", "vol_usd",
-        "global_ls_5m", "top_ls_accounts", "top_ls_positions", "funding",
-        "atr_5s", "obi", "taker_buy_ratio", "taker_sell_ratio", "vpi",
-        "z_oi", "z_top_ls_acc", "z_obi", "z_funding", "zsc",
-        "oi_change_5s_pct", "oi_change_10s_pct",
-        "price_change_5s_pct", "price_change_10s_pct",
-        "confidence", "families", "raw_json"
+    now = datetime.utcnow()
+    rows = [
+        {**f, "timeframe": f.get("timeframe", "1m"), "ts": now,
+         "families": f.get("families") or {}, "raw_json": f}
+        for f in features if isinstance(f, dict)
     ]
-    placeholders = ", ".join(f"${i+1}" for i in range(len(cols)))
-    sql = f"INSERT INTO quant_features ({', '.join(cols)}) VALUES ({placeholders})"
-    count = 0
-
-    async with _pool.acquire() as conn:
-        async with conn.transaction():
-            for f in features:
-                try:
-                    values = [
-                        f.get("symbol"),
-                        f.get("timeframe", "1m"),
-                        datetime.utcnow(),
-                        f.get("price"),
-                        f.get("oi_usd"),
-                        f.get("vol_usd"),
-                        f.get("global_ls_5m"),
-                        f.get("top_ls_accounts"),
-                        f.get("top_ls_positions"),
-                        f.get("funding"),
-                        f.get("atr_5s"),
-                        f.get("obi"),
-                        f.get("taker_buy_ratio"),
-                        f.get("taker_sell_ratio"),
-                        f.get("vpi"),
-                        f.get("z_oi"),
-                        f.get("z_top_ls_acc"),
-                        f.get("z_obi"),
-                        f.get("z_funding"),
-                        f.get("zsc"),
-                        f.get("oi_change_5s_pct"),
-                        f.get("oi_change_10s_pct"),
-                        f.get("price_change_5s_pct"),
-                        f.get("price_change_10s_pct"),
-                        f.get("confidence"),
-                        json.dumps(f.get("families") or {}),
-                        json.dumps(f)
-                    ]
-                    await conn.execute(sql, *values)
-                    count += 1
-                except Exception as e:
-                    logger.warning(f"[save_quant_features_async] insert failed: {e}")
+    count = await bulk_write("quant_features", rows, tag="save_quant_features_async")
     logger.info(f"[DB.save_quant_features_async] saved {count} quant feature rows")
     return count
 
@@ -708,38 +1619,8 @@ async def save_quant_diagnostics_async(rows: list[dict[str, any]]) -> int:
     """Bulk insert diagnostics snapshots into quant_diagnostics."""
     if not rows:
         return 0
-    global _pool
-    await ensure_connected()
-
-    cols = [
-        "symbol", "ts", "window_s",
-        "corr_price_oi", "corr_price_ls", "corr_oi_ls",
-        "volatility_5s", "volatility_zscore",
-        "confluence_density", "raw_json"
-    ]
-    placeholders = ", ".join(f"${i+1}" for i in range(len(cols)))
-    sql = f"INSERT INTO quant_diagnostics ({', '.join(cols)}) VALUES ({placeholders})"
-
-    count = 0
-    async with _pool.acquire() as conn:
-        async with conn.transaction():
-            for r in rows:
-                try:
-                    await conn.execute(sql,
-                        r.get("symbol"),
-                        r.get("ts"),
-                        r.get("window_s", 60),
-                        r.get("corr_price_oi"),
-                        r.get("corr_price_ls"),
-                        r.get("corr_oi_ls"),
-                        r.get("volatility_5s"),
-                        r.get("volatility_zscore"),
-                        r.get("confluence_density"),
-                        json.dumps(sanitize_json(r.get("raw_json") or {}), default=str),
-                    )
-                    count += 1
-                except Exception as e:
-                    logger.warning(f"[save_quant_diagnostics_async] failed: {e}")
+    mapped = [{**r, "window_s": r.get("window_s", 60), "raw_json": r.get("raw_json") or {}} for r in rows]
+    count = await bulk_write("quant_diagnostics", mapped, tag="save_quant_diagnostics_async")
     logger.info(f"[DB] saved {count} rows into quant_diagnostics")
     return count
 
@@ -747,37 +1628,15 @@ async def save_quant_diagnostics_async(rows: list[dict[str, any]]) -> int:
 # Save family-level signals
 # ---------------------------------------------------------------------
 async def save_quant_signals_async(rows: list[dict[str, any]]) -> int:
-    """Bulk insert family signal scores."""
+    """Bulk insert family signal scores (one wide row per symbol and tick once compact)."""
     if not rows:
         return 0
-    global _pool
-    await ensure_connected()
-
-    cols = [
-        "symbol", "ts", "family",
-        "score", "confidence",
-        "diagnostics_ref", "raw_json"
-    ]
-    placeholders = ", ".join(f"${i+1}" for i in range(len(cols)))
-    sql = f"INSERT INTO quant_signals ({', '.join(cols)}) VALUES ({placeholders})"
-
-    count = 0
-    async with _pool.acquire() as conn:
-        async with conn.transaction():
-            for r in rows:
-                try:
-                    await conn.execute(sql,
-                        r.get("symbol"),
-                        r.get("ts"),
-                        r.get("family"),
-                        r.get("score"),
-                        r.get("confidence"),
-                        r.get("diagnostics_ref"),
-                        json.dumps(sanitize_json(r.get("raw_json") or {}), default=str),
-                    )
-                    count += 1
-                except Exception as e:
-                    logger.warning(f"[save_quant_signals_async] failed: {e}")
+    if "quant_signals" in _COMPACT:
+        count = await bulk_write("quant_signals_wide", compact.widen_signals(rows), tag="save_quant_signals_async")
+        logger.info(f"[DB] saved {count} rows into quant_signals_wide")
+        return count
+    mapped = [{**r, "raw_json": r.get("raw_json") or {}} for r in rows]
+    count = await bulk_write("quant_signals", mapped, tag="save_quant_signals_async")
     logger.info(f"[DB] saved {count} rows into quant_signals")
     return count
 
@@ -788,35 +1647,8 @@ async def save_quant_confluence_async(rows: list[dict[str, any]]) -> int:
     """Bulk insert confluence snapshots."""
     if not rows:
         return 0
-    global _pool
-    await ensure_connected()
-
-    sql = """
-    INSERT INTO quant_confluence (
-        symbol, ts, confluence_score, bull_strength,
-        bear_strength, volatility, family_count,
-        diagnostic_ref, raw_json
-    ) VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9)
-    """
-    count = 0
-    async with _pool.acquire() as conn:
-        async with conn.transaction():
-            for r in rows:
-                try:
-                    await conn.execute(sql,
-                        r.get("symbol"),
-                        r.get("ts"),
-                        r.get("confluence_score"),
-                        r.get("bull_strength"),
-                        r.get("bear_strength"),
-                        r.get("volatility"),
-                        r.get("family_count"),
-                        r.get("diagnostic_ref"),
-                        json.dumps(sanitize_json(r.get("raw_json") or {}), default=str),
-                    )
-                    count += 1
-                except Exception as e:
-                    logger.warning(f"[save_quant_confluence_async] failed: {e}")
+    mapped = [{**r, "raw_json": r.get("raw_json") or {}} for r in rows]
+    count = await bulk_write("quant_confluence", mapped, tag="save_quant_confluence_async")
     logger.info(f"[DB] saved {count} rows into quant_confluence")
     return count
 
@@ -827,32 +1659,8 @@ async def save_quant_regimes_async(rows: list[dict[str, any]]) -> int:
     """Bulk insert regime classification results."""
     if not rows:
         return 0
-    global _pool
-    await ensure_connected()
-
-    sql = """
-    INSERT INTO quant_regimes (
-        symbol, ts, confluence_score, volatility,
-        regime, confidence, raw_json
-    ) VALUES ($1, $2, $3, $4, $5, $6, $7)
-    """
-    count = 0
-    async with _pool.acquire() as conn:
-        async with conn.transaction():
-            for r in rows:
-                try:
-                    await conn.execute(sql,
-                        r.get("symbol"),
-                        r.get("ts", datetime.utcnow()),
-                        r.get("confluence_score"),
-                        r.get("volatility"),
-                        r.get("regime"),
-                        r.get("confidence"),
-                        json.dumps(sanitize_json(r.get("raw_json") or {}), default=str),
-                    )
-                    count += 1
-                except Exception as e:
-                    logger.warning(f"[save_quant_regimes_async] failed: {e}")
+    mapped = [{**r, "raw_json": r.get("raw_json") or {}} for r in rows]
+    count = await bulk_write("quant_regimes", mapped, tag="save_quant_regimes_async")
     logger.info(f"[DB] saved {count} rows into quant_regimes")
     return count
 
@@ -864,23 +1672,10 @@ async def save_quant_context_trends_async(rows: list[dict]):
     if not rows:
         return 0
     try:
-        await ensure_connected()
-        async with _pool.acquire() as conn:
-            await conn.executemany("""
-                INSERT INTO quant_context_trends (symbol, ts, from_bias, to_bias, context_score, raw_json)
-                VALUES ($1, $2, $3, $4, $5, $6)
-            """, [
-                (
-                    r.get("symbol"),
-                    r.get("ts"),
-                    r.get("from_bias"),
-                    r.get("to_bias"),
-                    r.get("context_score"),
-                    json.dumps(r.get("raw_json") or {})
-                ) for r in rows
-            ])
-        logger.info(f"[DB] saved {len(rows)} rows into quant_context_trends")
-        return len(rows)
+        mapped = [{**r, "raw_json": r.get("raw_json") or {}} for r in rows]
+        count = await bulk_write("quant_context_trends", mapped, tag="save_quant_context_trends_async")
+        logger.info(f"[DB] saved {count} rows into quant_context_trends")
+        return count
     except Exception as e:
         logger.warning(f"[save_quant_context_trends_async] failed: {e}")
         return 0
@@ -888,49 +1683,66 @@ async def save_quant_context_trends_async(rows: list[dict]):
 # ---------------------------------------------------------------------
 # General insert_batch helper (used by rest_collector)
 # ---------------------------------------------------------------------
+# PostgreSQL type name (pg_type.typname) → bulk coercion kind
+PG_TYPE_KINDS = {
+    "text": "text", "varchar": "text", "bpchar": "text", "name": "text",
+    "float8": "float", "float4": "float",
+    "int2": "int", "int4": "int", "int8": "int",
+    "numeric": "numeric",
+    "timestamptz": "ts", "timestamp": "timestamp",
+    "json": "json", "jsonb": "json",
+    "bool": "bool",
+}
+
+# table → {column: BulkColumn}, filled on first use (cleared by init_db_async after migrations)
+_TABLE_COLUMNS: Dict[str, Dict[str, BulkColumn]] = {}
+
+
+def columns_from_catalog(rows: List[Tuple[str, str]]) -> Dict[str, BulkColumn]:
+    """[(column, typname), ...] → {column: BulkColumn}; unmapped types are passed through as-is."""
+    return {name: BulkColumn(name, PG_TYPE_KINDS.get(typname, "raw")) for name, typname in rows}
+
+
+async def table_columns(table: str, refresh: bool = False) -> Dict[str, BulkColumn]:
+    """Declared column types of `table`, introspected once and cached."""
+    if not refresh and table in _TABLE_COLUMNS:
+        return _TABLE_COLUMNS[table]
+    await ensure_connected()
+    async with _pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT a.attname, t.typname
+            FROM pg_attribute a JOIN pg_type t ON t.oid = a.atttypid
+            WHERE a.attrelid = $1::regclass AND a.attnum > 0 AND NOT a.attisdropped
+            ORDER BY a.attnum
+        """, table)
+    cols = columns_from_catalog([(r["attname"], r["typname"]) for r in rows])
+    if not cols:
+        raise ValueError(f"insert_batch: table {table!r} has no columns")
+    _TABLE_COLUMNS[table] = cols
+    return cols
+
+
 async def insert_batch(table: str, rows: list[dict]) -> int:
     """
     Generic batch insert for arbitrary table using row dict keys as columns.
-    Will attempt ISO timestamp parsing for strings.
+    Values are coerced by the table's declared column types (introspected once per
+    table) and loaded with COPY. Keys that are not columns of `table` raise ValueError.
     """
-    global _pool
-    await ensure_connected()
-
     if not rows:
         logger.debug(f"[DB.insert_batch] no rows provided for {table}")
         return 0
 
-    cols = list(rows[0].keys())
-    placeholders = ", ".join(f"${i+1}" for i in range(len(cols)))
-    sql = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({placeholders})"
-    count = 0
-
-    async with _pool.acquire() as conn:
-        async with conn.transaction():
-            for row in rows:
-                try:
-                    values = []
-                    for v in row.values():
-                        # if dict/list -> JSON string
-                        if isinstance(v, (dict, list)):
-                            values.append(json.dumps(v, default=str))
-                        # if string looks like ISO timestamp, try to parse to datetime
-                        elif isinstance(v, str):
-                            parsed = None
-                            try:
-                                parsed = dateutil_parser.isoparse(v)
-                            except Exception:
-                                parsed = None
-                            if parsed:
-                                values.append(parsed)
-                            else:
-                                values.append(v)
-                        else:
-                            values.append(v)
-                    await conn.execute(sql, *values)
-                    count += 1
-                except Exception as e:
-                    logger.warning(f"[DB.insert_batch] insert failed for {table}: {e}")
+    declared = await table_columns(table)
+    cols: List[str] = []
+    for row in rows:
+        for k in row:
+            if k not in cols:
+                cols.append(k)
+    unknown = [c for c in cols if c not in declared]
+    if unknown:
+        raise ValueError(f"insert_batch: unknown column(s) for {table}: {', '.join(unknown)}")
+
+    count = len(await _bulk_load(table, [declared[c] for c in cols], rows, f"DB.insert_batch:{table}"))
     logger.info(f"[DB.insert_batch] inserted {count} rows into {table}")
     return count
 
@@ -944,13 +1756,35 @@ async def get_latest_rest_metric(symbol: str) -> Optional[Dict[str, Any]]:
     """
     global _pool
     await ensure_connected()
-    q = "SELECT * FROM market_rest_metrics WHERE symbol = $1 ORDER BY ts DESC LIMIT 1"
     async with _pool.acquire() as conn:
-        row = await conn.fetchrow(q, symbol)
+        key, value = await symbol_filter(conn, "market_rest_metrics", symbol)
+        row = await conn.fetchrow(f"SELECT * FROM market_rest_metrics WHERE {key} = $1 ORDER BY ts DESC LIMIT 1", value)
     if not row:
         return None
     return dict(row)
 
+async def get_latest_rest_metrics_bulk(symbols: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Latest market_rest_metrics row for every symbol (or only `symbols`) in one query.
+    Used to warm the in-process snapshot store at startup.
+    """
+    global _pool
+    await ensure_connected()
+    async with _pool.acquire() as conn:
+        key, values, pg_type = await _symbol_keys(conn, "market_rest_metrics", symbols or [])
+        if symbols:
+            q = f"""
+                SELECT DISTINCT ON ({key}) * FROM market_rest_metrics
+                WHERE {key} = ANY($1::{pg_type}[])
+                ORDER BY {key}, ts DESC
+            """
+            args = [values]
+        else:
+            q = f"SELECT DISTINCT ON ({key}) * FROM market_rest_metrics ORDER BY {key}, ts DESC"
+            args = []
+        rows = await conn.fetch(q, *args)
+    return [dict(r) for r in rows]
+
 async def get_latest_metrics_async(limit: int = 100, tf: Optional[str] = None, symbol: Optional[str] = None):
     """
     Return latest metrics, optionally filtered by timeframe and/or symbol.
@@ -962,13 +1796,14 @@ async def get_latest_metrics_async(limit: int = 100, tf: Optional[str] = None, s
     if tf:
         where_clauses.append("timeframe = $%d" % (len(params) + 1))
         params.append(tf)
-    if symbol:
-        where_clauses.append("symbol = $%d" % (len(params) + 1))
-        params.append(symbol)
-    where = ("WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
-    q = f"SELECT * FROM metrics {where} ORDER BY updated_at DESC LIMIT $%d" % (len(params) + 1)
-    params.append(limit)
-    async with _pool.acquire() as conn:
+    async with DBReadConnection() as conn:
+        if symbol:
+            key, value = await symbol_filter(conn, "metrics", symbol)
+            where_clauses.append(f"{key} = $%d" % (len(params) + 1))
+            params.append(value)
+        where = ("WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
+        q = f"SELECT * FROM metrics {where} ORDER BY updated_at DESC LIMIT $%d" % (len(params) + 1)
+        params.append(limit)
         rows = await conn.fetch(q, *params)
     return [dict(r) for r in rows]
 
@@ -978,15 +1813,133 @@ async def get_metrics_by_symbol_async(symbol: str, limit: int = 100, tf: Optiona
     """
     global _pool
     await ensure_connected()
-    if tf:
-        q = "SELECT * FROM metrics WHERE symbol = $1 AND timeframe = $2 ORDER BY updated_at DESC LIMIT $3"
-        async with _pool.acquire() as conn:
-            rows = await conn.fetch(q, symbol, tf, limit)
-    else:
-        q = "SELECT * FROM metrics WHERE symbol = $1 ORDER BY updated_at DESC LIMIT $2"
-        async with _pool.acquire() as conn:
-            rows = await conn.fetch(q, symbol, limit)
-    return [dict(r) for r in rows]
+    async with DBReadConnection() as conn:
+        key, value = await symbol_filter(conn, "metrics", symbol)
+        if tf:
+            q = f"SELECT * FROM metrics WHERE {key} = $1 AND timeframe = $2 ORDER BY updated_at DESC LIMIT $3"
+            rows = await conn.fetch(q, value, tf, limit)
+        else:
+            q = f"SELECT * FROM metrics WHERE {key} = $1 ORDER BY updated_at DESC LIMIT $2"
+            rows = await conn.fetch(q, value, limit)
+    return await with_archived_tail("metrics", symbol, [dict(r) for r in rows], limit,
+                                    where={"timeframe": tf} if tf else None)
+
+
+async def with_archived_tail(table: str, symbol: str, rows: List[Dict[str, Any]], limit: int,
+                             columns: Optional[Sequence[str]] = None,
+                             where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Newest-first history rows from PG, topped up from the Parquet archive (archive.py)
+    when PG ran out of rows before `limit`.
+    """
+    if len(rows) >= limit or not archive.archives(table):
+        return rows
+    tc = timeseries.TIMESERIES_TABLES[table].time_col
+    try:
+        older = await archive.read(table, end=rows[-1][tc] if rows else None, symbol=symbol, columns=columns,
+                                   where=where, limit=limit - len(rows), descending=True)
+    except Exception as e:
+        logger.warning(f"[archive] {table} history read failed: {e}")
+        return rows
+    return rows + older
+
+# ---------------------------------------------------------------------
+# Columnar history reads (NumPy arrays per column)
+# ---------------------------------------------------------------------
+# Series = {"ts": epoch seconds, <column>: values}, oldest → newest. Numeric columns
+# are contiguous float64 with NaN for NULL; other types come back as object arrays.
+Series = Dict[str, np.ndarray]
+_NUMERIC_KINDS = ("float", "int", "numeric", "bool")
+
+
+def records_to_arrays(rows: Sequence[Any], columns: Sequence[str], numeric: Sequence[str]) -> Series:
+    """Rows (newest first, as selected) → chronological per-column arrays."""
+    rows = rows[::-1]
+    out: Series = {"ts": np.array([r["ts"] for r in rows], dtype=np.float64)}
+    for c in columns:
+        if c in numeric:
+            out[c] = np.array([r[c] for r in rows], dtype=np.float64)  # None → NaN
+        else:
+            out[c] = np.array([r[c] for r in rows], dtype=object)
+    return out
+
+
+async def _series_select(table: str, columns: Sequence[str]) -> Tuple[str, List[str]]:
+    """SELECT list for fetch_series (validated against the catalog) and the numeric columns."""
+    declared = await table_columns(table)
+    unknown = [c for c in columns if c not in declared]
+    if unknown:
+        raise ValueError(f"fetch_series: unknown column(s) for {table}: {', '.join(unknown)}")
+    numeric = [c for c in columns if declared[c].kind in _NUMERIC_KINDS]
+    time_col = timeseries.TIMESERIES_TABLES[table].time_col
+    select = [f"extract(epoch FROM {time_col})::float8 AS ts"] + [
+        f"{c}::float8 AS {c}" if c in numeric else c for c in columns
+    ]
+    return ", ".join(select), numeric
+
+
+def split_by_symbol(rows: Sequence[Any], symbols: Sequence[str], columns: Sequence[str],
+                    numeric: Sequence[str]) -> Dict[str, Series]:
+    """Multi-symbol result (newest first within each symbol) → {symbol: Series}; every symbol gets an entry."""
+    grouped: Dict[str, List[Any]] = {sym: [] for sym in symbols}
+    for r in rows:
+        grouped.setdefault(r["symbol"], []).append(r)
+    return {sym: records_to_arrays(recs, columns, numeric) for sym, recs in grouped.items()}
+
+
+async def fetch_series(symbols: Sequence[str], columns: Sequence[str], window: Any = 120,
+                       tf: Optional[str] = None, table: str = "metrics") -> Dict[str, Series]:
+    """
+    History of `columns` for each symbol as NumPy arrays (see Series), in one round trip.
+    window: int → last N rows per symbol; timedelta → rows newer than now - window.
+    Either way one LATERAL index probe per symbol (on symbol_id once the table is migrated).
+    Only the requested columns are selected (no raw_json unless asked for).
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    await ensure_connected()
+    select, numeric = await _series_select(table, columns)
+    time_col = timeseries.TIMESERIES_TABLES[table].time_col
+    tf_clause = " AND timeframe = $3" if tf else ""
+    async with DBReadConnection() as conn:
+        if table in _SYMBOL_ID_TABLES:
+            # probe the (symbol_id, time) index; names ride along for the result
+            ids = await _known_symbol_ids(conn, symbols)
+            keys: List[Any] = [[s for s in symbols if s in ids], [ids[s] for s in symbols if s in ids]]
+            source = f"unnest($1::text[], ${4 if tf else 3}::smallint[]) AS s(symbol, symbol_id)"
+            match = "symbol_id = s.symbol_id"
+        else:
+            keys = [symbols]
+            source, match = "unnest($1::text[]) AS s(symbol)", "symbol = s.symbol"
+        if isinstance(window, timedelta):
+            q = (f"SELECT s.symbol, m.* FROM {source} "
+                 f"CROSS JOIN LATERAL (SELECT {select} FROM {table} "
+                 f"WHERE {match} AND {time_col} >= now() - $2::interval{tf_clause} ORDER BY {time_col} DESC) m")
+            args: List[Any] = [keys[0], window]
+        else:
+            q = (f"SELECT s.symbol, m.* FROM {source} "
+                 f"CROSS JOIN LATERAL (SELECT {select} FROM {table} "
+                 f"WHERE {match}{tf_clause} ORDER BY {time_col} DESC LIMIT $2) m")
+            args = [keys[0], int(window)]
+        if tf:
+            args.append(tf)
+        if len(keys) > 1:
+            args.append(keys[1])
+        rows = await conn.fetch(q, *args)
+    return split_by_symbol(rows, symbols, columns, numeric)
+
+
+async def recent_symbols(since: timedelta = timedelta(minutes=10), table: str = "metrics") -> List[str]:
+    """Symbols with rows newer than now - since (fallback universe for the quant engine)."""
+    await ensure_connected()
+    time_col = timeseries.TIMESERIES_TABLES[table].time_col
+    async with DBReadConnection() as conn:
+        rows = await conn.fetch(
+            f"SELECT DISTINCT symbol FROM {table} WHERE {time_col} >= now() - $1::interval ORDER BY symbol", since
+        )
+    return [r["symbol"] for r in rows]
+
 
 # ---------------------------------------------------------------------
 # Persist 5s quant features (high-frequency table)
@@ -994,77 +1947,24 @@ async def get_metrics_by_symbol_async(symbol: str, limit: int = 100, tf: Optiona
 async def save_quant_features_5s_async(features: List[Dict[str, Any]]) -> int:
     """
     Persist 5s quant features into quant_features_5s.
-    Bulk inserts in batches; uses datetime.utcnow() for ts if not present.
+    Bulk loads via COPY; uses datetime.utcnow() for ts if not present.
     """
-    global _pool
-    await ensure_connected()
     if not features:
         return 0
-
-    cols = [
-        "symbol", "timeframe", "ts", "price", "oi_usd", "vol_usd",
-        "oi_change_5s_pct", "oi_change_10s_pct", "price_change_5s_pct", "price_change_10s_pct",
-        "atr_5s", "obi", "taker_buy_ratio", "taker_sell_ratio", "vpi",
-        "z_oi", "z_top_ls_acc", "z_obi", "z_funding", "zsc",
-        "confidence", "families", "raw_json"
-    ]
-    placeholders = ", ".join(f"${i+1}" for i in range(len(cols)))
-    sql = f"INSERT INTO quant_features_5s ({', '.join(cols)}) VALUES ({placeholders})"
-    batch = int(os.getenv("DB_INSERT_BATCH", "200"))
-    count = 0
-
-    async with _pool.acquire() as conn:
-        async with conn.transaction():
-            for i in range(0, len(features), batch):
-                chunk = features[i:i+batch]
-                values_list = []
-                for f in chunk:
-                    ts = f.get("ts") or datetime.utcnow()
-                    # ensure JSON serializable for families / raw_json
-                    families = f.get("families") or {}
-                    raw_json = f.get("raw_json") or f
-                    row = [
-                        f.get("symbol"),
-                        f.get("timeframe", "5s"),
-                        ts,
-                        safe_float(f.get("price")),
-                        safe_float(f.get("oi_usd")),
-                        safe_float(f.get("vol_usd")),
-                        safe_float(f.get("oi_change_5s_pct")),
-                        safe_float(f.get("oi_change_10s_pct")),
-                        safe_float(f.get("price_change_5s_pct")),
-                        safe_float(f.get("price_change_10s_pct")),
-                        safe_float(f.get("atr_5s")),
-                        safe_float(f.get("obi")),
-                        safe_float(f.get("taker_buy_ratio")),
-                        safe_float(f.get("taker_sell_ratio")),
-                        safe_float(f.get("vpi")),
-                        safe_float(f.get("z_oi")),
-                        safe_float(f.get("z_top_ls_acc")),
-                        safe_float(f.get("z_obi")),
-                        safe_float(f.get("z_funding")),
-                        safe_float(f.get("zsc")),
-                        safe_float(f.get("confidence")),
-                        json.dumps(families),
-                        json.dumps(raw_json, default=str)
-                    ]
-                    # sanitize non-finite floats
-                    for idx, v in enumerate(row):
-                        if isinstance(v, float) and not math.isfinite(v):
-                            row[idx] = None
-                    values_list.append(row)
-                try:
-                    await conn.executemany(sql, values_list)
-                    count += len(values_list)
-                except Exception as e:
-                    logger.warning(f"[save_quant_features_5s_async] bulk insert failed: {e}")
-                    # fallback to single-row insert attempts
-                    for row in values_list:
-                        try:
-                            await conn.execute(sql, *row)
-                            count += 1
-                        except Exception as e2:
-                            logger.warning(f"[save_quant_features_5s_async] single insert failed: {e2}")
+    if "quant_features_5s" in _COMPACT:
+        keep_raw = compact.keep_raw()
+        rows = [
+            {**f, "timeframe": f.get("timeframe", "5s"), "family_mask": compact.family_mask(f.get("families")),
+             "raw_json": f.get("raw_json") if keep_raw else None}
+            for f in features if isinstance(f, dict)
+        ]
+    else:
+        rows = [
+            {**f, "timeframe": f.get("timeframe", "5s"),
+             "families": f.get("families") or {}, "raw_json": f.get("raw_json") or f}
+            for f in features if isinstance(f, dict)
+        ]
+    count = await bulk_write("quant_features_5s", rows, tag="save_quant_features_5s_async")
     logger.info(f"[DB.save_quant_features_5s_async] saved {count} rows to quant_features_5s")
     return count
 
@@ -1073,81 +1973,132 @@ async def save_quant_features_5s_async(features: List[Dict[str, Any]]) -> int:
 # ---------------------------------------------------------------------
 async def save_quant_context_scores_async(rows: list[dict]):
     """
-    Persist context scoring rows into quant_context_scores (safe bulk insert).
-    This version logs and continues on per-row errors to avoid transaction aborts
-    for a single malformed row.
+    Persist context scoring rows into quant_context_scores (COPY bulk load).
+    Malformed rows are rejected by validation and retried individually, so a
+    single bad row cannot abort the batch.
     """
-    global _pool
-    await ensure_connected()
     if not rows:
         return 0
-
-    sql = """
-        INSERT INTO quant_context_scores (symbol, ts, context_score, bias, components)
-        VALUES ($1, $2, $3, $4, $5)
-    """
-    count = 0
-    async with _pool.acquire() as conn:
-        async with conn.transaction():
-            for r in rows:
-                try:
-                    components_json = json.dumps(sanitize_json(r.get("components") or {}), default=str)
-                    ts = r.get("ts") or datetime.utcnow()
-                    await conn.execute(
-                        sql,
-                        r.get("symbol"),
-                        ts,
-                        safe_float(r.get("context_score")),
-                        r.get("bias"),
-                        components_json
-                    )
-                    count += 1
-                except Exception as e:
-                    logger.warning(f"[save_quant_context_scores_async] insert failed for {r.get('symbol')}: {e}")
+    mapped = [{**r, "components": r.get("components") or {}} for r in rows]
+    count = await bulk_write("quant_context_scores", mapped, tag="save_quant_context_scores_async")
     logger.info(f"[DB] saved {count} rows into quant_context_scores")
     return count
 
 # ---------------------------------------------------------------------
 # Prune helpers
 # ---------------------------------------------------------------------
+async def _delete_older_than(conn, table: str, time_col: str, cutoff: datetime, batch: int) -> int:
+    """Row-wise retention for plain heaps, in short autocommit batches (no long locks / giant WAL bursts)."""
+    total = 0
+    while True:
+        res = await conn.execute(
+            f"DELETE FROM {table} WHERE ctid = ANY(ARRAY("
+            f"SELECT ctid FROM {table} WHERE {time_col} < $1 LIMIT $2))",
+            cutoff, batch,
+        )
+        # asyncpg returns strings like 'DELETE <n>'
+        try:
+            n = int(res.split()[-1]) if isinstance(res, str) and res.startswith("DELETE") else 0
+        except Exception:
+            n = 0
+        total += n
+        if n < batch:
+            return total
+        await asyncio.sleep(0)
+
+
+async def _prune_table(conn, tbl: str, cutoff: datetime, dry_run: bool = False) -> int:
+    """
+    Retention for one table: dropped partitions (partitioned), dropped chunks
+    (hypertable) or deleted rows (plain heap).
+    """
+    spec = timeseries.TIMESERIES_TABLES.get(tbl)
+    tcol = spec.time_col if spec else "ts"
+    if dry_run:
+        return int(await conn.fetchval(f"SELECT COUNT(1) FROM {tbl} WHERE {tcol} < $1", cutoff) or 0)
+    if tbl in _PARTITIONED:
+        return len(await partitions.drop_expired(conn, tbl, cutoff))
+    if tbl in _HYPERTABLES:
+        return await timeseries.drop_chunks_older_than(conn, tbl, cutoff)
+    return await _delete_older_than(conn, tbl, tcol, cutoff, int(os.getenv("PRUNE_BATCH", "10000")))
+
+
 async def prune_old_data(days: int = 60, tables: Optional[List[str]] = None, dry_run: bool = False) -> Dict[str, int]:
     """
     Prune rows older than `days` from the provided tables.
     Returns a dict mapping table -> rows_deleted (or rows_matched if dry_run=True).
+    Partitioned tables / hypertables drop whole partitions / chunks instead (value = count dropped).
     Default: prune quant_features_5s only.
     """
     global _pool
     await ensure_connected()
     if tables is None:
         tables = ["quant_features_5s"]
-    cutoff = datetime.utcnow() - timedelta(days=days)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
     results: Dict[str, int] = {}
     async with _pool.acquire() as conn:
-        async with conn.transaction():
-            for tbl in tables:
-                try:
-                    if dry_run:
-                        q = f"SELECT COUNT(1) FROM {tbl} WHERE ts < $1"
-                        rec = await conn.fetchval(q, cutoff)
-                        results[tbl] = int(rec or 0)
-                    else:
-                        q = f"DELETE FROM {tbl} WHERE ts < $1"
-                        res = await conn.execute(q, cutoff)
-                        # asyncpg returns strings like 'DELETE <n>'
-                        if isinstance(res, str) and res.startswith("DELETE"):
-                            try:
-                                n = int(res.split()[-1])
-                            except Exception:
-                                n = 0
-                        else:
-                            n = 0
-                        results[tbl] = n
-                except Exception as e:
-                    logger.warning(f"[prune_old_data] failed for {tbl}: {e}")
-                    results[tbl] = -1
+        for tbl in tables:
+            try:
+                results[tbl] = await _prune_table(conn, tbl, cutoff, dry_run)
+            except Exception as e:
+                logger.warning(f"[prune_old_data] failed for {tbl}: {e}")
+                results[tbl] = -1
     logger.info(f"[prune_old_data] prune result: {results} (dry_run={dry_run})")
     return results
 
+
+async def apply_retention() -> Dict[str, Any]:
+    """
+    One maintenance pass over every registered time-series table: premake upcoming
+    day partitions, archive closed days to Parquet (archive.py) and drop the archived
+    ones outside the hot window, then apply the table's retention policy
+    (timeseries.retention_days).
+    """
+    await ensure_connected()
+    now = datetime.now(timezone.utc)
+    results: Dict[str, Any] = {}
+    async with _pool.acquire() as conn:
+        for tbl in timeseries.TIMESERIES_TABLES:
+            out: Dict[str, Any] = {}
+            try:
+                if tbl in _PARTITIONED:
+                    out["created"] = len(await partitions.ensure_future(conn, tbl))
+                if archive.archives(tbl) and await timeseries.table_exists(conn, tbl):
+                    # closed days → Parquet, then PG keeps only what is not archived or still hot
+                    out["archive"] = await archive.archive_table(conn, tbl, now)
+                    bound = archive.boundary(tbl, now)
+                    if bound is not None:
+                        out["archive"]["pruned"] = await _prune_table(conn, tbl, bound)
+                days = timeseries.retention_days(tbl)
+                if days > 0 and await timeseries.table_exists(conn, tbl):
+                    out["pruned"] = await _prune_table(conn, tbl, now - timedelta(days=days))
+            except Exception as e:
+                logger.warning(f"[retention] {tbl} failed: {e}")
+                out["error"] = str(e)
+            results[tbl] = out
+    try:
+        results["raw_segments"] = {"pruned": len(await asyncio.to_thread(blobstore.prune_disk))}
+    except Exception as e:
+        logger.warning(f"[retention] raw segment prune failed: {e}")
+    logger.info(f"[retention] pass done: {results}")
+    return results
+
+
+async def retention_loop(interval_hours: float = 6):
+    """Background partition maintenance + retention (replaces the per-table prune loops)."""
+    logger.info(f"[retention_loop] starting: every {interval_hours}h, mode={TIMESERIES_MODE}")
+    try:
+        while True:
+            try:
+                await apply_retention()
+            except Exception as e:
+                logger.exception(f"[retention_loop] iteration failed: {e}")
+            await asyncio.sleep(interval_hours * 3600)
+    except asyncio.CancelledError:
+        logger.info("[retention_loop] cancelled — exiting")
+        raise
+
+
 async def prune_old_data_loop(interval_hours: int = 6, days: int = 60, tables: Optional[List[str]] = None):
     """
     Background loop to prune old high-frequency tables every `interval_hours`.
@@ -1170,20 +2121,47 @@ async def prune_old_data_loop(interval_hours: int = 6, days: int = 60, tables: O
 # ---------------------------------------------------------------------
 # Monitoring helper
 # ---------------------------------------------------------------------
+def timeseries_status() -> Dict[str, Any]:
+    """Storage mode + hypertables (for /api/system/continuity)."""
+    return {"mode": TIMESERIES_MODE, "configured": timeseries.configured_mode(),
+            "hypertables": sorted(_HYPERTABLES), "partitioned": sorted(_PARTITIONED)}
+
+
 async def get_pool_stats():
-    """Return basic stats about current connection pool."""
+    """Return stats about the write pool (top level) and every pool incl. acquire waits."""
     global _pool
     if not _pool or getattr(_pool, "_closed", True):
         return {"status": "disconnected"}
-    holders = getattr(_pool, "_holders", [])
+    write = _pool.stats()
     return {
         "status": "connected",
-        "min": getattr(_pool, "_minsize", None),
-        "max": getattr(_pool, "_maxsize", None),
-        "size": len(holders),
-        "idle": sum(1 for h in holders if h._con is not None and not h._in_use),
+        "min": write["min"],
+        "max": write["max"],
+        "size": write["size"],
+        "idle": write["idle"],
+        "pools": {p.name: p.stats() for p in (_pool, _read_pool, _replica_pool) if p is not None},
+        "replica": {
+            "configured": bool(REPLICA_URL),
+            "lag_s": _replica_lag_s,
+            "max_lag_s": REPLICA_MAX_LAG_S,
+            "in_use": _replica_pool is not None and pools.replica_usable(_replica_lag_s, REPLICA_MAX_LAG_S),
+        },
+        "read_routes": dict(_read_routes),
+        "queries": querystats.STATS.snapshot(),
+        "raw_store": blobstore.status(),
+        "symbols": {"cached": len(symbols.CACHE), "symbol_id_tables": sorted(_SYMBOL_ID_TABLES)},
+        "changefeed": changefeed.status(),
+        "change_only": changes.status(),
+        "compact": sorted(_COMPACT),
+        "archive": archive.status(),
+        "metrics_upsert": _METRICS_UPSERT,
     }
 
+def prometheus_metrics() -> str:
+    """Pool wait + per-statement metrics in Prometheus text format (GET /metrics)."""
+    return querystats.render_prometheus([p for p in (_pool, _read_pool, _replica_pool) if p is not None])
+
+
 class DBConnection:
     """Async context manager that ensures the pool exists before acquiring."""
     def __init__(self):
@@ -1199,3 +2177,19 @@ class DBConnection:
         global _pool
         if self.conn:
             await _pool.release(self.conn)
+
+
+class DBReadConnection:
+    """Like DBConnection, but for read-only queries routed by read_pool() (replica / read pool)."""
+    def __init__(self):
+        self.conn = None
+        self.pool = None
+
+    async def __aenter__(self):
+        self.pool = await read_pool()
+        self.conn = await self.pool.acquire()
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.conn:
+            await self.pool.release(self.conn)
@@ -0,0 +1,184 @@
+# backend/src/futuresboard/ingest_queue.py
+"""
+Multi-lane ingest queue for the db_writer partitions.
+
+Lanes, highest priority first:
+    rest     — REST snapshots, 24h ticker, open interest
+    mark     — markPrice updates
+    trades   — aggTrade / trade frames
+    depth    — order-book depth frames
+
+Each lane has its own capacity (a share of the partition's maxsize) and the
+writer drains lanes by smooth weighted round-robin, so a flood of depth frames
+cannot starve REST/ticker rows. When the partition is full, shedding starts in
+the lowest non-empty lane (its oldest item is evicted); an incoming item is only
+rejected (asyncio.QueueFull) when every queued item outranks it. A lane that is
+full on its own sheds its own oldest item — newer frames of the same class
+supersede older ones.
+
+LaneQueue is a drop-in for the subset of asyncio.Queue the writers use
+(put_nowait / get / get_nowait / task_done / qsize / empty / full / maxsize).
+"""
+
+from __future__ import annotations
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from .config import get_settings
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.ingest_queue")
+logger.setLevel(logging.INFO)
+
+LANES = ["rest", "mark", "trades", "depth"]
+
+# stream kind (ws_manager tags payloads with "kind") → lane
+KIND_TO_LANE = {
+    "rest": "rest",
+    "ticker": "rest",
+    "openInterest": "rest",
+    "markPrice": "mark",
+    "trades": "trades",
+    "aggTrade": "trades",
+    "trade": "trades",
+    "depth": "depth",
+}
+DEFAULT_LANE = "mark"
+
+
+def _parse_floats(value: str, fallback: List[float]) -> List[float]:
+    try:
+        vals = [float(x) for x in str(value).split(",") if x.strip()]
+        return vals if len(vals) == len(LANES) else fallback
+    except Exception:
+        return fallback
+
+
+def lane_for(item: Any) -> str:
+    """Lane for a queued record (uses its `kind` tag, then the raw Binance event type)."""
+    if not isinstance(item, dict):
+        return DEFAULT_LANE
+    kind = item.get("kind")
+    if kind is None and isinstance(item.get("raw"), dict):
+        kind = item["raw"].get("kind")
+    return KIND_TO_LANE.get(kind, DEFAULT_LANE)
+
+
+class LaneQueue:
+    """Priority lanes with per-lane capacity, weighted draining and lowest-lane-first shedding."""
+
+    def __init__(self, maxsize: int, weights: Optional[List[float]] = None, shares: Optional[List[float]] = None):
+        self.maxsize = max(1, int(maxsize))
+        weights = weights or _parse_floats(getattr(cfg, "INGEST_LANE_WEIGHTS", "8,4,2,1"), [8, 4, 2, 1])
+        shares = shares or _parse_floats(getattr(cfg, "INGEST_LANE_SHARES", "0.25,0.25,0.5,0.5"), [0.25, 0.25, 0.5, 0.5])
+        self._weights = {lane: max(0.0, float(w)) or 1.0 for lane, w in zip(LANES, weights)}
+        self._capacity = {lane: max(1, int(self.maxsize * float(s))) for lane, s in zip(LANES, shares)}
+        self._lanes: Dict[str, deque] = {lane: deque() for lane in LANES}
+        self._current = {lane: 0.0 for lane in LANES}
+        self._size = 0
+        self._unfinished = 0
+        self._not_empty = asyncio.Event()
+        self.counters: Dict[str, Dict[str, int]] = {
+            lane: {"in": 0, "out": 0, "shed": 0, "rejected": 0} for lane in LANES
+        }
+
+    # ---- asyncio.Queue-compatible surface ----
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def full(self) -> bool:
+        return self._size >= self.maxsize
+
+    def put_nowait(self, item: Any, lane: Optional[str] = None):
+        lane = lane if lane in self._lanes else lane_for(item)
+        if len(self._lanes[lane]) >= self._capacity[lane]:
+            # lane over its own capacity: newest frame of the class wins
+            self._evict(lane)
+        elif self._size >= self.maxsize:
+            victim = self._lowest_nonempty(at_or_below=lane)
+            if victim is None:
+                self.counters[lane]["rejected"] += 1
+                raise asyncio.QueueFull
+            self._evict(victim)
+        self._lanes[lane].append(item)
+        self._size += 1
+        self._unfinished += 1
+        self.counters[lane]["in"] += 1
+        self._not_empty.set()
+
+    def get_nowait(self) -> Any:
+        if self._size == 0:
+            raise asyncio.QueueEmpty
+        lane = self._pick_lane()
+        self._size -= 1
+        self.counters[lane]["out"] += 1
+        if self._size == 0:
+            self._not_empty.clear()
+        return self._lanes[lane].popleft()
+
+    async def get(self) -> Any:
+        while self._size == 0:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    def task_done(self):
+        if self._unfinished > 0:
+            self._unfinished -= 1
+
+    # ---- internals ----
+    def _lowest_nonempty(self, at_or_below: str) -> Optional[str]:
+        floor = LANES.index(at_or_below)
+        for lane in reversed(LANES):
+            if LANES.index(lane) < floor:
+                return None
+            if self._lanes[lane]:
+                return lane
+        return None
+
+    def _evict(self, lane: str):
+        self._lanes[lane].popleft()
+        self._size -= 1
+        self._unfinished = max(0, self._unfinished - 1)
+        self.counters[lane]["shed"] += 1
+
+    def _pick_lane(self) -> str:
+        """Smooth weighted round-robin over non-empty lanes."""
+        active = [lane for lane in LANES if self._lanes[lane]]
+        if len(active) == 1:
+            return active[0]
+        total = 0.0
+        best = None
+        for lane in active:
+            self._current[lane] += self._weights[lane]
+            total += self._weights[lane]
+            if best is None or self._current[lane] > self._current[best]:
+                best = lane
+        self._current[best] -= total
+        return best
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            lane: {"size": len(self._lanes[lane]), "capacity": self._capacity[lane], **self.counters[lane]}
+            for lane in LANES
+        }
+
+
+def merge_status(queues: List["LaneQueue"]) -> Dict[str, Dict[str, int]]:
+    """Per-lane totals across partitions (for /api/system/continuity)."""
+    out: Dict[str, Dict[str, int]] = {}
+    for q in queues:
+        for lane, st in q.status().items():
+            agg = out.setdefault(lane, {k: 0 for k in st})
+            for k, v in st.items():
+                agg[k] += v
+    return out
+
+
+__all__ = ["LaneQueue", "LANES", "lane_for", "merge_status"]
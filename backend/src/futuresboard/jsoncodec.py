@@ -0,0 +1,125 @@
+# backend/src/futuresboard/jsoncodec.py
+"""
+JSON encoding shared by the asyncpg json/jsonb codecs and the socket.io server.
+
+register(conn) is run on every pool connection (pools.init_connection), so JSON
+columns take and return Python objects natively — no json.dumps before a bind,
+no json.loads after a fetch. The codecs use the binary wire format, which also
+covers COPY (jsonb binary = b"\\x01" version byte + JSON text).
+
+    dumps      orjson when installed (optional), else the stdlib; non-finite floats
+               become null, datetimes ISO strings, numpy scalars/arrays plain values
+    loads      orjson / stdlib
+    JSONText   opt-in wrapper for text that already is JSON: sent unchanged, without
+               validation or NaN sanitising. A plain str is a JSON string value and
+               is encoded like any other object.
+"""
+
+from __future__ import annotations
+import json
+import math
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+try:  # optional dependency
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    _orjson = None
+
+JSONB_VERSION = b"\x01"
+
+
+def sanitize(obj: Any) -> Any:
+    """Recursively replace NaN/Inf floats with None to make JSON safe."""
+    if isinstance(obj, dict):
+        return {k: sanitize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [sanitize(v) for v in obj]
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    return obj
+
+
+def _default(o: Any) -> Any:
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return float(o)
+    if hasattr(o, "tolist"):  # numpy scalar / array
+        return sanitize(o.tolist())
+    return str(o)
+
+
+if _orjson is not None:
+    _OPTS = _orjson.OPT_SERIALIZE_NUMPY | _orjson.OPT_NON_STR_KEYS
+
+    def dumpb(obj: Any) -> bytes:
+        try:
+            return _orjson.dumps(obj, default=_default, option=_OPTS)  # NaN/Inf → null
+        except TypeError:  # e.g. ints beyond 64 bit
+            return json.dumps(sanitize(obj), default=_default, separators=(",", ":")).encode("utf-8")
+
+    def loads(s: Any, **_kw) -> Any:
+        return _orjson.loads(s)
+else:
+    def dumpb(obj: Any) -> bytes:
+        return json.dumps(sanitize(obj), default=_default, separators=(",", ":")).encode("utf-8")
+
+    def loads(s: Any, **_kw) -> Any:
+        return json.loads(s)
+
+
+def dumps(obj: Any, **_kw) -> str:
+    """JSON text of obj (keyword arguments of json.dumps are accepted and ignored)."""
+    return dumpb(obj).decode("utf-8")
+
+
+class JSONText:
+    """Already-encoded JSON text for a json/jsonb bind; the caller vouches that it is valid JSON."""
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"JSONText({self.text!r})"
+
+
+def _text(v: Any) -> bytes:
+    return v.text.encode("utf-8") if isinstance(v, JSONText) else dumpb(v)
+
+
+def encode_json(v: Any) -> bytes:
+    return _text(v)
+
+
+def decode_json(data: bytes) -> Any:
+    return loads(data)
+
+
+def encode_jsonb(v: Any) -> bytes:
+    return JSONB_VERSION + _text(v)
+
+
+def decode_jsonb(data: bytes) -> Any:
+    if data[:1] != JSONB_VERSION:
+        raise ValueError(f"unsupported jsonb version {data[:1]!r}")
+    return loads(data[1:])
+
+
+async def register(conn):
+    """Install the json/jsonb codecs on an asyncpg connection."""
+    await conn.set_type_codec("jsonb", schema="pg_catalog", encoder=encode_jsonb,
+                              decoder=decode_jsonb, format="binary")
+    await conn.set_type_codec("json", schema="pg_catalog", encoder=encode_json,
+                              decoder=decode_json, format="binary")
+
+
+__all__ = [
+    "JSONText", "sanitize", "dumps", "dumpb", "loads", "encode_json", "decode_json",
+    "encode_jsonb", "decode_jsonb", "register",
+]
@@ -0,0 +1,237 @@
+# backend/src/futuresboard/partitions.py
+"""
+Native declarative range partitioning (plain PostgreSQL, no TimescaleDB).
+
+Every table in timeseries.TIMESERIES_TABLES can be converted to
+`PARTITION BY RANGE (<time col>)` with one partition per UTC day:
+
+    <table>_pYYYYMMDD   FOR VALUES FROM ('YYYY-MM-DD') TO ('YYYY-MM-DD' + 1 day)
+
+Conversion (convert_table) copies no data: the existing heap is renamed to
+<table>_legacy and attached as the first partition FROM (MINVALUE) TO (end of
+today), guarded by a CHECK constraint so ATTACH does not rescan it. Its own
+PRIMARY KEY (id) gives way to the parent's (id, time) key, which ATTACH builds as
+an index on the legacy rows. Daily
+partitions are created DB_PARTITION_PREMAKE_DAYS ahead by the maintenance loop.
+
+Retention detaches and drops whole partitions whose upper bound is older than
+the table's policy (timeseries.retention_days), which takes milliseconds and
+produces no heap bloat or per-row WAL. The legacy partition is dropped the same
+way once everything in it has expired.
+"""
+
+from __future__ import annotations
+import logging
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from .config import get_settings
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.partitions")
+logger.setLevel(logging.INFO)
+
+Partition = Tuple[str, Optional[datetime], Optional[datetime]]  # (name, lower, upper); None = MIN/MAXVALUE
+
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def partition_name(table: str, day: date) -> str:
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def day_start(dt: datetime) -> datetime:
+    """UTC midnight of the day containing dt (naive values are taken as UTC)."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    dt = dt.astimezone(timezone.utc)
+    return datetime(dt.year, dt.month, dt.day, tzinfo=timezone.utc)
+
+
+def _parse_bound_value(v: str) -> Optional[datetime]:
+    v = v.strip()
+    if v.upper() in ("MINVALUE", "MAXVALUE"):
+        return None
+    ts = datetime.fromisoformat(v.strip("'"))
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def parse_bound(expr: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """pg_get_expr(relpartbound) → (lower, upper); raises ValueError for non-range bounds."""
+    m = _BOUND_RE.search(expr or "")
+    if not m:
+        raise ValueError(f"not a range partition bound: {expr!r}")
+    return _parse_bound_value(m.group(1)), _parse_bound_value(m.group(2))
+
+
+def expired(parts: Sequence[Partition], cutoff: datetime) -> List[str]:
+    """Partitions whose every row is older than cutoff (upper bound <= cutoff)."""
+    if cutoff.tzinfo is None:
+        cutoff = cutoff.replace(tzinfo=timezone.utc)
+    return [name for name, _lo, hi in parts if hi is not None and hi <= cutoff]
+
+
+def missing_days(parts: Sequence[Partition], today: date, ahead: int) -> List[date]:
+    """Days in [today, today + ahead] whose start is not covered by an existing partition."""
+    out = []
+    for i in range(ahead + 1):
+        d = today + timedelta(days=i)
+        start = datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
+        covered = any(
+            (lo is None or lo <= start) and (hi is None or start < hi)
+            for _n, lo, hi in parts
+        )
+        if not covered:
+            out.append(d)
+    return out
+
+
+# ---------------------------------------------------------------------
+# Catalog
+# ---------------------------------------------------------------------
+async def is_partitioned(conn, table: str) -> bool:
+    return bool(await conn.fetchval(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass($1)", table
+    ))
+
+
+async def partitioned_tables(conn, tables: Sequence[str]) -> List[str]:
+    return [t for t in tables if await is_partitioned(conn, t)]
+
+
+async def list_partitions(conn, table: str) -> List[Partition]:
+    rows = await conn.fetch("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = $1::regclass
+    """, table)
+    out: List[Partition] = []
+    for r in rows:
+        try:
+            lo, hi = parse_bound(r["bound"])
+        except ValueError:
+            continue  # DEFAULT partition (not created by us) — never dropped
+        out.append((r["relname"], lo, hi))
+    return sorted(out, key=lambda p: p[2] or datetime.max.replace(tzinfo=timezone.utc))
+
+
+# ---------------------------------------------------------------------
+# Maintenance
+# ---------------------------------------------------------------------
+async def ensure_future(conn, table: str, ahead: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+    """Create the daily partitions for today .. today + ahead that do not exist yet."""
+    ahead = int(ahead if ahead is not None else getattr(cfg, "DB_PARTITION_PREMAKE_DAYS", 7))
+    today = today or datetime.now(timezone.utc).date()
+    created = []
+    for d in missing_days(await list_partitions(conn, table), today, ahead):
+        name = partition_name(table, d)
+        lo, hi = d.isoformat(), (d + timedelta(days=1)).isoformat()
+        try:
+            async with conn.transaction():
+                await conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{lo} 00:00:00+00') TO ('{hi} 00:00:00+00')"
+                )
+            created.append(name)
+        except Exception as e:
+            logger.warning(f"[partitions] could not create {name}: {e}")
+    if created:
+        logger.info(f"[partitions] {table}: created {', '.join(created)}")
+    return created
+
+
+async def drop_expired(conn, table: str, cutoff: datetime) -> List[str]:
+    """Detach + drop every partition entirely older than cutoff (one short transaction each)."""
+    dropped = []
+    for name in expired(await list_partitions(conn, table), cutoff):
+        try:
+            async with conn.transaction():
+                await conn.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                await conn.execute(f"DROP TABLE {name}")
+            dropped.append(name)
+        except Exception as e:
+            logger.warning(f"[partitions] could not drop {name}: {e}")
+    if dropped:
+        logger.info(f"[partitions] {table}: dropped {', '.join(dropped)}")
+    return dropped
+
+
+# ---------------------------------------------------------------------
+# Conversion (migration)
+# ---------------------------------------------------------------------
+async def convert_table(conn, table: str, time_col: str, has_id: bool = True,
+                        log: Callable[[str], Any] = print) -> str:
+    """
+    Convert a regular heap into a daily range-partitioned table without copying rows.
+    Returns "converted", "already", "view" or "missing".
+    """
+    kind = await conn.fetchval("SELECT relkind::text FROM pg_class WHERE oid = to_regclass($1)", table)
+    if kind is None:
+        log(f"⏭️  {table}: table missing, skipped (start the backend once to create it)")
+        return "missing"
+    if kind == "v":
+        # compact.py compatibility view; its base table is converted on its own
+        return "view"
+    if await is_partitioned(conn, table):
+        await ensure_future(conn, table)
+        return "already"
+
+    legacy = f"{table}_legacy"
+    async with conn.transaction():
+        await conn.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        indexes = await conn.fetch("""
+            SELECT c.relname, pg_get_indexdef(i.indexrelid) AS def, i.indisprimary
+            FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = $1::regclass
+        """, table)
+        seq = await conn.fetchval("SELECT pg_get_serial_sequence($1, 'id')", table) if has_id else None
+        newest = await conn.fetchval(f"SELECT max({time_col}) FROM {table}")
+        now = datetime.now(timezone.utc)
+        boundary = day_start(max(newest, now) if newest else now) + timedelta(days=1)
+
+        # the partition key cannot be NULL; such rows land in the oldest range and expire first
+        await conn.execute(f"UPDATE {table} SET {time_col} = 'epoch' WHERE {time_col} IS NULL")
+        await conn.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        for ix in indexes:
+            if ix["indisprimary"] and has_id:
+                # ATTACH builds the parent's (id, time) key on the legacy rows; a
+                # partition cannot keep a second primary key of its own
+                await conn.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {ix['relname']}")
+            elif ix["indisprimary"]:
+                await conn.execute(f"ALTER INDEX {ix['relname']} RENAME TO {legacy}_pkey")
+            else:
+                await conn.execute(f"DROP INDEX {ix['relname']}")  # rebuilt through the parent below
+
+        await conn.execute(
+            f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING STORAGE) "
+            f"PARTITION BY RANGE ({time_col})"
+        )
+        await conn.execute(f"ALTER TABLE {table} ALTER COLUMN {time_col} SET NOT NULL")
+        if seq:
+            # keep the id sequence alive when the legacy partition is eventually dropped
+            await conn.execute(f"ALTER SEQUENCE {seq} OWNED BY {table}.id")
+        if has_id:
+            await conn.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {time_col})")
+
+        await conn.execute(f"ALTER TABLE {legacy} ALTER COLUMN {time_col} SET NOT NULL")
+        await conn.execute(
+            f"ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_range CHECK ({time_col} < '{boundary.isoformat()}')"
+        )
+        await conn.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {legacy} "
+            f"FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}')"
+        )
+        for ix in indexes:
+            if not ix["indisprimary"]:
+                await conn.execute(ix["def"])
+        await ensure_future(conn, table, today=boundary.date())
+    log(f"🧩 {table}: partitioned by day on {time_col} (legacy rows < {boundary:%Y-%m-%d} kept in {legacy})")
+    return "converted"
+
+
+__all__ = [
+    "partition_name", "parse_bound", "expired", "missing_days", "is_partitioned", "partitioned_tables",
+    "list_partitions", "ensure_future", "drop_expired", "convert_table",
+]
@@ -0,0 +1,194 @@
+# backend/src/futuresboard/pools.py
+"""
+Instrumented asyncpg pools and read routing.
+
+db.py keeps three pools:
+
+    write    db._pool           writers, maintenance, engine loops (primary)
+    read     db._read_pool      dashboard / history / latest reads (primary)
+    replica  db._replica_pool   optional DB_REPLICA_URL; preferred for reads
+
+Each one is an InstrumentedPool: a thin wrapper over asyncpg.Pool that times
+every acquire() (queue wait until a connection is handed out) into a
+WaitStats histogram, so /api/db/status shows which pool is starved.
+
+Reads go to the replica only while its measured replay lag is at or below
+DB_REPLICA_MAX_LAG_S; otherwise (lagging, unreachable, not configured) they
+fall back to the primary read pool.
+
+Connections are InstrumentedConnection (asyncpg `connection_class`), which
+times every statement into querystats.STATS, and run init_connection (asyncpg
+`init`) which registers the json/jsonb codecs of jsoncodec.py.
+"""
+
+from __future__ import annotations
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+from . import jsoncodec, querystats
+
+logger = logging.getLogger("futuresboard.pools")
+logger.setLevel(logging.INFO)
+
+# acquire-wait histogram upper bounds (seconds); the last bucket is open-ended
+WAIT_BUCKETS: List[float] = [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]
+
+# replay lag on a standby; 0 on a primary (pg_last_xact_replay_timestamp is NULL there)
+REPLICA_LAG_SQL = """
+    SELECT CASE WHEN pg_is_in_recovery()
+                THEN COALESCE(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+                ELSE 0 END::float8
+"""
+
+
+class WaitStats:
+    """Counts and histogram of pool acquire waits."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.errors = 0
+        self.buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{b:g}" for b in WAIT_BUCKETS] + ["inf"]
+        return {
+            "acquires": self.count,
+            "errors": self.errors,
+            "wait_avg_ms": round(self.total_s / self.count * 1000, 3) if self.count else 0.0,
+            "wait_max_ms": round(self.max_s * 1000, 3),
+            "wait_buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class _TimedAcquire:
+    """Both `await pool.acquire()` and `async with pool.acquire() as conn` forms, timed."""
+
+    def __init__(self, owner: "InstrumentedPool", timeout: Optional[float]):
+        self._owner = owner
+        self._timeout = timeout
+        self._conn = None
+
+    async def _acquire(self):
+        t0 = time.perf_counter()
+        try:
+            conn = await self._owner.pool.acquire(timeout=self._timeout)
+        except Exception:
+            self._owner.waits.errors += 1
+            raise
+        self._owner.waits.observe(time.perf_counter() - t0)
+        return conn
+
+    def __await__(self):
+        return self._acquire().__await__()
+
+    async def __aenter__(self):
+        self._conn = await self._acquire()
+        return self._conn
+
+    async def __aexit__(self, exc_type, exc, tb):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            await self._owner.pool.release(conn)
+
+
+class InstrumentedPool:
+    """asyncpg.Pool wrapper recording acquire waits; everything else is delegated."""
+
+    def __init__(self, name: str, pool):
+        self.name = name
+        self.pool = pool
+        self.waits = WaitStats()
+
+    def acquire(self, *, timeout: Optional[float] = None) -> _TimedAcquire:
+        return _TimedAcquire(self, timeout)
+
+    async def release(self, conn, *, timeout: Optional[float] = None):
+        await self.pool.release(conn, timeout=timeout)
+
+    async def close(self):
+        await self.pool.close()
+
+    def __getattr__(self, item):
+        # _closed, get_size(), ... (only called for missing attributes)
+        return getattr(self.pool, item)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "closed": self.pool.is_closing(),
+            "min": self.pool.get_min_size(),
+            "max": self.pool.get_max_size(),
+            "size": self.pool.get_size(),
+            "idle": self.pool.get_idle_size(),
+            **self.waits.snapshot(),
+        }
+
+
+class InstrumentedConnection(asyncpg.Connection):
+    """asyncpg connection that reports latency and row counts of every statement to querystats."""
+
+    async def _timed(self, sql: str, args, call, rows_of):
+        t0 = time.perf_counter()
+        try:
+            res = await call
+        except Exception:
+            querystats.STATS.record(sql, time.perf_counter() - t0, 0, args, error=True)
+            raise
+        querystats.STATS.record(sql, time.perf_counter() - t0, rows_of(res), args)
+        return res
+
+    async def execute(self, query: str, *args, **kw):
+        return await self._timed(query, args, super().execute(query, *args, **kw), querystats.rows_from_status)
+
+    async def executemany(self, command: str, args, **kw):
+        n = len(args) if hasattr(args, "__len__") else 0
+        return await self._timed(command, (), super().executemany(command, args, **kw), lambda _r: n)
+
+    async def fetch(self, query: str, *args, **kw):
+        return await self._timed(query, args, super().fetch(query, *args, **kw), len)
+
+    async def fetchrow(self, query: str, *args, **kw):
+        return await self._timed(query, args, super().fetchrow(query, *args, **kw), lambda r: int(r is not None))
+
+    async def fetchval(self, query: str, *args, **kw):
+        return await self._timed(query, args, super().fetchval(query, *args, **kw), lambda _r: 1)
+
+    async def copy_records_to_table(self, table_name: str, **kw):
+        return await self._timed(f"COPY {table_name} FROM STDIN", (),
+                                 super().copy_records_to_table(table_name, **kw), querystats.rows_from_status)
+
+
+def connection_class():
+    """Connection class for create_pool (plain asyncpg.Connection when DB_QUERY_STATS is off)."""
+    from .config import get_settings
+    return InstrumentedConnection if getattr(get_settings(), "DB_QUERY_STATS", True) else asyncpg.Connection
+
+
+async def init_connection(conn):
+    """asyncpg pool `init` hook: JSON columns bind and return Python objects."""
+    await jsoncodec.register(conn)
+
+
+def replica_usable(lag_s: Optional[float], max_lag_s: float) -> bool:
+    """Route reads to the replica only when its last measured lag is known and within bounds."""
+    return lag_s is not None and lag_s <= max_lag_s
+
+
+__all__ = [
+    "WAIT_BUCKETS", "REPLICA_LAG_SQL", "WaitStats", "InstrumentedPool", "InstrumentedConnection",
+    "connection_class", "init_connection", "replica_usable",
+]
@@ -1,17 +1,20 @@
 # backend/src/futuresboard/quant_engine.py
 from __future__ import annotations
 import asyncio
-import json
 import math
-import statistics
 import random
+import time
 import warnings
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Sequence
 from datetime import datetime, timedelta, timezone
 import numpy as np
-from .utils import safe_float, pct_change, safe_corrcoef, zscore, mean_or_none
+from .utils import safe_float, pct_change, safe_corrcoef, last_or_none, zscore_last, extract_book_top_volumes
 
+from . import changefeed
+from . import jsoncodec
 from . import db
+from . import universe
+from . import bucketer
 import logging
 
 logger = logging.getLogger("futuresboard.quant_engine")
@@ -21,6 +24,13 @@ if not logger.handlers:
 
 # --- Config / thresholds (tweakable) ---
 DEFAULT_HISTORY = 120  # rows per-symbol to fetch for time-series features
+# metrics columns read by _process_symbol_sync (raw_json only as fallback for older rows
+# without typed book depth; it is NULL when payloads are offloaded, see blobstore.py)
+SERIES_COLUMNS = [
+    "price", "oi_usd", "vol_usd", "volume_24h", "global_ls_5m", "top_ls_accounts",
+    "top_ls_positions", "funding", "taker_buy_count", "taker_sell_count",
+    "book_bid_top5", "book_ask_top5", "raw_json",
+]
 ATR_WINDOW = 5         # used as proxy for short-term volatility
 VPI_THRESHOLD = 500_000  # example threshold for strong VPI signals
 ZSC_ALERT = 1.8        # absolute zsc alert threshold
@@ -45,10 +55,10 @@ def parse_raw_json_field(raw):
         return raw
     if isinstance(raw, str):
         try:
-            parsed = json.loads(raw)
+            parsed = jsoncodec.loads(raw)
             if isinstance(parsed, dict) and "raw" in parsed and isinstance(parsed["raw"], str):
                 try:
-                    parsed["raw"] = json.loads(parsed["raw"])
+                    parsed["raw"] = jsoncodec.loads(parsed["raw"])
                 except Exception:
                     pass
             return parsed
@@ -56,52 +66,6 @@ def parse_raw_json_field(raw):
             return None
     return None
 
-def extract_book_top_volumes(parsed_raw: dict, top_n: int = 5):
-    if not parsed_raw:
-        return None, None
-    raw_field = parsed_raw.get("raw") if isinstance(parsed_raw, dict) else parsed_raw
-    if raw_field is None:
-        raw_field = parsed_raw
-    if not isinstance(raw_field, dict):
-        return None, None
-
-    bids = None
-    asks = None
-    for k in ("bids", "b", "bid"):
-        if k in raw_field:
-            bids = raw_field[k]
-            break
-    for k in ("asks", "a", "ask"):
-        if k in raw_field:
-            asks = raw_field[k]
-            break
-
-    def sum_top(arr):
-        if not isinstance(arr, list):
-            return None
-        s = 0.0
-        n = 0
-        for i, item in enumerate(arr):
-            if i >= top_n:
-                break
-            try:
-                if isinstance(item, (list, tuple)) and len(item) >= 2:
-                    size = safe_float(item[1])
-                elif isinstance(item, dict) and ("size" in item or "volume" in item):
-                    size = safe_float(item.get("size") or item.get("volume"))
-                else:
-                    size = None
-                if size is not None:
-                    s += float(size)
-                    n += 1
-            except Exception:
-                continue
-        return s if n > 0 else None
-
-    bid_sum = sum_top(bids)
-    ask_sum = sum_top(asks)
-    return bid_sum, ask_sum
-
 def extract_taker_counts(parsed_raw: dict, lookback_trades: int = 100):
     if not parsed_raw:
         return None, None
@@ -159,15 +123,19 @@ async def safe_loop_runner(
     iteration_coro: Callable[[], Any],
     interval: float = 5.0,
     flush_coro: Optional[Callable[[], Any]] = None,
-    jitter: float = 0.1
+    jitter: float = 0.1,
+    wake_on: Sequence[str] = ()
 ):
     """
     Runs `iteration_coro()` repeatedly with cancellable loop, jittered sleep,
     and optional flush on cancel.
     - iteration_coro: async callable performing a single iteration/work unit.
     - flush_coro: optional async callable executed once on cancellation to flush state.
+    - wake_on: upstream tables; the loop runs once per committed change of them
+      (changefeed) and `interval` becomes the fallback when no change arrives.
     """
-    logger.info(f"[{name}] started (interval={interval}s)")
+    sub = changefeed.subscribe(wake_on, name) if wake_on else None
+    logger.info(f"[{name}] started (interval={interval}s{', wake_on=' + ','.join(wake_on) if wake_on else ''})")
     try:
         while True:
             try:
@@ -181,7 +149,7 @@ async def safe_loop_runner(
             sleep_for = interval + random.uniform(-jitter, jitter)
             if sleep_for < 0:
                 sleep_for = interval
-            await asyncio.sleep(sleep_for)
+            await changefeed.wait(sub, sleep_for)
     except asyncio.CancelledError:
         # run flush if provided
         if flush_coro:
@@ -203,45 +171,53 @@ async def safe_loop_runner(
                 except Exception:
                     pass
         return
+    finally:
+        if sub is not None:
+            changefeed.unsubscribe(sub)
 
 # -------------------------
 # Main compute (per-symbol heavy lifting moved to sync function to offload)
 # -------------------------
-def _process_symbol_sync(sym: str, rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+def _process_symbol_sync(sym: str, series: Dict[str, np.ndarray]) -> Optional[Dict[str, Any]]:
     """
     CPU-heavy processing for one symbol. Executed in thread pool.
-    Accepts chronological rows (oldest -> newest).
+    Accepts db.fetch_series arrays (oldest -> newest, NaN for NULL).
     Returns dict or None.
     """
     try:
-        if not rows:
+        if not len(series.get("ts", ())):
             return None
 
         # extract series
-        prices = [safe_float(r.get("price")) for r in rows]
-        oi_usd = [safe_float(r.get("oi_usd")) for r in rows]
-        vol_usd = [safe_float(r.get("vol_usd") or r.get("volume_24h")) for r in rows]
-        global_ls = [safe_float(r.get("global_ls_5m") or r.get("Global_LS_5m")) for r in rows]
-        top_ls_acc = [safe_float(r.get("top_ls_accounts") or r.get("Top_LS_Accounts")) for r in rows]
-        top_ls_pos = [safe_float(r.get("top_ls_positions") or r.get("Top_LS_Positions")) for r in rows]
-        funding = [safe_float(r.get("funding") or r.get("funding_rate") or r.get("Funding")) for r in rows]
-        raw_jsons = [r.get("raw_json") or r.get("raw") or r.get("rawJson") for r in rows]
+        prices = series["price"]
+        oi_usd = series["oi_usd"]
+        vol_usd = np.where(np.isnan(series["vol_usd"]), series["volume_24h"], series["vol_usd"])
+        top_ls_acc = series["top_ls_accounts"]
+        funding = series["funding"]
+        raw_jsons = series["raw_json"]
+        book_bid, book_ask = series["book_bid_top5"], series["book_ask_top5"]
+
+        def book_at(i):
+            # typed top-5 depth; rows written before the typed columns existed parse raw_json
+            b, a = book_bid[i], book_ask[i]
+            if np.isfinite(b) and np.isfinite(a):
+                return float(b), float(a)
+            return extract_book_top_volumes(parse_raw_json_field(raw_jsons[i]), top_n=5)
 
         # latest
-        latest = rows[-1]
-        latest_price = safe_float(latest.get("price"))
-        latest_oi = safe_float(latest.get("oi_usd"))
-        latest_vol = safe_float(latest.get("vol_usd") or latest.get("volume_24h"))
-        latest_global_ls = safe_float(latest.get("global_ls_5m"))
-        latest_top_ls_acc = safe_float(latest.get("top_ls_accounts"))
-        latest_top_ls_pos = safe_float(latest.get("top_ls_positions"))
-        latest_funding = safe_float(latest.get("funding") or latest.get("funding_rate"))
+        latest_price = last_or_none(prices)
+        latest_oi = last_or_none(oi_usd)
+        latest_vol = last_or_none(vol_usd)
+        latest_global_ls = last_or_none(series["global_ls_5m"])
+        latest_top_ls_acc = last_or_none(top_ls_acc)
+        latest_top_ls_pos = last_or_none(series["top_ls_positions"])
+        latest_funding = last_or_none(funding)
 
         # helper index pct change
-        def idx_pct_change(series, offset):
-            if len(series) <= offset or series[-1] is None or series[-1-offset] is None:
+        def idx_pct_change(arr, offset):
+            if len(arr) <= offset:
                 return None
-            return pct_change(series[-1], series[-1-offset])
+            return pct_change(last_or_none(arr), last_or_none(arr[:len(arr) - offset]))
 
         oi_ch_5 = idx_pct_change(oi_usd, 5)
         oi_ch_10 = idx_pct_change(oi_usd, 10)
@@ -249,34 +225,24 @@ def _process_symbol_sync(sym: str, rows: List[Dict[str, Any]]) -> Optional[Dict[
         price_ch_10 = idx_pct_change(prices, 10)
 
         # returns and ATR proxy
-        returns = []
-        for i in range(1, len(prices)):
-            a = prices[i]
-            b = prices[i-1]
-            if a is None or b is None or b == 0:
-                returns.append(None)
-            else:
-                returns.append((a - b) / b)
-        recent_returns = [r for r in returns[-ATR_WINDOW:] if r is not None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.where(prices[:-1] != 0, (prices[1:] - prices[:-1]) / prices[:-1], np.nan)
+        recent_returns = returns[-ATR_WINDOW:]
+        recent_returns = recent_returns[np.isfinite(recent_returns)]
         atr_5s = None
-        if recent_returns:
-            try:
-                atr_5s = statistics.pstdev(recent_returns) * (latest_price or 1.0)
-            except Exception:
-                atr_5s = None
+        if len(recent_returns):
+            atr_5s = float(recent_returns.std()) * (latest_price or 1.0)
 
         # zscores
-        z_oi_series = zscore([v for v in oi_usd])
-        z_top_acc_series = zscore([v for v in top_ls_acc])
-        z_oi_latest = z_oi_series[-1] if z_oi_series else None
-        z_top_acc_latest = z_top_acc_series[-1] if z_top_acc_series else None
+        z_oi_latest = zscore_last(oi_usd)
+        z_top_acc_latest = zscore_last(top_ls_acc)
 
         # parse latest raw
         parsed_latest_raw = None
-        raw_field = raw_jsons[-1] if raw_jsons else None
+        raw_field = raw_jsons[-1] if len(raw_jsons) else None
         parsed_latest_raw = parse_raw_json_field(raw_field)
 
-        bid_top, ask_top = extract_book_top_volumes(parsed_latest_raw, top_n=5)
+        bid_top, ask_top = book_at(-1) if len(raw_jsons) else (None, None)
         obi = None
         if bid_top is not None and ask_top is not None:
             try:
@@ -285,7 +251,11 @@ def _process_symbol_sync(sym: str, rows: List[Dict[str, Any]]) -> Optional[Dict[
             except Exception:
                 obi = None
 
-        taker_buy_count, taker_sell_count = extract_taker_counts(parsed_latest_raw) or (None, None)
+        # bucketed bars carry typed taker counts; fall back to trades embedded in raw_json
+        taker_buy_count = last_or_none(series["taker_buy_count"])
+        taker_sell_count = last_or_none(series["taker_sell_count"])
+        if taker_buy_count is None or taker_sell_count is None:
+            taker_buy_count, taker_sell_count = extract_taker_counts(parsed_latest_raw) or (None, None)
         taker_buy_ratio = None
         taker_sell_ratio = None
         if taker_buy_count is not None and taker_sell_count is not None and (taker_sell_count + taker_buy_count) > 0:
@@ -300,9 +270,8 @@ def _process_symbol_sync(sym: str, rows: List[Dict[str, Any]]) -> Optional[Dict[
 
         # build obi_series and funding_series for z-scores
         obi_series = []
-        for raw in raw_jsons:
-            p = parse_raw_json_field(raw)
-            b, a = extract_book_top_volumes(p, top_n=5)
+        for i in range(len(raw_jsons)):
+            b, a = book_at(i)
             if b is not None and a is not None:
                 try:
                     obi_series.append(b / (b + a))
@@ -310,20 +279,8 @@ def _process_symbol_sync(sym: str, rows: List[Dict[str, Any]]) -> Optional[Dict[
                     obi_series.append(None)
             else:
                 obi_series.append(None)
-        funding_series = [safe_float(x) for x in funding] if funding else []
-
-        z_obi = None
-        if any(v is not None for v in obi_series):
-            z_obi_series = zscore([v for v in obi_series])
-            z_obi = z_obi_series[-1] if z_obi_series else None
-
-        z_funding = None
-        if funding_series:
-            try:
-                z_funding_series = zscore([v for v in funding_series])
-                z_funding = z_funding_series[-1] if z_funding_series else None
-            except Exception:
-                z_funding = None
+        z_obi = zscore_last(np.array(obi_series, dtype=np.float64))
+        z_funding = zscore_last(funding)
 
         # zsc composite
         zsc = None
@@ -402,8 +359,7 @@ def _process_symbol_sync(sym: str, rows: List[Dict[str, Any]]) -> Optional[Dict[
         try:
             bid_prev, ask_prev = None, None
             if len(raw_jsons) >= 6:
-                prev_parsed = parse_raw_json_field(raw_jsons[-6])
-                bid_prev, ask_prev = extract_book_top_volumes(prev_parsed, top_n=5)
+                bid_prev, ask_prev = book_at(-6)
             avg_book_depth = None
             top_depth_vals = [v for v in (bid_top, ask_top, bid_prev, ask_prev) if v is not None]
             if top_depth_vals:
@@ -482,46 +438,49 @@ def _process_symbol_sync(sym: str, rows: List[Dict[str, Any]]) -> Optional[Dict[
 # -------------------------
 # High-level compute function (async) that offloads heavy per-symbol compute to threadpool
 # -------------------------
-async def compute_quant_metrics(limit: int = 200) -> List[Dict[str, Any]]:
+async def compute_quant_metrics(limit: int = 200, symbols: Optional[List[str]] = None) -> List[Dict[str, Any]]:
     """
     Compute per-symbol quant metrics and heuristic signals.
     Offloads the per-symbol CPU-heavy part to threadpool for event-loop responsiveness.
+    `symbols` defaults to the whole universe; when it is empty, up to `limit` symbols
+    with recent metrics rows are used instead. History for all symbols is fetched in
+    one query (db.fetch_series).
     """
+    if symbols is None:
+        symbols = universe.symbols()
+    if not symbols:
+        try:
+            symbols = (await db.recent_symbols())[:limit]
+        except Exception as e:
+            logger.exception(f"[quant_engine] failed to fetch recent symbols: {e}")
+            return []
+    if not symbols:
+        return []
+
+    # evenly spaced WS bars when write-side bucketing is on (bucketer.py)
+    series_tf = bucketer.series_timeframe()
     try:
-        raw_latest = await db.get_latest_metrics_async(limit=limit)
+        history = await db.fetch_series(symbols, SERIES_COLUMNS, DEFAULT_HISTORY, tf=series_tf)
     except Exception as e:
-        logger.exception(f"[quant_engine] failed to fetch latest metrics: {e}")
+        logger.exception(f"[quant_engine] fetch_series failed: {e}")
         return []
 
-    # gather unique symbols preserving order
-    symbols = []
-    seen = set()
-    for r in raw_latest:
-        sym = r.get("symbol")
-        if sym and sym not in seen:
-            symbols.append(sym)
-            seen.add(sym)
-
-    # --- Replace semaphore + run_in_executor block in compute_quant_metrics ---
-    # bounded concurrency for IO + CPU offload
-    pool_max = getattr(db, "POOL_MAX_SIZE", 10) or 10
-    sem = asyncio.Semaphore(max(1, min(24, pool_max * 2)))
+    # bounded CPU offload
+    sem = asyncio.Semaphore(24)
 
     async def process_symbol(sym: str) -> Optional[Dict[str, Any]]:
         async with sem:
             try:
-                rows = await db.get_metrics_by_symbol_async(sym, limit=DEFAULT_HISTORY, tf=None)
-                if not rows:
+                series = history.get(sym)
+                if series is None or not len(series["ts"]):
                     return None
-                rows = list(reversed(rows))
                 # Offload CPU-heavy processing to thread. Note: threads cannot be cancelled.
-                result = await asyncio.to_thread(_process_symbol_sync, sym, rows)
+                result = await asyncio.to_thread(_process_symbol_sync, sym, series)
                 return result
             except Exception as e:
                 logger.exception(f"[quant_engine] process_symbol {sym} failed: {e}")
                 return None
 
-
     tasks = [asyncio.create_task(process_symbol(s)) for s in symbols]
     results = await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -605,18 +564,40 @@ async def persist_5s_features(computed: List[Dict[str, Any]]) -> int:
         logger.exception(f"[persist_5s_features] failed: {e}")
         return 0
 
+# -------------------------
+# Universe cadence state
+# -------------------------
+# symbol -> time.time() of the last HF quant computation (per-tier cadence)
+_last_quant_run: Dict[str, float] = {}
+
+
+async def on_universe_change(change: Dict[str, Any]):
+    """universe subscriber: drop removed symbols, compute added ones on the next tick."""
+    for sym in change.get("removed", []):
+        _last_quant_run.pop(sym, None)
+    for sym in change.get("added", {}):
+        _last_quant_run.pop(sym, None)
+    logger.info(f"[QuantEngine] universe changed — {len(universe.symbols())} symbols tracked")
+
 # -------------------------
 # 5s quant loop runner (uses safe_loop_runner)
 # -------------------------
 async def run_quant_loop(interval: float = 5.0):
     """
     Continuous loop computing metrics at HF cadence and persisting to quant_features_5s.
+    Each tick only computes the symbols whose tier quant cadence has elapsed.
     Uses safe_loop_runner for cancellation behavior.
     """
     async def iteration():
         computed = []
+        now = time.time()
+        due = universe.due_symbols(_last_quant_run, kind="quant", now=now)
+        if not due:
+            return
+        for sym in due:
+            _last_quant_run[sym] = now
         try:
-            computed = await compute_quant_metrics(limit=200)
+            computed = await compute_quant_metrics(limit=200, symbols=due)
         except Exception as e:
             logger.warning(f"[QuantEngine] compute_quant_metrics failed: {e}")
         if computed:
@@ -627,13 +608,8 @@ async def run_quant_loop(interval: float = 5.0):
             # optional socket emission (best-effort, non-blocking)
             try:
                 from .app import sio
-                def _safe_json(data):
-                    def default(o):
-                        if isinstance(o, datetime):
-                            return o.isoformat()
-                        return str(o)
-                    return json.loads(json.dumps(data, default=default))
-                await sio.emit("quant_update_5s", {"data": _safe_json(computed), "ts": datetime.utcnow().isoformat()})
+                # sio encodes with jsoncodec (datetimes, numpy, NaN handled there)
+                await sio.emit("quant_update_5s", {"data": computed, "ts": datetime.utcnow().isoformat()})
             except Exception:
                 # non-fatal
                 pass
@@ -647,57 +623,44 @@ async def run_quant_loop(interval: float = 5.0):
 async def compute_quant_diagnostics(symbols: List[str], window_s: int = 60) -> List[dict]:
     results = []
     try:
-        async with db.DBConnection() as conn:
-            for sym in symbols:
-                recs = await conn.fetch(
-                    "SELECT ts, price_change_5s_pct, oi_change_5s_pct, taker_buy_ratio, taker_sell_ratio "
-                    "FROM quant_features_5s WHERE symbol=$1 ORDER BY ts DESC LIMIT 120", sym
-                )
-                if len(recs) < 6:
-                    continue
-                price_deltas = [r["price_change_5s_pct"] or 0 for r in recs]
-                oi_deltas    = [r["oi_change_5s_pct"] or 0 for r in recs]
-                ls_ratio     = [((r["taker_buy_ratio"] or 0) - (r["taker_sell_ratio"] or 0)) for r in recs]
-
-                v5 = 0.0
-                try:
-                    norm_price_deltas = [float(x) for x in price_deltas if x is not None]
-                    v5 = float(np.std(norm_price_deltas)) if norm_price_deltas else 0.0
-                except Exception:
-                    v5 = float(np.var(price_deltas)) if price_deltas else 0.0
+        history = await db.fetch_series(
+            symbols, ["price_change_5s_pct", "oi_change_5s_pct", "taker_buy_ratio", "taker_sell_ratio"],
+            120, table="quant_features_5s",
+        )
+        for sym, ser in history.items():
+            if len(ser["ts"]) < 6:
+                continue
+            price_deltas = np.nan_to_num(ser["price_change_5s_pct"])
+            oi_deltas    = np.nan_to_num(ser["oi_change_5s_pct"])
+            ls_ratio     = np.nan_to_num(ser["taker_buy_ratio"]) - np.nan_to_num(ser["taker_sell_ratio"])
 
-                vol_z = None
-                try:
-                    if len(price_deltas) > 2:
-                        denom = statistics.pstdev(price_deltas)
-                        if denom and denom != 0:
-                            vol_z = (v5 - mean_or_none(price_deltas)) / denom
-                        else:
-                            vol_z = None
-                except Exception:
-                    vol_z = None
+            v5 = float(np.std(price_deltas))
 
+            vol_z = None
+            if len(price_deltas) > 2 and v5 > 0:
+                # pstdev(price_deltas) is v5 itself
+                vol_z = (v5 - float(price_deltas.mean())) / v5
 
-                row = {
-                    "symbol": sym,
-                    "ts": datetime.utcnow(),
-                    "window_s": window_s,
-                    "corr_price_oi": safe_corrcoef(price_deltas, oi_deltas),
-                    "corr_price_ls": safe_corrcoef(price_deltas, ls_ratio),
-                    "corr_oi_ls": safe_corrcoef(oi_deltas, ls_ratio),
-                    "volatility_5s": v5,
-                    "volatility_zscore": vol_z,
-                    "confluence_density": sum(1 for p in price_deltas if abs(p) > 0.2) / max(1, len(price_deltas)),
-                    "raw_json": {"n": len(price_deltas)},
-                }
-                results.append(row)
+            row = {
+                "symbol": sym,
+                "ts": datetime.utcnow(),
+                "window_s": window_s,
+                "corr_price_oi": safe_corrcoef(price_deltas, oi_deltas),
+                "corr_price_ls": safe_corrcoef(price_deltas, ls_ratio),
+                "corr_oi_ls": safe_corrcoef(oi_deltas, ls_ratio),
+                "volatility_5s": v5,
+                "volatility_zscore": vol_z,
+                "confluence_density": int((np.abs(price_deltas) > 0.2).sum()) / max(1, len(price_deltas)),
+                "raw_json": {"n": len(price_deltas)},
+            }
+            results.append(row)
     except Exception as e:
         logger.exception(f"[compute_quant_diagnostics] failed: {e}")
     return results
 
 async def diagnostics_loop(interval: int = 60):
     async def iteration():
-        symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]  # could be driven from config/env
+        symbols = universe.symbols()
         data = await compute_quant_diagnostics(symbols)
         if data:
             try:
@@ -716,10 +679,10 @@ async def compute_signal_families(window_s: int = 60) -> List[dict]:
     try:
         async with db.DBConnection() as conn:
             diags = await conn.fetch("""
-                SELECT DISTINCT ON (symbol) id, symbol, corr_price_oi, corr_price_ls,
+                SELECT id, symbol, corr_price_oi, corr_price_ls,
                        corr_oi_ls, volatility_5s, confluence_density, ts
-                FROM quant_diagnostics
-                ORDER BY symbol, ts DESC
+                FROM quant_diagnostics_latest
+                ORDER BY symbol
             """)
             for d in diags:
                 sym = d["symbol"]
@@ -761,7 +724,8 @@ async def signals_loop(interval: int = 60):
                 logger.info(f"[Signals] saved {len(data)} signal rows")
             except Exception as e:
                 logger.warning(f"[Signals] save failed: {e}")
-    await safe_loop_runner("Signals", iteration, interval=interval, flush_coro=None)
+    await safe_loop_runner("Signals", iteration, interval=interval, flush_coro=None,
+                           wake_on=("quant_diagnostics",))
 
 # -------------------------
 # Confluence scores
@@ -779,17 +743,13 @@ async def compute_confluence_scores(interval_s: int = 60) -> List[dict]:
     try:
         async with db.DBConnection() as conn:
             diags = await conn.fetch("""
-                SELECT DISTINCT ON (symbol) id, symbol, volatility_5s
-                FROM quant_diagnostics
-                ORDER BY symbol, ts DESC
+                SELECT id, symbol, volatility_5s
+                FROM quant_diagnostics_latest
+                ORDER BY symbol
             """)
             sigs = await conn.fetch("""
                 SELECT symbol, family, score
-                FROM (
-                    SELECT symbol, family, score,
-                           ROW_NUMBER() OVER (PARTITION BY symbol, family ORDER BY ts DESC) AS rn
-                    FROM quant_signals
-                ) s WHERE rn=1
+                FROM quant_signals_latest
             """)
             sigmap = {}
             for s in sigs:
@@ -830,7 +790,8 @@ async def confluence_loop(interval: int = 60):
                 logger.info(f"[Confluence] saved {len(data)} confluence rows")
             except Exception as e:
                 logger.warning(f"[Confluence] save failed: {e}")
-    await safe_loop_runner("Confluence", iteration, interval=interval, flush_coro=None)
+    await safe_loop_runner("Confluence", iteration, interval=interval, flush_coro=None,
+                           wake_on=("quant_signals",))
 
 # -------------------------
 # Regime classification
@@ -841,10 +802,10 @@ async def regime_loop(interval: int = 300):
         try:
             async with db.DBConnection() as conn:
                 rows = await conn.fetch("""
-                    SELECT DISTINCT ON (symbol)
+                    SELECT
                         symbol, ts, confluence_score, volatility
-                    FROM quant_confluence
-                    ORDER BY symbol, ts DESC
+                    FROM quant_confluence_latest
+                    ORDER BY symbol
                 """)
             for r in rows:
                 sym = r["symbol"]
@@ -876,7 +837,8 @@ async def regime_loop(interval: int = 300):
         except Exception as e:
             logger.warning(f"[Regime] iteration failed: {e}")
 
-    await safe_loop_runner("Regime", iteration, interval=interval, flush_coro=None)
+    await safe_loop_runner("Regime", iteration, interval=interval, flush_coro=None,
+                           wake_on=("quant_confluence",))
 
 # -------------------------
 # Context scoring (light mode)
@@ -888,21 +850,10 @@ async def context_scoring_loop(interval_s: float = 60.0):
             async with db.DBConnection() as conn:
                 rows = await conn.fetch("""
                     WITH sig AS (
+                        -- newest family row per symbol (symbols × families rows, no history scan)
                         SELECT DISTINCT ON (symbol)
                             symbol, confidence AS signal_conf, ts
-                        FROM quant_signals
-                        ORDER BY symbol, ts DESC
-                    ),
-                    reg AS (
-                        SELECT DISTINCT ON (symbol)
-                            symbol, regime, ts
-                        FROM quant_regimes
-                        ORDER BY symbol, ts DESC
-                    ),
-                    conf AS (
-                        SELECT DISTINCT ON (symbol)
-                            symbol, confluence_score, bull_strength, bear_strength, ts
-                        FROM quant_confluence
+                        FROM quant_signals_latest
                         ORDER BY symbol, ts DESC
                     )
                     SELECT 
@@ -913,8 +864,8 @@ async def context_scoring_loop(interval_s: float = 60.0):
                         conf.bull_strength,
                         conf.bear_strength
                     FROM sig
-                    LEFT JOIN reg USING(symbol)
-                    LEFT JOIN conf USING(symbol)
+                    LEFT JOIN quant_regimes_latest reg USING(symbol)
+                    LEFT JOIN quant_confluence_latest conf USING(symbol)
                 """)
             now = datetime.now(timezone.utc)
             for r in rows:
@@ -956,7 +907,8 @@ async def context_scoring_loop(interval_s: float = 60.0):
         except Exception as e:
             logger.warning(f"[ContextScoring] loop failed: {e}")
 
-    await safe_loop_runner("ContextScoring", iteration, interval=interval_s, flush_coro=None)
+    await safe_loop_runner("ContextScoring", iteration, interval=interval_s, flush_coro=None,
+                           wake_on=("quant_regimes", "quant_confluence", "quant_signals"))
 
 # -------------------------
 # Context trends monitor
@@ -970,9 +922,9 @@ async def context_trends_loop(interval_s: float = 120.0):
         try:
             async with db.DBConnection() as conn:
                 rows = await conn.fetch("""
-                    SELECT DISTINCT ON (symbol) symbol, bias, context_score, ts
-                    FROM quant_context_scores
-                    ORDER BY symbol, ts DESC
+                    SELECT symbol, bias, context_score, ts
+                    FROM quant_context_scores_latest
+                    ORDER BY symbol
                 """)
             now = datetime.now(timezone.utc)
             for r in rows:
@@ -995,7 +947,8 @@ async def context_trends_loop(interval_s: float = 120.0):
         except Exception as e:
             logger.warning(f"[ContextTrends] loop failed: {e}")
 
-    await safe_loop_runner("ContextTrends", iteration, interval=interval_s, flush_coro=None)
+    await safe_loop_runner("ContextTrends", iteration, interval=interval_s, flush_coro=None,
+                           wake_on=("quant_context_scores",))
 
 # -------------------------
 # Exports: keep names compatible with previous module
@@ -0,0 +1,206 @@
+# backend/src/futuresboard/querystats.py
+"""
+Per-statement query statistics.
+
+pools.InstrumentedConnection reports every execute/fetch/copy here. Statements
+are grouped by a normalized fingerprint (literals, numbers and $n placeholders
+collapsed to `?`, whitespace squashed), and each fingerprint keeps a call count,
+error count, rows returned/written, total/max latency and a latency histogram.
+
+Statements slower than DB_SLOW_QUERY_MS are logged (and kept in a small ring
+buffer for /api/db/status) with parameter values redacted to type and length.
+
+render_prometheus() produces text exposition for the /metrics endpoint.
+"""
+
+from __future__ import annotations
+import hashlib
+import logging
+import re
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from .config import get_settings
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.querystats")
+logger.setLevel(logging.INFO)
+
+# latency histogram upper bounds (seconds); the last bucket is open-ended
+LATENCY_BUCKETS: List[float] = [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]
+OTHER = "<other>"
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w$])[-+]?\d+(?:\.\d+)?(?:e[-+]?\d+)?\b", re.I)
+_PARAM_RE = re.compile(r"\$\d+")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WS_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql: str) -> str:
+    """Normalized statement text: same shape → same fingerprint regardless of literals."""
+    s = _COMMENT_RE.sub(" ", sql or "")
+    s = _STRING_RE.sub("?", s)
+    s = _PARAM_RE.sub("?", s)
+    s = _NUMBER_RE.sub("?", s)
+    s = _LIST_RE.sub("(?, ...)", s)
+    s = _WS_RE.sub(" ", s).strip().rstrip(";").strip()
+    return s[:500]
+
+
+def query_id(fp: str) -> str:
+    return hashlib.sha1(fp.encode("utf-8")).hexdigest()[:12]
+
+
+def redact(args: Sequence[Any]) -> List[str]:
+    """Parameter values → '$n=<type>' / '$n=<type:len>' (never the value itself)."""
+    out = []
+    for i, a in enumerate(args, 1):
+        t = type(a).__name__
+        if a is None:
+            out.append(f"${i}=null")
+        elif isinstance(a, (str, bytes, list, tuple, dict)):
+            out.append(f"${i}=<{t}:{len(a)}>")
+        else:
+            out.append(f"${i}=<{t}>")
+    return out
+
+
+def rows_from_status(status: Any) -> int:
+    """Command tag ("INSERT 0 5", "COPY 120", "DELETE 3") → affected rows (0 if none)."""
+    try:
+        return int(str(status).rsplit(" ", 1)[-1])
+    except (TypeError, ValueError):
+        return 0
+
+
+class _FpStats:
+    __slots__ = ("calls", "errors", "rows", "total_s", "max_s", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+class QueryStats:
+    def __init__(self, max_fingerprints: int = 500, slow_ms: float = 500.0, slow_keep: int = 50):
+        self.max_fingerprints = max_fingerprints
+        self.slow_ms = slow_ms
+        self.by_fp: Dict[str, _FpStats] = {}
+        self.slow: Deque[Dict[str, Any]] = deque(maxlen=slow_keep)
+        self.started = time.time()
+
+    def record(self, sql: str, elapsed_s: float, rows: int = 0, args: Sequence[Any] = (), error: bool = False):
+        fp = fingerprint(sql)
+        st = self.by_fp.get(fp)
+        if st is None:
+            if len(self.by_fp) >= self.max_fingerprints:
+                fp = OTHER
+                st = self.by_fp.setdefault(OTHER, _FpStats())
+            else:
+                st = self.by_fp[fp] = _FpStats()
+        st.calls += 1
+        st.errors += int(error)
+        st.rows += rows
+        st.total_s += elapsed_s
+        st.max_s = max(st.max_s, elapsed_s)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed_s <= bound:
+                st.buckets[i] += 1
+                break
+        else:
+            st.buckets[-1] += 1
+
+        if self.slow_ms > 0 and elapsed_s * 1000 >= self.slow_ms:
+            entry = {"ts": time.time(), "ms": round(elapsed_s * 1000, 1), "rows": rows,
+                     "error": error, "query": fp, "params": redact(args)}
+            self.slow.append(entry)
+            logger.warning(f"[DB][slow] {entry['ms']} ms rows={rows}{' (error)' if error else ''}: "
+                           f"{fp[:300]} params={entry['params']}")
+
+    def snapshot(self, top: int = 20) -> Dict[str, Any]:
+        ranked = sorted(self.by_fp.items(), key=lambda kv: kv[1].total_s, reverse=True)[:top]
+        return {
+            "since": self.started,
+            "fingerprints": len(self.by_fp),
+            "slow_query_ms": self.slow_ms,
+            "top": [
+                {"query_id": query_id(fp), "query": fp, "calls": st.calls, "errors": st.errors,
+                 "rows": st.rows, "total_ms": round(st.total_s * 1000, 1),
+                 "avg_ms": round(st.total_s / st.calls * 1000, 3) if st.calls else 0.0,
+                 "max_ms": round(st.max_s * 1000, 1)}
+                for fp, st in ranked
+            ],
+            "slow": list(self.slow),
+        }
+
+    def reset(self):
+        self.by_fp.clear()
+        self.slow.clear()
+        self.started = time.time()
+
+
+STATS = QueryStats(
+    max_fingerprints=int(getattr(cfg, "DB_QUERY_STATS_MAX", 500)),
+    slow_ms=float(getattr(cfg, "DB_SLOW_QUERY_MS", 500)),
+)
+
+
+# ---------------------------------------------------------------------
+# Prometheus text exposition
+# ---------------------------------------------------------------------
+def _esc(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _histogram(name: str, labels: str, buckets: Sequence[int], bounds: Sequence[float],
+               total_s: float, count: int) -> List[str]:
+    out, cum = [], 0
+    for bound, n in zip(list(bounds) + [float("inf")], buckets):
+        cum += n
+        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+        out.append(f'{name}_bucket{{{labels},le="{le}"}} {cum}')
+    out.append(f"{name}_sum{{{labels}}} {total_s:.6f}")
+    out.append(f"{name}_count{{{labels}}} {count}")
+    return out
+
+
+def render_prometheus(pools: Sequence[Any] = (), stats: Optional[QueryStats] = None) -> str:
+    """Pool wait + per-fingerprint latency metrics (pools: InstrumentedPool instances)."""
+    stats = stats or STATS
+    lines = [
+        "# TYPE futuresboard_db_pool_wait_seconds histogram",
+    ]
+    from .pools import WAIT_BUCKETS
+    for p in pools:
+        w = p.waits
+        lines += _histogram("futuresboard_db_pool_wait_seconds", f'pool="{p.name}"',
+                            w.buckets, WAIT_BUCKETS, w.total_s, w.count)
+    lines.append("# TYPE futuresboard_db_pool_acquire_errors_total counter")
+    lines += [f'futuresboard_db_pool_acquire_errors_total{{pool="{p.name}"}} {p.waits.errors}' for p in pools]
+
+    lines.append("# TYPE futuresboard_db_query_seconds histogram")
+    info, rows, errors = [], [], []
+    for fp, st in stats.by_fp.items():
+        qid = query_id(fp)
+        lines += _histogram("futuresboard_db_query_seconds", f'query_id="{qid}"',
+                            st.buckets, LATENCY_BUCKETS, st.total_s, st.calls)
+        rows.append(f'futuresboard_db_query_rows_total{{query_id="{qid}"}} {st.rows}')
+        errors.append(f'futuresboard_db_query_errors_total{{query_id="{qid}"}} {st.errors}')
+        info.append(f'futuresboard_db_query_info{{query_id="{qid}",query="{_esc(fp[:200])}"}} 1')
+    lines += ["# TYPE futuresboard_db_query_rows_total counter"] + rows
+    lines += ["# TYPE futuresboard_db_query_errors_total counter"] + errors
+    lines += ["# TYPE futuresboard_db_query_info gauge"] + info
+    return "\n".join(lines) + "\n"
+
+
+__all__ = ["STATS", "QueryStats", "fingerprint", "query_id", "redact", "rows_from_status", "render_prometheus"]
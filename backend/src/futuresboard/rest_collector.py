@@ -3,10 +3,13 @@ from __future__ import annotations
 import asyncio
 import aiohttp
 import logging
+import time
 from datetime import datetime, timezone
-from typing import Dict, Any
+from typing import Any, Dict, Optional
 from dotenv import load_dotenv
 from . import db
+from . import universe
+from . import snapshots
 import json
 from .config import get_settings
 cfg = get_settings()
@@ -23,6 +26,18 @@ logger = logging.getLogger("rest_collector")
 
 _sem = asyncio.Semaphore(CONCURRENCY)
 
+# symbol -> time.time() of last REST poll (per-tier cadence)
+_last_polled: Dict[str, float] = {}
+
+
+async def on_universe_change(change: Dict[str, Any]):
+    """universe subscriber: forget removed symbols, poll added ones on the next tick."""
+    for sym in change.get("removed", []):
+        _last_polled.pop(sym, None)
+    for sym in change.get("added", {}):
+        _last_polled.pop(sym, None)
+    logger.info(f"[rest_collector] universe changed — now polling {len(universe.symbols())} symbols")
+
 
 async def fetch_symbol(session: aiohttp.ClientSession, symbol: str) -> Dict[str, Any]:
     now = datetime.now(timezone.utc)
@@ -108,6 +123,17 @@ def safe_num(x):
         return None
 
 
+def _idle_sleep(now: Optional[float] = None) -> float:
+    """
+    Sleep until the next symbol's tier cadence is due (universe.TIER_SPECS rest_interval),
+    capped by POLL_INTERVAL; sleeping POLL_INTERVAL flat would stretch 10s/30s tiers to it.
+    """
+    wait = universe.next_due_in(_last_polled, kind="rest", now=now)
+    if wait is None:
+        return float(POLL_INTERVAL)
+    return min(float(POLL_INTERVAL), max(wait, 0.1))
+
+
 async def poll_loop():
     logger.info("[rest_collector] poll_loop started ✅ (initializing DB + session)")
     try:
@@ -117,11 +143,19 @@ async def poll_loop():
         return
 
     async with aiohttp.ClientSession() as session:
-        logger.info(f"[rest_collector] entering main loop (symbols={SYMBOLS}, interval={POLL_INTERVAL}s)")
+        logger.info(f"[rest_collector] entering main loop (symbols={universe.symbols()}, interval={POLL_INTERVAL}s)")
         while True:
             try:
-                logger.info(f"[rest_collector] polling {len(SYMBOLS)} symbols via REST API")
-                tasks = [asyncio.create_task(fetch_symbol(session, s)) for s in SYMBOLS]
+                # only symbols whose tier cadence has elapsed (static universe: all, every cycle)
+                now = time.time()
+                due = universe.due_symbols(_last_polled, kind="rest", now=now)
+                if not due:
+                    await asyncio.sleep(_idle_sleep())
+                    continue
+                for s in due:
+                    _last_polled[s] = now
+                logger.info(f"[rest_collector] polling {len(due)}/{len(universe.symbols())} symbols via REST API")
+                tasks = [asyncio.create_task(fetch_symbol(session, s)) for s in due]
                 results = await asyncio.gather(*tasks, return_exceptions=True)
 
                 # logging sample
@@ -168,6 +202,8 @@ async def poll_loop():
                         "metadata": {"raw": res},
                     }
                     rest_rows.append(rest_row)
+                    # publish to the in-process snapshot store (db_writer overlays from here)
+                    snapshots.publish_rest(rest_row["symbol"], rest_row)
 
                     # prepare merged view for metrics table (save_metrics expects many fields)
                     metrics_row = {
@@ -200,7 +236,7 @@ async def poll_loop():
                     logger.info("[rest_collector] done inserting merged metrics")
 
                 logger.info(f"[rest_collector] ✅ cycle complete (inserted {len(metrics_rows)} metrics, {len(rest_rows)} rest rows)")
-                await asyncio.sleep(POLL_INTERVAL)
+                await asyncio.sleep(_idle_sleep())
 
             except asyncio.CancelledError:
                 logger.info("[rest_collector] cancelled — stopping loop")
@@ -210,11 +246,14 @@ async def poll_loop():
                 await asyncio.sleep(POLL_INTERVAL)
 
 
-async def run(symbols: list[str], out_queue: asyncio.Queue | None = None, interval: int = 60):
+async def run(symbols: list[str], interval: int = 60):
     """
     Unified REST collector entrypoint for app.py.
     """
     logger.info(f"[rest_collector] run() invoked (symbols={symbols}, interval={interval})")
+    # the universe is the source of truth; an explicit list only seeds it when empty
+    if symbols:
+        universe.seed_if_empty(symbols)
     # adapt configured interval if provided
     global POLL_INTERVAL
     try:
@@ -0,0 +1,398 @@
+# backend/src/futuresboard/rollups.py
+"""
+Multi-resolution rollups of quant_features_5s.
+
+Tables quant_features_1m / _5m / _1h / _1d hold, per (symbol, bucket):
+    n                      — source rows in the bucket
+    <f>_first / <f>_last   — first / last non-NULL value by time
+    <f>_min / <f>_max / <f>_mean / <f>_n (non-NULL count)
+for every feature in FEATURES.
+
+Two ways to maintain them:
+  * TimescaleDB (quant_features_5s is a hypertable): each rollup is a continuous
+    aggregate over the 5s hypertable with a refresh policy.
+  * Otherwise: an in-app refresher (refresh_loop) that processes only new
+    buckets. A watermark per rollup (rollup_watermarks) marks the first bucket not
+    yet materialized; each pass aggregates [watermark, closed_until) and upserts.
+    Rollups cascade: 1m from raw 5s, 5m from 1m, 1h from 5m, 1d from 1h, combining
+    first/last/min/max/count exactly and the mean weighted by count.
+
+Readers call fetch_history(), which picks the coarsest resolution that still
+yields the requested number of points over the requested range (raw 5s rows are
+returned in the same shape when no rollup is fine enough; archived days of the
+5s table are read from Parquet, see archive.py).
+"""
+
+from __future__ import annotations
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from .config import get_settings
+from . import archive
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.rollups")
+logger.setLevel(logging.INFO)
+
+SOURCE_TABLE = "quant_features_5s"
+SOURCE_RESOLUTION_S = 5
+
+FEATURES = [
+    "price", "oi_usd", "vol_usd",
+    "oi_change_5s_pct", "oi_change_10s_pct", "price_change_5s_pct", "price_change_10s_pct",
+    "atr_5s", "obi", "taker_buy_ratio", "taker_sell_ratio", "vpi",
+    "z_oi", "z_top_ls_acc", "z_obi", "z_funding", "zsc", "confidence",
+]
+STATS = ("first", "last", "min", "max", "mean", "n")
+
+
+class Rollup(NamedTuple):
+    label: str
+    seconds: int
+    source: str        # table it is built from (in-app refresher)
+    source_col: str    # time column of the source
+
+
+ROLLUPS: List[Rollup] = [
+    Rollup("1m", 60, SOURCE_TABLE, "ts"),
+    Rollup("5m", 300, "quant_features_1m", "bucket"),
+    Rollup("1h", 3600, "quant_features_5m", "bucket"),
+    Rollup("1d", 86400, "quant_features_1h", "bucket"),
+]
+
+# resolution label → relation kind actually present ("table" refreshed in-app, "cagg" by TimescaleDB)
+_available: Dict[str, str] = {}
+_stats: Dict[str, Any] = {"passes": 0, "buckets_written": 0, "last_error": None, "last_pass": None}
+
+
+def table_name(label: str) -> str:
+    return f"quant_features_{label}"
+
+
+def stat_columns(features: Sequence[str] = FEATURES) -> List[str]:
+    return [f"{f}_{s}" for f in features for s in STATS]
+
+
+# ---------------------------------------------------------------------
+# SQL builders
+# ---------------------------------------------------------------------
+def _bucket_expr(col: str, seconds: int) -> str:
+    return f"to_timestamp(floor(extract(epoch FROM {col}) / {seconds}) * {seconds})"
+
+
+def _raw_aggs(features: Sequence[str] = FEATURES) -> List[str]:
+    out = []
+    for f in features:
+        out += [
+            f"(array_agg({f} ORDER BY ts) FILTER (WHERE {f} IS NOT NULL))[1]",
+            f"(array_agg({f} ORDER BY ts DESC) FILTER (WHERE {f} IS NOT NULL))[1]",
+            f"min({f})", f"max({f})", f"avg({f})", f"count({f})",
+        ]
+    return out
+
+
+def _rollup_aggs(features: Sequence[str] = FEATURES) -> List[str]:
+    out = []
+    for f in features:
+        out += [
+            f"(array_agg({f}_first ORDER BY bucket) FILTER (WHERE {f}_first IS NOT NULL))[1]",
+            f"(array_agg({f}_last ORDER BY bucket DESC) FILTER (WHERE {f}_last IS NOT NULL))[1]",
+            f"min({f}_min)", f"max({f}_max)",
+            f"sum({f}_mean * {f}_n) / NULLIF(sum({f}_n), 0)", f"sum({f}_n)",
+        ]
+    return out
+
+
+def create_table_sql(label: str) -> str:
+    cols = ",\n    ".join(
+        f"{c} {'INTEGER' if c.endswith('_n') else 'DOUBLE PRECISION'}" for c in stat_columns()
+    )
+    t = table_name(label)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {t} (\n"
+        f"    symbol TEXT NOT NULL,\n    bucket TIMESTAMPTZ NOT NULL,\n    n INTEGER,\n    {cols},\n"
+        f"    PRIMARY KEY (symbol, bucket)\n);"
+    )
+
+
+def upsert_sql(r: Rollup) -> str:
+    """Aggregate source rows in [$1, $2) into r's buckets; re-running a range is idempotent."""
+    raw = r.source == SOURCE_TABLE
+    aggs = _raw_aggs() if raw else _rollup_aggs()
+    n = "count(*)" if raw else "sum(n)"
+    cols = stat_columns()
+    return (
+        f"INSERT INTO {table_name(r.label)} (symbol, bucket, n, {', '.join(cols)})\n"
+        f"SELECT symbol, {_bucket_expr(r.source_col, r.seconds)} AS b, {n}, {', '.join(aggs)}\n"
+        f"FROM {r.source} WHERE {r.source_col} >= $1 AND {r.source_col} < $2 AND symbol IS NOT NULL\n"
+        f"GROUP BY symbol, b\n"
+        f"ON CONFLICT (symbol, bucket) DO UPDATE SET n = EXCLUDED.n, "
+        + ", ".join(f"{c} = EXCLUDED.{c}" for c in cols)
+    )
+
+
+def cagg_sql(r: Rollup) -> str:
+    """TimescaleDB continuous aggregate built straight from the 5s hypertable."""
+    aggs = []
+    for f in FEATURES:
+        aggs += [
+            f"first({f}, ts) FILTER (WHERE {f} IS NOT NULL) AS {f}_first",
+            f"last({f}, ts) FILTER (WHERE {f} IS NOT NULL) AS {f}_last",
+            f"min({f}) AS {f}_min", f"max({f}) AS {f}_max",
+            f"avg({f}) AS {f}_mean", f"count({f})::int AS {f}_n",
+        ]
+    return (
+        f"CREATE MATERIALIZED VIEW IF NOT EXISTS {table_name(r.label)} WITH (timescaledb.continuous) AS\n"
+        f"SELECT symbol, time_bucket(INTERVAL '{r.seconds} seconds', ts) AS bucket, count(*)::int AS n,\n"
+        f"    {', '.join(aggs)}\n"
+        f"FROM {SOURCE_TABLE} GROUP BY symbol, bucket WITH NO DATA"
+    )
+
+
+def floor_ts(ts: datetime, seconds: int) -> datetime:
+    epoch = ts.timestamp()
+    return datetime.fromtimestamp(epoch - (epoch % seconds), tz=timezone.utc)
+
+
+def choose_resolution(range_s: float, points: int, available: Optional[Sequence[str]] = None) -> str:
+    """
+    Coarsest resolution whose bucket count over range_s is still >= points;
+    "5s" (raw) when no rollup is fine enough.
+    """
+    best = "5s"
+    for r in ROLLUPS:
+        if available is not None and r.label not in available:
+            continue
+        if range_s / r.seconds >= points:
+            best = r.label
+    return best
+
+
+# ---------------------------------------------------------------------
+# Schema
+# ---------------------------------------------------------------------
+async def _relkind(conn, name: str) -> Optional[str]:
+    return await conn.fetchval("SELECT relkind::text FROM pg_class WHERE oid = to_regclass($1)", name)
+
+
+async def _is_hypertable(conn, table: str) -> bool:
+    try:
+        return bool(await conn.fetchval(
+            "SELECT 1 FROM timescaledb_information.hypertables WHERE hypertable_name = $1", table
+        ))
+    except Exception:
+        return False
+
+
+async def ensure_schema(conn, log=logger.info) -> Dict[str, str]:
+    """
+    Create the rollups: continuous aggregates when the 5s table is a hypertable,
+    else plain tables + watermarks. An empty plain rollup table left over from
+    before a TimescaleDB migration is replaced by the continuous aggregate.
+    """
+    _available.clear()
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_watermarks (
+            name TEXT PRIMARY KEY,
+            watermark TIMESTAMPTZ NOT NULL,
+            updated_at TIMESTAMPTZ DEFAULT now()
+        )
+    """)
+    use_cagg = await _is_hypertable(conn, SOURCE_TABLE)
+    lag_s = float(getattr(cfg, "ROLLUP_GRACE_S", 10))
+    for r in ROLLUPS:
+        t = table_name(r.label)
+        kind = await _relkind(conn, t)
+        if use_cagg and kind == "r" and not await conn.fetchval(f"SELECT EXISTS (SELECT 1 FROM {t})"):
+            await conn.execute(f"DROP TABLE {t}")
+            await conn.execute("DELETE FROM rollup_watermarks WHERE name = $1", t)
+            kind = None
+        if use_cagg and kind is None:
+            try:
+                await conn.execute(cagg_sql(r))
+                await conn.execute(
+                    f"SELECT add_continuous_aggregate_policy('{t}', "
+                    f"start_offset => make_interval(secs => $1), end_offset => make_interval(secs => $2), "
+                    f"schedule_interval => make_interval(secs => $3), if_not_exists => TRUE)",
+                    float(max(r.seconds * 4, 3600)), float(r.seconds + lag_s), float(max(r.seconds // 2, 30)),
+                )
+                _available[r.label] = "cagg"
+                log(f"[rollups] {t}: continuous aggregate")
+                continue
+            except Exception as e:
+                log(f"[rollups] {t}: continuous aggregate unavailable ({e}), using in-app refresher")
+        if kind in ("v", "m"):
+            _available[r.label] = "cagg"  # cagg exposes a view
+            continue
+        await conn.execute(create_table_sql(r.label))
+        _available[r.label] = "table"
+    return dict(_available)
+
+
+# ---------------------------------------------------------------------
+# In-app refresher
+# ---------------------------------------------------------------------
+async def _watermark(conn, name: str) -> Optional[datetime]:
+    return await conn.fetchval("SELECT watermark FROM rollup_watermarks WHERE name = $1", name)
+
+
+async def refresh_rollup(conn, r: Rollup, now: Optional[datetime] = None) -> int:
+    """Materialize the closed buckets after r's watermark. Returns buckets written."""
+    t = table_name(r.label)
+    now = now or datetime.now(timezone.utc)
+    wm = await _watermark(conn, t)
+    if wm is None:
+        oldest = await conn.fetchval(f"SELECT min({r.source_col}) FROM {r.source}")
+        if oldest is None:
+            return 0
+        wm = floor_ts(oldest, r.seconds)
+
+    if r.source == SOURCE_TABLE:
+        closed = floor_ts(now - timedelta(seconds=float(getattr(cfg, "ROLLUP_GRACE_S", 10))), r.seconds)
+    else:
+        child = await _watermark(conn, r.source)
+        if child is None:
+            return 0
+        closed = floor_ts(child, r.seconds)
+    span = max(float(getattr(cfg, "ROLLUP_BACKFILL_SPAN_HOURS", 6)) * 3600, r.seconds)
+    hi = min(closed, floor_ts(wm + timedelta(seconds=span), r.seconds))
+    if hi <= wm:
+        return 0
+
+    async with conn.transaction():
+        res = await conn.execute(upsert_sql(r), wm, hi)
+        await conn.execute("""
+            INSERT INTO rollup_watermarks (name, watermark, updated_at) VALUES ($1, $2, now())
+            ON CONFLICT (name) DO UPDATE SET watermark = EXCLUDED.watermark, updated_at = now()
+        """, t, hi)
+    try:
+        return int(res.split()[-1])
+    except Exception:
+        return 0
+
+
+async def refresh_once() -> Dict[str, int]:
+    """One pass over the in-app rollups, finest first so the cascade flows in a single pass."""
+    from . import db
+    out: Dict[str, int] = {}
+    async with db.DBConnection() as conn:
+        for r in ROLLUPS:
+            if _available.get(r.label) != "table":
+                continue
+            out[r.label] = await refresh_rollup(conn, r)
+    return out
+
+
+async def prune_once() -> Dict[str, int]:
+    """Per-resolution retention for in-app rollup tables (ROLLUP_RETENTION_DAYS, 0 = keep)."""
+    from . import db
+    policy = _parse_retention(getattr(cfg, "ROLLUP_RETENTION_DAYS", "1m=30,5m=180,1h=0,1d=0"))
+    out: Dict[str, int] = {}
+    async with db.DBConnection() as conn:
+        for r in ROLLUPS:
+            days = policy.get(r.label, 0)
+            if _available.get(r.label) != "table" or days <= 0:
+                continue
+            res = await conn.execute(
+                f"DELETE FROM {table_name(r.label)} WHERE bucket < now() - make_interval(days => $1)", int(days)
+            )
+            try:
+                out[r.label] = int(res.split()[-1])
+            except Exception:
+                out[r.label] = 0
+    return out
+
+
+def _parse_retention(raw: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in str(raw or "").split(","):
+        k, sep, v = part.partition("=")
+        if sep:
+            try:
+                out[k.strip()] = float(v)
+            except ValueError:
+                pass
+    return out
+
+
+async def refresh_loop(interval: float = 15.0):
+    """Background in-app refresher (no-op for resolutions served by continuous aggregates)."""
+    logger.info(f"[rollups] refresher started (every {interval}s, available={_available})")
+    last_prune = 0.0
+    try:
+        while True:
+            try:
+                written = await refresh_once()
+                _stats["passes"] += 1
+                _stats["buckets_written"] += sum(written.values())
+                _stats["last_pass"] = datetime.utcnow().isoformat(timespec="seconds")
+                now = asyncio.get_running_loop().time()
+                if now - last_prune > 3600:
+                    last_prune = now
+                    await prune_once()
+            except Exception as e:
+                _stats["last_error"] = str(e)
+                logger.warning(f"[rollups] refresh failed: {e}")
+            await asyncio.sleep(interval)
+    except asyncio.CancelledError:
+        logger.info("[rollups] refresher cancelled — exiting")
+        raise
+
+
+# ---------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------
+async def fetch_history(symbol: str, start: datetime, end: datetime, points: int = 300,
+                        fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Feature history for symbol over [start, end) at the coarsest resolution that
+    still gives >= points buckets. Rows: {bucket, n, <f>_first/_last/_min/_max/_mean/_n}.
+    """
+    from . import db
+    fields = [f for f in (fields or FEATURES) if f in FEATURES]
+    if not fields:
+        raise ValueError("no valid fields requested")
+    res = choose_resolution((end - start).total_seconds(), points, available=list(_available))
+    cols = stat_columns(fields)
+    out: List[Dict[str, Any]] = []
+    if res == "5s":
+        # days before the archive boundary are no longer in PG (archive.py)
+        bound = archive.boundary(SOURCE_TABLE) if archive.archives(SOURCE_TABLE) else None
+        if bound is not None and start < bound:
+            for r in await archive.read(SOURCE_TABLE, start, min(end, bound), symbol=symbol, columns=["ts", *fields]):
+                row: Dict[str, Any] = {"bucket": r["ts"], "n": 1}
+                for f in fields:
+                    row.update({f"{f}_{s}": r[f] for s in STATS if s != "n"})
+                    row[f"{f}_n"] = int(r[f] is not None)
+                out.append(row)
+            start = max(start, bound)
+        if start >= end:
+            return {"symbol": symbol, "resolution": res, "rows": out}
+    async with db.DBReadConnection() as conn:
+        if res == "5s":
+            sel = ", ".join(
+                f"{f} AS {f}_{s}" if s != "n" else f"({f} IS NOT NULL)::int AS {f}_n"
+                for f in fields for s in STATS
+            )
+            key, value = await db.symbol_filter(conn, SOURCE_TABLE, symbol)
+            q = (f"SELECT ts AS bucket, 1 AS n, {sel} FROM {SOURCE_TABLE} "
+                 f"WHERE {key} = $1 AND ts >= $2 AND ts < $3 ORDER BY ts")
+        else:
+            value = symbol
+            q = (f"SELECT bucket, n, {', '.join(cols)} FROM {table_name(res)} "
+                 f"WHERE symbol = $1 AND bucket >= $2 AND bucket < $3 ORDER BY bucket")
+        rows = await conn.fetch(q, value, start, end)
+    return {"symbol": symbol, "resolution": res, "rows": out + [dict(r) for r in rows]}
+
+
+def status() -> Dict[str, Any]:
+    return {"available": dict(_available), **_stats}
+
+
+__all__ = [
+    "ROLLUPS", "FEATURES", "choose_resolution", "ensure_schema", "refresh_once", "refresh_loop",
+    "fetch_history", "status", "upsert_sql", "cagg_sql",
+]
@@ -0,0 +1,85 @@
+# backend/src/futuresboard/snapshots.py
+"""
+Process-wide latest-REST snapshot store.
+
+rest_collector publishes every poll result here (per symbol, newest wins) so the
+db_writer can overlay REST fields onto WS rows without touching the database.
+At startup the store is warmed from market_rest_metrics with one bulk query.
+"""
+
+from __future__ import annotations
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger("futuresboard.snapshots")
+logger.setLevel(logging.INFO)
+
+# symbol -> latest market_rest_metrics-shaped dict
+_latest_rest: Dict[str, Dict[str, Any]] = {}
+# symbol -> time.time() of the publish (staleness diagnostics)
+_published_at: Dict[str, float] = {}
+
+
+def _ts_key(row: Dict[str, Any]):
+    ts = row.get("ts")
+    return ts.timestamp() if hasattr(ts, "timestamp") else None
+
+
+def publish_rest(symbol: str, row: Dict[str, Any]):
+    """Store the latest REST row for `symbol`; an older `ts` never overwrites a newer one."""
+    if not symbol or not isinstance(row, dict):
+        return
+    sym = symbol.upper()
+    cur = _latest_rest.get(sym)
+    if cur is not None:
+        new_ts, cur_ts = _ts_key(row), _ts_key(cur)
+        if new_ts is not None and cur_ts is not None and new_ts < cur_ts:
+            return
+    _latest_rest[sym] = row
+    _published_at[sym] = time.time()
+
+
+def publish_many(rows: Iterable[Dict[str, Any]]):
+    for r in rows:
+        publish_rest(r.get("symbol") or "", r)
+
+
+def get_rest(symbol: str) -> Optional[Dict[str, Any]]:
+    """Latest REST row for `symbol` (no DB access), or None."""
+    if not symbol:
+        return None
+    return _latest_rest.get(symbol.upper())
+
+
+def clear():
+    _latest_rest.clear()
+    _published_at.clear()
+
+
+async def warm_from_db(symbols: Optional[list[str]] = None) -> int:
+    """Load every symbol's latest market_rest_metrics row in a single query."""
+    from . import db
+    try:
+        rows = await db.get_latest_rest_metrics_bulk(symbols)
+    except Exception as e:
+        logger.warning(f"[snapshots] warm-up from DB failed: {e}")
+        return 0
+    for r in rows:
+        # live publishes that already arrived win over the DB copy
+        if r.get("symbol") and r["symbol"].upper() not in _latest_rest:
+            publish_rest(r["symbol"], r)
+    logger.info(f"[snapshots] warmed {len(rows)} REST snapshots from DB")
+    return len(rows)
+
+
+def status() -> Dict[str, Any]:
+    now = time.time()
+    ages = [now - t for t in _published_at.values()]
+    return {
+        "symbols": len(_latest_rest),
+        "max_age_s": round(max(ages), 2) if ages else None,
+    }
+
+
+__all__ = ["publish_rest", "publish_many", "get_rest", "clear", "warm_from_db", "status"]
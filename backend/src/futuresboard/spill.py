@@ -0,0 +1,394 @@
+# backend/src/futuresboard/spill.py
+"""
+Durable local spill log for `metrics` rows.
+
+When PostgreSQL is unreachable, an insert stalls, or the writers fall behind
+SPILL_LAG_THRESHOLD, db_writer appends its already-transformed rows here instead
+of dropping them. A background replayer drains the log back into PostgreSQL with
+COPY once the DB answers again.
+
+Layout: <SPILL_DIR>/spill-<seq>.log segments, rolled at SPILL_SEGMENT_BYTES.
+Record:  <u32 payload length><u32 crc32(payload)><payload = JSON row>
+The replay position is persisted in <SPILL_DIR>/cursor after every committed COPY,
+so replay is at-least-once across crashes.
+
+A batch whose COPY fails SPILL_REPLAY_RETRIES times in a row (a row the server will
+never accept) is replayed row by row; rows that still fail are moved to
+<SPILL_DIR>/quarantine.log (one JSON row per line) so the log can drain.
+
+Ordering: while the log holds un-replayed rows every writer keeps diverting to it
+(`diverting()`), so rows for a symbol reach PostgreSQL in the order they were
+produced; direct inserts resume only after the log has fully drained.
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import os
+import pathlib
+import struct
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import get_settings
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.spill")
+logger.setLevel(logging.INFO)
+
+_HEADER = struct.Struct("<II")
+_SEGMENT_PREFIX = "spill-"
+_SEGMENT_SUFFIX = ".log"
+
+_dir: Optional[pathlib.Path] = None
+_writer = None                     # open binary file of the active segment
+_writer_seq: int = 0
+_writer_pos: int = 0               # bytes written to the active segment
+_flushed_pos: int = 0              # bytes of the active segment flushed to the OS (readable)
+_dirty: bool = False               # written since the last fsync
+_last_fsync: float = 0.0
+_cursor: Tuple[int, int] = (0, 0)  # (segment seq, byte offset) of the next record to replay
+_pending_bytes: int = 0
+_replay_attempts: int = 0          # failed COPYs of the batch at the cursor
+_stats: Dict[str, int] = {"appended": 0, "replayed": 0, "dropped": 0, "corrupt": 0, "replay_errors": 0,
+                          "quarantined": 0}
+
+
+def enabled() -> bool:
+    return bool(getattr(cfg, "SPILL_ENABLED", True))
+
+
+def _spill_dir() -> pathlib.Path:
+    configured = getattr(cfg, "SPILL_DIR", "") or ""
+    if configured:
+        return pathlib.Path(configured).resolve()
+    return (pathlib.Path(__file__).resolve().parents[2] / "spill").resolve()
+
+
+def _segment_path(seq: int) -> pathlib.Path:
+    return _dir / f"{_SEGMENT_PREFIX}{seq:012d}{_SEGMENT_SUFFIX}"
+
+
+def _list_segments() -> List[int]:
+    out = []
+    for p in _dir.glob(f"{_SEGMENT_PREFIX}*{_SEGMENT_SUFFIX}"):
+        try:
+            out.append(int(p.name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]))
+        except ValueError:
+            continue
+    return sorted(out)
+
+
+def _load_cursor() -> Tuple[int, int]:
+    try:
+        seq, off = (_dir / "cursor").read_text(encoding="utf-8").split()
+        return int(seq), int(off)
+    except Exception:
+        return (0, 0)
+
+
+def _save_cursor():
+    tmp = _dir / "cursor.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(f"{_cursor[0]} {_cursor[1]}")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, _dir / "cursor")
+
+
+def open_log():
+    """Open (or re-open) the spill directory. Appends always start a fresh segment."""
+    global _dir, _writer, _writer_seq, _writer_pos, _flushed_pos, _cursor, _pending_bytes
+    if _writer is not None:
+        return
+    _dir = _spill_dir()
+    _dir.mkdir(parents=True, exist_ok=True)
+    segments = _list_segments()
+    _cursor = _load_cursor()
+    if segments and _cursor[0] < segments[0]:
+        _cursor = (segments[0], 0)
+    # never append to a segment that may end in a torn record from a crash
+    _writer_seq = (segments[-1] + 1) if segments else max(1, _cursor[0])
+    _writer = open(_segment_path(_writer_seq), "ab")
+    _writer_pos = _flushed_pos = 0
+    if not segments:
+        _cursor = (_writer_seq, 0)
+    _pending_bytes = sum(_segment_path(s).stat().st_size for s in segments if s >= _cursor[0]) - (
+        _cursor[1] if _cursor[0] in segments else 0
+    )
+    if _pending_bytes > 0:
+        logger.warning(f"[spill] {_pending_bytes} bytes of un-replayed rows found in {_dir} — will replay")
+    else:
+        logger.info(f"[spill] log ready at {_dir}")
+
+
+def close_log():
+    """fsync + close the active segment (shutdown)."""
+    global _writer, _dirty
+    if _writer is None:
+        return
+    try:
+        _writer.flush()
+        os.fsync(_writer.fileno())
+        _writer.close()
+    except Exception as e:
+        logger.warning(f"[spill] close failed: {e}")
+    _writer = None
+    _dirty = False
+
+
+def pending() -> bool:
+    return _pending_bytes > 0
+
+
+def diverting() -> bool:
+    """True while un-replayed rows exist — writers must append here to keep ordering."""
+    return enabled() and pending()
+
+
+def _json_default(o):
+    if isinstance(o, datetime):
+        return o.isoformat()
+    return str(o)
+
+
+def _encode(row: Dict[str, Any]) -> bytes:
+    payload = json.dumps(row, default=_json_default, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _quarantine(rows: List[Dict[str, Any]]):
+    """Append rows PostgreSQL keeps rejecting to quarantine.log (fsynced) for manual inspection."""
+    with open(_dir / "quarantine.log", "a", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, default=_json_default, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _roll():
+    global _writer, _writer_seq, _writer_pos, _flushed_pos
+    _writer.flush()
+    os.fsync(_writer.fileno())
+    _writer.close()
+    _writer_seq += 1
+    _writer = open(_segment_path(_writer_seq), "ab")
+    _writer_pos = _flushed_pos = 0
+
+
+def append(rows: List[Dict[str, Any]], reason: str = "") -> int:
+    """
+    Append transformed metric rows. Data reaches the OS page cache immediately and
+    is fsynced by `sync()` at most every SPILL_FSYNC_INTERVAL. Returns rows written.
+    """
+    global _writer_pos, _flushed_pos, _pending_bytes, _dirty
+    if not rows or not enabled():
+        return 0
+    if _writer is None:
+        open_log()
+    max_bytes = int(getattr(cfg, "SPILL_MAX_BYTES", 2 * 1024 ** 3))
+    seg_bytes = int(getattr(cfg, "SPILL_SEGMENT_BYTES", 16 * 1024 ** 2))
+    written = dropped = 0
+    for r in rows:
+        try:
+            rec = _encode(r)
+        except Exception as e:
+            logger.debug(f"[spill] encode failed: {e}")
+            continue
+        if _pending_bytes + len(rec) > max_bytes:
+            dropped += 1
+            continue
+        if _writer_pos and _writer_pos + len(rec) > seg_bytes:
+            _roll()
+        _writer.write(rec)
+        _writer_pos += len(rec)
+        _pending_bytes += len(rec)
+        written += 1
+    if written:
+        _writer.flush()
+        _flushed_pos = _writer_pos
+        _dirty = True
+        _stats["appended"] += written
+        logger.debug(f"[spill] appended {written} rows ({reason})")
+    if dropped:
+        _stats["dropped"] += dropped
+        logger.warning(f"[spill] SPILL_MAX_BYTES reached — dropped {dropped} rows")
+    return written
+
+
+async def sync(force: bool = False):
+    """Batched fsync of the active segment (runs in a thread)."""
+    global _dirty, _last_fsync
+    if _writer is None or not _dirty:
+        return
+    interval = float(getattr(cfg, "SPILL_FSYNC_INTERVAL", 0.5))
+    now = time.time()
+    if not force and now - _last_fsync < interval:
+        return
+    _dirty = False
+    _last_fsync = now
+    try:
+        await asyncio.to_thread(os.fsync, _writer.fileno())
+    except Exception as e:
+        _dirty = True
+        logger.warning(f"[spill] fsync failed: {e}")
+
+
+def _read_batch(max_rows: int, cursor: Tuple[int, int], active_seq: int,
+                active_limit: int) -> Tuple[List[Dict[str, Any]], Tuple[int, int]]:
+    """
+    Decode up to `max_rows` records from `cursor`. Returns (rows, next_cursor).
+    Runs in a thread, so the active segment is bounded by a snapshot of the flushed
+    write position taken on the event loop. A torn / corrupt record in a sealed
+    segment ends that segment.
+    """
+    seq, off = cursor
+    rows: List[Dict[str, Any]] = []
+    while len(rows) < max_rows and seq <= active_seq:
+        path = _segment_path(seq)
+        if seq == active_seq:
+            limit = active_limit
+        else:
+            limit = path.stat().st_size if path.exists() else 0
+        if off >= limit:
+            if seq == active_seq:
+                break
+            seq, off = seq + 1, 0
+            continue
+        with open(path, "rb") as f:
+            f.seek(off)
+            while len(rows) < max_rows and off < limit:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size or off + _HEADER.size > limit:
+                    payload = None
+                else:
+                    length, crc = _HEADER.unpack(header)
+                    payload = f.read(length) if off + _HEADER.size + length <= limit else None
+                    if payload is not None and (len(payload) != length or zlib.crc32(payload) != crc):
+                        payload = None
+                if payload is None:
+                    _stats["corrupt"] += 1
+                    logger.warning(f"[spill] corrupt/torn record in segment {seq} at {off} — skipping rest of segment")
+                    off = limit
+                    break
+                off += _HEADER.size + len(payload)
+                try:
+                    rows.append(json.loads(payload))
+                except Exception:
+                    _stats["corrupt"] += 1
+    return rows, (seq, off)
+
+
+def _advance(new_cursor: Tuple[int, int], consumed: int):
+    """Persist the cursor and delete fully replayed sealed segments."""
+    global _cursor, _pending_bytes
+    old_seq = _cursor[0]
+    _cursor = new_cursor
+    _save_cursor()
+    for s in range(old_seq, new_cursor[0]):
+        try:
+            _segment_path(s).unlink(missing_ok=True)
+        except Exception as e:
+            logger.debug(f"[spill] unlink segment {s} failed: {e}")
+    _pending_bytes = max(0, _pending_bytes - consumed)
+    if _cursor == (_writer_seq, _flushed_pos):
+        _pending_bytes = 0
+
+
+def _bytes_between(a: Tuple[int, int], b: Tuple[int, int]) -> int:
+    if a[0] == b[0]:
+        return b[1] - a[1]
+    total = 0
+    for s in range(a[0], b[0]):
+        p = _segment_path(s)
+        size = p.stat().st_size if p.exists() else 0
+        total += size - (a[1] if s == a[0] else 0)
+    return total + b[1]
+
+
+async def replay_once(max_rows: Optional[int] = None) -> int:
+    """
+    Replay one batch into PostgreSQL with COPY. Returns rows loaded (0 if idle/unhealthy).
+    After SPILL_REPLAY_RETRIES failed COPYs of the same batch it is loaded row by row
+    and the rows that still fail are quarantined.
+    """
+    global _replay_attempts
+    from . import db
+    if _writer is None or not pending():
+        return 0
+    if not await db.is_connected():
+        return 0
+    await sync(force=True)
+    rows, nxt = await asyncio.to_thread(
+        _read_batch, max_rows or int(getattr(cfg, "SPILL_REPLAY_BATCH", 5000)),
+        _cursor, _writer_seq, _flushed_pos,
+    )
+    if not rows and nxt == _cursor:
+        return 0
+    if rows and _replay_attempts < int(getattr(cfg, "SPILL_REPLAY_RETRIES", 3)):
+        try:
+            loaded = await db.copy_metrics_rows_async(rows)
+        except Exception:
+            _replay_attempts += 1
+            raise
+        _stats["replayed"] += loaded
+    elif rows:
+        logger.warning(f"[spill] batch at {_cursor} failed {_replay_attempts} times — replaying row by row")
+        failed = await db.insert_metrics_rows_each_async(rows)
+        if failed:
+            await asyncio.to_thread(_quarantine, failed)
+            _stats["quarantined"] += len(failed)
+            logger.error(f"[spill] quarantined {len(failed)} rejected rows in {_dir / 'quarantine.log'}")
+        _stats["replayed"] += len(rows) - len(failed)
+    _replay_attempts = 0
+    _advance(nxt, _bytes_between(_cursor, nxt))
+    if not pending():
+        logger.info(f"[spill] drained — direct inserts resume (replayed total={_stats['replayed']})")
+    return len(rows)
+
+
+async def spill_loop(interval: float = 1.0):
+    """Background fsync batching + replay into PostgreSQL once it is healthy."""
+    open_log()
+    logger.info(f"[spill] replayer started (interval={interval}s)")
+    backoff = interval
+    try:
+        while True:
+            await sync()
+            try:
+                n = await replay_once()
+                backoff = interval
+                if n:
+                    logger.info(f"[spill] replayed {n} rows")
+                    continue  # keep draining without sleeping
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _stats["replay_errors"] += 1
+                backoff = min(backoff * 2, 30.0)
+                logger.warning(f"[spill] replay failed (retry in {backoff:.0f}s): {e}")
+            await asyncio.sleep(backoff)
+    except asyncio.CancelledError:
+        logger.info("[spill] replayer cancelled")
+        raise
+    finally:
+        close_log()
+
+
+def status() -> Dict[str, Any]:
+    return {
+        "enabled": enabled(),
+        "diverting": diverting(),
+        "pending_bytes": _pending_bytes,
+        "cursor": list(_cursor),
+        "active_segment": _writer_seq,
+        **_stats,
+    }
+
+
+__all__ = ["open_log", "close_log", "append", "sync", "pending", "diverting",
+           "replay_once", "spill_loop", "status", "enabled"]
@@ -0,0 +1,311 @@
+# backend/src/futuresboard/symbols.py
+"""
+Symbol dictionary: `symbols(id SMALLINT, name TEXT)` plus an in-process cache.
+
+Time-series tables carry `symbol_id SMALLINT` next to (ticks: instead of) the
+`symbol TEXT` label, and their per-symbol indexes lead with symbol_id:
+
+    writers   resolve names → ids once per batch (ensure(); new names are inserted
+              outside the batch transaction so a rolled-back batch never leaves the
+              cache pointing at an uncommitted id) and COPY symbol_id with the rows
+    readers   filter on symbol_id once the table is migrated (its symbol_id index
+              exists); API responses still carry names (ticks map ids back via the cache)
+
+migrate() converts existing tables (run_migrations.py): dictionary fill, symbol_id
+backfill, index swap, and for ticks a rewrite without the text column; it reports
+heap / index size per table before and after. The backfill runs in ctid block ranges
+(one autocommit UPDATE each, plain VACUUM in between), so the heap grows by about one
+range of replaced rows rather than doubling; VACUUM FULL (--vacuum-full) returns the rest.
+"""
+
+from __future__ import annotations
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("futuresboard.symbols")
+logger.setLevel(logging.INFO)
+
+SYMBOLS_SQL = """
+CREATE TABLE IF NOT EXISTS symbols (
+    id SMALLSERIAL PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
+"""
+
+# heap blocks (8 kB) per backfill UPDATE
+BACKFILL_BLOCKS = 2000
+
+# table → (legacy index on symbol, columns after the symbol key); the symbol_id index
+# is the same name with "_symbol_" → "_symbol_id_"
+INDEXES: Dict[str, Tuple[str, str]] = {
+    "metrics": ("metrics_symbol_tf_idx", "timeframe, updated_at DESC"),
+    "ticks": ("ticks_symbol_ts_idx", "ts DESC"),
+    "market_rest_metrics": ("market_rest_metrics_symbol_ts_idx", "ts DESC"),
+    "quant_summary": ("quant_summary_symbol_tf_idx", "timeframe, updated_at DESC"),
+    "quant_features": ("quant_features_symbol_ts_idx", "ts DESC"),
+    "quant_features_5s": ("quant_features_5s_symbol_ts_idx", "ts DESC"),
+    "quant_diagnostics": ("quant_diagnostics_symbol_ts_idx", "ts DESC"),
+    "quant_signals": ("quant_signals_symbol_ts_idx", "ts DESC"),
+    "quant_signals_wide": ("quant_signals_wide_symbol_ts_idx", "ts DESC"),
+    "quant_confluence": ("quant_confluence_symbol_ts_idx", "ts DESC"),
+    "quant_regimes": ("quant_regimes_symbol_ts_idx", "ts DESC"),
+    "quant_context_scores": ("quant_context_scores_symbol_ts_idx", "ts DESC"),
+    "quant_context_trends": ("quant_context_trends_symbol_ts_idx", "ts DESC"),
+}
+TABLES = tuple(INDEXES)
+# tables that keep only symbol_id (narrow, highest row count)
+ID_ONLY = ("ticks",)
+
+TICKS_SQL = """
+CREATE TABLE IF NOT EXISTS {name} (
+    ts TIMESTAMP WITH TIME ZONE NOT NULL,
+    symbol_id SMALLINT NOT NULL,
+    kind SMALLINT NOT NULL,
+    price DOUBLE PRECISION,
+    qty DOUBLE PRECISION
+);
+"""
+
+
+def id_index(table: str) -> str:
+    return INDEXES[table][0].replace("_symbol_", "_symbol_id_", 1)
+
+
+def legacy_index_sql(table: str) -> str:
+    name, rest = INDEXES[table]
+    return f"CREATE INDEX IF NOT EXISTS {name} ON {table}(symbol, {rest});"
+
+
+def id_index_sql(table: str) -> str:
+    return f"CREATE INDEX IF NOT EXISTS {id_index(table)} ON {table}(symbol_id, {INDEXES[table][1]});"
+
+
+class SymbolCache:
+    """Bidirectional name ↔ id map of the symbols table (grows only)."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: Dict[int, str] = {}
+
+    def add(self, pairs: Iterable[Tuple[int, str]]):
+        for i, name in pairs:
+            self.ids[name] = i
+            self.names[i] = name
+
+    def id_of(self, name: Optional[str]) -> Optional[int]:
+        return self.ids.get(name) if name else None
+
+    def name_of(self, symbol_id: Optional[int]) -> Optional[str]:
+        return self.names.get(symbol_id) if symbol_id is not None else None
+
+    def missing(self, names: Iterable[Optional[str]]) -> List[str]:
+        return sorted({n for n in names if n and n not in self.ids})
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+CACHE = SymbolCache()
+
+
+async def load(conn) -> int:
+    """(Re)load the whole dictionary into CACHE."""
+    rows = await conn.fetch("SELECT id, name FROM symbols")
+    CACHE.add((r["id"], r["name"]) for r in rows)
+    return len(rows)
+
+
+async def lookup(conn, names: Iterable[Optional[str]]) -> Dict[str, int]:
+    """name → id for known names (cache, then the table for names other processes added); never inserts."""
+    names = [n for n in names if n]
+    miss = CACHE.missing(names)
+    if miss:
+        rows = await conn.fetch("SELECT id, name FROM symbols WHERE name = ANY($1::text[])", miss)
+        CACHE.add((r["id"], r["name"]) for r in rows)
+    return {n: CACHE.ids[n] for n in names if n in CACHE.ids}
+
+
+async def ensure(conn, names: Iterable[Optional[str]]) -> Dict[str, int]:
+    """
+    name → id for every name, inserting unknown ones. Call outside the caller's batch
+    transaction. Looks up before inserting so ON CONFLICT does not burn smallint ids.
+    """
+    names = [n for n in names if n]
+    if CACHE.missing(names):
+        await lookup(conn, names)
+    miss = CACHE.missing(names)
+    if miss:
+        await conn.execute(
+            "INSERT INTO symbols (name) SELECT unnest($1::text[]) ON CONFLICT (name) DO NOTHING", miss
+        )
+        await lookup(conn, miss)
+        logger.info(f"[symbols] registered {len(miss)} new symbol(s): {', '.join(miss[:10])}")
+    return {n: CACHE.ids[n] for n in names if n in CACHE.ids}
+
+
+def stamp(cols: Sequence[str], records: Sequence[Sequence[Any]],
+          ids: Dict[str, int]) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+    """Append a symbol_id column (from `ids`, None for unknown/NULL symbols) to positional records."""
+    si = list(cols).index("symbol")
+    return list(cols) + ["symbol_id"], [(*r, ids.get(r[si])) for r in records]
+
+
+# ---------------------------------------------------------------------
+# Schema (init) and migration (run_migrations)
+# ---------------------------------------------------------------------
+async def _has_column(conn, table: str, column: str) -> bool:
+    return bool(await conn.fetchval(
+        "SELECT EXISTS (SELECT 1 FROM pg_attribute WHERE attrelid = $1::regclass "
+        "AND attname = $2 AND NOT attisdropped)", table, column,
+    ))
+
+
+async def _has_index(conn, name: str) -> bool:
+    return bool(await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", name))
+
+
+async def ensure_schema(conn, fresh: Iterable[str] = ()) -> set:
+    """
+    Dictionary table + symbol_id column on every table in INDEXES. Tables created just now
+    (`fresh`) get the symbol_id index directly; existing tables keep their legacy symbol
+    index until migrate() has backfilled them. Returns the tables whose readers may filter
+    on symbol_id, and loads CACHE.
+    """
+    from . import timeseries
+
+    await conn.execute(SYMBOLS_SQL)
+    fresh = set(fresh)
+    ready = set()
+    for table in TABLES:
+        if not await timeseries.table_exists(conn, table):
+            continue
+        await conn.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS symbol_id SMALLINT;")
+        if table in fresh or await _has_index(conn, id_index(table)):
+            await conn.execute(id_index_sql(table))
+            ready.add(table)
+        elif await _has_column(conn, table, "symbol"):
+            await conn.execute(legacy_index_sql(table))
+    await load(conn)
+    return ready
+
+
+async def _rewrite_ticks(conn):
+    """ticks → (ts, symbol_id, kind, price, qty) in one rewrite (drops the text column and its heap)."""
+    async with conn.transaction():
+        await conn.execute(TICKS_SQL.format(name="ticks_symbol_id"))
+        await conn.execute(
+            "INSERT INTO ticks_symbol_id (ts, symbol_id, kind, price, qty) "
+            "SELECT t.ts, s.id, t.kind, t.price, t.qty FROM ticks t JOIN symbols s ON s.name = t.symbol"
+        )
+        await conn.execute("DROP TABLE ticks")
+        await conn.execute("ALTER TABLE ticks_symbol_id RENAME TO ticks")
+        await conn.execute(id_index_sql("ticks"))
+
+
+async def _backfill_ids(conn, table: str, batch_blocks: int = BACKFILL_BLOCKS) -> int:
+    """
+    symbol_id backfill in ctid block ranges (applied to every partition / chunk at once),
+    each UPDATE committed on its own like db._delete_older_than. The plain VACUUM after
+    each range frees the replaced tuples for the next range's new versions. Returns rows updated.
+    """
+    blocks = int(await conn.fetchval(
+        "SELECT COALESCE(max(pg_relation_size(c.oid)), 0) / current_setting('block_size')::int FROM pg_class c "
+        "WHERE c.oid = $1::regclass OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = $1::regclass)",
+        table,
+    ) or 0)
+    sql = f"UPDATE {table} t SET symbol_id = s.id FROM symbols s WHERE s.name = t.symbol AND t.symbol_id IS NULL"
+    total = 0
+    for start in range(0, blocks + 1, batch_blocks):
+        res = await conn.execute(f"{sql} AND t.ctid >= '({start},0)'::tid AND t.ctid < '({start + batch_blocks},0)'::tid")
+        total += int(res.rsplit(" ", 1)[-1])
+        await conn.execute(f"VACUUM {table}")
+    # rows written past the size snapshot by a writer that did not stamp symbol_id yet
+    res = await conn.execute(sql)
+    return total + int(res.rsplit(" ", 1)[-1])
+
+
+async def migrate_table(conn, table: str, log: Callable[[str], Any] = print) -> str:
+    """Fill the dictionary from `table`, backfill symbol_id and swap its index. Returns the action taken."""
+    from . import timeseries
+
+    has_symbol = await _has_column(conn, table, "symbol")
+    if await _has_index(conn, id_index(table)) and not (table in ID_ONLY and has_symbol):
+        return "already migrated"
+    if not has_symbol:
+        await conn.execute(id_index_sql(table))
+        return "no symbol column"
+    await conn.execute(
+        f"INSERT INTO symbols (name) SELECT DISTINCT symbol FROM {table} WHERE symbol IS NOT NULL "
+        f"ON CONFLICT (name) DO NOTHING"
+    )
+    if table in ID_ONLY:
+        if table in await timeseries.hypertables(conn):
+            log(f"🔁 {table}: rewriting hypertable as a plain table (re-converted by the time-series step)")
+        await _rewrite_ticks(conn)
+        return "rewritten (symbol_id only)"
+    await conn.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS symbol_id SMALLINT")
+    n = await _backfill_ids(conn, table)
+    async with conn.transaction():
+        await conn.execute(id_index_sql(table))
+        await conn.execute(f"DROP INDEX IF EXISTS {INDEXES[table][0]}")
+    return f"backfilled ({n} rows)"
+
+
+async def migrate(conn, vacuum_full: bool = False, log: Callable[[str], Any] = print) -> List[Dict[str, Any]]:
+    """
+    Migrate every table in INDEXES to symbol_id (idempotent). Per-table failures are logged
+    and leave that table on its legacy symbol index. With vacuum_full the backfilled wide
+    tables are rewritten so the space of the replaced tuples is returned to the OS;
+    without it the heap growth is shown in the report (format_migration).
+    """
+    from . import timeseries
+
+    await conn.execute(SYMBOLS_SQL)
+    results = []
+    for table in TABLES:
+        if not await timeseries.table_exists(conn, table):
+            continue
+        before = await timeseries.relation_sizes(conn, table)
+        try:
+            action = await migrate_table(conn, table, log=log)
+            if vacuum_full and action.startswith("backfilled"):
+                await conn.execute(f"VACUUM (FULL, ANALYZE) {table}")
+            else:
+                await conn.execute(f"ANALYZE {table}")
+        except Exception as e:
+            action = f"failed: {e}"
+            logger.warning(f"[symbols] {table}: migration failed, keeping the symbol index: {e}")
+        after = await timeseries.relation_sizes(conn, table)
+        results.append({"table": table, "action": action, "before": before, "after": after})
+        log(f"🔤 {table}: {action}")
+    await load(conn)
+    return results
+
+
+def format_migration(results: Sequence[Dict[str, Any]]) -> str:
+    """Plain-text heap / index size table (MB, heap growth in %) for run_migrations."""
+    def mb(x):
+        return f"{x / 1048576:.1f}" if isinstance(x, (int, float)) else "-"
+
+    def growth(b, a):
+        return f"{(a - b) * 100 / b:+.0f}%" if isinstance(a, (int, float)) and b else "-"
+
+    lines = [f"{'table':<22} {'heap MB':>16} {'heap Δ':>7} {'index MB':>16}  action"]
+    tot = {"hb": 0, "ha": 0, "ib": 0, "ia": 0}
+    for r in results:
+        b, a = r["before"], r["after"]
+        tot["hb"] += b.get("heap", 0); tot["ha"] += a.get("heap", 0)
+        tot["ib"] += b.get("index", 0); tot["ia"] += a.get("index", 0)
+        lines.append(f"{r['table']:<22} {mb(b.get('heap')):>7} → {mb(a.get('heap')):>6} "
+                     f"{growth(b.get('heap'), a.get('heap')):>7} "
+                     f"{mb(b.get('index')):>7} → {mb(a.get('index')):>6}  {r['action']}")
+    lines.append(f"{'total':<22} {mb(tot['hb']):>7} → {mb(tot['ha']):>6} {growth(tot['hb'], tot['ha']):>7} "
+                 f"{mb(tot['ib']):>7} → {mb(tot['ia']):>6}")
+    return "\n".join(lines)
+
+
+__all__ = [
+    "CACHE", "SymbolCache", "INDEXES", "TABLES", "ID_ONLY", "id_index",
+    "load", "lookup", "ensure", "stamp", "ensure_schema", "migrate", "format_migration",
+]
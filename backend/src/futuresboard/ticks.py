@@ -0,0 +1,144 @@
+# backend/src/futuresboard/ticks.py
+"""
+Narrow append-only `ticks` store for high-rate WS data.
+
+Every WS frame used to become a full 45-column `metrics` row (mostly NULLs plus a
+JSON copy of the whole input). Raw ticks now go to the narrow `ticks` table
+(ts, symbol, kind, price, qty) through a COPY-based writer, and `metrics` keeps
+the enriched snapshot rows (bucket bars + REST overlay).
+
+Each db_writer partition owns one TickWriter; rows are buffered and loaded with
+COPY in batches. On DB failure the buffer is kept (bounded by TICKS_BUFFER_MAX,
+oldest dropped first) and retried on the next flush.
+"""
+
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .config import get_settings
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.ticks")
+logger.setLevel(logging.INFO)
+
+# stream kind (ws_manager tag) → smallint code stored in ticks.kind
+KIND_CODES = {
+    "ticker": 1,
+    "markPrice": 2,
+    "trades": 3,
+    "openInterest": 4,
+    "depth": 5,
+}
+KIND_NAMES = {v: k for k, v in KIND_CODES.items()}
+
+TickRecord = Tuple[datetime, str, int, Optional[float], Optional[float]]
+
+
+def _num(v) -> Optional[float]:
+    try:
+        return float(v) if v is not None and v != "" else None
+    except (TypeError, ValueError):
+        return None
+
+
+def enabled_kinds() -> set:
+    raw = getattr(cfg, "TICKS_KINDS", "ticker,markPrice,trades,openInterest") or ""
+    return {k.strip() for k in str(raw).split(",") if k.strip() in KIND_CODES}
+
+
+def to_tick(item: Dict[str, Any], kinds: Optional[set] = None) -> Optional[TickRecord]:
+    """on_message record → (ts, symbol, kind, price, qty), or None if not persisted as a tick."""
+    if not isinstance(item, dict):
+        return None
+    kind = item.get("kind")
+    if kind not in KIND_CODES or (kinds is not None and kind not in kinds):
+        return None
+    sym = (item.get("symbol") or "").upper()
+    if not sym:
+        return None
+    payload = item.get("raw") if isinstance(item.get("raw"), dict) else {}
+    data = payload.get("raw") if isinstance(payload.get("raw"), dict) else payload
+    ts = _num(payload.get("timestamp")) or _num(data.get("E")) or _num(data.get("T"))
+    ts_s = ts / 1000.0 if ts else (_num(item.get("recv_ts")) or time.time())
+    price = _num(item.get("Price"))
+    qty = None
+    if kind == "trades":
+        qty = _num(data.get("q"))
+    elif kind == "openInterest":
+        qty = _num(item.get("openInterest")) or _num(data.get("o"))
+    if price is None and qty is None:
+        return None
+    return (datetime.utcfromtimestamp(ts_s), sym, KIND_CODES[kind], price, qty)
+
+
+class TickWriter:
+    """Buffers tick records for one writer partition and loads them with COPY."""
+
+    def __init__(self, batch_size: Optional[int] = None, max_buffer: Optional[int] = None):
+        self.batch_size = int(batch_size or getattr(cfg, "TICKS_BATCH", 2000))
+        self.max_buffer = int(max_buffer or getattr(cfg, "TICKS_BUFFER_MAX", 50000))
+        self.kinds = enabled_kinds()
+        self._buf: Deque[TickRecord] = deque()
+        self.written = 0
+        self.dropped = 0
+        self.failures = 0
+
+    def add(self, item: Dict[str, Any]) -> bool:
+        rec = to_tick(item, self.kinds)
+        if rec is None:
+            return False
+        if len(self._buf) >= self.max_buffer:
+            self._buf.popleft()
+            self.dropped += 1
+        self._buf.append(rec)
+        return True
+
+    def pending(self) -> int:
+        return len(self._buf)
+
+    def due(self) -> bool:
+        return len(self._buf) >= self.batch_size
+
+    async def flush(self, timeout: Optional[float] = None) -> int:
+        """
+        COPY the buffered ticks; keeps them for the next attempt on failure or when the
+        COPY outlasts `timeout` seconds (a stuck DB must not stall the metrics writer).
+        """
+        from . import db
+        if not self._buf:
+            return 0
+        records = list(self._buf)
+        self._buf.clear()
+        try:
+            n = await asyncio.wait_for(db.copy_ticks_async(records), timeout=timeout)
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"[ticks] COPY of {len(records)} ticks failed (kept for retry): {e or type(e).__name__}")
+            # put them back in front of anything that arrived meanwhile, oldest dropped past the cap
+            self._buf.extendleft(reversed(records))
+            while len(self._buf) > self.max_buffer:
+                self._buf.popleft()
+                self.dropped += 1
+            return 0
+        self.written += n
+        return n
+
+    def status(self) -> Dict[str, Any]:
+        return {"pending": len(self._buf), "written": self.written,
+                "dropped": self.dropped, "failures": self.failures}
+
+
+def from_settings() -> Optional[TickWriter]:
+    """TickWriter when TICKS_ENABLED, else None."""
+    if not getattr(cfg, "TICKS_ENABLED", True):
+        return None
+    return TickWriter()
+
+
+__all__ = ["TickWriter", "KIND_CODES", "KIND_NAMES", "to_tick", "from_settings"]
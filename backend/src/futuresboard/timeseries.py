@@ -0,0 +1,388 @@
+# backend/src/futuresboard/timeseries.py
+"""
+Time-series storage mode (TimescaleDB hypertables vs plain PostgreSQL).
+
+TIMESERIES_TABLES is the registry of every append-mostly table keyed by its time
+column. In TimescaleDB mode each one becomes a hypertable with:
+    - PRIMARY KEY (id, <time col>)   (unique indexes must include the partition column)
+    - chunk_time_interval sized from the measured ingest rate so one chunk
+      (heap + indexes) stays near TIMESCALE_CHUNK_TARGET_MB
+    - native compression segmented by symbol, ordered by time DESC, with a
+      compression policy after N hours
+
+DB_TIMESERIES_MODE:
+    auto         — TimescaleDB when the extension is installed/available, else partitioned
+    timescale    — require TimescaleDB (migration fails loudly when missing)
+    partitioned  — native daily range partitions on plain PostgreSQL (partitions.py)
+    plain        — plain heaps + btree on (symbol, ts), row-wise DELETE retention
+
+Plain PostgreSQL degrades gracefully: every Timescale step is skipped. Used by
+run_migrations.py (apply + report) and by db.py at runtime (mode detection and
+retention: drop_chunks / drop partitions / batched DELETE).
+
+Retention is per table: DB_RETENTION_DAYS overrides ("ticks=7,metrics=30"),
+then the registry value, then PRUNE_DAYS; 0 keeps the table forever.
+"""
+
+from __future__ import annotations
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from . import partitions
+from .config import get_settings
+
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.timeseries")
+logger.setLevel(logging.INFO)
+
+MODES = ("auto", "timescale", "partitioned", "plain")
+
+
+class TimeseriesTable(NamedTuple):
+    time_col: str
+    has_id: bool = True                  # id BIGSERIAL → PK becomes (id, time_col)
+    segmentby: str = "symbol"
+    est_rows_per_s: float = 1.0          # used when the table has no recent rows to measure
+    est_row_bytes: int = 400             # heap + index bytes per row when the table is empty
+    compress_after_hours: Optional[float] = None  # None → TIMESCALE_COMPRESS_AFTER_HOURS
+    retention_days: Optional[float] = None        # None → PRUNE_DAYS (ticks: TICKS_RETENTION_DAYS)
+
+
+TIMESERIES_TABLES: Dict[str, TimeseriesTable] = {
+    "metrics": TimeseriesTable("updated_at", segmentby="symbol, timeframe", est_rows_per_s=20, est_row_bytes=900),
+    "ticks": TimeseriesTable("ts", segmentby="symbol_id", has_id=False, est_rows_per_s=500, est_row_bytes=80,
+                             compress_after_hours=2),
+    "quant_summary": TimeseriesTable("updated_at", segmentby="symbol, timeframe", est_rows_per_s=1, est_row_bytes=200),
+    "market_rest_metrics": TimeseriesTable("ts", est_rows_per_s=3, est_row_bytes=1500),
+    "quant_features": TimeseriesTable("ts", segmentby="symbol, timeframe", est_rows_per_s=1, est_row_bytes=1500),
+    "quant_features_5s": TimeseriesTable("ts", segmentby="symbol, timeframe", est_rows_per_s=10, est_row_bytes=1500),
+    "quant_diagnostics": TimeseriesTable("ts", est_rows_per_s=1, est_row_bytes=400),
+    "quant_signals": TimeseriesTable("ts", est_rows_per_s=5, est_row_bytes=300),
+    "quant_signals_wide": TimeseriesTable("ts", est_rows_per_s=1, est_row_bytes=150),
+    "quant_confluence": TimeseriesTable("ts", est_rows_per_s=1, est_row_bytes=400),
+    "quant_regimes": TimeseriesTable("ts", est_rows_per_s=1, est_row_bytes=300),
+    "quant_context_scores": TimeseriesTable("ts", est_rows_per_s=1, est_row_bytes=300),
+    "quant_context_trends": TimeseriesTable("ts", est_rows_per_s=0.1, est_row_bytes=300),
+    # RAW_STORE=table side store (blobstore.py)
+    "raw_payloads": TimeseriesTable("ts", segmentby="src, symbol", est_rows_per_s=20, est_row_bytes=600),
+}
+
+
+def configured_mode() -> str:
+    mode = str(getattr(cfg, "DB_TIMESERIES_MODE", "auto") or "auto").strip().lower()
+    return mode if mode in MODES else "auto"
+
+
+def _retention_overrides() -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in str(getattr(cfg, "DB_RETENTION_DAYS", "") or "").split(","):
+        name, sep, days = part.partition("=")
+        if sep:
+            try:
+                out[name.strip()] = float(days)
+            except ValueError:
+                logger.warning(f"[timeseries] bad DB_RETENTION_DAYS entry: {part!r}")
+    return out
+
+
+def retention_days(table: str) -> float:
+    """Retention policy in days for a registered table (0 → keep forever)."""
+    overrides = _retention_overrides()
+    if table in overrides:
+        return max(0.0, overrides[table])
+    spec = TIMESERIES_TABLES.get(table)
+    if spec and spec.retention_days is not None:
+        return spec.retention_days
+    if table == "ticks":
+        return float(getattr(cfg, "TICKS_RETENTION_DAYS", 7))
+    return float(os.getenv("PRUNE_DAYS", "60"))
+
+
+def chunk_interval_hours(rows_per_s: float, row_bytes: float,
+                         target_mb: Optional[float] = None,
+                         min_hours: Optional[float] = None,
+                         max_hours: Optional[float] = None) -> float:
+    """
+    Chunk span (hours) so that one chunk holds ~target_mb of heap + index data at
+    the given ingest rate, clamped to [min_hours, max_hours] and rounded to whole
+    hours (sub-hour chunks only when the clamp allows it).
+    """
+    target_mb = float(target_mb or getattr(cfg, "TIMESCALE_CHUNK_TARGET_MB", 256))
+    min_hours = float(min_hours or getattr(cfg, "TIMESCALE_CHUNK_MIN_HOURS", 1))
+    max_hours = float(max_hours or getattr(cfg, "TIMESCALE_CHUNK_MAX_HOURS", 168))
+    bytes_per_hour = max(rows_per_s, 1e-6) * max(row_bytes, 1.0) * 3600.0
+    hours = (target_mb * 1024 * 1024) / bytes_per_hour
+    if hours >= 1:
+        hours = float(round(hours))
+    return max(min_hours, min(max_hours, hours))
+
+
+# ---------------------------------------------------------------------
+# Detection
+# ---------------------------------------------------------------------
+async def timescale_installed(conn) -> bool:
+    try:
+        return bool(await conn.fetchval("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'"))
+    except Exception:
+        return False
+
+
+async def detect_mode(conn, create: bool = False) -> str:
+    """
+    Resolve DB_TIMESERIES_MODE to "timescale" or "plain" for this database.
+    With create=True (migrations) the extension is created when available.
+    """
+    mode = configured_mode()
+    if mode in ("plain", "partitioned"):
+        return mode
+    if await timescale_installed(conn):
+        return "timescale"
+    if create:
+        try:
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
+            return "timescale"
+        except Exception as e:
+            if mode == "timescale":
+                raise RuntimeError(f"DB_TIMESERIES_MODE=timescale but the extension is unavailable: {e}")
+            logger.info(f"[timeseries] TimescaleDB unavailable, using native partitioning: {e}")
+    elif mode == "timescale":
+        logger.warning("[timeseries] DB_TIMESERIES_MODE=timescale but the extension is not installed (run run_migrations.py)")
+        return "plain"
+    return "partitioned"
+
+
+async def table_exists(conn, table: str) -> bool:
+    """A relation named `table` that is not a view (compact.py compatibility views do not count)."""
+    return bool(await conn.fetchval(
+        "SELECT EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass($1) AND relkind <> 'v')", table
+    ))
+
+
+async def hypertables(conn) -> List[str]:
+    try:
+        rows = await conn.fetch("SELECT hypertable_name FROM timescaledb_information.hypertables")
+        return [r["hypertable_name"] for r in rows]
+    except Exception:
+        return []
+
+
+# ---------------------------------------------------------------------
+# Sizing inputs
+# ---------------------------------------------------------------------
+async def measured_rate(conn, table: str, spec: TimeseriesTable, window_s: int = 3600) -> Optional[float]:
+    """Rows/s written over the last `window_s` seconds (None when nothing recent)."""
+    try:
+        n = await conn.fetchval(
+            f"SELECT count(*) FROM {table} WHERE {spec.time_col} > now() - make_interval(secs => $1)",
+            float(window_s),
+        )
+        return (n / window_s) if n else None
+    except Exception:
+        return None
+
+
+async def measured_row_bytes(conn, table: str) -> Optional[float]:
+    """Average heap + index bytes per row from the catalog (None for empty/unanalysed tables)."""
+    try:
+        rec = await conn.fetchrow(
+            "SELECT pg_total_relation_size($1::regclass) AS bytes, reltuples FROM pg_class WHERE oid = $1::regclass",
+            table,
+        )
+        if rec and rec["reltuples"] and rec["reltuples"] > 0:
+            return rec["bytes"] / rec["reltuples"]
+    except Exception:
+        pass
+    return None
+
+
+# ---------------------------------------------------------------------
+# Apply (migration)
+# ---------------------------------------------------------------------
+async def ensure_hypertable(conn, table: str, spec: TimeseriesTable,
+                            log: Callable[[str], Any] = print) -> Dict[str, Any]:
+    """Convert one table to a compressed hypertable (idempotent). Returns what was applied."""
+    out: Dict[str, Any] = {"table": table}
+    if not await table_exists(conn, table):
+        log(f"⏭️  {table}: table missing, skipped (start the backend once to create it)")
+        out["skipped"] = "missing"
+        return out
+
+    rate = await measured_rate(conn, table, spec) or spec.est_rows_per_s
+    row_bytes = await measured_row_bytes(conn, table) or spec.est_row_bytes
+    hours = chunk_interval_hours(rate, row_bytes)
+    out.update({"rows_per_s": round(rate, 3), "row_bytes": round(row_bytes), "chunk_hours": hours})
+
+    if spec.has_id:
+        try:
+            await conn.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_pkey;")
+            await conn.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {spec.time_col});")
+        except Exception as e:
+            log(f"⚠️ {table}: could not reset primary key: {e}")
+
+    try:
+        await conn.execute(
+            f"SELECT create_hypertable('{table}', '{spec.time_col}', "
+            f"chunk_time_interval => make_interval(secs => $1), "
+            f"if_not_exists => TRUE, migrate_data => TRUE);",
+            hours * 3600.0,
+        )
+        # applies to chunks created from now on for tables that already were hypertables
+        await conn.execute(f"SELECT set_chunk_time_interval('{table}', make_interval(secs => $1));", hours * 3600.0)
+        log(f"📈 {table}: hypertable on {spec.time_col}, chunk {hours:g}h ({rate:.2f} rows/s × {row_bytes:.0f} B)")
+    except Exception as e:
+        log(f"⚠️ {table}: hypertable creation skipped: {e}")
+        out["error"] = str(e)
+        return out
+
+    after_h = float(spec.compress_after_hours or getattr(cfg, "TIMESCALE_COMPRESS_AFTER_HOURS", 6))
+    try:
+        await conn.execute(
+            f"ALTER TABLE {table} SET (timescaledb.compress, "
+            f"timescaledb.compress_segmentby = '{spec.segmentby}', "
+            f"timescaledb.compress_orderby = '{spec.time_col} DESC');"
+        )
+        await conn.execute(
+            f"SELECT add_compression_policy('{table}', compress_after => make_interval(secs => $1), if_not_exists => TRUE);",
+            after_h * 3600.0,
+        )
+        out["compress_after_hours"] = after_h
+        log(f"🗜️  {table}: compression by ({spec.segmentby}) after {after_h:g}h")
+    except Exception as e:
+        log(f"⚠️ {table}: compression policy skipped: {e}")
+    return out
+
+
+async def apply(conn, log: Callable[[str], Any] = print) -> Dict[str, Any]:
+    """Resolve the mode (creating the extension if possible) and convert every registered table."""
+    mode = await detect_mode(conn, create=True)
+    if mode == "partitioned":
+        results = []
+        for t, spec in TIMESERIES_TABLES.items():
+            try:
+                status = await partitions.convert_table(conn, t, spec.time_col, spec.has_id, log)
+            except Exception as e:
+                log(f"⚠️ {t}: partitioning skipped: {e}")
+                status = f"error: {e}"
+            results.append({"table": t, "partitioning": status})
+        return {"mode": mode, "tables": results}
+    if mode != "timescale":
+        log("ℹ️ Plain PostgreSQL mode: hypertables/partitioning skipped, tables stay regular heaps.")
+        return {"mode": mode, "tables": []}
+    results = [await ensure_hypertable(conn, t, spec, log) for t, spec in TIMESERIES_TABLES.items()]
+    return {"mode": mode, "tables": results}
+
+
+async def compress_now(conn, log: Callable[[str], Any] = print) -> int:
+    """Compress every chunk already past its policy age (so a report reflects compression immediately)."""
+    total = 0
+    for table, spec in TIMESERIES_TABLES.items():
+        after_h = float(spec.compress_after_hours or getattr(cfg, "TIMESCALE_COMPRESS_AFTER_HOURS", 6))
+        try:
+            n = await conn.fetchval(
+                f"SELECT count(compress_chunk(c, if_not_compressed => TRUE)) "
+                f"FROM show_chunks('{table}', older_than => make_interval(secs => $1)) c",
+                after_h * 3600.0,
+            )
+            total += int(n or 0)
+        except Exception as e:
+            log(f"⚠️ {table}: compress_now skipped: {e}")
+    log(f"🗜️  compressed {total} chunk(s)")
+    return total
+
+
+# ---------------------------------------------------------------------
+# Runtime helpers
+# ---------------------------------------------------------------------
+async def drop_chunks_older_than(conn, table: str, cutoff) -> int:
+    """Retention for hypertables: drop whole chunks older than cutoff. Returns chunks dropped."""
+    n = await conn.fetchval(f"SELECT count(*) FROM drop_chunks('{table}', older_than => $1::timestamptz)", cutoff)
+    return int(n or 0)
+
+
+# ---------------------------------------------------------------------
+# Report (storage + query latency)
+# ---------------------------------------------------------------------
+async def table_report(conn, table: str, spec: TimeseriesTable, probes: int = 5) -> Dict[str, Any]:
+    """Total bytes, estimated rows and median latency of the dashboard's latest-N-by-symbol query."""
+    if not await table_exists(conn, table):
+        return {"table": table, "missing": True}
+    out: Dict[str, Any] = {"table": table}
+    try:
+        out["bytes"] = int(await conn.fetchval("SELECT hypertable_size($1::regclass)", table))
+    except Exception:
+        out["bytes"] = int(await conn.fetchval("SELECT pg_total_relation_size($1::regclass)", table) or 0)
+    out["rows_est"] = int(await conn.fetchval(
+        "SELECT GREATEST(sum(c.reltuples), 0)::bigint FROM pg_class c "
+        "WHERE c.oid = $1::regclass OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = $1::regclass)",
+        table,
+    ) or 0)
+    # probe on the key the table's index leads with (symbol_id once migrated, see symbols.py)
+    from .symbols import INDEXES, id_index
+    key = "symbol_id" if table in INDEXES and await table_exists(conn, id_index(table)) else "symbol"
+    sym = await conn.fetchval(f"SELECT {key} FROM {table} ORDER BY {spec.time_col} DESC LIMIT 1")
+    if sym is not None:
+        q = (f"SELECT * FROM {table} WHERE {key} = $1 AND {spec.time_col} > now() - interval '1 day' "
+             f"ORDER BY {spec.time_col} DESC LIMIT 500")
+        timings = []
+        for _ in range(probes):
+            t0 = time.perf_counter()
+            await conn.fetch(q, sym)
+            timings.append((time.perf_counter() - t0) * 1000.0)
+        timings.sort()
+        out["latest_500_ms"] = round(timings[len(timings) // 2], 2)
+    return out
+
+
+async def relation_sizes(conn, table: str) -> Dict[str, int]:
+    """Heap (incl. TOAST) and index bytes of a table, summed over partitions / hypertable chunks."""
+    try:
+        rec = await conn.fetchrow(
+            "SELECT table_bytes + COALESCE(toast_bytes, 0) AS heap, index_bytes AS index "
+            "FROM hypertable_detailed_size($1::regclass)", table,
+        )
+        if rec is not None and rec["heap"] is not None:
+            return {"heap": int(rec["heap"]), "index": int(rec["index"] or 0)}
+    except Exception:
+        pass
+    rec = await conn.fetchrow(
+        "SELECT COALESCE(sum(pg_table_size(c.oid)), 0)::bigint AS heap, "
+        "COALESCE(sum(pg_indexes_size(c.oid)), 0)::bigint AS index FROM pg_class c "
+        "WHERE c.oid = $1::regclass OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = $1::regclass)",
+        table,
+    )
+    return {"heap": int(rec["heap"]), "index": int(rec["index"])}
+
+
+async def report(conn) -> List[Dict[str, Any]]:
+    return [await table_report(conn, t, spec) for t, spec in TIMESERIES_TABLES.items()]
+
+
+def _mb(x) -> str:
+    return f"{x / 1048576:.1f}" if isinstance(x, (int, float)) else "-"
+
+
+def _ms(x) -> str:
+    return f"{x:.2f}" if isinstance(x, (int, float)) else "-"
+
+
+def format_report(before: List[Dict[str, Any]], after: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Plain-text before/after table for run_migrations --report."""
+    after_by = {r["table"]: r for r in (after or [])}
+    lines = [f"{'table':<22} {'MB before':>10} {'MB after':>10} {'ms before':>10} {'ms after':>10}"]
+    for r in before:
+        if r.get("missing"):
+            continue
+        a = after_by.get(r["table"], {})
+        lines.append(f"{r['table']:<22} {_mb(r.get('bytes')):>10} {_mb(a.get('bytes')):>10} "
+                     f"{_ms(r.get('latest_500_ms')):>10} {_ms(a.get('latest_500_ms')):>10}")
+    return "\n".join(lines)
+
+
+__all__ = [
+    "TIMESERIES_TABLES", "TimeseriesTable", "configured_mode", "detect_mode", "chunk_interval_hours",
+    "retention_days", "relation_sizes",
+    "apply", "compress_now", "drop_chunks_older_than", "hypertables", "report", "format_report",
+]
@@ -0,0 +1,367 @@
+# backend/src/futuresboard/universe.py
+"""
+Symbol universe manager.
+
+- Discovers USDT-margined perpetuals via /fapi/v1/exchangeInfo
+- Ranks them by 24h quote volume (one bulk /fapi/v1/ticker/24hr call),
+  blended with open-interest notional for the top candidates
+- Selects top-N plus a pinned list and assigns each symbol a tier
+- A tier decides the WS streams, the REST poll cadence and the quant cadence
+- Publishes changes to subscribers (ws_manager, rest_collector, quant_engine)
+  so the running pipeline follows the universe without a restart
+
+With UNIVERSE_ENABLED=false the universe is simply cfg.SYMBOLS, all tier 1,
+which reproduces the previous static behaviour.
+"""
+
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from .config import get_settings
+cfg = get_settings()
+
+logger = logging.getLogger("futuresboard.universe")
+logger.setLevel(logging.INFO)
+
+API_BASE = cfg.API_BASE_URL
+
+# ---------------------------------------------------------------------
+# Tier specs: WS streams + REST / quant cadence (seconds)
+# ---------------------------------------------------------------------
+TIER_SPECS: Dict[int, Dict[str, Any]] = {
+    1: {
+        "streams": ["ticker", "markPrice", "openInterest", "depth@100ms", "aggTrade"],
+        "rest_interval": 10,
+        "quant_interval": 5,
+    },
+    2: {
+        "streams": ["ticker", "markPrice", "aggTrade"],
+        "rest_interval": 30,
+        "quant_interval": 15,
+    },
+    3: {
+        "streams": ["ticker", "markPrice"],
+        "rest_interval": 60,
+        "quant_interval": 60,
+    },
+}
+LOWEST_TIER = max(TIER_SPECS)
+
+# -- module-level universe state (single instance behaviour, like ws_manager) --
+_universe: Dict[str, int] = {}
+_listeners: List[Callable[[Dict[str, Any]], Awaitable[None]]] = []
+_last_refresh: Optional[float] = None
+_lock = asyncio.Lock()
+
+
+# ---------------------------------------------------------------------
+# Read helpers
+# ---------------------------------------------------------------------
+def _ensure_seeded():
+    if not _universe:
+        seed(cfg.SYMBOLS)
+
+
+def seed(symbols: Iterable[str], tier: int = 1):
+    """Seed the universe with a static symbol list (no publish)."""
+    for s in symbols:
+        if s and s.strip():
+            _universe[s.strip().upper()] = tier
+
+
+def seed_if_empty(symbols: Iterable[str], tier: int = 1):
+    """Seed only when nothing (config or discovery) has populated the universe yet."""
+    if not _universe:
+        seed(symbols, tier)
+
+
+def get_universe() -> Dict[str, int]:
+    """Return a copy of the current symbol → tier mapping."""
+    _ensure_seeded()
+    return dict(_universe)
+
+
+def symbols(tier: Optional[int] = None) -> List[str]:
+    """Current symbols ordered by tier (optionally only one tier)."""
+    _ensure_seeded()
+    items = sorted(_universe.items(), key=lambda kv: kv[1])
+    return [s for s, t in items if tier is None or t == tier]
+
+
+def tier_of(symbol: str) -> int:
+    _ensure_seeded()
+    return _universe.get((symbol or "").upper(), LOWEST_TIER)
+
+
+def spec_for(symbol: str) -> Dict[str, Any]:
+    return TIER_SPECS.get(tier_of(symbol), TIER_SPECS[LOWEST_TIER])
+
+
+def rest_interval(symbol: str) -> float:
+    return float(spec_for(symbol)["rest_interval"])
+
+
+def quant_interval(symbol: str) -> float:
+    return float(spec_for(symbol)["quant_interval"])
+
+
+def streams_by_symbol() -> Dict[str, List[str]]:
+    """Symbol → WS stream names for its tier (used by ws_manager)."""
+    _ensure_seeded()
+    return {s: list(TIER_SPECS.get(t, TIER_SPECS[LOWEST_TIER])["streams"]) for s, t in _universe.items()}
+
+
+def due_symbols(last_run: Dict[str, float], kind: str = "quant", now: Optional[float] = None,
+                slack: float = 0.5) -> List[str]:
+    """
+    Return symbols whose `kind` cadence ("quant" or "rest") has elapsed since last_run[sym].
+    `slack` absorbs loop jitter so a 5s tier is not skipped on a 4.9s tick.
+    """
+    now = now if now is not None else time.time()
+    key = "quant_interval" if kind == "quant" else "rest_interval"
+    out = []
+    for s in symbols():
+        interval = float(spec_for(s)[key])
+        last = last_run.get(s)
+        if last is None or (now - last) >= interval - slack:
+            out.append(s)
+    return out
+
+
+def next_due_in(last_run: Dict[str, float], kind: str = "quant", now: Optional[float] = None) -> Optional[float]:
+    """Seconds until the next symbol's `kind` cadence elapses (0 if one is due, None for an empty universe)."""
+    now = now if now is not None else time.time()
+    key = "quant_interval" if kind == "quant" else "rest_interval"
+    waits = [float(spec_for(s)[key]) - (now - last_run[s]) if s in last_run else 0.0 for s in symbols()]
+    return max(0.0, min(waits)) if waits else None
+
+
+def status() -> Dict[str, Any]:
+    """Summary for API / diagnostics."""
+    _ensure_seeded()
+    counts: Dict[int, int] = {}
+    for t in _universe.values():
+        counts[t] = counts.get(t, 0) + 1
+    return {
+        "enabled": bool(cfg.UNIVERSE_ENABLED),
+        "size": len(_universe),
+        "tiers": {str(k): v for k, v in sorted(counts.items())},
+        "symbols": get_universe(),
+        "last_refresh": _last_refresh,
+    }
+
+
+# ---------------------------------------------------------------------
+# Selection (pure — no I/O)
+# ---------------------------------------------------------------------
+def _parse_tier_sizes(raw: str) -> List[int]:
+    try:
+        return [max(0, int(x)) for x in str(raw).split(",") if x.strip()]
+    except Exception:
+        return [5, 15]
+
+
+def select_universe(
+    exchange_info: Dict[str, Any],
+    tickers: List[Dict[str, Any]],
+    oi_notional: Optional[Dict[str, float]] = None,
+    top_n: int = 30,
+    pinned: Optional[Iterable[str]] = None,
+    tier_sizes: Optional[List[int]] = None,
+    quote_asset: str = "USDT",
+) -> Dict[str, int]:
+    """
+    Pick top-N trading perpetuals by 24h quote volume (blended with OI notional
+    when available) and assign tiers. Pinned symbols are always tier 1 and do
+    not count towards top_n.
+    """
+    pinned = [p.upper() for p in (pinned or [])]
+    tier_sizes = tier_sizes if tier_sizes is not None else [5, 15]
+
+    eligible = set()
+    for s in (exchange_info or {}).get("symbols", []):
+        try:
+            if (s.get("contractType") == "PERPETUAL"
+                    and s.get("status") == "TRADING"
+                    and s.get("quoteAsset") == quote_asset):
+                eligible.add(s["symbol"])
+        except Exception:
+            continue
+
+    volumes: Dict[str, float] = {}
+    for t in tickers or []:
+        sym = t.get("symbol")
+        if sym not in eligible:
+            continue
+        try:
+            volumes[sym] = float(t.get("quoteVolume") or 0.0)
+        except Exception:
+            volumes[sym] = 0.0
+
+    by_volume = sorted(volumes, key=lambda s: volumes[s], reverse=True)
+    if oi_notional:
+        # blend: mean of volume rank and OI rank (symbols without OI rank last on that leg)
+        vol_rank = {s: i for i, s in enumerate(by_volume)}
+        by_oi = sorted(by_volume, key=lambda s: oi_notional.get(s, -1.0), reverse=True)
+        oi_rank = {s: i for i, s in enumerate(by_oi)}
+        ranked = sorted(by_volume, key=lambda s: (vol_rank[s] + oi_rank[s], vol_rank[s]))
+    else:
+        ranked = by_volume
+
+    selected = [s for s in ranked if s not in pinned][:max(0, top_n)]
+
+    out: Dict[str, int] = {p: 1 for p in pinned}
+    bounds = []
+    acc = 0
+    for size in tier_sizes:
+        acc += size
+        bounds.append(acc)
+    for i, sym in enumerate(selected):
+        tier = LOWEST_TIER
+        for t, bound in enumerate(bounds, start=1):
+            if i < bound:
+                tier = min(t, LOWEST_TIER)
+                break
+        out[sym] = tier
+    return out
+
+
+def diff_universe(old: Dict[str, int], new: Dict[str, int]) -> Dict[str, Any]:
+    added = {s: t for s, t in new.items() if s not in old}
+    removed = [s for s in old if s not in new]
+    retiered = {s: t for s, t in new.items() if s in old and old[s] != t}
+    return {"added": added, "removed": removed, "retiered": retiered}
+
+
+# ---------------------------------------------------------------------
+# Publish / subscribe
+# ---------------------------------------------------------------------
+def subscribe(callback: Callable[[Dict[str, Any]], Awaitable[None]]):
+    """Register an async callback receiving {added, removed, retiered, universe}."""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+async def apply(new_universe: Dict[str, int]) -> Dict[str, Any]:
+    """Swap in a new universe and notify subscribers if anything changed."""
+    global _universe
+    async with _lock:
+        old = get_universe()
+        change = diff_universe(old, new_universe)
+        if not (change["added"] or change["removed"] or change["retiered"]):
+            return change
+        _universe = dict(new_universe)
+        change["universe"] = dict(_universe)
+        logger.info(
+            f"[universe] updated: +{len(change['added'])} -{len(change['removed'])} "
+            f"~{len(change['retiered'])} (size={len(_universe)})"
+        )
+        for cb in list(_listeners):
+            try:
+                await cb(change)
+            except Exception as e:
+                logger.warning(f"[universe] subscriber {getattr(cb, '__qualname__', cb)} failed: {e}")
+        return change
+
+
+# ---------------------------------------------------------------------
+# Discovery (REST)
+# ---------------------------------------------------------------------
+async def _get_json(session: aiohttp.ClientSession, path: str, params: Optional[dict] = None):
+    async with session.get(f"{API_BASE}{path}", params=params or {}, timeout=15) as r:
+        if r.status != 200:
+            raise RuntimeError(f"{path} returned HTTP {r.status}")
+        return await r.json()
+
+
+async def _fetch_oi_notional(session: aiohttp.ClientSession, candidates: List[str],
+                             last_prices: Dict[str, float]) -> Dict[str, float]:
+    sem = asyncio.Semaphore(cfg.REST_CONCURRENCY)
+    out: Dict[str, float] = {}
+
+    async def one(sym: str):
+        async with sem:
+            try:
+                j = await _get_json(session, "/fapi/v1/openInterest", {"symbol": sym})
+                oi = float(j.get("openInterest") or 0.0)
+                out[sym] = oi * float(last_prices.get(sym) or 0.0)
+            except Exception:
+                pass
+
+    await asyncio.gather(*(one(s) for s in candidates))
+    return out
+
+
+async def refresh_once(session: Optional[aiohttp.ClientSession] = None) -> Dict[str, Any]:
+    """
+    Pull exchangeInfo + bulk 24h tickers (+ OI for top candidates), select the
+    universe and publish changes. On any fetch error the current universe is kept.
+    """
+    global _last_refresh
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession()
+    try:
+        info = await _get_json(session, "/fapi/v1/exchangeInfo")
+        tickers = await _get_json(session, "/fapi/v1/ticker/24hr")
+        if not isinstance(tickers, list):
+            raise RuntimeError("unexpected ticker/24hr payload")
+
+        oi_map: Dict[str, float] = {}
+        n_candidates = int(cfg.UNIVERSE_OI_CANDIDATES or 0)
+        if n_candidates > 0:
+            ranked = sorted(
+                (t for t in tickers if t.get("symbol")),
+                key=lambda t: float(t.get("quoteVolume") or 0.0),
+                reverse=True,
+            )[:n_candidates]
+            last_prices = {t["symbol"]: float(t.get("lastPrice") or 0.0) for t in ranked}
+            oi_map = await _fetch_oi_notional(session, list(last_prices), last_prices)
+
+        new_universe = select_universe(
+            info,
+            tickers,
+            oi_notional=oi_map,
+            top_n=cfg.UNIVERSE_TOP_N,
+            pinned=cfg.UNIVERSE_PINNED,
+            tier_sizes=_parse_tier_sizes(cfg.UNIVERSE_TIER_SIZES),
+            quote_asset=cfg.UNIVERSE_QUOTE_ASSET,
+        )
+        if not new_universe:
+            logger.warning("[universe] selection came back empty — keeping current universe")
+            return diff_universe(_universe, _universe)
+        _last_refresh = time.time()
+        return await apply(new_universe)
+    finally:
+        if own_session:
+            await session.close()
+
+
+async def universe_loop(interval: int = 900):
+    """Background refresher; a no-op loop when UNIVERSE_ENABLED is false."""
+    if not cfg.UNIVERSE_ENABLED:
+        logger.info("[universe] disabled — using static SYMBOLS as tier 1")
+        return
+    logger.info(f"[universe] refresher started (interval={interval}s, top_n={cfg.UNIVERSE_TOP_N})")
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                await refresh_once(session)
+            except asyncio.CancelledError:
+                logger.info("[universe] cancelled — stopping refresher")
+                raise
+            except Exception as e:
+                logger.warning(f"[universe] refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+
+__all__ = [
+    "TIER_SPECS", "seed", "seed_if_empty", "get_universe", "symbols", "tier_of", "spec_for",
+    "rest_interval", "quant_interval", "streams_by_symbol", "due_symbols", "next_due_in", "status",
+    "select_universe", "diff_universe", "subscribe", "apply", "refresh_once", "universe_loop",
+]
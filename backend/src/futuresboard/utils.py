@@ -180,10 +180,9 @@ def pct_change(a: Optional[float], b: Optional[float]) -> Optional[float]:
 def safe_corrcoef(a: List[float], b: List[float]) -> float:
     """Compute correlation safely without NaNs or zero division."""
     import numpy as np
-    a, b = list(a), list(b)
-    if len(a) != len(b) or not a:
+    arr_a, arr_b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    if len(arr_a) != len(arr_b) or not len(arr_a):
         return 0.0
-    arr_a, arr_b = np.array(a, dtype=float), np.array(b, dtype=float)
     mask = np.isfinite(arr_a) & np.isfinite(arr_b)
     if not mask.any():
         return 0.0
@@ -203,12 +202,78 @@ def zscore(series: List[float]) -> List[Optional[float]]:
     return [(x - mu) / sigma if x is not None and sigma > 0 else None for x in series]
 
 
+def last_or_none(arr) -> Optional[float]:
+    """Last element of a float array as a Python float (None when empty or NaN)."""
+    if arr is None or not len(arr):
+        return None
+    v = float(arr[-1])
+    return None if v != v else v
+
+
+def zscore_last(arr) -> Optional[float]:
+    """z-score of the last element against the finite values of a float array (zscore(...)[-1])."""
+    import numpy as np
+    arr = np.asarray(arr, dtype=float)
+    clean = arr[np.isfinite(arr)]
+    if len(clean) < 2 or not np.isfinite(arr[-1]) or clean.max() == clean.min():
+        return None  # constant series: float std would be rounding noise, not 0
+    sigma = clean.std()
+    return float((arr[-1] - clean.mean()) / sigma) if sigma > 0 else None
+
+
 def mean_or_none(values: List[Optional[float]]) -> Optional[float]:
     import statistics
     vs = [v for v in values if v is not None]
     return statistics.mean(vs) if vs else None
 
 
+def extract_book_top_volumes(parsed_raw: dict, top_n: int = 5):
+    if not parsed_raw:
+        return None, None
+    raw_field = parsed_raw.get("raw") if isinstance(parsed_raw, dict) else parsed_raw
+    if raw_field is None:
+        raw_field = parsed_raw
+    if not isinstance(raw_field, dict):
+        return None, None
+
+    bids = None
+    asks = None
+    for k in ("bids", "b", "bid"):
+        if k in raw_field:
+            bids = raw_field[k]
+            break
+    for k in ("asks", "a", "ask"):
+        if k in raw_field:
+            asks = raw_field[k]
+            break
+
+    def sum_top(arr):
+        if not isinstance(arr, list):
+            return None
+        s = 0.0
+        n = 0
+        for i, item in enumerate(arr):
+            if i >= top_n:
+                break
+            try:
+                if isinstance(item, (list, tuple)) and len(item) >= 2:
+                    size = safe_float(item[1])
+                elif isinstance(item, dict) and ("size" in item or "volume" in item):
+                    size = safe_float(item.get("size") or item.get("volume"))
+                else:
+                    size = None
+                if size is not None:
+                    s += float(size)
+                    n += 1
+            except Exception:
+                continue
+        return s if n > 0 else None
+
+    bid_sum = sum_top(bids)
+    ask_sum = sum_top(asks)
+    return bid_sum, ask_sum
+
+
 # ==============================================================
 # 🕒 TIME HELPERS
 # ==============================================================
@@ -224,7 +289,7 @@ def iso_utc_now() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
 __all__ = [
-    "safe_float", "pct_change", "safe_corrcoef", "zscore", "mean_or_none",
+    "safe_float", "pct_change", "safe_corrcoef", "zscore", "mean_or_none", "extract_book_top_volumes",
     "send_public_request", "send_public_request_async",
     "hashing", "generate_signed_query",
     "utc_ts_ms", "iso_utc_now"
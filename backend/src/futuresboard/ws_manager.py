@@ -1,11 +1,14 @@
 """
 Production-ready Binance Futures WebSocket manager (aiohttp).
-Exports start_all(symbols, on_message_callback) and stop_all() for lifecycle control.
+Exports start_all(symbols, on_message_callback), reconfigure(streams_by_symbol)
+and stop_all() for lifecycle control.
 
 Behavior:
 - Groups streams into connections (max streams per conn).
 - Reconnects with exponential backoff.
 - Uses shared, cancellable tasks and single ClientSession per manager.
+- Per-symbol stream sets (universe tiers); symbols stay in their connection
+  group across reconfigure(), which restarts only the groups a symbol left or joined.
 - on_message_callback(payload: dict) should be async and lightweight (e.g., push to queue).
 """
 from __future__ import annotations
@@ -16,7 +19,7 @@ import random
 import aiohttp
 import pathlib
 import contextlib
-from typing import Callable, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional
 from .config import get_settings
 cfg = get_settings()
 
@@ -40,6 +43,10 @@ _manager_session: Optional[aiohttp.ClientSession] = None
 _manager_tasks: List[asyncio.Task] = []
 _manager_stop: Optional[asyncio.Event] = None
 _manager_symbols: List[str] = []
+_manager_callback: Optional[Callable[[dict], "asyncio.Future"]] = None
+_manager_max_per_conn: int = MAX_STREAMS_PER_CONN
+# stream-group key (tuple of tokens) -> connection task
+_manager_groups: Dict[tuple, asyncio.Task] = {}
 
 # ---------- helpers ----------
 def _norm_for_path(sym: str) -> str:
@@ -53,6 +60,114 @@ def _streams_for_symbol(sym: str, streams: Optional[Iterable[str]] = None) -> Li
     tokens = [f"{base}@{s}" for s in streams]
     return tokens
 
+def _group_tokens(all_tokens: List[str], max_per_conn: int) -> List[List[str]]:
+    groups: List[List[str]] = []
+    cur: List[str] = []
+    for tok in all_tokens:
+        if len(cur) >= max_per_conn:
+            groups.append(cur)
+            cur = []
+        cur.append(tok)
+    if cur:
+        groups.append(cur)
+    return groups
+
+def _tokens_by_symbol(symbols: List[str],
+                      streams: Optional[Iterable[str]],
+                      streams_by_symbol: Optional[Dict[str, Iterable[str]]]) -> Dict[str, List[str]]:
+    out: Dict[str, List[str]] = {}
+    for s in symbols:
+        sym_streams = streams
+        if streams_by_symbol:
+            sym_streams = streams_by_symbol.get(s.upper()) or streams_by_symbol.get(s) or streams
+        out[_norm_for_path(s)] = _streams_for_symbol(s, sym_streams)
+    return out
+
+def _assign_groups(current: List[List[str]],
+                   wanted: Dict[str, List[str]],
+                   max_per_conn: int) -> List[List[str]]:
+    """
+    Place each symbol's tokens in a connection group, keeping existing groups stable.
+    A symbol stays in its current group while its token list is unchanged, so adding,
+    removing or re-tiering a symbol only touches the group it leaves and the group it
+    joins. Newcomers fill groups that are restarting anyway first, then existing groups
+    with room, and only then open new groups. A symbol's tokens never straddle groups
+    unless it alone exceeds max_per_conn.
+    """
+    groups: List[List[str]] = []
+    changing: List[List[str]] = []  # groups that restart (or start) anyway
+    untouched: List[List[str]] = []
+    placed = set()
+    for grp in current:
+        members: Dict[str, List[str]] = {}
+        for tok in grp:
+            members.setdefault(tok.split("@", 1)[0], []).append(tok)
+        kept: List[str] = []
+        for base, toks in members.items():
+            if base not in placed and wanted.get(base) == toks:
+                kept.extend(toks)
+                placed.add(base)
+        if kept == grp:
+            kept = list(grp)
+            groups.append(kept)
+            untouched.append(kept)
+        elif kept:
+            groups.append(kept)
+            changing.append(kept)
+    for base, toks in wanted.items():
+        if base in placed or not toks:
+            continue
+        placed.add(base)
+        fits = lambda g: len(g) + len(toks) <= max_per_conn
+        target = next((g for g in changing if fits(g)), None)
+        if target is None:
+            target = next((g for g in untouched if fits(g)), None)
+            if target is not None:
+                untouched.remove(target)
+                changing.append(target)
+        if target is not None:
+            target.extend(toks)
+            continue
+        for chunk in _group_tokens(toks, max_per_conn):
+            groups.append(chunk)
+            changing.append(chunk)
+    return groups
+
+def _build_groups(symbols: List[str],
+                  streams: Optional[Iterable[str]],
+                  streams_by_symbol: Optional[Dict[str, Iterable[str]]],
+                  max_per_conn: int) -> List[List[str]]:
+    return _assign_groups([], _tokens_by_symbol(symbols, streams, streams_by_symbol), max_per_conn)
+
+# Binance event type → stream kind (ingest lane selection in ingest_queue.py)
+_EVENT_KINDS = {
+    "24hrTicker": "ticker",
+    "24hrMiniTicker": "ticker",
+    "markPriceUpdate": "markPrice",
+    "aggTrade": "trades",
+    "trade": "trades",
+    "depthUpdate": "depth",
+}
+
+
+def _stream_kind(stream_name: str, data: dict) -> Optional[str]:
+    kind = _EVENT_KINDS.get(data.get("e")) if isinstance(data, dict) else None
+    if kind:
+        return kind
+    name = (stream_name or "").split("@", 1)[-1]
+    if name.startswith("depth"):
+        return "depth"
+    if name.startswith("aggTrade") or name.startswith("trade"):
+        return "trades"
+    if name.startswith("markPrice"):
+        return "markPrice"
+    if name.startswith("openInterest"):
+        return "openInterest"
+    if "ticker" in name.lower():
+        return "ticker"
+    return None
+
+
 def _parse_raw_message(raw: str) -> Optional[dict]:
     try:
         j = json.loads(raw)
@@ -71,6 +186,7 @@ def _parse_raw_message(raw: str) -> Optional[dict]:
             out["symbol"] = symbol.replace("/", "").replace(":USDT", "").upper()
         ts = data.get("E") or data.get("T") or data.get("time")
         out["timestamp"] = ts
+        out["kind"] = _stream_kind(j.get("stream", ""), data)
         last = data.get("c") or data.get("last") or data.get("p") or data.get("markPrice")
         if last is not None:
             out["last"] = last
@@ -85,6 +201,7 @@ def _parse_raw_message(raw: str) -> Optional[dict]:
         return out
     if isinstance(j, dict):
         out["raw"] = j
+        out["kind"] = _stream_kind("", j)
         if "s" in j:
             out["symbol"] = j.get("s").replace("/", "").replace(":USDT", "").upper()
         if "c" in j:
@@ -151,11 +268,14 @@ async def _run_single_connection(session: aiohttp.ClientSession,
 async def start_all(symbols: Optional[List[str]] = None,
                     on_message_callback: Optional[Callable[[dict], "asyncio.Future"]] = None,
                     streams: Optional[Iterable[str]] = None,
-                    max_per_conn: int = MAX_STREAMS_PER_CONN):
+                    max_per_conn: int = MAX_STREAMS_PER_CONN,
+                    streams_by_symbol: Optional[Dict[str, Iterable[str]]] = None):
     """
     Start manager for provided symbols. If manager already running, this is a no-op.
+    `streams_by_symbol` overrides `streams` per symbol (universe tiers).
     """
     global _manager_session, _manager_tasks, _manager_stop, _manager_symbols
+    global _manager_callback, _manager_max_per_conn, _manager_groups
 
     async with _manager_lock:
         if _manager_tasks:
@@ -178,36 +298,73 @@ async def start_all(symbols: Optional[List[str]] = None,
 
         symbols = [s.strip() for s in symbols if s and s.strip()]
         _manager_symbols = symbols
+        _manager_callback = on_message_callback
+        _manager_max_per_conn = max_per_conn
 
         # build tokens and groups
-        all_tokens: List[str] = []
-        for s in symbols:
-            all_tokens.extend(_streams_for_symbol(s, streams))
-        groups: List[List[str]] = []
-        cur: List[str] = []
-        for tok in all_tokens:
-            if len(cur) >= max_per_conn:
-                groups.append(cur)
-                cur = []
-            cur.append(tok)
-        if cur:
-            groups.append(cur)
+        groups = _build_groups(symbols, streams, streams_by_symbol, max_per_conn)
 
         logger.info(f"[ws_manager] creating {len(groups)} connections for {len(symbols)} symbols: {symbols}")
 
         _manager_stop = asyncio.Event()
         _manager_session = aiohttp.ClientSession()
-        _manager_tasks = [
-            asyncio.create_task(_run_single_connection(_manager_session, grp, on_message_callback, _manager_stop))
+        _manager_groups = {
+            tuple(grp): asyncio.create_task(_run_single_connection(_manager_session, grp, on_message_callback, _manager_stop))
             for grp in groups
-        ]
+        }
+        _manager_tasks = list(_manager_groups.values())
         logger.info("[ws_manager] started (tasks created)")
 
+async def reconfigure(streams_by_symbol: Dict[str, Iterable[str]]):
+    """
+    Switch the running manager to a new symbol → streams mapping.
+    Symbols keep their current connection group (see _assign_groups), so only the
+    groups a symbol leaves or joins are restarted; groups left empty are stopped.
+    Cancelled connections are awaited before returning.
+    """
+    global _manager_tasks, _manager_symbols, _manager_groups
+    async with _manager_lock:
+        if not _manager_tasks or _manager_session is None or _manager_stop is None:
+            logger.info("[ws_manager] reconfigure skipped — manager not running")
+            return
+        symbols = list(streams_by_symbol.keys())
+        groups = _assign_groups([list(k) for k in _manager_groups],
+                                _tokens_by_symbol(symbols, None, streams_by_symbol),
+                                _manager_max_per_conn)
+        wanted = [tuple(g) for g in groups]
+
+        keep = set(wanted)
+        stale = [k for k in _manager_groups if k not in keep]
+        cancelled = [_manager_groups.pop(key) for key in stale]
+        for task in cancelled:
+            task.cancel()
+        await asyncio.gather(*cancelled, return_exceptions=True)
+
+        started = 0
+        for key in wanted:
+            if key not in _manager_groups:
+                _manager_groups[key] = asyncio.create_task(
+                    _run_single_connection(_manager_session, list(key), _manager_callback, _manager_stop)
+                )
+                started += 1
+
+        _manager_tasks = list(_manager_groups.values())
+        _manager_symbols = symbols
+        logger.info(
+            f"[ws_manager] reconfigured: {len(symbols)} symbols, "
+            f"{len(_manager_groups)} connections (+{started} started, -{len(stale)} stopped)"
+        )
+
+async def on_universe_change(change: Dict[str, Any]):
+    """universe subscriber: re-group streams for the new symbol tiers."""
+    from . import universe
+    await reconfigure(universe.streams_by_symbol())
+
 async def stop_all(timeout: float = 1.0):
     """
     Stop all manager tasks and close HTTP session.
     """
-    global _manager_session, _manager_tasks, _manager_stop
+    global _manager_session, _manager_tasks, _manager_stop, _manager_groups
     async with _manager_lock:
         if not _manager_tasks:
             logger.info("[ws_manager] stop_all called — no active tasks")
@@ -223,6 +380,7 @@ async def stop_all(timeout: float = 1.0):
         # ensure gather to suppress exceptions
         await asyncio.gather(*_manager_tasks, return_exceptions=True)
         _manager_tasks = []
+        _manager_groups = {}
         # close session
         if _manager_session:
             await _manager_session.close()
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard import archive
+
+
+def test_boundary_stops_at_gap_and_hot_window():
+    now = datetime(2026, 3, 20, 12, tzinfo=timezone.utc)
+    days = [date(2026, 3, 1) + timedelta(days=i) for i in range(5)] + [date(2026, 3, 8)]
+    # contiguous run ends 03-05 → PG from 03-06
+    assert archive.boundary("t", now, days=days) == datetime(2026, 3, 6, tzinfo=timezone.utc)
+    # hot window (7 days before today) caps it
+    recent = [date(2026, 3, 10) + timedelta(days=i) for i in range(10)]
+    assert archive.boundary("t", now, days=recent) == datetime(2026, 3, 13, tzinfo=timezone.utc)
+    assert archive.boundary("t", now, days=[date(2026, 3, 19)]) is None
+    assert archive.boundary("t", now, days=[]) is None
+
+
+def test_parquet_roundtrip_with_pushdown(tmp_path, monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    monkeypatch.setattr(archive.cfg, "ARCHIVE_ENABLED", True, raising=False)
+    monkeypatch.setattr(archive.cfg, "ARCHIVE_DIR", str(tmp_path), raising=False)
+    monkeypatch.setattr(archive.cfg, "ARCHIVE_TABLES", "quant_regimes", raising=False)
+    kinds = {"symbol": "text", "ts": "ts", "regime": "text", "confidence": "float", "raw_json": "json"}
+    schema = pa.schema([(c, archive._arrow_type(k)) for c, k in kinds.items()])
+    t0 = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    rows = [(s, t0 + timedelta(minutes=i), "trend", i / 10, {"i": i}) for s in ("BTCUSDT", "ETHUSDT") for i in range(10)]
+    path = archive.file_path("quant_regimes", t0.date())
+    path.parent.mkdir(parents=True)
+    pq.write_table(archive.to_arrow(schema, kinds, rows), str(path), row_group_size=5)
+
+    got = asyncio.run(archive.read("quant_regimes", t0 + timedelta(minutes=3), t0 + timedelta(minutes=6),
+                                   symbol="ETHUSDT", columns=["ts", "confidence", "raw_json"]))
+    assert [r["confidence"] for r in got] == [0.3, 0.4, 0.5]
+    assert got[0]["raw_json"] == '{"i":3}' and set(got[0]) == {"ts", "confidence", "raw_json"}
+    tail = asyncio.run(archive.read("quant_regimes", symbol="BTCUSDT", limit=2, descending=True))
+    assert [r["ts"] for r in tail] == [t0 + timedelta(minutes=9), t0 + timedelta(minutes=8)]
+
+
+def test_export_skips_empty_days_without_files(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+    from futuresboard import db
+
+    monkeypatch.setattr(archive.cfg, "ARCHIVE_DIR", str(tmp_path), raising=False)
+    monkeypatch.setattr(archive.cfg, "ARCHIVE_RETENTION_DAYS", 0, raising=False)
+    monkeypatch.setattr(archive.cfg, "ARCHIVE_MAX_DAYS_PER_PASS", 7, raising=False)
+    rows = [datetime(1970, 1, 1, tzinfo=timezone.utc)]  # stray epoch row
+    rows += [datetime(2026, 3, d, 5, tzinfo=timezone.utc) for d in (1, 2, 5)]
+
+    class Conn:
+        async def fetchval(self, sql, lo):
+            return min((t for t in rows if t >= lo), default=None)
+
+    async def fake_export(conn, table, day):
+        archive.file_path(table, day).parent.mkdir(parents=True, exist_ok=True)
+        archive.file_path(table, day).touch()
+        return sum(1 for t in rows if t.date() == day)
+
+    async def fake_columns(table):
+        return {"ts": SimpleNamespace(name="ts", kind="ts")}
+
+    monkeypatch.setattr(archive, "export_day", fake_export)
+    monkeypatch.setattr(db, "table_columns", fake_columns)
+    now = datetime(2026, 3, 7, 12, tzinfo=timezone.utc)
+    out = asyncio.run(archive.archive_table(Conn(), "quant_regimes", now))
+    assert out["exported"] == 4 and out["rows"] == 4
+    assert archive.archived_days("quant_regimes") == [date(1970, 1, 1), date(2026, 3, 1), date(2026, 3, 2), date(2026, 3, 5)]
+    # the gaps are markers, not ~20k empty Parquet files; they keep the run contiguous
+    spans = archive.empty_spans("quant_regimes")
+    assert spans == [(date(1970, 1, 2), date(2026, 2, 28)), (date(2026, 3, 3), date(2026, 3, 4)),
+                     (date(2026, 3, 6), date(2026, 3, 6))]
+    assert archive.contiguous_end(archive.archived_days("quant_regimes"), spans) == date(2026, 3, 6)
+
+    # a quiet day extends the trailing marker instead of adding one per day
+    asyncio.run(archive.archive_table(Conn(), "quant_regimes", now + timedelta(days=1)))
+    asyncio.run(archive.archive_table(Conn(), "quant_regimes", now + timedelta(days=2)))
+    assert archive.empty_spans("quant_regimes")[-1] == (date(2026, 3, 6), date(2026, 3, 8))
+    assert len(archive.empty_spans("quant_regimes")) == 3
+
+    # a fresh archive never starts before the retention window
+    monkeypatch.setattr(archive.cfg, "ARCHIVE_DIR", str(tmp_path / "fresh"), raising=False)
+    monkeypatch.setattr(archive.cfg, "ARCHIVE_RETENTION_DAYS", 4, raising=False)
+    asyncio.run(archive.archive_table(Conn(), "quant_regimes", now))
+    assert archive.archived_days("quant_regimes") == [date(2026, 3, 5)]
@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard import blobstore
+
+
+def test_encode_decode_roundtrip():
+    text = '{"raw": {"b": [[1, 2]], "a": [[1, 3]]}}' * 20
+    codec, blob = blobstore.encode(text)
+    assert len(blob) < len(text)
+    assert blobstore.decode(codec, blob) == text
+
+
+def test_sampling_is_deterministic():
+    keys = [("BTCUSDT", f"2026-01-01T00:00:{i:02d}") for i in range(60)]
+    first = [blobstore.sampled(s, t, rate=0.5) for s, t in keys]
+    assert first == [blobstore.sampled(s, t, rate=0.5) for s, t in keys]
+    assert 0 < sum(first) < len(keys)
+    assert all(blobstore.sampled(s, t, rate=1.0) for s, t in keys)
+    assert not any(blobstore.sampled(s, t, rate=0.0) for s, t in keys)
+
+
+def test_disk_append_and_read(tmp_path):
+    blobstore._dir = tmp_path
+    try:
+        refs = blobstore.disk_append([blobstore.encode('{"i": %d}' % i) for i in range(3)])
+        assert [blobstore.disk_read(r) for r in refs] == ['{"i": 0}', '{"i": 1}', '{"i": 2}']
+        assert blobstore.prune_disk(days=0) == []
+    finally:
+        if blobstore._writer is not None:
+            blobstore._writer.close()
+        blobstore._writer, blobstore._writer_name, blobstore._dir = None, "", None
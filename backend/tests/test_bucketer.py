@@ -0,0 +1,70 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard.bucketer import TickBucketer, parse_resolution
+
+
+def _tick(sym, ts, price, **raw):
+    return {"symbol": sym, "Price": price, "raw": {"timestamp": int(ts * 1000), **raw}}
+
+
+def test_parse_resolution():
+    assert parse_resolution("1s") == 1
+    assert parse_resolution("5s") == 5
+    assert parse_resolution("1m") == 60
+    assert parse_resolution("off") is None
+    assert parse_resolution("0") is None
+
+
+def test_one_bar_per_symbol_per_bucket():
+    b = TickBucketer(5, grace=0.5)
+    t0 = 1_700_000_000  # multiple of 5
+    out = []
+    for i, p in enumerate([10.0, 12.0, 9.0, 11.0]):
+        out += b.add(_tick("BTCUSDT", t0 + i, p, raw={"e": "aggTrade", "m": i % 2 == 1}))
+    out += b.add(_tick("ETHUSDT", t0 + 1, 2.0))
+    assert out == []
+
+    # a tick for the next bucket closes the previous BTC bar
+    out = b.add(_tick("BTCUSDT", t0 + 6, 13.0))
+    assert len(out) == 1
+    bar = out[0]
+    assert (bar["price_open"], bar["price_high"], bar["price_low"], bar["Price"]) == (10.0, 12.0, 9.0, 11.0)
+    assert bar["tick_count"] == 4
+    assert (bar["taker_buy_count"], bar["taker_sell_count"]) == (2, 2)
+    assert bar["updated_at"] == datetime.utcfromtimestamp(t0)
+
+    # the clock closes the idle ETH bar; the open BTC bar (t0+5) is not due yet
+    due = b.close_due(now=t0 + 5.5)
+    assert [r["symbol"] for r in due] == ["ETHUSDT"]
+
+    # late tick for the emitted ETH bucket is folded forward, never re-emitted
+    b.add(_tick("ETHUSDT", t0 + 2, 3.0))
+    rest = b.drain()
+    eth = [r for r in rest if r["symbol"] == "ETHUSDT"][0]
+    assert eth["updated_at"] == datetime.utcfromtimestamp(t0 + 5)
+    assert b.late == 1
+
+
+
+def test_bucketed_batch_lag_counts_from_bar_close():
+    # 5 ticks/s for one 5s bucket: the oldest tick is 5s old when the bar closes, which
+    # must not read as writer lag against SPILL_LAG_THRESHOLD (5s by default)
+    from futuresboard.app import _batch_lag
+
+    b = TickBucketer(5, grace=0.5)
+    t0 = 1_700_000_000
+    ticks = [{**_tick("BTCUSDT", t0 + i / 5, 10.0), "recv_ts": t0 + i / 5} for i in range(25)]
+    for t in ticks:
+        assert b.add(t) == []
+    bars = b.close_due(now=t0 + 5.5)
+    assert len(bars) == 1 and bars[0]["close_ts"] == t0 + 5
+    assert _batch_lag(bars, now=t0 + 5.6) == pytest.approx(0.6)
+    assert _batch_lag(ticks, now=t0 + 5.6) == pytest.approx(5.6)  # raw ticks keep recv_ts
+    # a writer that falls behind still shows up
+    assert _batch_lag(bars, now=t0 + 12) == pytest.approx(7.0)
@@ -0,0 +1,136 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard.db import BULK_SPECS, _prepare_records, columns_from_catalog, prepare_bulk_records
+
+
+def test_prepare_bulk_records_coerces_and_rejects():
+    rows = [
+        {"symbol": "BTCUSDT", "ts": "2024-01-01T00:00:00", "family": "oi",
+         "score": "0.5", "confidence": float("nan"), "diagnostics_ref": 7.0, "raw_json": {"a": 1}},
+        {"symbol": None, "family": "oi", "score": 1.0},          # missing symbol
+        {"symbol": "ETHUSDT", "family": "oi", "score": "n/a"},   # non-numeric score
+    ]
+    records, rejected = prepare_bulk_records("quant_signals", rows)
+    assert len(records) == 1 and len(rejected) == 2
+
+    rec = dict(zip([c.name for c in BULK_SPECS["quant_signals"]], records[0]))
+    assert rec["ts"] == datetime(2024, 1, 1)
+    assert rec["score"] == 0.5 and rec["confidence"] is None
+    assert rec["diagnostics_ref"] == 7 and isinstance(rec["diagnostics_ref"], int)
+    assert rec["raw_json"] == {"a": 1}
+
+
+def test_missing_ts_defaults_to_now():
+    records, rejected = prepare_bulk_records("quant_regimes", [{"symbol": "BTCUSDT", "regime": "trend"}])
+    assert not rejected
+    assert isinstance(records[0][1], datetime)
+
+
+def test_catalog_types_drive_insert_batch_coercion():
+    cols = columns_from_catalog([
+        ("ts", "timestamptz"), ("local_ts", "timestamp"), ("symbol", "text"),
+        ("trades", "int4"), ("close", "float8"), ("metadata", "jsonb"), ("flag", "bool"),
+    ])
+    assert cols["trades"].kind == "int" and cols["metadata"].kind == "json"
+    spec = list(cols.values())
+    aware = datetime(2024, 1, 1, 2, tzinfo=timezone(timedelta(hours=2)))
+    records, rejected = _prepare_records(spec, [{
+        "ts": "2024-01-01T00:00:00+00:00", "local_ts": aware, "symbol": "2024-01-01",
+        "trades": "12", "close": 1, "metadata": {"raw": 1}, "flag": "true",
+    }])
+    assert not rejected
+    ts, local_ts, symbol, trades, close, metadata, flag = records[0]
+    assert ts.tzinfo is not None and local_ts == datetime(2024, 1, 1)
+    # text columns are never parsed as timestamps
+    assert symbol == "2024-01-01"
+    assert (trades, close, flag) == (12, 1.0, True)
+    assert metadata == {"raw": 1}
+
+
+def test_latest_rows_keeps_newest_per_key():
+    from futuresboard.db import latest_rows
+    cols = ["id", "symbol", "ts", "family", "score"]
+    t0 = datetime(2024, 1, 1)
+    records = [
+        (1, "BTCUSDT", t0, "momentum", 0.1),
+        (2, "BTCUSDT", t0 + timedelta(seconds=5), "momentum", 0.2),
+        (3, "BTCUSDT", t0, "momentum", 0.3),          # older than id 2 → ignored
+        (4, "BTCUSDT", t0, "exhaustion", 0.4),
+        (5, "ETHUSDT", t0, None, 0.5),                # NULL key → never upserted
+    ]
+    out = {(r[1], r[3]): r[0] for r in latest_rows("quant_signals", cols, records)}
+    assert out == {("BTCUSDT", "momentum"): 2, ("BTCUSDT", "exhaustion"): 4}
+
+
+def test_latest_table_sql_keys():
+    from futuresboard.db import latest_table_sql
+    sql = latest_table_sql("quant_signals")
+    assert "quant_signals_latest" in sql and "PRIMARY KEY (symbol, family)" in sql
+    assert "id BIGINT" in sql and "raw_json JSONB" in sql
+
+
+def test_metric_rows_fold_into_one_row_per_bucket():
+    from futuresboard.db import bucket_metric_records, metrics_upsert_sql
+
+    cols = ["symbol", "timeframe", "price", "funding", "price_open", "price_high", "price_low", "updated_at", "raw_json"]
+    t = datetime(2026, 1, 1, 0, 0, 10)
+    records = [
+        ("BTCUSDT", "1m", 100.0, None, 100.0, 101.0, 99.0, t, {"raw": 1}),                    # WS
+        ("BTCUSDT", "1m", None, 0.01, None, None, None, t + timedelta(seconds=20), {"rest": 2}),  # REST
+        ("BTCUSDT", "1m", 102.0, None, 101.5, 103.0, 98.5, t + timedelta(seconds=40), {"raw": 3}),
+        ("BTCUSDT", "1m", 104.0, None, None, None, None, t + timedelta(seconds=55), None),
+    ]
+    out = bucket_metric_records(cols, records, resolution=60)
+    assert len(out) == 2
+    first = dict(zip(cols, out[0]))
+    assert first["updated_at"] == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert (first["price"], first["funding"]) == (102.0, 0.01)
+    assert (first["price_open"], first["price_high"], first["price_low"]) == (100.0, 103.0, 98.5)
+    assert first["raw_json"] == {"raw": 3, "rest": 2}
+    assert dict(zip(cols, out[1]))["updated_at"] == datetime(2026, 1, 1, 0, 1, tzinfo=timezone.utc)
+
+    sql = metrics_upsert_sql(cols)
+    assert "ON CONFLICT (symbol, timeframe, updated_at) DO UPDATE" in sql
+    assert "price_high = GREATEST(metrics.price_high, EXCLUDED.price_high)" in sql
+    assert "updated_at =" not in sql
+
+
+def test_rest_row_and_ws_bar_merge_into_one_bucket(monkeypatch):
+    from futuresboard import db
+    monkeypatch.setattr(db.cfg, "METRICS_BUCKET", "5s", raising=False)
+    monkeypatch.setattr(db.cfg, "METRICS_UPSERT_BUCKET", "", raising=False)
+    cols = ["symbol", "timeframe", "price", "funding", "price_open", "price_high", "price_low",
+            "tick_count", "updated_at", "raw_json"]
+    t = datetime(2026, 1, 1, 0, 0, 10, tzinfo=timezone.utc)
+    ws_bar = ("BTCUSDT", "5s", 100.0, None, 99.0, 101.0, 98.0, 12, t, {"ws": 1})
+    rest = ("BTCUSDT", "1m", None, 0.01, None, None, None, None, t + timedelta(seconds=3), {"rest": 2})
+    out = db.bucket_metric_records(cols, [ws_bar, rest])
+    assert len(out) == 1
+    row = dict(zip(cols, out[0]))
+    assert (row["timeframe"], row["updated_at"]) == ("5s", t)
+    assert (row["price"], row["funding"], row["price_open"], row["tick_count"]) == (100.0, 0.01, 99.0, 12)
+    assert row["raw_json"] == {"ws": 1, "rest": 2}
+    assert "tick_count = CASE WHEN EXCLUDED.tick_count IS NULL" in db.metrics_upsert_sql(cols)
+
+
+def test_replayed_bar_counts_are_added_once():
+    from futuresboard import db
+    cols = ["symbol", "timeframe", "tick_count", "last_bar_at", "updated_at", "raw_json"]
+    t = datetime(2026, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+    b1 = ("BTCUSDT", "5s", 10, t, t, None)
+    b2 = ("BTCUSDT", "5s", 7, t + timedelta(seconds=5), t + timedelta(seconds=5), None)
+    rest = ("BTCUSDT", "1m", None, None, t + timedelta(seconds=3), {"rest": 1})
+    # the same bar twice in one batch (spill replay) folds to one count
+    out = db.bucket_metric_records(cols, [b1, rest, b1], resolution=60)
+    assert len(out) == 1 and dict(zip(cols, out[0]))["tick_count"] == 10
+    # distinct bars of one bucket stay separate upserts, each checked against last_bar_at
+    out = db.bucket_metric_records(cols, [b1, b2], resolution=60)
+    assert [dict(zip(cols, r))["tick_count"] for r in out] == [10, 7]
+    assert db.merge_metric_rows(cols, b2, b1)[2] == 7
+    sql = db.metrics_upsert_sql(cols)
+    assert "WHEN COALESCE(EXCLUDED.last_bar_at > metrics.last_bar_at, TRUE) THEN metrics.tick_count + EXCLUDED.tick_count" in sql
+    assert "last_bar_at = GREATEST(metrics.last_bar_at, EXCLUDED.last_bar_at)" in sql
@@ -0,0 +1,40 @@
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard import changefeed
+
+
+def test_encode_decode_and_symbol_cap():
+    ts = datetime(2026, 1, 1, 0, 0, 5)
+    change = changefeed.decode(changefeed.encode("quant_signals", ["ETHUSDT", "BTCUSDT", None], ts))
+    assert change == ("quant_signals", frozenset({"BTCUSDT", "ETHUSDT"}), ts.isoformat())
+
+    many = [f"SYM{i:04d}USDT" for i in range(changefeed.MAX_SYMBOLS + 1)]
+    payload = changefeed.encode("quant_signals", many)
+    assert len(payload.encode()) < 8000
+    assert changefeed.decode(payload).symbols is None
+    assert changefeed.decode("not json") is None
+
+
+def test_subscription_wakes_on_upstream_change():
+    async def run():
+        debounce, changefeed.cfg.CHANGEFEED_DEBOUNCE_S = changefeed.cfg.CHANGEFEED_DEBOUNCE_S, 0
+        sub = changefeed.subscribe(["quant_regimes"], "test")
+        try:
+            assert await changefeed.wait(sub, 0.01) == {}
+            changefeed.dispatch(changefeed.encode("quant_signals", ["BTCUSDT"]))
+            changefeed.dispatch(changefeed.encode("quant_regimes", ["BTCUSDT"]))
+            changefeed.dispatch(changefeed.encode("quant_regimes", ["ETHUSDT"]))
+            got = await asyncio.wait_for(changefeed.wait(sub, 60), timeout=1)
+            assert got == {"quant_regimes": {"BTCUSDT", "ETHUSDT"}}
+            changefeed.dispatch(changefeed.encode("quant_regimes", []))
+            assert await changefeed.wait(sub, 60) == {"quant_regimes": None}
+        finally:
+            changefeed.unsubscribe(sub)
+            changefeed.cfg.CHANGEFEED_DEBOUNCE_S = debounce
+
+    asyncio.run(run())
@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard import changes
+
+
+def test_rows_persist_only_on_change_or_heartbeat(monkeypatch):
+    monkeypatch.setattr(changes.cfg, "CHANGE_HEARTBEAT_S", 300, raising=False)
+    changes.forget()
+    cols = ["symbol", "ts", "family", "score", "confidence", "raw_json"]
+
+    def tick(score, now, family="momentum"):
+        rows = [{"symbol": "BTCUSDT", "family": family, "score": score, "confidence": 0.5,
+                 "ts": now, "raw_json": {"t": now}}]
+        kept = changes.select("quant_signals", rows, now=now, columns=cols)
+        changes.commit("quant_signals", kept, now=now, columns=cols)
+        return len(kept)
+
+    assert tick(0.300, 0) == 1                  # first row per key
+    assert tick(0.305, 60) == 0                 # within 0.01, ts/raw_json ignored
+    assert tick(0.309, 120) == 0                # still compared with the stored 0.300
+    assert tick(0.311, 180) == 1                # drift accumulates past tolerance
+    assert tick(0.311, 240, "exhaustion") == 1  # other family is its own key
+    assert tick(0.311, 479) == 0
+    assert tick(0.311, 480) == 1                # heartbeat
+    assert tick(None, 540) == 1                 # value disappearing is a change
+
+
+def test_text_exact_and_tolerance_overrides(monkeypatch):
+    monkeypatch.setattr(changes.cfg, "CHANGE_TOLERANCES", "quant_regimes.volatility=5%", raising=False)
+    assert changes.parse_tolerance("0.01|1%") == changes.Tolerance(0.01, 0.01)
+    old = {"symbol": "BTCUSDT", "regime": "trend", "volatility": 1.00, "confidence": float("nan")}
+    assert not changes.differs("quant_regimes", old, {**old, "volatility": 1.04, "confidence": None})
+    assert changes.differs("quant_regimes", old, {**old, "volatility": 1.06})
+    assert changes.differs("quant_regimes", old, {**old, "regime": "range"})
+
+
+def test_rows_dropped_by_the_writer_are_not_committed(monkeypatch):
+    import asyncio
+    from futuresboard import db
+
+    monkeypatch.setattr(changes.cfg, "CHANGE_ONLY_ENABLED", True, raising=False)
+    changes.forget()
+    loaded = []
+
+    async def load(table, spec, rows, tag):
+        loaded.append([r["symbol"] for r in rows])
+        return [r for r in rows if r["symbol"] != "ETHUSDT"]  # the server refused ETH
+
+    monkeypatch.setattr(db, "_bulk_load", load)
+    rows = [{"symbol": s, "regime": "trend", "confidence": 0.5} for s in ("BTCUSDT", "ETHUSDT")]
+    assert asyncio.run(db.bulk_write("quant_regimes", [dict(r) for r in rows])) == 1
+    asyncio.run(db.bulk_write("quant_regimes", [dict(r) for r in rows]))
+    assert loaded == [["BTCUSDT", "ETHUSDT"], ["ETHUSDT"]]  # unchanged BTC skipped, ETH retried
+    changes.forget()
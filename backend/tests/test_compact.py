@@ -0,0 +1,47 @@
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard import compact, db
+
+
+def test_family_mask_roundtrip():
+    flags = {"accumulation": True, "distribution": False, "momentum": True,
+             "exhaustion": False, "orderflow": False, "divergence": True}
+    mask = compact.family_mask(flags)
+    assert mask == 0b100101
+    assert compact.family_flags(mask) == flags
+    assert compact.family_mask(None) is None and compact.family_flags(None)["momentum"] is False
+
+
+def test_signal_rows_widen_to_one_row_per_tick():
+    t0 = datetime(2026, 1, 1)
+    rows = [{"symbol": "BTCUSDT", "ts": t0, "family": f, "score": i / 10, "confidence": 0.8,
+             "diagnostics_ref": 7, "raw_json": {"diag": {}}} for i, f in enumerate(compact.FAMILIES)]
+    rows.append({"symbol": "BTCUSDT", "ts": t0, "family": "unknown", "score": 1.0})
+    rows.append({"symbol": "ETHUSDT", "ts": t0, "family": "momentum", "score": 0.2, "confidence": 0.0})
+    wide = compact.widen_signals(rows, raw=False)
+    assert len(wide) == 2
+    btc = wide[0]
+    assert btc["diagnostics_ref"] == 7 and btc["raw_json"] is None
+    assert btc["momentum_score"] == 0.2 and btc["divergence_conf"] == 0.8
+    assert wide[1]["momentum_score"] == 0.2 and "accumulation_score" not in wide[1]
+
+    records, rejected = db.prepare_bulk_records("quant_signals_wide", wide)
+    assert not rejected and len(records[0]) == 3 + 2 * len(compact.FAMILIES) + 1
+
+
+def test_compact_sql_and_layout_switch(monkeypatch):
+    alter = compact.features_alter_sql()
+    assert "ALTER COLUMN zsc TYPE REAL" in alter and "ALTER COLUMN price TYPE" not in alter
+    assert "RENAME COLUMN families TO family_mask" in alter
+    view = compact.signals_view_sql("quant_signals", "quant_signals_wide")
+    assert all(f"w.{f}_score" in view for f in compact.FAMILIES)
+    assert "'divergence', (family_mask & 32) <> 0" in compact.features_v1_view_sql(["id", "family_mask"])
+
+    assert "families" in [c.name for c in db.bulk_spec("quant_features_5s")]
+    monkeypatch.setattr(db, "_COMPACT", {"quant_features_5s"})
+    names = [c.name for c in db.bulk_spec("quant_features_5s")]
+    assert "family_mask" in names and "families" not in names
@@ -0,0 +1,52 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard.ingest_queue import LaneQueue, lane_for
+
+
+def _item(kind, n=0):
+    return {"symbol": "BTCUSDT", "kind": kind, "n": n}
+
+
+def test_lane_for_kinds():
+    assert lane_for(_item("ticker")) == "rest"
+    assert lane_for(_item("markPrice")) == "mark"
+    assert lane_for(_item("trades")) == "trades"
+    assert lane_for(_item("depth")) == "depth"
+    assert lane_for({"symbol": "X"}) == "mark"
+
+
+def test_shedding_starts_in_lowest_lane():
+    q = LaneQueue(maxsize=4, shares=[1, 1, 1, 1])
+    for i in range(3):
+        q.put_nowait(_item("depth", i))
+    q.put_nowait(_item("trades"))
+    # full: a ticker row evicts the oldest depth frame, not the trade
+    q.put_nowait(_item("ticker"))
+    assert q.qsize() == 4
+    assert q.counters["depth"]["shed"] == 1
+    assert q.counters["trades"]["shed"] == 0
+
+    # full of higher lanes only → an incoming depth frame is rejected
+    q2 = LaneQueue(maxsize=2, shares=[1, 1, 1, 1])
+    q2.put_nowait(_item("ticker"))
+    q2.put_nowait(_item("markPrice"))
+    with pytest.raises(asyncio.QueueFull):
+        q2.put_nowait(_item("depth"))
+    assert q2.counters["depth"]["rejected"] == 1
+
+
+def test_weighted_draining_prefers_high_lanes_without_starving():
+    q = LaneQueue(maxsize=100, weights=[3, 1, 1, 1], shares=[1, 1, 1, 1])
+    for i in range(8):
+        q.put_nowait(_item("ticker", i))
+        q.put_nowait(_item("depth", i))
+    first = [lane_for(q.get_nowait()) for _ in range(8)]
+    assert first.count("rest") == 6 and first.count("depth") == 2
+    # FIFO within a lane
+    assert [q.get_nowait()["n"] for _ in range(8)][-1] == 7
@@ -0,0 +1,24 @@
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard import jsoncodec
+
+
+def test_jsonb_binary_roundtrip_sanitises():
+    value = {"a": float("nan"), "b": [1.5, float("inf")], "ts": datetime(2026, 1, 1), "n": np.float64(2.0)}
+    data = jsoncodec.encode_jsonb(value)
+    assert data[:1] == b"\x01"
+    assert jsoncodec.decode_jsonb(data) == {"a": None, "b": [1.5, None], "ts": "2026-01-01T00:00:00", "n": 2.0}
+    assert jsoncodec.decode_json(jsoncodec.encode_json([1, None])) == [1, None]
+
+
+def test_strings_are_json_values_raw_text_is_opt_in():
+    assert jsoncodec.decode_jsonb(jsoncodec.encode_jsonb('{"x": 1}')) == '{"x": 1}'
+    assert jsoncodec.decode_json(jsoncodec.encode_json("NaN")) == "NaN"
+    assert jsoncodec.encode_jsonb(jsoncodec.JSONText('{"x": 1}')) == b'\x01{"x": 1}'
+    assert jsoncodec.loads(jsoncodec.dumps({"x": 1}, separators=(",", ":"))) == {"x": 1}
@@ -0,0 +1,39 @@
+import os
+import sys
+from datetime import date, datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard import timeseries
+from futuresboard.partitions import expired, missing_days, parse_bound, partition_name
+
+
+def _utc(*a):
+    return datetime(*a, tzinfo=timezone.utc)
+
+
+def test_parse_bound():
+    lo, hi = parse_bound("FOR VALUES FROM ('2024-03-01 00:00:00+00') TO ('2024-03-02 00:00:00+00')")
+    assert (lo, hi) == (_utc(2024, 3, 1), _utc(2024, 3, 2))
+    assert parse_bound("FOR VALUES FROM (MINVALUE) TO ('2024-03-01 01:00:00+01')") == (None, _utc(2024, 3, 1))
+
+
+def test_premake_and_expiry():
+    parts = [
+        ("metrics_legacy", None, _utc(2024, 3, 2)),
+        (partition_name("metrics", date(2024, 3, 2)), _utc(2024, 3, 2), _utc(2024, 3, 3)),
+    ]
+    assert partition_name("metrics", date(2024, 3, 2)) == "metrics_p20240302"
+    # legacy range + 3/2 exist → only 3/3 and 3/4 are missing
+    assert missing_days(parts, date(2024, 3, 1), 3) == [date(2024, 3, 3), date(2024, 3, 4)]
+    # whole partitions only: a cutoff inside 3/2 drops the legacy range, not the 3/2 partition
+    assert expired(parts, _utc(2024, 3, 2, 12)) == ["metrics_legacy"]
+    assert expired(parts, _utc(2024, 3, 1)) == []
+
+
+def test_retention_policy_overrides(monkeypatch):
+    monkeypatch.setattr(timeseries.cfg, "DB_RETENTION_DAYS", "metrics=30, ticks=0,bad", raising=False)
+    monkeypatch.setenv("PRUNE_DAYS", "45")
+    assert timeseries.retention_days("metrics") == 30
+    assert timeseries.retention_days("ticks") == 0
+    assert timeseries.retention_days("quant_signals") == 45
@@ -0,0 +1,52 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard.pools import InstrumentedPool, WaitStats, replica_usable
+
+
+class _FakePool:
+    _closed = False
+
+    def __init__(self):
+        self.released = []
+
+    async def acquire(self, timeout=None):
+        await asyncio.sleep(0)
+        return "conn"
+
+    async def release(self, conn, timeout=None):
+        self.released.append(conn)
+
+
+def test_wait_stats_buckets():
+    w = WaitStats()
+    for s in (0.0005, 0.003, 0.2, 10.0):
+        w.observe(s)
+    snap = w.snapshot()
+    assert snap["acquires"] == 4 and snap["wait_max_ms"] == 10000.0
+    assert snap["wait_buckets"]["le_0.001"] == 1 and snap["wait_buckets"]["le_0.005"] == 1
+    assert snap["wait_buckets"]["le_0.5"] == 1 and snap["wait_buckets"]["inf"] == 1
+
+
+def test_instrumented_pool_times_both_acquire_forms():
+    raw = _FakePool()
+    pool = InstrumentedPool("read", raw)
+
+    async def run():
+        async with pool.acquire() as conn:
+            assert conn == "conn"
+        conn = await pool.acquire()
+        await pool.release(conn)
+
+    asyncio.run(run())
+    assert pool.waits.count == 2 and raw.released == ["conn", "conn"]
+    assert pool._closed is False  # delegated attribute
+
+
+def test_replica_usable():
+    assert replica_usable(0.5, 5.0)
+    assert not replica_usable(6.0, 5.0)
+    assert not replica_usable(None, 5.0)
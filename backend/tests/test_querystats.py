@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard.querystats import QueryStats, fingerprint, redact, render_prometheus, rows_from_status
+
+
+def test_fingerprint_collapses_literals_and_params():
+    a = fingerprint("SELECT * FROM metrics WHERE symbol = 'BTCUSDT' AND id IN (1, 2, 3) LIMIT 50")
+    b = fingerprint("select * from metrics\n WHERE symbol = 'ETHUSDT' AND id IN (7,8) LIMIT 5 -- hot")
+    assert a == "SELECT * FROM metrics WHERE symbol = ? AND id IN (?, ...) LIMIT ?"
+    assert b.lower() == a.lower()
+    assert fingerprint("SELECT $1, $2 FROM quant_features_5s") == "SELECT ?, ? FROM quant_features_5s"
+
+
+def test_redact_and_rows_from_status():
+    assert redact(["BTCUSDT", 1.5, None, [1, 2]]) == ["$1=<str:7>", "$2=<float>", "$3=null", "$4=<list:2>"]
+    assert rows_from_status("INSERT 0 5") == 5 and rows_from_status("COPY 120") == 120
+    assert rows_from_status("BEGIN") == 0
+
+
+def test_query_stats_histogram_and_slow_log():
+    st = QueryStats(max_fingerprints=1, slow_ms=100)
+    st.record("SELECT 1", 0.0005, rows=1)
+    st.record("SELECT 2", 0.2, rows=1, args=("secret",))
+    st.record("DELETE FROM ticks", 0.01, rows=9)   # over the fingerprint cap → <other>
+    snap = st.snapshot()
+    assert snap["fingerprints"] == 2
+    by_q = {t["query"]: t for t in snap["top"]}
+    assert by_q["SELECT ?"]["calls"] == 2 and by_q["<other>"]["rows"] == 9
+    assert len(snap["slow"]) == 1 and snap["slow"][0]["params"] == ["$1=<str:6>"]
+    text = render_prometheus([], st)
+    assert 'futuresboard_db_query_seconds_bucket' in text and 'le="+Inf"} 2' in text
@@ -0,0 +1,33 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard.rollups import ROLLUPS, choose_resolution, floor_ts, stat_columns, upsert_sql
+
+
+def test_choose_coarsest_resolution_meeting_point_count():
+    day = 86400
+    assert choose_resolution(day, 300) == "1m"        # 5m gives only 288 points
+    assert choose_resolution(day, 200) == "5m"
+    assert choose_resolution(30 * day, 300) == "1h"
+    assert choose_resolution(2 * 365 * day, 300) == "1d"
+    assert choose_resolution(600, 300) == "5s"        # 10 minutes → raw
+    # only available rollups are considered
+    assert choose_resolution(30 * day, 300, available=["1m"]) == "1m"
+
+
+def test_floor_and_cascade_sql():
+    ts = datetime(2024, 3, 1, 12, 34, 56, tzinfo=timezone.utc)
+    assert floor_ts(ts, 300) == datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc)
+    assert floor_ts(ts, 86400) == datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+    by_label = {r.label: r for r in ROLLUPS}
+    raw = upsert_sql(by_label["1m"])
+    assert "FROM quant_features_5s" in raw and "count(*)" in raw
+    cascade = upsert_sql(by_label["1h"])
+    # built from the 5m rollup with a count-weighted mean
+    assert "FROM quant_features_5m" in cascade
+    assert "sum(price_mean * price_n) / NULLIF(sum(price_n), 0)" in cascade
+    assert all(c in cascade for c in stat_columns(["zsc"]))
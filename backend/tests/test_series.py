@@ -0,0 +1,42 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard.db import records_to_arrays
+from futuresboard.utils import zscore, zscore_last
+
+
+def test_records_to_arrays_chronological_with_nan():
+    rows = [  # as selected: newest first
+        {"ts": 30.0, "price": 3.0, "raw_json": "{}"},
+        {"ts": 20.0, "price": None, "raw_json": None},
+        {"ts": 10.0, "price": 1.0, "raw_json": "{}"},
+    ]
+    out = records_to_arrays(rows, ["price", "raw_json"], numeric=["price"])
+    assert out["ts"].tolist() == [10.0, 20.0, 30.0]
+    assert out["price"].dtype == np.float64 and out["price"].flags["C_CONTIGUOUS"]
+    assert out["price"][0] == 1.0 and np.isnan(out["price"][1])
+    assert out["raw_json"].dtype == object and out["raw_json"][1] is None
+
+
+def test_zscore_last_matches_list_zscore():
+    values = [1.0, None, 4.0, 2.0, 7.0]
+    arr = np.array(values, dtype=np.float64)
+    assert abs(zscore_last(arr) - zscore(values)[-1]) < 1e-12
+    assert zscore_last(np.array([1.0, np.nan])) is None
+
+
+def test_split_by_symbol_keeps_every_requested_symbol():
+    from futuresboard.db import split_by_symbol
+    rows = [
+        {"symbol": "BTCUSDT", "ts": 2.0, "price": 2.0},
+        {"symbol": "BTCUSDT", "ts": 1.0, "price": 1.0},
+        {"symbol": "ETHUSDT", "ts": 1.0, "price": None},
+    ]
+    out = split_by_symbol(rows, ["BTCUSDT", "ETHUSDT", "SOLUSDT"], ["price"], ["price"])
+    assert out["BTCUSDT"]["price"].tolist() == [1.0, 2.0]
+    assert np.isnan(out["ETHUSDT"]["price"][0])
+    assert len(out["SOLUSDT"]["ts"]) == 0
@@ -0,0 +1,45 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard import db, snapshots
+
+
+def test_newest_rest_row_wins_and_warmup_keeps_live_rows(monkeypatch):
+    snapshots.clear()
+    t0 = datetime(2026, 3, 1, 12)
+    snapshots.publish_rest("btcusdt", {"symbol": "BTCUSDT", "ts": t0, "funding_rate": 0.01})
+    snapshots.publish_rest("BTCUSDT", {"symbol": "BTCUSDT", "ts": t0 - timedelta(minutes=1), "funding_rate": 0.5})
+    assert snapshots.get_rest("btcusdt")["funding_rate"] == 0.01  # older ts never overwrites
+    snapshots.publish_many([{"symbol": "BTCUSDT", "ts": t0 + timedelta(minutes=1), "funding_rate": 0.02}])
+    assert snapshots.get_rest("BTCUSDT")["funding_rate"] == 0.02
+    assert snapshots.get_rest("") is None and snapshots.get_rest("ETHUSDT") is None
+
+    async def latest(symbols=None):
+        return [{"symbol": "BTCUSDT", "ts": t0, "funding_rate": 9.0},
+                {"symbol": "ETHUSDT", "ts": t0, "funding_rate": 0.03}]
+
+    monkeypatch.setattr(db, "get_latest_rest_metrics_bulk", latest)
+    assert asyncio.run(snapshots.warm_from_db()) == 2
+    assert snapshots.get_rest("BTCUSDT")["funding_rate"] == 0.02  # live publish beats the DB copy
+    assert snapshots.get_rest("ETHUSDT")["funding_rate"] == 0.03
+    assert snapshots.status()["symbols"] == 2
+    snapshots.clear()
+    assert snapshots.status() == {"symbols": 0, "max_age_s": None}
+
+
+def test_published_snapshot_overlays_ws_row():
+    from futuresboard.app import _overlay_rest
+
+    snapshots.clear()
+    snapshots.publish_rest("SOLUSDT", {"symbol": "SOLUSDT", "funding_rate": 0.0001, "open_interest_hist_usd": None,
+                                       "global_long_short_ratio": 1.2, "mark_price": 150.0, "volume": 1e6})
+    row = _overlay_rest({"symbol": "SOLUSDT", "price": None, "oi_usd": 5e7, "raw_json": {"ws": 1}},
+                        snapshots.get_rest("SOLUSDT"))
+    assert (row["funding"], row["oi_usd"], row["global_ls_5m"], row["price"]) == (0.0001, 5e7, 1.2, 150.0)
+    assert row["raw_json"]["ws"] == 1 and row["raw_json"]["rest"]["symbol"] == "SOLUSDT"
+    assert _overlay_rest({"price": 1.0}, snapshots.get_rest("XRPUSDT")) == {"price": 1.0}
+    snapshots.clear()
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard import spill
+
+
+def _fresh(monkeypatch, tmp_path):
+    spill.close_log()
+    monkeypatch.setattr(spill.cfg, "SPILL_DIR", str(tmp_path))
+    monkeypatch.setattr(spill, "_writer", None)
+    monkeypatch.setattr(spill, "_pending_bytes", 0)
+    spill.open_log()
+
+
+def _drain():
+    rows, nxt = spill._read_batch(1000, spill._cursor, spill._writer_seq, spill._flushed_pos)
+    spill._advance(nxt, spill._bytes_between(spill._cursor, nxt))
+    return rows
+
+
+def test_append_replay_roundtrip_and_segments(monkeypatch, tmp_path):
+    _fresh(monkeypatch, tmp_path)
+    monkeypatch.setattr(spill.cfg, "SPILL_SEGMENT_BYTES", 64)
+    rows = [{"symbol": "BTCUSDT", "price": float(i)} for i in range(5)]
+    assert spill.append(rows) == 5
+    assert spill.diverting()
+    assert len(spill._list_segments()) > 1
+
+    assert [r["price"] for r in _drain()] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert not spill.pending()
+    # replayed sealed segments are removed, only the active one remains
+    assert spill._list_segments() == [spill._writer_seq]
+    spill.close_log()
+
+
+def test_backlog_survives_restart_and_torn_tail_is_skipped(monkeypatch, tmp_path):
+    _fresh(monkeypatch, tmp_path)
+    spill.append([{"symbol": "ETHUSDT", "price": 1.0}, {"symbol": "ETHUSDT", "price": 2.0}])
+    seg = spill._segment_path(spill._writer_seq)
+    spill.close_log()
+    with open(seg, "ab") as f:
+        f.write(b"\x10\x00\x00\x00torn")
+
+    _fresh(monkeypatch, tmp_path)
+    assert spill.pending()
+    assert [r["price"] for r in _drain()] == [1.0, 2.0]
+    assert spill._stats["corrupt"] >= 1
+    assert not spill.pending()
+    spill.close_log()
+
+
+def test_batch_rejected_repeatedly_is_replayed_row_by_row(monkeypatch, tmp_path):
+    from futuresboard import db
+    _fresh(monkeypatch, tmp_path)
+    monkeypatch.setattr(spill.cfg, "SPILL_REPLAY_RETRIES", 2)
+    monkeypatch.setattr(spill, "_replay_attempts", 0)
+    loaded = []
+
+    async def connected():
+        return True
+
+    async def copy(rows):
+        raise ValueError("bad row in batch")
+
+    async def each(rows):
+        loaded.extend(r for r in rows if r["price"] is not None)
+        return [r for r in rows if r["price"] is None]
+
+    monkeypatch.setattr(db, "is_connected", connected)
+    monkeypatch.setattr(db, "copy_metrics_rows_async", copy)
+    monkeypatch.setattr(db, "insert_metrics_rows_each_async", each)
+    spill.append([{"symbol": "BTCUSDT", "price": 1.0}, {"symbol": "BTCUSDT", "price": None}])
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            asyncio.run(spill.replay_once())
+        assert spill.diverting()
+    assert asyncio.run(spill.replay_once()) == 2
+    assert [r["price"] for r in loaded] == [1.0] and not spill.diverting()
+    with open(tmp_path / "quarantine.log", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [{"symbol": "BTCUSDT", "price": None}]
+    assert spill._replay_attempts == 0
+    spill.close_log()
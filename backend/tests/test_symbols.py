@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard import symbols
+
+
+def test_cache_is_bidirectional():
+    cache = symbols.SymbolCache()
+    cache.add([(1, "BTCUSDT"), (2, "ETHUSDT")])
+    assert cache.id_of("ETHUSDT") == 2 and cache.name_of(1) == "BTCUSDT"
+    assert cache.id_of(None) is None and cache.name_of(None) is None
+    assert cache.missing(["BTCUSDT", "SOLUSDT", None, "SOLUSDT"]) == ["SOLUSDT"]
+
+
+def test_stamp_appends_symbol_id():
+    cols, rows = symbols.stamp(["ts", "symbol", "price"], [(1, "BTCUSDT", 2.0), (2, None, 3.0)], {"BTCUSDT": 7})
+    assert cols == ["ts", "symbol", "price", "symbol_id"]
+    assert rows == [(1, "BTCUSDT", 2.0, 7), (2, None, 3.0, None)]
+
+
+def test_index_names_and_sql():
+    assert symbols.id_index("metrics") == "metrics_symbol_id_tf_idx"
+    assert symbols.id_index("quant_features_5s") == "quant_features_5s_symbol_id_ts_idx"
+    assert "ticks(symbol_id, ts DESC)" in symbols.id_index_sql("ticks")
+    report = symbols.format_migration([{"table": "ticks", "action": "rewritten",
+                                        "before": {"heap": 2 << 20, "index": 1 << 20},
+                                        "after": {"heap": 1 << 20, "index": 1 << 19}}])
+    assert "ticks" in report and "total" in report
+    assert "-50%" in report  # heap growth column (here: shrink)
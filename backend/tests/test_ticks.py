@@ -0,0 +1,42 @@
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard.ticks import KIND_CODES, TickWriter, to_tick
+
+
+def test_to_tick_trade_and_filtering():
+    item = {
+        "symbol": "btcusdt", "Price": "100.5", "kind": "trades",
+        "raw": {"timestamp": 1_700_000_000_000, "raw": {"e": "aggTrade", "q": "0.25"}},
+    }
+    assert to_tick(item) == (datetime.utcfromtimestamp(1_700_000_000), "BTCUSDT", KIND_CODES["trades"], 100.5, 0.25)
+    # depth frames and kinds outside the configured set are not ticks
+    assert to_tick({**item, "kind": "depth", "Price": None}) is None
+    assert to_tick(item, kinds={"ticker"}) is None
+
+
+def test_writer_buffer_is_bounded():
+    w = TickWriter(batch_size=2, max_buffer=3)
+    w.kinds = {"ticker"}
+    for i in range(5):
+        w.add({"symbol": "ETHUSDT", "Price": i + 1, "kind": "ticker", "recv_ts": 1_700_000_000 + i})
+    assert w.pending() == 3 and w.dropped == 2 and w.due()
+
+
+def test_flush_timeout_keeps_ticks(monkeypatch):
+    from futuresboard import db
+
+    async def stuck_copy(records):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(db, "copy_ticks_async", stuck_copy)
+    w = TickWriter(batch_size=10, max_buffer=10)
+    w.kinds = {"ticker"}
+    for i in range(3):
+        w.add({"symbol": "ETHUSDT", "Price": i + 1, "kind": "ticker", "recv_ts": 1_700_000_000 + i})
+    assert asyncio.run(w.flush(timeout=0.05)) == 0
+    assert w.pending() == 3 and w.failures == 1
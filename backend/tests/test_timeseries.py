@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard.timeseries import TIMESERIES_TABLES, chunk_interval_hours, format_report
+
+
+def test_chunk_interval_tracks_ingest_rate():
+    # 500 rows/s × 90 B ≈ 154 MiB/h → a 256 MiB target is ~2h of ticks
+    assert chunk_interval_hours(500, 90, target_mb=256, min_hours=1, max_hours=168) == 2.0
+    # a trickle is capped at one week, a flood floored at the minimum
+    assert chunk_interval_hours(0.01, 300, target_mb=256, min_hours=1, max_hours=168) == 168
+    assert chunk_interval_hours(1e6, 1000, target_mb=256, min_hours=0.25, max_hours=168) == 0.25
+
+
+def test_registry_and_report():
+    assert TIMESERIES_TABLES["metrics"].time_col == "updated_at"
+    assert not TIMESERIES_TABLES["ticks"].has_id
+    for t in ("quant_features_5s", "quant_features", "quant_signals", "quant_diagnostics"):
+        assert t in TIMESERIES_TABLES
+    text = format_report(
+        [{"table": "ticks", "bytes": 2 * 1048576, "latest_500_ms": 4.0}, {"table": "gone", "missing": True}],
+        [{"table": "ticks", "bytes": 1048576, "latest_500_ms": 1.5}],
+    )
+    assert "ticks" in text and "2.0" in text and "1.50" in text and "gone" not in text
@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard import universe
+
+
+def _info(symbols, contract="PERPETUAL"):
+    return {"symbols": [
+        {"symbol": s, "contractType": contract, "status": "TRADING", "quoteAsset": "USDT"} for s in symbols
+    ]}
+
+
+def test_select_universe_tiers_and_pins():
+    info = _info(["AUSDT", "BUSDT", "CUSDT", "DUSDT"])
+    info["symbols"].append({"symbol": "QUSDT", "contractType": "CURRENT_QUARTER", "status": "TRADING", "quoteAsset": "USDT"})
+    tickers = [{"symbol": s, "quoteVolume": v} for s, v in
+               [("AUSDT", "40"), ("BUSDT", "30"), ("CUSDT", "20"), ("DUSDT", "10"), ("QUSDT", "999")]]
+    out = universe.select_universe(info, tickers, top_n=3, pinned=["PINUSDT"], tier_sizes=[1, 1])
+    assert out == {"PINUSDT": 1, "AUSDT": 1, "BUSDT": 2, "CUSDT": 3}
+
+
+def test_diff_universe():
+    change = universe.diff_universe({"A": 1, "B": 2}, {"A": 2, "C": 1})
+    assert change == {"added": {"C": 1}, "removed": ["B"], "retiered": {"A": 2}}
+
+
+
+def test_next_due_in_follows_the_fastest_tier(monkeypatch):
+    monkeypatch.setattr(universe, "_universe", {"AUSDT": 1, "BUSDT": 2, "CUSDT": 3})
+    now = 1_000.0
+    last = {"AUSDT": now - 4, "BUSDT": now - 4, "CUSDT": now - 4}
+    assert universe.next_due_in(last, kind="rest", now=now) == 6.0   # tier 1: every 10s
+    assert universe.next_due_in({**last, "CUSDT": now - 70}, kind="rest", now=now) == 0.0
+    assert universe.next_due_in({"AUSDT": now}, kind="rest", now=now) == 0.0  # never polled
+    monkeypatch.setattr(universe, "_universe", {})
+    monkeypatch.setattr(universe.cfg, "SYMBOLS", [], raising=False)
+    assert universe.next_due_in({}, kind="rest", now=now) is None
+
+
+if __name__ == "__main__":
+    test_select_universe_tiers_and_pins()
+    test_diff_universe()
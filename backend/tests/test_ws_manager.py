@@ -0,0 +1,61 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from futuresboard import ws_manager
+
+
+def _want(*syms, streams=("ticker", "aggTrade")):
+    return ws_manager._tokens_by_symbol(list(syms), list(streams), None)
+
+
+def test_groups_stay_put_when_symbols_come_and_go():
+    groups = ws_manager._assign_groups([], _want("AUSDT", "BUSDT", "CUSDT", "DUSDT", "EUSDT"), 4)
+    assert [len(g) for g in groups] == [4, 4, 2]  # a symbol's tokens never straddle groups
+
+    # a newcomer fills the group with room; the full groups keep running
+    added = ws_manager._assign_groups(groups, _want("XUSDT", "AUSDT", "BUSDT", "CUSDT", "DUSDT", "EUSDT"), 4)
+    assert added[:2] == groups[:2] and added[2] == groups[2] + ["xusdt@ticker", "xusdt@aggTrade"]
+    more = _want("XUSDT", "YUSDT", "AUSDT", "BUSDT", "CUSDT", "DUSDT", "EUSDT", "ZUSDT")
+    assert ws_manager._assign_groups(groups, more, 4)[3:] == [["yusdt@ticker", "yusdt@aggTrade",
+                                                               "zusdt@ticker", "zusdt@aggTrade"]]
+
+    # removing one only changes its own group, which then takes the newcomer
+    removed = ws_manager._assign_groups(groups, _want("BUSDT", "CUSDT", "DUSDT", "EUSDT", "XUSDT"), 4)
+    assert removed[1:] == groups[1:]
+    assert removed[0] == ["busdt@ticker", "busdt@aggTrade", "xusdt@ticker", "xusdt@aggTrade"]
+
+    # re-tiering a symbol moves it out of its group, the others are untouched
+    want = _want("AUSDT", "BUSDT", "CUSDT", "DUSDT", "EUSDT")
+    want["cusdt"] = ["cusdt@ticker"]
+    retiered = ws_manager._assign_groups(groups, want, 4)
+    assert retiered[0] == groups[0] and retiered[2] == groups[2]
+    assert retiered[1] == ["dusdt@ticker", "dusdt@aggTrade", "cusdt@ticker"]
+
+
+def test_reconfigure_restarts_only_changed_groups(monkeypatch):
+    runs = []
+
+    async def fake_connection(session, tokens, cb, stop):
+        runs.append(tuple(tokens))
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(ws_manager, "_run_single_connection", fake_connection)
+
+    async def scenario():
+        streams = {s: ["ticker", "aggTrade"] for s in ("AUSDT", "BUSDT", "CUSDT")}
+        await ws_manager.start_all(list(streams), streams_by_symbol=streams, max_per_conn=4)
+        await asyncio.sleep(0)
+        before = dict(ws_manager._manager_groups)
+        await ws_manager.reconfigure({**streams, "DUSDT": ["ticker", "aggTrade"]})
+        after = dict(ws_manager._manager_groups)
+        stale = [t for k, t in before.items() if k not in after]
+        assert all(t.done() for t in stale)  # cancelled connections were awaited
+        await ws_manager.stop_all(timeout=0)
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    assert list(before)[0] in after  # the full A/B group kept its connection
+    assert len(after) == 2 and ("cusdt@ticker", "cusdt@aggTrade", "dusdt@ticker", "dusdt@aggTrade") in after